@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+#
+#Benchmark for pmt_common_brush.build_brush_polygons(): brushes per second of random boxes (6 planes) and
+#boxes with a cut corner (7 planes), rotated and moved to random places. Each box is checked to have 8 vertices and 6 polygons,
+#and each cut box 10 vertices and 7 polygons. Square pyramids, with 4 planes through the apex, are checked to have 5 vertices
+#and polygons with 3, 3, 3, 3 and 4 vertices.
+#
+#	benchmark_brush_polygons.py [num_brushes] [num_repeats]
+
+import os
+import sys
+import timeit
+import numpy
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+import pmt_common_brush
+
+def random_brushes(num_brushes, rng):
+	normals = list()
+	distances = list()
+	plane_counts = list()
+	for brush_index in range(num_brushes):
+		(rotation, r) = numpy.linalg.qr(rng.normal(size = (3, 3)))
+		center = rng.uniform(-8192.0, 8192.0, 3)
+		half_size = rng.uniform(8.0, 256.0, 3)
+		axes = numpy.concatenate([rotation.T, -rotation.T])
+		brush_distances = numpy.concatenate([half_size, half_size]) + axes @ center
+		if brush_index % 2 == 1:
+			#cut the corner (+x, +y, +z), without reaching the 3 vertices next to it
+			corner_normal = rotation @ (numpy.ones(3) / numpy.sqrt(3.0))
+			axes = numpy.concatenate([axes, corner_normal[None, :]])
+			brush_distances = numpy.append(brush_distances, corner_normal @ center + (numpy.sum(half_size) - numpy.min(half_size)) / numpy.sqrt(3.0))
+		normals.append(axes)
+		distances.append(brush_distances)
+		plane_counts.append(len(axes))
+	return (numpy.concatenate(normals), numpy.concatenate(distances), plane_counts)
+
+#Square pyramids with the base on z = 0 and the apex at (x, x, height) for each x of apex_xs;
+#the apex coordinates are chosen near the middle between two multiples of pmt_common_brush.BRUSH_EPSILON
+def square_pyramids(apex_xs, half_size = 32.0, height = 64.0):
+	normals = list()
+	distances = list()
+	for x in apex_xs:
+		apex = numpy.array([x, x, height])
+		sides = numpy.array([[height, 0.0, half_size], [-height, 0.0, half_size], [0.0, height, half_size], [0.0, -height, half_size]]) / numpy.hypot(height, half_size)
+		normals.append(numpy.concatenate([[[0.0, 0.0, -1.0]], sides]))
+		distances.append(numpy.concatenate([[0.0], sides @ apex]))
+	return (numpy.concatenate(normals), numpy.concatenate(distances), [5] * len(apex_xs))
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	num_brushes = int(sys.argv[1]) if num_args > 1 else 10000
+	num_repeats = int(sys.argv[2]) if num_args > 2 else 3
+	if num_args > 3:
+		print("benchmark_brush_polygons.py [num_brushes] [num_repeats]")
+		exit()
+
+	(normals, distances, plane_counts) = random_brushes(num_brushes, numpy.random.default_rng(0))
+	brush_polygons = pmt_common_brush.build_brush_polygons(normals, distances, plane_counts)
+	vertex_counts = numpy.bincount(brush_polygons.vertex_brushes, minlength = num_brushes)
+	plane_brushes = numpy.repeat(numpy.arange(num_brushes), plane_counts)
+	polygon_counts = numpy.bincount(plane_brushes[brush_polygons.polygon_planes], minlength = num_brushes)
+	assert numpy.all(vertex_counts[0::2] == 8) and numpy.all(polygon_counts[0::2] == 6), "boxes differ"
+	assert numpy.all(vertex_counts[1::2] == 10) and numpy.all(polygon_counts[1::2] == 7), "cut boxes differ"
+	
+	apex_xs = [0.125, 1.125, 7.125, -0.125, 4096.005]
+	pyramid_polygons = pmt_common_brush.build_brush_polygons(*square_pyramids(apex_xs))
+	assert numpy.all(numpy.bincount(pyramid_polygons.vertex_brushes, minlength = len(apex_xs)) == 5), "pyramids differ"
+	assert pyramid_polygons.polygon_vertex_counts.tolist() == [4, 3, 3, 3, 3] * len(apex_xs), "pyramid polygons differ"
+
+	time = min(timeit.repeat(lambda: pmt_common_brush.build_brush_polygons(normals, distances, plane_counts), number = 1, repeat = num_repeats))
+	print("{} brushes, {} polygons   {:10.0f} brushes/s".format(num_brushes, len(brush_polygons.polygon_planes), num_brushes / time))
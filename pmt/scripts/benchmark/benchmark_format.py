@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+#
+#Microbenchmark for pmt_common_format: time per emitted line of the VMF side, T3D polygon and MAP plane
+#text, formatted float by float with LINS()/LINE() (as the exporters did before pmt_common_format) and with
+#the templates used by the exporters. Both versions are checked to produce the same text.
+#
+#	benchmark_format.py [num_repeats]
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+import pmt_common_format as F
+
+TAB = "\t"
+NEWLINE = "\n"
+
+### Formatting before pmt_common_format
+def LINS(num_tabs, string):
+	out = ""
+	for i in range(num_tabs):
+		out += TAB
+	out += string + NEWLINE
+	return out
+
+def LINE(num_tabs, key, value):
+	out = ""
+	for i in range(num_tabs):
+		out += TAB
+	out += "\"" + key + "\" \"" + value + "\"" + NEWLINE
+	return out
+
+def FloatUVStr6(float_value):
+	return '{0:0=.6f}'.format(float_value)
+
+def FloatUVStr16(float_value):
+	return '{0:0=.16f}'.format(float_value)
+
+def FloatStrT3d(float_value):
+	return '{0:0=+13.6f}'.format(float_value)
+
+def vmf_side_old(side_id, a, b, c, material, u, v, offset, scale):
+	out = ""
+	out += LINS(2, "side")
+	out += LINS(2, "{")
+	out += LINE(3, "id", str(side_id))
+	plane_str = ""
+	plane_str += "(" + FloatUVStr6(a[0]) + " " + FloatUVStr6(a[1]) + " " + FloatUVStr6(a[2]) + ")"
+	plane_str += " "
+	plane_str += "(" + FloatUVStr6(b[0]) + " " + FloatUVStr6(b[1]) + " " + FloatUVStr6(b[2]) + ")"
+	plane_str += " "
+	plane_str += "(" + FloatUVStr6(c[0]) + " " + FloatUVStr6(c[1]) + " " + FloatUVStr6(c[2]) + ")"
+	out += LINE(3, "plane", plane_str)
+	out += LINE(3, "material", material)
+	out += LINE(3, "uaxis", "[" + FloatUVStr6(u[0]) + " " + FloatUVStr6(u[1]) + " " + FloatUVStr6(u[2]) + " " + FloatUVStr6(offset[0]) + "] " + FloatUVStr6(scale[0]))
+	out += LINE(3, "vaxis", "[" + FloatUVStr6(v[0]) + " " + FloatUVStr6(v[1]) + " " + FloatUVStr6(v[2]) + " " + FloatUVStr6(offset[1]) + "] " + FloatUVStr6(scale[1]))
+	out += LINE(3, "rotation", "0")
+	out += LINE(3, "lightmapscale", "64")
+	out += LINE(3, "smoothing_groups", "0")
+	return out
+
+def t3d_polygon_old(o, n, u, v, vertices):
+	out = ""
+	out += LINS(4, "Origin   " + FloatStrT3d(o[0]) + "," + FloatStrT3d(o[1]) + "," + FloatStrT3d(o[2]))
+	out += LINS(4, "Normal   " + FloatStrT3d(n[0]) + "," + FloatStrT3d(n[1]) + "," + FloatStrT3d(n[2]))
+	out += LINS(4, "TextureU " + FloatStrT3d(u[0]) + "," + FloatStrT3d(u[1]) + "," + FloatStrT3d(u[2]))
+	out += LINS(4, "TextureV " + FloatStrT3d(v[0]) + "," + FloatStrT3d(v[1]) + "," + FloatStrT3d(v[2]))
+	out += LINS(4, "Pan      U={0} V={1}".format(0, 0))
+	for vertex in vertices:
+		out += LINS(4, "Vertex   " + FloatStrT3d(vertex[0]) + "," + FloatStrT3d(vertex[1]) + "," + FloatStrT3d(vertex[2]))
+	return out
+
+def map_plane_old(n, distance, row0, row1, material):
+	u_str = "( {0} {1} {2} )".format( FloatUVStr16(row0[0]), FloatUVStr16(row0[1]), FloatUVStr16(row0[2]) )
+	v_str = "( {0} {1} {2} )".format( FloatUVStr16(row1[0]), FloatUVStr16(row1[1]), FloatUVStr16(row1[2]) )
+	plane_str = ""
+	plane_str += "({0} {1} {2} {3})".format( FloatUVStr16(n[0]), FloatUVStr16(n[1]), FloatUVStr16(n[2]), FloatUVStr16(distance) )
+	plane_str += " ( {0} {1} ) \"{2}\" 0 0 0".format(u_str, v_str, material) + NEWLINE
+	return plane_str
+
+### Formatting with pmt_common_format; same templates as pmt_vmf_export, pmt_t3d_export and pmt_map_export
+VMF_PLANE_FORMAT = " ".join( ["(" + F.vector_format(F.FLOAT_6, 3) + ")"] * 3 )
+VMF_UV_AXIS_FORMAT = "[" + F.vector_format(F.FLOAT_6, 4) + "] " + F.FLOAT_6
+VMF_SIDE_TEMPLATE = "".join([
+	F.LINS_TEMPLATE(2, "side"),
+	F.LINS_TEMPLATE(2, "{{"),
+	F.LINE_TEMPLATE(3, "id", "{}"),
+	F.LINE_TEMPLATE(3, "plane", VMF_PLANE_FORMAT),
+	F.LINE_TEMPLATE(3, "material", "{}"),
+	F.LINE_TEMPLATE(3, "uaxis", VMF_UV_AXIS_FORMAT),
+	F.LINE_TEMPLATE(3, "vaxis", VMF_UV_AXIS_FORMAT),
+	F.LINE_TEMPLATE(3, "rotation", "0"),
+	F.LINE_TEMPLATE(3, "lightmapscale", "64"),
+	F.LINE_TEMPLATE(3, "smoothing_groups", "0"),
+])
+VMF_SIDE_LINES = VMF_SIDE_TEMPLATE.count(NEWLINE)
+
+def vmf_side_new(side_id, a, b, c, material, u, v, offset, scale):
+	return VMF_SIDE_TEMPLATE.format(
+		side_id,
+		a[0], a[1], a[2], b[0], b[1], b[2], c[0], c[1], c[2],
+		material,
+		u[0], u[1], u[2], offset[0], scale[0],
+		v[0], v[1], v[2], offset[1], scale[1])
+
+T3D_VECTOR_FORMAT = F.vector_format(F.FLOAT_T3D, 3, ",")
+T3D_POLYGON_AXES_TEMPLATE = "".join([
+	F.LINS_TEMPLATE(4, "Origin   " + T3D_VECTOR_FORMAT),
+	F.LINS_TEMPLATE(4, "Normal   " + T3D_VECTOR_FORMAT),
+	F.LINS_TEMPLATE(4, "TextureU " + T3D_VECTOR_FORMAT),
+	F.LINS_TEMPLATE(4, "TextureV " + T3D_VECTOR_FORMAT),
+	F.LINS_TEMPLATE(4, "Pan      U={} V={}"),
+])
+T3D_VERTEX_TEMPLATE = F.LINS_TEMPLATE(4, "Vertex   " + T3D_VECTOR_FORMAT)
+
+def t3d_polygon_new(o, n, u, v, vertices):
+	out = T3D_POLYGON_AXES_TEMPLATE.format(o[0], o[1], o[2], n[0], n[1], n[2], u[0], u[1], u[2], v[0], v[1], v[2], 0, 0)
+	out += F.format_rows(T3D_VERTEX_TEMPLATE, vertices)
+	return out
+
+MAP_PLANE_TEMPLATE = F.LINS_TEMPLATE(0, "".join([
+	"(", F.vector_format(F.FLOAT_16, 4), ")",
+	" ( ( ", F.vector_format(F.FLOAT_16, 3), " )",
+	" ( ", F.vector_format(F.FLOAT_16, 3), " ) )",
+	" \"{}\" 0 0 0",
+]))
+
+def map_plane_new(n, distance, row0, row1, material):
+	return MAP_PLANE_TEMPLATE.format(n[0], n[1], n[2], distance, row0[0], row0[1], row0[2], row1[0], row1[1], row1[2], material)
+
+def random_vector(size = 3, extent = 1024.0):
+	return tuple([random.uniform(-extent, extent) for i in range(size)])
+
+def benchmark(name, old_function, new_function, all_args, num_lines, num_repeats):
+	for args in all_args:
+		assert old_function(*args) == new_function(*args), name + ": output differs"
+
+	def run_old():
+		for args in all_args:
+			old_function(*args)
+	def run_new():
+		for args in all_args:
+			new_function(*args)
+
+	time_old = min(timeit.repeat(run_old, number = 1, repeat = num_repeats))
+	time_new = min(timeit.repeat(run_new, number = 1, repeat = num_repeats))
+	ns_old = time_old * 1e9 / num_lines
+	ns_new = time_new * 1e9 / num_lines
+	print("{:<12} {:>9} lines   old {:8.1f} ns/line   new {:8.1f} ns/line   {:.2f}x".format(name, num_lines, ns_old, ns_new, ns_old / ns_new))
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	if num_args == 1:
+		num_repeats = 5
+	elif num_args == 2:
+		num_repeats = int(sys.argv[1])
+	else:
+		print("benchmark_format.py [num_repeats]")
+		exit()
+
+	random.seed(0)
+	NUM_ELEMENTS = 20000
+	NUM_POLYGON_VERTICES = 4
+
+	vmf_args = [(i, random_vector(), random_vector(), random_vector(), "DEV/DEV_MEASUREICE01", random_vector(3, 1.0), random_vector(3, 1.0), random_vector(2, 512.0), random_vector(2, 1.0)) for i in range(NUM_ELEMENTS)]
+	benchmark("vmf side", vmf_side_old, vmf_side_new, vmf_args, NUM_ELEMENTS * VMF_SIDE_LINES, num_repeats)
+
+	t3d_args = [(random_vector(), random_vector(3, 1.0), random_vector(3, 1.0), random_vector(3, 1.0), [random_vector() for v in range(NUM_POLYGON_VERTICES)]) for i in range(NUM_ELEMENTS)]
+	benchmark("t3d polygon", t3d_polygon_old, t3d_polygon_new, t3d_args, NUM_ELEMENTS * (5 + NUM_POLYGON_VERTICES), num_repeats)
+
+	map_args = [(random_vector(3, 1.0), random.uniform(-1024.0, 1024.0), random_vector(3, 1.0), random_vector(3, 1.0), "textures/common/clip") for i in range(NUM_ELEMENTS)]
+	benchmark("map plane", map_plane_old, map_plane_new, map_args, NUM_ELEMENTS, num_repeats)
+
+	#Compact mode writes NaN and inf as fixed mode does
+	non_finite = [float("nan"), float("inf"), -float("inf")]
+	for decimals in [6, 16]:
+		fixed = F.NumberFormat(decimals, F.PRECISION_FIXED)
+		compact = F.NumberFormat(decimals, F.PRECISION_COMPACT)
+		assert [fixed.str(value) for value in non_finite] == compact.values(non_finite), "compact differs from fixed for NaN/inf"
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+#
+#Benchmark for the tokenizer of the text parsers: tokens per second of a synthetic .vmf, tokenized as parse_vmf() did
+#before pmt_common_lexer (remove comments, extract string literals char by char, pad operators, compact spaces, split)
+#and with pmt_common_lexer.Lexer.tokenize(). Both versions are checked to produce the same tokens.
+#
+#	benchmark_lexer.py [num_solids] [num_repeats]
+
+import os
+import sys
+import string
+import random
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+import pmt_common_lexer
+
+### Tokenizer of parse_vmf() before pmt_common_lexer
+INQUOTE_TOKEN = "%%q_"
+def extract_string_literals(text):
+	inquote_text_dict = dict()
+	in_quote = False
+	quote_char = None
+	text_without_quotes = ""
+	inquote_buffer = ""
+	for char in text:
+		if char == "\"" or char == "\'" and not in_quote:
+			quote_char = char
+		if char == quote_char:
+			if not in_quote:
+				inquote_buffer = ""
+			else:
+				dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
+				inquote_text_dict[dict_id_str] = inquote_buffer
+				text_without_quotes += " {} ".format(dict_id_str)
+			in_quote = not in_quote
+		else:
+			if in_quote:
+				inquote_buffer += char
+			else:
+				text_without_quotes += char
+	return (text_without_quotes, inquote_text_dict)
+
+def tokenize_old(lines):
+	text = ""
+	for line in lines:
+		if line.lstrip().startswith("//"):
+			left, sep, right = line.partition("//")
+			text += left
+		else:
+			text += line
+	(text_without_quotes, inquote_text_dict) = extract_string_literals(text)
+	for char in string.whitespace:
+		text_without_quotes = text_without_quotes.replace(char, " ")
+	for char in "{}":
+		text_without_quotes = text_without_quotes.replace(char, " {} ".format(char))
+	while text_without_quotes.find("    ") != -1:
+		text_without_quotes = text_without_quotes.replace("    ", " ")
+	while text_without_quotes.find("  ") != -1:
+		text_without_quotes = text_without_quotes.replace("  ", " ")
+	tokens_with_quotes = text_without_quotes.split(sep = " ", maxsplit = -1)
+	while "" in tokens_with_quotes:
+		tokens_with_quotes.remove("")
+	tokens = list()
+	for token in tokens_with_quotes:
+		if token.startswith(INQUOTE_TOKEN):
+			tokens.append(inquote_text_dict[token])
+		else:
+			tokens.append(token)
+	return tokens
+
+VMF_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"\'")
+def tokenize_new(lines):
+	return pmt_common_lexer.token_texts(VMF_LEXER.tokenize("".join(lines)))
+
+def random_float():
+	return "{:.6f}".format(random.uniform(-1024.0, 1024.0))
+
+def vmf_lines(num_solids):
+	lines = ["// synthetic vmf\n", "world\n", "{\n", "\t\"id\" \"1\"\n", "\t\"classname\" \"worldspawn\"\n"]
+	side_id = 1
+	for solid_id in range(num_solids):
+		lines += ["\tsolid\n", "\t{\n", "\t\t\"id\" \"{}\"\n".format(solid_id)]
+		for s in range(6):
+			plane = " ".join(["({} {} {})".format(random_float(), random_float(), random_float()) for p in range(3)])
+			lines += ["\t\tside\n", "\t\t{\n", "\t\t\t\"id\" \"{}\"\n".format(side_id), "\t\t\t\"plane\" \"{}\"\n".format(plane),
+				"\t\t\t\"material\" \"DEV/DEV_MEASUREGENERIC01B\"\n", "\t\t\t\"uaxis\" \"[1 0 0 0] 0.25\"\n", "\t\t\t\"vaxis\" \"[0 -1 0 0] 0.25\"\n",
+				"\t\t\t\"rotation\" \"0\"\n", "\t\t\t\"lightmapscale\" \"16\"\n", "\t\t\t\"smoothing_groups\" \"0\"\n", "\t\t}\n"]
+			side_id += 1
+		lines += ["\t}\n"]
+	lines += ["}\n"]
+	return lines
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	num_solids = int(sys.argv[1]) if num_args > 1 else 200
+	num_repeats = int(sys.argv[2]) if num_args > 2 else 3
+	if num_args > 3:
+		print("benchmark_lexer.py [num_solids] [num_repeats]")
+		exit()
+
+	random.seed(0)
+	lines = vmf_lines(num_solids)
+	tokens = tokenize_new(lines)
+	assert tokenize_old(lines) == tokens, "tokens differ"
+
+	num_tokens = len(tokens)
+	time_old = min(timeit.repeat(lambda: tokenize_old(lines), number = 1, repeat = num_repeats))
+	time_new = min(timeit.repeat(lambda: tokenize_new(lines), number = 1, repeat = num_repeats))
+	print("{} solids, {} tokens   old {:10.0f} tokens/s   new {:10.0f} tokens/s   {:.2f}x".format(num_solids, num_tokens, num_tokens / time_old, num_tokens / time_new, time_old / time_new))
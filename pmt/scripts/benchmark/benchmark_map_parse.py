@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+#
+#Benchmark for pmt_map_import.parse_map(): MB per second of a synthetic .map (a worldspawn of brushDef3s with 6 planes and patchDef2s,
+#and point entities), parsed by parse_map() and by parse_map() before MAP_PLANE_DTYPE, which tokenized the whole file and converted
+#each plane and control point token by token. Both versions are checked to decode the same values.
+#
+#	benchmark_map_parse.py [size_mb] [num_repeats]
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt_map_import"))
+import pmt_map_import
+import pmt_common_lexer
+
+pmt_map_import.DPRINT = lambda string, level = 1: None
+
+### parse_map() before MAP_PLANE_DTYPE, without its asserts; returns the values of each entity (see entity_values())
+def parse_map_entity_old(tokens, tokens_quoted, entity_opening, entity_closing):
+	keyvalues = dict()
+	planes = list()
+	patches = list()
+	token_index = entity_opening + 1
+	while token_index < entity_closing:
+		if tokens_quoted[token_index]:
+			keyvalues[tokens[token_index].lower()] = tokens[token_index + 1]
+			token_index += 1
+		elif tokens[token_index] == "{":
+			opening = token_index
+			primitive_type = tokens[opening + 1].lower()
+			num_closing_brackets = 0
+			closing = opening
+			while closing < entity_closing and num_closing_brackets < 2:
+				if tokens[closing] == "}": num_closing_brackets += 1
+				if num_closing_brackets < 2: closing += 1
+
+			if primitive_type == "brushdef3":
+				brush = list()
+				for plane_index in range(((closing - opening) + 1 - 5) // 22):
+					pl = opening + 3 + plane_index * 22
+					brush.append(((float(tokens[pl + 1]), float(tokens[pl + 2]), float(tokens[pl + 3])), float(tokens[pl + 4]),
+						(float(tokens[pl + 8]), float(tokens[pl + 9]), float(tokens[pl + 10])), (float(tokens[pl + 13]), float(tokens[pl + 14]), float(tokens[pl + 15])),
+						tokens[pl + 18]))
+				planes.append(brush)
+			else:
+				texpath_index = opening + 3
+				width = int(tokens[texpath_index + 2])
+				height = int(tokens[texpath_index + 3])
+				first_vertex_x = texpath_index + (11 if primitive_type == "patchdef2" else 13)
+				tokens_per_width = (height * 7) + 2
+				vertices = list()
+				for w in range(width):
+					for h in range(height):
+						x = first_vertex_x + w * tokens_per_width + h * 7
+						vertices.append((float(tokens[x]), float(tokens[x + 1]), float(tokens[x + 2]), float(tokens[x + 3]), float(tokens[x + 4])))
+				patches.append((tokens[texpath_index], width, height, vertices))
+			token_index = closing
+		token_index += 1
+	return (keyvalues, planes, patches)
+
+def parse_map_old(map_path):
+	with open(map_path, 'rt', encoding=pmt_map_import.TEXT_CODEC) as map_file:
+		text = map_file.read()
+	lexer_tokens = pmt_map_import.MAP_LEXER.tokenize(text, map_path)
+	tokens = pmt_common_lexer.token_texts(lexer_tokens)
+	tokens_quoted = [token[0] == pmt_common_lexer.TOKEN_STRING for token in lexer_tokens]
+
+	entities = list()
+	num_tokens = len(tokens)
+	token_index = 2
+	while token_index < num_tokens:
+		if tokens[token_index] == "{":
+			bracket_depth = 1
+			entity_closing = token_index + 1
+			while entity_closing < num_tokens:
+				if tokens[entity_closing] == "{": bracket_depth += 1
+				if tokens[entity_closing] == "}": bracket_depth -= 1
+				if bracket_depth == 0: break
+				entity_closing += 1
+			entities.append(parse_map_entity_old(tokens, tokens_quoted, token_index, entity_closing))
+			token_index = entity_closing
+		token_index += 1
+	return entities
+
+#(keyvalues, planes of each brush, patches) of an ImportMapEntity, as returned by parse_map_entity_old()
+def entity_values(entity):
+	paths = entity.materials.paths
+	planes = [[(tuple(normal), distance, tuple(uv_row0), tuple(uv_row1), paths[material]) for (normal, distance, uv_row0, uv_row1, material) in brush.planes.tolist()] for brush in entity.brushes]
+	patches = [(paths[patch.material], patch.width, patch.height, [tuple(position) + tuple(uv) for (position, uv) in patch.vertices.reshape(-1).tolist()]) for patch in entity.patchdef2s]
+	return (entity.keyvalues, planes, patches)
+
+def random_float():
+	return "{:.10f}".format(random.uniform(-1024.0, 1024.0))
+
+def brush_text(brush_index):
+	lines = ["// primitive {}\n{{\nbrushDef3\n{{\n".format(brush_index)]
+	for p in range(6):
+		numbers = [random_float() for i in range(10)]
+		lines.append("( {} {} {} {} ) ( ( {} {} {} ) ( {} {} {} ) ) \"textures/base_wall/lfwall{}\" 0 0 0\n".format(*numbers, random.randint(0, 20)))
+	lines.append("}\n}\n")
+	return "".join(lines)
+
+def patch_text(brush_index):
+	lines = ["// primitive {}\n{{\npatchDef2\n{{\n\"textures/common/pipe\"\n( 3 3 0 0 0 )\n(\n".format(brush_index)]
+	for w in range(3):
+		lines.append("( " + " ".join(["( {} {} {} {} {} )".format(*[random_float() for i in range(5)]) for h in range(3)]) + " )\n")
+	lines.append(")\n}\n}\n")
+	return "".join(lines)
+
+def entity_text(entity_index):
+	return "// entity {0}\n{{\n\"classname\" \"light\"\n\"name\" \"light_{0}\"\n\"origin\" \"{1} {2} {3}\"\n}}\n".format(entity_index, random_float(), random_float(), random_float())
+
+#Writes a .map of about size_mb to map_path; 1 of 10 primitives is a patch, and there is a light for each 20 primitives
+def write_map(map_path, size_mb):
+	size = 0
+	max_size = size_mb * 1024 * 1024
+	with open(map_path, "w") as map_file:
+		map_file.write("Version 2\n// entity 0\n{\n\"classname\" \"worldspawn\"\n")
+		num_primitives = 0
+		while size < max_size:
+			primitive = patch_text(num_primitives) if num_primitives % 10 == 0 else brush_text(num_primitives)
+			map_file.write(primitive)
+			size += len(primitive)
+			num_primitives += 1
+		map_file.write("}\n")
+		for entity_index in range(1, num_primitives // 20 + 1):
+			map_file.write(entity_text(entity_index))
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	size_mb = float(sys.argv[1]) if num_args > 1 else 20.0
+	num_repeats = int(sys.argv[2]) if num_args > 2 else 1
+	if num_args > 3:
+		print("benchmark_map_parse.py [size_mb] [num_repeats]")
+		exit()
+
+	random.seed(0)
+	with tempfile.TemporaryDirectory() as temp_dir:
+		map_path = os.path.join(temp_dir, "benchmark.map")
+		write_map(map_path, size_mb)
+		file_mb = os.path.getsize(map_path) / (1024 * 1024)
+
+		assert parse_map_old(map_path) == [entity_values(entity) for entity in pmt_map_import.parse_map(map_path)], "entities differ"
+
+		time_old = min(timeit.repeat(lambda: parse_map_old(map_path), number = 1, repeat = num_repeats))
+		time_new = min(timeit.repeat(lambda: pmt_map_import.parse_map(map_path), number = 1, repeat = num_repeats))
+		print("{:.1f} MB   old {:6.2f} MB/s ({:.2f}s)   new {:6.2f} MB/s ({:.2f}s)   {:.2f}x".format(file_mb, file_mb / time_old, time_old, file_mb / time_new, time_new, time_old / time_new))
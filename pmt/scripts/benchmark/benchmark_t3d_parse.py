@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+#
+#Benchmark for pmt_t3d_import.parse_t3d(): MB per second of a synthetic .t3d (brush actors with 6 polygons and point actors),
+#parsed by parse_t3d() and by parse_t3d() before its single pass state machine, which searched the lines for the 'end' line of
+#each actor, brush, polylist and polygon. Both versions are checked to return the same actors, with the vectors of the old
+#version converted to floats.
+#
+#	benchmark_t3d_parse.py [size_mb] [num_repeats]
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt_t3d_import"))
+import pmt_t3d_import
+import pmt_common_lexer
+
+pmt_t3d_import.DPRINT = lambda string, level = 1: None
+
+### parse_t3d() before the state machine
+def parse_t3d_old(t3d_path):
+	INQUOTE_TOKEN = pmt_common_lexer.INQUOTE_TOKEN
+	
+	with open(t3d_path, 'rt', encoding=pmt_t3d_import.TEXT_CODEC) as t3d_file:
+		text = t3d_file.read()
+		
+	#one line per line of text with tokens, with spaces compacted and string literals replaced by INQUOTE_TOKEN placeholders
+	inquote_text_dict = dict()
+	lines = pmt_common_lexer.join_lines(pmt_t3d_import.T3D_LEXER.tokenize(text, t3d_path), inquote_text_dict)
+	num_lines = len(lines)
+	
+	for i in range(num_lines):
+		lines[i] = lines[i].lower()
+	
+	assert lines[0].startswith("begin map"), "t3d does not start with 'begin map': {}".format(lines[0].lower())
+	assert lines[-1].startswith("end map"), "t3d does not end with 'end map': {}".format(lines[-1].lower())
+	
+	def find_line_index_that_startswith(lines, start_index, end_statement = "end map"):
+		num_lines = len(lines)
+		while start_index < num_lines:
+			if lines[start_index].startswith(end_statement):
+				return start_index
+			start_index += 1
+			
+		return None
+	def get_begin_statement_keyvalues(begin_line):
+		kv_dict = dict()
+	
+		begin_line_tokens = begin_line.rstrip().split(sep = " ", maxsplit = -1)
+		begin_line_tokens = begin_line_tokens[2:]
+		for t in begin_line_tokens:
+			t = t.lower()
+			if "=" in t:
+				left, sep, right = t.partition("=")
+				kv_dict[left] = right
+		return kv_dict
+		
+	def parse_brush(lines, brush_start, inquote_text_dict):
+		brush_end = find_line_index_that_startswith(lines, brush_start, end_statement = "end brush")
+		
+		brush_first_line = lines[brush_start]
+		brush_kv_dict = get_begin_statement_keyvalues(brush_first_line)
+		polygons = list()
+		
+		polylist_start = find_line_index_that_startswith(lines, brush_start, end_statement = "begin polylist")
+		polylist_end = find_line_index_that_startswith(lines, brush_start, end_statement = "end polylist")
+		
+		num_lines = len(lines)
+		brush_line_index = polylist_start + 1
+		while brush_line_index < polylist_end:
+			brush_line = lines[brush_line_index]
+		
+			if brush_line.startswith("begin polygon"):
+				poly_kv = get_begin_statement_keyvalues(brush_line)
+				
+				poly_start = brush_line_index
+				poly_end = find_line_index_that_startswith(lines, brush_line_index, end_statement = "end polygon")
+				
+				poly_lines = lines[poly_start+1:poly_end]
+				assert "begin polygon" not in poly_lines[0]
+				assert "end polygon" not in poly_lines[-1]
+				
+				poly = pmt_t3d_import.ImportPolyT3d()
+				poly.keyvalues = poly_kv
+				for poly_line in poly_lines:
+					def float3_to_tokens(line, remove = "origin"):
+						return line[len(remove):].lstrip().split(",", maxsplit=-1)
+						
+					if poly_line.startswith("origin"):
+						floatstr = float3_to_tokens(poly_line, "origin")
+						poly.origin = floatstr
+					elif poly_line.startswith("normal"):
+						floatstr = float3_to_tokens(poly_line, "normal")
+						poly.normal = floatstr
+					elif poly_line.startswith("textureu"):
+						floatstr = float3_to_tokens(poly_line, "textureu")
+						poly.textureu = floatstr
+					elif poly_line.startswith("texturev"):
+						floatstr = float3_to_tokens(poly_line, "texturev")
+						poly.texturev = floatstr
+					elif poly_line.startswith("vertex"):
+						floatstr = float3_to_tokens(poly_line, "vertex")
+						poly.vertices.append(floatstr)
+					elif poly_line.startswith("pan"):
+						pan_line = poly_line[len("pan"):].lstrip()
+						uline, sep, vline = pan_line.partition(" ")
+						assert uline.startswith("u=")
+						assert vline.startswith("v=")
+						pan_u = uline[2:]
+						pan_v = vline[2:]
+						poly.pan = (pan_u, pan_v)
+					else:
+						assert False, "unsupported line in 'begin polygon': {}".format(poly_line)
+						
+				polygons.append(poly)
+				
+				brush_line_index = poly_end
+			brush_line_index += 1
+		
+		brush = pmt_t3d_import.ImportBrushT3d()
+		brush.keyvalues = brush_kv_dict
+		brush.polygons = polygons
+		return (brush, brush_end)
+		
+	def parse_actor(lines, actor_start, inquote_text_dict):
+		actor_end = find_line_index_that_startswith(lines, actor_start, end_statement = "end actor")
+		
+		actor_first_line = lines[actor_start]
+		actor_kv_dict = get_begin_statement_keyvalues(actor_first_line)
+		brushes = list()
+		
+		num_lines = len(lines)
+		actor_line_index = actor_start + 1
+		while actor_line_index < actor_end:
+			actor_line = lines[actor_line_index]
+		
+			if actor_line.startswith("begin brush"):
+				(brush, actor_line_index) = parse_brush(lines, actor_line_index, inquote_text_dict)
+				brushes.append(brush)
+			elif "=" in actor_line:
+				left, sep, right = actor_line.rstrip().partition("=")
+				key = left.lower()
+				value = right
+				if INQUOTE_TOKEN in value:
+					vtokens = value.split(" ", maxsplit = -1)
+					while "" in vtokens:
+						vtokens.remove("")
+						
+					num_rtokens = len(vtokens)
+					assert num_rtokens <= 2, "actorkv unsupported: {} (vtokens={})".format(actor_line, vtokens)
+				
+					if num_rtokens == 1 and vtokens[0].startswith(INQUOTE_TOKEN):
+						type_string = "string"
+						value_string = inquote_text_dict[vtokens[0]]
+						kv_string = value_string
+					elif num_rtokens == 2 and vtokens[1].startswith(INQUOTE_TOKEN):
+						type_string = vtokens[0]
+						value_string = inquote_text_dict[vtokens[1]]
+						kv_string = "{}'{}'".format(type_string, value_string)
+					
+					actor_kv_dict[key] = kv_string
+					
+				else:
+					actor_kv_dict[key] = value
+			actor_line_index += 1
+			
+		actor = pmt_t3d_import.ImportActorT3d()
+		actor.keyvalues = actor_kv_dict
+		actor.brushes = brushes
+		return (actor, actor_end)
+	
+	actors = list()
+	
+	line_index = 1
+	while line_index < num_lines-1:
+		line = lines[line_index]
+
+		if line.startswith("begin actor"):
+			(actor, line_index) = parse_actor(lines, line_index, inquote_text_dict)
+			actors.append(actor)
+	
+		line_index += 1
+	
+	return actors
+
+def actor_values(actor, float_vectors):
+	to_floats = (lambda vector: tuple(map(float, vector))) if float_vectors else (lambda vector: vector)
+	brushes = list()
+	for brush in actor.brushes:
+		polygons = list()
+		for poly in brush.polygons:
+			polygons.append((poly.keyvalues, to_floats(poly.origin), to_floats(poly.normal), to_floats(poly.textureu), to_floats(poly.texturev),
+				to_floats(poly.pan), [to_floats(vertex) for vertex in poly.vertices]))
+		brushes.append((brush.keyvalues, polygons))
+	return (actor.keyvalues, brushes)
+
+def random_float():
+	return "{:0=+13.6f}".format(random.uniform(-1024.0, 1024.0))
+
+def vector_line(keyword, num_tabs):
+	return "\t" * num_tabs + "{:<9}{},{},{}\n".format(keyword, random_float(), random_float(), random_float())
+
+def brush_actor_text(actor_index):
+	lines = ["Begin Actor Class=Brush Name=Brush{}\n".format(actor_index), "\tGroup=\"Cube\"\n", "\tBegin Brush Name=Model{}\n".format(actor_index), "\t\tBegin PolyList\n"]
+	for p in range(6):
+		lines += ["\t\t\tBegin Polygon Texture=Wall{} Flags=32\n".format(p), vector_line("Origin", 4), vector_line("Normal", 4),
+			vector_line("TextureU", 4), vector_line("TextureV", 4), "\t\t\t\tPan      U=0 V=-16\n"]
+		lines += [vector_line("Vertex", 4) for v in range(4)]
+		lines += ["\t\t\tEnd Polygon\n"]
+	lines += ["\t\tEnd PolyList\n", "\tEnd Brush\n", "\tBrush=Model'MyLevel.Model{}'\n".format(actor_index), "\tName=Brush{}\n".format(actor_index), "End Actor\n"]
+	return "".join(lines)
+
+def point_actor_text(actor_index):
+	return "Begin Actor Class=Light Name=Light{0}\n\tLightBrightness=128\n\tLocation=(X={1},Y={2},Z={3})\n\tName=Light{0}\nEnd Actor\n".format(actor_index, random_float(), random_float(), random_float())
+
+#Writes a .t3d of about size_mb to t3d_path; 9 of 10 actors are brushes
+def write_t3d(t3d_path, size_mb):
+	size = 0
+	max_size = size_mb * 1024 * 1024
+	with open(t3d_path, "w") as t3d_file:
+		t3d_file.write("Begin Map\n")
+		actor_index = 0
+		while size < max_size:
+			actor = point_actor_text(actor_index) if actor_index % 10 == 0 else brush_actor_text(actor_index)
+			t3d_file.write(actor)
+			size += len(actor)
+			actor_index += 1
+		t3d_file.write("End Map\n")
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	size_mb = float(sys.argv[1]) if num_args > 1 else 20.0
+	num_repeats = int(sys.argv[2]) if num_args > 2 else 1
+	if num_args > 3:
+		print("benchmark_t3d_parse.py [size_mb] [num_repeats]")
+		exit()
+
+	random.seed(0)
+	with tempfile.TemporaryDirectory() as temp_dir:
+		t3d_path = os.path.join(temp_dir, "benchmark.t3d")
+		write_t3d(t3d_path, size_mb)
+		file_mb = os.path.getsize(t3d_path) / (1024 * 1024)
+
+		old_actors = [actor_values(actor, True) for actor in parse_t3d_old(t3d_path)]
+		new_actors = [actor_values(actor, False) for actor in pmt_t3d_import.parse_t3d(t3d_path)]
+		assert old_actors == new_actors, "actors differ"
+
+		time_old = min(timeit.repeat(lambda: parse_t3d_old(t3d_path), number = 1, repeat = num_repeats))
+		time_new = min(timeit.repeat(lambda: pmt_t3d_import.parse_t3d(t3d_path), number = 1, repeat = num_repeats))
+		print("{:.1f} MB   old {:6.2f} MB/s ({:.2f}s)   new {:6.2f} MB/s ({:.2f}s)   {:.2f}x".format(file_mb, file_mb / time_old, time_old, file_mb / time_new, time_new, time_old / time_new))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+#
+#Benchmark for the t3d polygon emitter: polygons per second of the text of a brush, formatted polygon by polygon
+#with LINS() and FloatStr() (as pmt_t3d_export did before T3dExport.export_polygons()) and with export_polygons().
+#Both versions are checked to produce the same text.
+#
+#	benchmark_t3d_polygons.py [num_repeats]
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt_t3d_export"))
+import pmt_t3d_export
+
+TAB = "\t"
+NEWLINE = "\n"
+
+### Polygon text before T3dExport.export_polygons()
+def LINS(num_tabs, string):
+	out = ""
+	for i in range(num_tabs):
+		out += TAB
+	out += string + NEWLINE
+	return out
+
+def FloatStr(float_value):
+	return '{0:0=+13.6f}'.format(float_value)
+
+def FloatIntStr(float_value):
+	return str( int(float_value) )
+
+#Same as the old T3dExport.export_polygon() for a polygon without uv_data
+def export_polygon_old(polygon, is_terrain, is_detail, is_nonsolid):
+	o = polygon.vertices[0]
+	n = polygon.normal
+	u = polygon.uv_u_axis
+	v = polygon.uv_v_axis
+	pan_u, pan_v = 0.0, 0.0
+
+	final_material = "Detail.Marble"
+	if polygon.material_str != None:
+		final_material = polygon.material_str
+
+	out = ""
+	if not is_terrain:
+		beginstr = "Begin Polygon Texture={0}".format(final_material)
+		if is_nonsolid:
+			beginstr += " Item=Sheets"
+	else:
+		beginstr = "Begin Polygon Item=ground Texture={0}".format(final_material)
+
+	flags_sum = 0
+	if is_detail:
+		flags_sum += 32
+	elif is_nonsolid:
+		flags_sum += 8
+	if polygon.flags != 0:
+		flags_sum += polygon.flags
+	if flags_sum != 0:
+		beginstr += " Flags={}".format(flags_sum)
+
+	out += LINS(3, beginstr)
+	out += LINS(4, "Origin   " + FloatStr(o[0]) + "," + FloatStr(o[1]) + "," + FloatStr(o[2]))
+	out += LINS(4, "Normal   " + FloatStr(n[0]) + "," + FloatStr(n[1]) + "," + FloatStr(n[2]))
+	out += LINS(4, "TextureU " + FloatStr(u[0]) + "," + FloatStr(u[1]) + "," + FloatStr(u[2]))
+	out += LINS(4, "TextureV " + FloatStr(v[0]) + "," + FloatStr(v[1]) + "," + FloatStr(v[2]))
+	out += LINS(4, "Pan      U={0} V={1}".format(FloatIntStr(pan_u), FloatIntStr(pan_v)))
+	for v in polygon.vertices:
+		out += LINS(4, "Vertex   " + FloatStr(v[0]) + "," + FloatStr(v[1]) + "," + FloatStr(v[2]))
+	out += LINS(3, "End Polygon")
+	return out
+
+def export_brush_old(polygons):
+	out = ""
+	for polygon in polygons:
+		out += export_polygon_old(polygon, False, False, False)
+	return out
+
+def export_brush_new(polygons):
+	return pmt_t3d_export.T3dExport().export_polygons(polygons, False, False, False)
+
+def random_vector(extent = 1024.0):
+	return tuple([random.uniform(-extent, extent) for i in range(3)])
+
+def random_polygon(num_vertices):
+	polygon = pmt_t3d_export.Polygon()
+	polygon.vertices = [random_vector() for i in range(num_vertices)]
+	polygon.normal = random_vector(1.0)
+	polygon.uv_u_axis = random_vector(1.0)
+	polygon.uv_v_axis = random_vector(1.0)
+	polygon.material_str = "Detail.Marble"
+	return polygon
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	if num_args == 1:
+		num_repeats = 5
+	elif num_args == 2:
+		num_repeats = int(sys.argv[1])
+	else:
+		print("benchmark_t3d_polygons.py [num_repeats]")
+		exit()
+
+	random.seed(0)
+	NUM_BRUSHES = 2000
+	for polygons_per_brush in [6, 24]:
+		brushes = [[random_polygon(random.randint(3, 8)) for p in range(polygons_per_brush)] for b in range(NUM_BRUSHES)]
+		for polygons in brushes:
+			assert export_brush_old(polygons) == export_brush_new(polygons), "output differs"
+
+		def run_old():
+			for polygons in brushes:
+				export_brush_old(polygons)
+		def run_new():
+			for polygons in brushes:
+				export_brush_new(polygons)
+
+		num_polygons = NUM_BRUSHES * polygons_per_brush
+		time_old = min(timeit.repeat(run_old, number = 1, repeat = num_repeats))
+		time_new = min(timeit.repeat(run_new, number = 1, repeat = num_repeats))
+		print("{:>3} polygons/brush   old {:10.0f} polygons/s   new {:10.0f} polygons/s   {:.2f}x".format(polygons_per_brush, num_polygons / time_old, num_polygons / time_new, time_old / time_new))
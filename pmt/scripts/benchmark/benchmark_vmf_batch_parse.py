@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+#
+#Benchmark for pmt_vmf_import.parse_vmf_batch(): files per second of a library of synthetic prefabs (see benchmark_vmf_parse.write_vmf()),
+#parsed in a single process and in num_processes worker processes. One prefab has no closing bracket; both runs are checked
+#to return the same vmf_dicts in the order of the paths, and to report only the broken prefab as a failure.
+#
+#	benchmark_vmf_batch_parse.py [num_files] [size_kb] [num_processes]
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import benchmark_vmf_parse
+pmt_vmf_import = benchmark_vmf_parse.pmt_vmf_import
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	num_files = int(sys.argv[1]) if num_args > 1 else 200
+	size_kb = float(sys.argv[2]) if num_args > 2 else 100.0
+	num_processes = int(sys.argv[3]) if num_args > 3 else os.cpu_count()
+	if num_args > 4:
+		print("benchmark_vmf_batch_parse.py [num_files] [size_kb] [num_processes]")
+		exit()
+
+	random.seed(0)
+	with tempfile.TemporaryDirectory() as temp_dir:
+		vmf_paths = list()
+		for file_index in range(num_files):
+			vmf_paths.append(os.path.join(temp_dir, "prefab_{:04}.vmf".format(file_index)))
+			benchmark_vmf_parse.write_vmf(vmf_paths[-1], size_kb / 1024)
+		broken_path = vmf_paths[num_files // 2]
+		with open(broken_path, "a") as vmf_file:
+			vmf_file.write("entity\n{\n\t\"classname\" \"info_target\"\n")
+		total_mb = sum([os.path.getsize(vmf_path) for vmf_path in vmf_paths]) / (1024 * 1024)
+
+		(serial_dicts, serial_failures) = pmt_vmf_import.parse_vmf_batch(vmf_paths, 1)
+		(parallel_dicts, parallel_failures) = pmt_vmf_import.parse_vmf_batch(vmf_paths, num_processes)
+		assert serial_dicts == parallel_dicts, "vmf_dicts differ"
+		assert [vmf_path for (vmf_path, error) in serial_failures] == [broken_path], "unexpected failures {}".format(serial_failures)
+		assert serial_failures == parallel_failures, "failures differ"
+
+		time_serial = min(timeit.repeat(lambda: pmt_vmf_import.parse_vmf_batch(vmf_paths, 1), number = 1, repeat = 1))
+		time_parallel = min(timeit.repeat(lambda: pmt_vmf_import.parse_vmf_batch(vmf_paths, num_processes), number = 1, repeat = 1))
+		print("{} files, {:.1f} MB   1 process {:6.1f} files/s ({:.2f}s)   {} processes {:6.1f} files/s ({:.2f}s)   {:.2f}x".format(num_files, total_mb,
+			num_files / time_serial, time_serial, num_processes, num_files / time_parallel, time_parallel, time_serial / time_parallel))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+#
+#Benchmark for pmt_vmf_import.parse_vmf(): MB per second of a synthetic .vmf (solids with 6 sides and point entities),
+#parsed by parse_vmf() and by the tree builder of parse_vmf() before pmt_vmf_import.parse_vmf_block(), which found the
+#closing bracket of each block and recursed on a copy of its tokens. Both versions are checked to return the same vmf_dict.
+#
+#	benchmark_vmf_parse.py [size_mb] [num_repeats]
+
+import os
+import sys
+import random
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt_vmf_import"))
+import pmt_vmf_import
+import pmt_common_lexer
+
+pmt_vmf_import.DPRINT = lambda string, level = 1: None
+
+### parse_vmf() before parse_vmf_block()
+def extract_tokens_in_brackets(vmf_keyword, tokens, tokens_quoted, opening_index, global_bracket_depth):
+	num_tokens = len(tokens)
+	closing_index = opening_index+1
+	bracket_depth = 1
+	while closing_index < num_tokens:
+		t2 = tokens[closing_index]
+		if t2 == "{": bracket_depth += 1
+		if t2 == "}": bracket_depth -= 1
+		if bracket_depth == 0:
+			break
+		closing_index += 1
+
+	in_bracket_tokens = tokens[opening_index:closing_index+1]
+	in_bracket_tokens_quoted = tokens_quoted[opening_index:closing_index+1]
+
+	kv_dict = dict()
+	token_index2 = 1
+	num_tokens2 = len(in_bracket_tokens)
+	while token_index2 < num_tokens2 - 1:
+		t2 = in_bracket_tokens[token_index2]
+		if not in_bracket_tokens_quoted[token_index2]:
+			t2lo = t2.lower()
+			if t2lo not in kv_dict:
+				kv_dict[t2lo] = list()
+			(closing_index2, kv_dict2) = extract_tokens_in_brackets(t2lo, in_bracket_tokens, in_bracket_tokens_quoted, token_index2+1, global_bracket_depth+1)
+			kv_dict[t2lo].append(kv_dict2)
+			token_index2 = closing_index2
+		else:
+			kv_dict[t2] = in_bracket_tokens[token_index2+1]
+			token_index2 += 1
+		token_index2 += 1
+	return (closing_index, kv_dict)
+
+def parse_vmf_old(vmf_path):
+	with open(vmf_path, 'rt', encoding=pmt_vmf_import.TEXT_CODEC) as vmf_file:
+		text = vmf_file.read()
+	lexer_tokens = pmt_vmf_import.VMF_LEXER.tokenize(text, vmf_path)
+	tokens = pmt_common_lexer.token_texts(lexer_tokens)
+	tokens_quoted = [token[0] == pmt_common_lexer.TOKEN_STRING for token in lexer_tokens]
+
+	vmf_dict = dict()
+	num_tokens = len(tokens)
+	token_index = 0
+	while token_index < num_tokens:
+		if tokens[token_index] == "{":
+			vmf_keyword = tokens[token_index - 1].lower()
+			(closing_index, kv_dict) = extract_tokens_in_brackets(vmf_keyword, tokens, tokens_quoted, token_index, 1)
+			if vmf_keyword not in vmf_dict:
+				vmf_dict[vmf_keyword] = list()
+			vmf_dict[vmf_keyword].append(kv_dict)
+			token_index = closing_index
+		token_index += 1
+	return vmf_dict
+
+def random_float():
+	return "{:.6f}".format(random.uniform(-1024.0, 1024.0))
+
+def solid_text(solid_id, side_id):
+	lines = ["\tsolid\n", "\t{\n", "\t\t\"id\" \"{}\"\n".format(solid_id)]
+	for s in range(6):
+		plane = " ".join(["({} {} {})".format(random_float(), random_float(), random_float()) for p in range(3)])
+		lines += ["\t\tside\n", "\t\t{\n", "\t\t\t\"id\" \"{}\"\n".format(side_id + s), "\t\t\t\"plane\" \"{}\"\n".format(plane),
+			"\t\t\t\"material\" \"DEV/DEV_MEASUREGENERIC01B\"\n", "\t\t\t\"uaxis\" \"[1 0 0 0] 0.25\"\n", "\t\t\t\"vaxis\" \"[0 -1 0 0] 0.25\"\n",
+			"\t\t\t\"rotation\" \"0\"\n", "\t\t\t\"lightmapscale\" \"16\"\n", "\t\t\t\"smoothing_groups\" \"0\"\n", "\t\t}\n"]
+	lines += ["\t\teditor\n", "\t\t{\n", "\t\t\t\"color\" \"0 180 255\"\n", "\t\t\t\"visgroupshown\" \"1\"\n", "\t\t}\n", "\t}\n"]
+	return "".join(lines)
+
+def entity_text(entity_id):
+	return "entity\n{{\n\t\"id\" \"{}\"\n\t\"classname\" \"info_target\"\n\t\"origin\" \"{} {} {}\"\n\tconnections\n\t{{\n\t\t\"OnUser1\" \"t,Kill,,0,-1\"\n\t}}\n}}\n".format(entity_id, random_float(), random_float(), random_float())
+
+#Writes a .vmf of about size_mb to vmf_path; 9 of 10 blocks are solids of the world
+def write_vmf(vmf_path, size_mb):
+	size = 0
+	max_size = size_mb * 1024 * 1024
+	with open(vmf_path, "w") as vmf_file:
+		header = "versioninfo\n{\n\t\"editorversion\" \"400\"\n}\nworld\n{\n\t\"id\" \"1\"\n\t\"classname\" \"worldspawn\"\n"
+		vmf_file.write(header)
+		size += len(header)
+		entities = list()
+		block_id = 2
+		while size < max_size:
+			if block_id % 10 == 0:
+				entities.append(entity_text(block_id))
+				size += len(entities[-1])
+			else:
+				solid = solid_text(block_id, block_id * 6)
+				vmf_file.write(solid)
+				size += len(solid)
+			block_id += 1
+		vmf_file.write("}\n")
+		vmf_file.writelines(entities)
+
+if __name__ == "__main__":
+	num_args = len(sys.argv)
+	size_mb = float(sys.argv[1]) if num_args > 1 else 100.0
+	num_repeats = int(sys.argv[2]) if num_args > 2 else 1
+	if num_args > 3:
+		print("benchmark_vmf_parse.py [size_mb] [num_repeats]")
+		exit()
+
+	random.seed(0)
+	with tempfile.TemporaryDirectory() as temp_dir:
+		vmf_path = os.path.join(temp_dir, "benchmark.vmf")
+		write_vmf(vmf_path, size_mb)
+		file_mb = os.path.getsize(vmf_path) / (1024 * 1024)
+
+		assert parse_vmf_old(vmf_path) == pmt_vmf_import.parse_vmf(vmf_path), "vmf_dict differs"
+
+		time_old = min(timeit.repeat(lambda: parse_vmf_old(vmf_path), number = 1, repeat = num_repeats))
+		time_new = min(timeit.repeat(lambda: pmt_vmf_import.parse_vmf(vmf_path), number = 1, repeat = num_repeats))
+		print("{:.1f} MB   old {:6.2f} MB/s ({:.2f}s)   new {:6.2f} MB/s ({:.2f}s)   {:.2f}x".format(file_mb, file_mb / time_old, time_old, file_mb / time_new, time_new, time_old / time_new))
@@ -30,9 +30,9 @@ def OnMapEntityChanged(node):
 	new_map_entity = node.parm("set_entity_to").evalAsString()
 
 	map_models_path = PMT__G_CFG.g_cfg.get_config("map", "map_models_path")
-	if new_map_entity in PMT__G_CFG.map_entity_dict:
+	if new_map_entity in PMT__G_CFG.get_asset("map_entity_dict"):
 		node.parm("pmt_map_entity_class").set(new_map_entity)
-		entdef = PMT__G_CFG.map_entity_dict[new_map_entity]
+		entdef = PMT__G_CFG.get_asset("map_entity_dict")[new_map_entity]
 		if "model" in entdef.all_property_dict:
 			if not override_mesh:
 				modelpath = entdef.all_property_dict["model"].value
@@ -29,10 +29,10 @@ def OnClassChanged(node):
 	t3d_models_path = PMT__G_CFG.g_cfg.get_config("t3d", "t3d_models_path")
 	
 	new_uclass = node.parm("set_uclass_to").evalAsString()
-	if new_uclass in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
+	if new_uclass in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
 		node.parm("pmt_t3d_entity_class").set(new_uclass)
 		
-		unrealclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[new_uclass]
+		unrealclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[new_uclass]
 		if unrealclass.mesh3d != None:
 			mesh = unrealclass.mesh3d
 			origin = mesh.origin
@@ -33,9 +33,9 @@ def OnVmfEntityChanged(node):
 	vmf_models_path = PMT__G_CFG.g_cfg.get_config("vmf", "vmf_models_path")
 	
 	new_vmf_class = node.parm("set_class_to").evalAsString()
-	if new_vmf_class in PMT__G_CFG.vmf_entity_dict:
+	if new_vmf_class in PMT__G_CFG.get_asset("vmf_entity_dict"):
 		node.parm("pmt_vmf_entity_class").set(new_vmf_class)
-		entity = PMT__G_CFG.vmf_entity_dict[new_vmf_class]
+		entity = PMT__G_CFG.get_asset("vmf_entity_dict")[new_vmf_class]
 		
 		vmf_keyvalues = dict()
 		for prop_name in entity.all_property_dict:
@@ -17,9 +17,9 @@ if True:
 	S = pmt__global_config.PmtGlobalConfigSerializer()
 	S.load_ini(PMT__G_CFG.g_cfg)
 	
-#Load assets, including class definitions, textures, materials, sound files, etc.
+#Load the class definitions of the parameter menus; textures, materials, sound files, etc. are loaded on first use (see PMT__G_CFG.get_asset())
 if True:
-	PMT__G_CFG.load_assets()
+	PMT__G_CFG.load_assets(PMT__G_CFG.MENU_ASSETS)
 	
 #Load python panels
 if True:
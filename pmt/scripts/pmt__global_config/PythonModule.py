@@ -6,12 +6,22 @@
 #load other modules from this module
 
 ### Load modules
+import time
 import toolutils
 pmt__global_config = toolutils.createModuleFromSection("pmt__global_config", kwargs["type"], "pmt__global_config.py")
 #shared modules pmt_common
 pmt_common = toolutils.createModuleFromSection("pmt_common", kwargs["type"], "pmt_common.py")
 pmt_common_texture = toolutils.createModuleFromSection("pmt_common_texture", kwargs["type"], "pmt_common_texture.py")
 pmt_common_json = toolutils.createModuleFromSection("pmt_common_json", kwargs["type"], "pmt_common_json.py")
+pmt_common_format = toolutils.createModuleFromSection("pmt_common_format", kwargs["type"], "pmt_common_format.py")
+pmt_common_extract = toolutils.createModuleFromSection("pmt_common_extract", kwargs["type"], "pmt_common_extract.py")
+pmt_common_cache = toolutils.createModuleFromSection("pmt_common_cache", kwargs["type"], "pmt_common_cache.py")
+pmt_common_dump = toolutils.createModuleFromSection("pmt_common_dump", kwargs["type"], "pmt_common_dump.py")
+pmt_common_lexer = toolutils.createModuleFromSection("pmt_common_lexer", kwargs["type"], "pmt_common_lexer.py")
+pmt_common_blockindex = toolutils.createModuleFromSection("pmt_common_blockindex", kwargs["type"], "pmt_common_blockindex.py")
+pmt_common_build = toolutils.createModuleFromSection("pmt_common_build", kwargs["type"], "pmt_common_build.py")
+pmt_common_brush = toolutils.createModuleFromSection("pmt_common_brush", kwargs["type"], "pmt_common_brush.py")
+pmt_common_bounds = toolutils.createModuleFromSection("pmt_common_bounds", kwargs["type"], "pmt_common_bounds.py")
 #non-shared modules; these modules should not access each other
 pmt_parse_source1_fgd = toolutils.createModuleFromSection("pmt_parse_source1_fgd", kwargs["type"], "pmt_parse_source1_fgd.py")
 pmt_parse_unreal1_uc = toolutils.createModuleFromSection("pmt_parse_unreal1_uc", kwargs["type"], "pmt_parse_unreal1_uc.py")
@@ -26,6 +36,7 @@ pmt_meshdb_unreal1 = toolutils.createModuleFromSection("pmt_meshdb_unreal1", kwa
 #higher-level modules
 pmt_material_select = toolutils.createModuleFromSection("pmt_material_select", kwargs["type"], "pmt_material_select.py")
 pmt_material_search = toolutils.createModuleFromSection("pmt_material_search", kwargs["type"], "pmt_material_search.py")
+pmt_multi_export = toolutils.createModuleFromSection("pmt_multi_export", kwargs["type"], "pmt_multi_export.py")
 pmt_qt_entity_kv_editor = toolutils.createModuleFromSection("pmt_qt_entity_kv_editor", kwargs["type"], "pmt_qt_entity_kv_editor.py")
 pmt_qt_material_selector = toolutils.createModuleFromSection("pmt_qt_material_selector", kwargs["type"], "pmt_qt_material_selector.py")
 pmt_qt_materialsets_editor = toolutils.createModuleFromSection("pmt_qt_materialsets_editor", kwargs["type"], "pmt_qt_materialsets_editor.py")
@@ -120,6 +131,9 @@ def button_default(node):
 	copy_configs_to_node(g_cfg, node)
 	
 
+#The assets (entity dicts and menus, material, sound and mesh dbs) are None, or empty menus, until their loader runs; see get_asset().
+#Each loader reads into locals and sets the globals at the end, so a loader that raises leaves the assets as they were.
+#The menus are filled in place, so references to them (e.g. testmenu) stay valid.
 vmf_all_entity_menu = list()
 vmf_placeable_entity_menu = list()
 vmf_placeable_point_entity_menu = list()
@@ -129,55 +143,56 @@ vmf_placeable_brush_entity_menu = list()
 vmf_placeable_nonbrush_entity_menu = list()
 vmf_entity_dict = None
 def vmf_load_entity_dict():
-	vmf_all_entity_menu.clear()
-	vmf_placeable_entity_menu.clear()
-	vmf_placeable_point_entity_menu.clear()
-	vmf_placeable_npc_entity_menu.clear()
-	vmf_placeable_model_entity_menu.clear()
-	vmf_placeable_brush_entity_menu.clear()
-	vmf_placeable_nonbrush_entity_menu.clear()
-	global vmf_entity_dict
-	vmf_entity_dict = None
+	all_entity_menu = list()
+	placeable_entity_menu = list()
+	placeable_point_entity_menu = list()
+	placeable_npc_entity_menu = list()
+	placeable_model_entity_menu = list()
+	placeable_brush_entity_menu = list()
+	placeable_nonbrush_entity_menu = list()
 
 	vmf_fgd_search_path = g_cfg.get_config("vmf", "vmf_fgd_search_path")
-	vmf_entity_dict = pmt_parse_source1_fgd.parse_fgds_in_path(vmf_fgd_search_path)
-	for name in vmf_entity_dict:
-		entity_def = vmf_entity_dict[name]
+	entity_dict = pmt_parse_source1_fgd.parse_fgds_in_path(vmf_fgd_search_path)
+	for name in entity_dict:
+		entity_def = entity_dict[name]
 		
 		#Houdini parameter menu is a flat list of paired strings in the format
 		#[value_0, label_0, value_1, label_1, ..., value_n, label_n]
 		#so we add each entry twice
-		vmf_all_entity_menu.append(entity_def.classname)
-		vmf_all_entity_menu.append(entity_def.classname)
+		all_entity_menu.append(entity_def.classname)
+		all_entity_menu.append(entity_def.classname)
 		
 		if entity_def.is_placeable():
-			vmf_placeable_entity_menu.append(entity_def.classname)
-			vmf_placeable_entity_menu.append(entity_def.classname)
+			placeable_entity_menu.append(entity_def.classname)
+			placeable_entity_menu.append(entity_def.classname)
 			type = entity_def.classtype.lower()
 			if type == "@pointclass":
-				vmf_placeable_point_entity_menu.append(entity_def.classname)
-				vmf_placeable_point_entity_menu.append(entity_def.classname)
+				placeable_point_entity_menu.append(entity_def.classname)
+				placeable_point_entity_menu.append(entity_def.classname)
 			if type == "@npcclass":
-				vmf_placeable_npc_entity_menu.append(entity_def.classname)
-				vmf_placeable_npc_entity_menu.append(entity_def.classname)
+				placeable_npc_entity_menu.append(entity_def.classname)
+				placeable_npc_entity_menu.append(entity_def.classname)
 			if entity_def.has_model():
-				vmf_placeable_model_entity_menu.append(entity_def.classname)
-				vmf_placeable_model_entity_menu.append(entity_def.classname)
+				placeable_model_entity_menu.append(entity_def.classname)
+				placeable_model_entity_menu.append(entity_def.classname)
 				
 			if type == "@solidclass":
-				vmf_placeable_brush_entity_menu.append(entity_def.classname)
-				vmf_placeable_brush_entity_menu.append(entity_def.classname)
+				placeable_brush_entity_menu.append(entity_def.classname)
+				placeable_brush_entity_menu.append(entity_def.classname)
 			else:
-				vmf_placeable_nonbrush_entity_menu.append(entity_def.classname)
-				vmf_placeable_nonbrush_entity_menu.append(entity_def.classname)
+				placeable_nonbrush_entity_menu.append(entity_def.classname)
+				placeable_nonbrush_entity_menu.append(entity_def.classname)
 		#print("vmf: {}".format(entity_def.classname))
-	vmf_all_entity_menu.sort()
-	vmf_placeable_entity_menu.sort()
-	vmf_placeable_point_entity_menu.sort()
-	vmf_placeable_npc_entity_menu.sort()
-	vmf_placeable_model_entity_menu.sort()
-	vmf_placeable_brush_entity_menu.sort()
-	vmf_placeable_nonbrush_entity_menu.sort()
+	
+	global vmf_entity_dict
+	vmf_all_entity_menu[:] = sorted(all_entity_menu)
+	vmf_placeable_entity_menu[:] = sorted(placeable_entity_menu)
+	vmf_placeable_point_entity_menu[:] = sorted(placeable_point_entity_menu)
+	vmf_placeable_npc_entity_menu[:] = sorted(placeable_npc_entity_menu)
+	vmf_placeable_model_entity_menu[:] = sorted(placeable_model_entity_menu)
+	vmf_placeable_brush_entity_menu[:] = sorted(placeable_brush_entity_menu)
+	vmf_placeable_nonbrush_entity_menu[:] = sorted(placeable_nonbrush_entity_menu)
+	vmf_entity_dict = entity_dict
 	print("vmf: loaded {} entity classes.".format(len(vmf_entity_dict)))
 
 t3d_placeable_pawns_menu = list()
@@ -186,33 +201,33 @@ t3d_placeable_nonbrush_menu = list()
 t3d_placeable_brush_menu = list()
 t3d_unrealscript_defs = None
 def t3d_load_class_dict():
-	t3d_placeable_pawns_menu.clear()
-	t3d_placeable_actor_menu.clear()
-	t3d_placeable_nonbrush_menu.clear()
-	t3d_placeable_brush_menu.clear()
-	global t3d_unrealscript_defs
-	t3d_unrealscript_defs = None
+	placeable_pawns_menu = list()
+	placeable_actor_menu = list()
+	placeable_nonbrush_menu = list()
+	placeable_brush_menu = list()
 	
 	t3d_uc_search_path = g_cfg.get_config("t3d", "t3d_uc_search_path")
-	t3d_unrealscript_defs = pmt_parse_unreal1_uc.parse_uc_in_path(t3d_uc_search_path)
-	for classname in t3d_unrealscript_defs.class_dict:
-		if t3d_unrealscript_defs.class_dict[classname].is_a("pawn"):
-			t3d_placeable_pawns_menu.append(classname)
-			t3d_placeable_pawns_menu.append(classname)
-		if t3d_unrealscript_defs.class_dict[classname].is_a("actor"):
-			t3d_placeable_actor_menu.append(classname)
-			t3d_placeable_actor_menu.append(classname)
-			if not t3d_unrealscript_defs.class_dict[classname].is_a("brush"):
-				t3d_placeable_nonbrush_menu.append(classname)
-				t3d_placeable_nonbrush_menu.append(classname)
-		if t3d_unrealscript_defs.class_dict[classname].is_a("brush"):
-			t3d_placeable_brush_menu.append(classname)
-			t3d_placeable_brush_menu.append(classname)
-	
-	t3d_placeable_pawns_menu.sort()
-	t3d_placeable_actor_menu.sort()
-	t3d_placeable_nonbrush_menu.sort()
-	t3d_placeable_brush_menu.sort()
+	unrealscript_defs = pmt_parse_unreal1_uc.parse_uc_in_path(t3d_uc_search_path)
+	for classname in unrealscript_defs.class_dict:
+		if unrealscript_defs.class_dict[classname].is_a("pawn"):
+			placeable_pawns_menu.append(classname)
+			placeable_pawns_menu.append(classname)
+		if unrealscript_defs.class_dict[classname].is_a("actor"):
+			placeable_actor_menu.append(classname)
+			placeable_actor_menu.append(classname)
+			if not unrealscript_defs.class_dict[classname].is_a("brush"):
+				placeable_nonbrush_menu.append(classname)
+				placeable_nonbrush_menu.append(classname)
+		if unrealscript_defs.class_dict[classname].is_a("brush"):
+			placeable_brush_menu.append(classname)
+			placeable_brush_menu.append(classname)
+	
+	global t3d_unrealscript_defs
+	t3d_placeable_pawns_menu[:] = sorted(placeable_pawns_menu)
+	t3d_placeable_actor_menu[:] = sorted(placeable_actor_menu)
+	t3d_placeable_nonbrush_menu[:] = sorted(placeable_nonbrush_menu)
+	t3d_placeable_brush_menu[:] = sorted(placeable_brush_menu)
+	t3d_unrealscript_defs = unrealscript_defs
 	#print("t3d: loaded {} classes ({} pawns).".format(len(t3d_unrealscript_defs.class_dict), len(t3d_placeable_pawns_menu) // 2))		
 	print("t3d: loaded {} classes ({} actors).".format(len(t3d_unrealscript_defs.class_dict), len(t3d_placeable_actor_menu) // 2))		
 
@@ -222,37 +237,38 @@ map_placeable_npc_entity_menu = list()
 map_placeable_model_entity_menu = list()
 map_entity_dict = None
 def map_load_entity_dict():
-	map_placeable_entity_menu.clear()
-	#map_placeable_point_entity_menu.clear()
-	map_placeable_npc_entity_menu.clear()
-	map_placeable_model_entity_menu.clear()
-	global map_entity_dict
-	map_entity_dict = None
+	placeable_entity_menu = list()
+	#placeable_point_entity_menu = list()
+	placeable_npc_entity_menu = list()
+	placeable_model_entity_menu = list()
 
 	map_def_search_path = g_cfg.get_config("map", "map_def_search_path")
-	map_entity_dict = pmt_parse_idtech4_def.parse_def_in_path(map_def_search_path)
-	for name in map_entity_dict:
-		entity_def = map_entity_dict[name]
+	entity_dict = pmt_parse_idtech4_def.parse_def_in_path(map_def_search_path)
+	for name in entity_dict:
+		entity_def = entity_dict[name]
 		
 		#Houdini parameter menu is a flat list of paired strings in the format
 		#[value_0, label_0, value_1, label_1, ..., value_n, label_n]
 		#so we add each entry twice
-		map_placeable_entity_menu.append(name)
-		map_placeable_entity_menu.append(name)
+		placeable_entity_menu.append(name)
+		placeable_entity_menu.append(name)
 		
 		if "atdm:ai_base" in entity_def.inheritance_chain:
-			map_placeable_npc_entity_menu.append(name)
-			map_placeable_npc_entity_menu.append(name)
+			placeable_npc_entity_menu.append(name)
+			placeable_npc_entity_menu.append(name)
 		if "model" in entity_def.all_property_dict:
 			modelprop = entity_def.all_property_dict["model"]
 			if modelprop.value != None:
 				if modelprop.value.endswith(".ase") or modelprop.value.endswith(".lwo"):
-					map_placeable_model_entity_menu.append(name)
-					map_placeable_model_entity_menu.append(name)
-	map_placeable_entity_menu.sort()
-	#map_placeable_point_entity_menu.sort()
-	map_placeable_npc_entity_menu.sort()
-	map_placeable_model_entity_menu.sort()
+					placeable_model_entity_menu.append(name)
+					placeable_model_entity_menu.append(name)
+	
+	global map_entity_dict
+	map_placeable_entity_menu[:] = sorted(placeable_entity_menu)
+	#map_placeable_point_entity_menu[:] = sorted(placeable_point_entity_menu)
+	map_placeable_npc_entity_menu[:] = sorted(placeable_npc_entity_menu)
+	map_placeable_model_entity_menu[:] = sorted(placeable_model_entity_menu)
+	map_entity_dict = entity_dict
 	print("map: loaded {} entity classes({} atdm:ai_base).".format(len(map_entity_dict), len(map_placeable_npc_entity_menu)))
 		
 
@@ -285,27 +301,30 @@ def map_load_materials():
 vmf_materialsets = None
 def vmf_load_materialsets():
 	vmf_materialsets_path = g_cfg.get_config("vmf", "vmf_materialsets_path")
+	materialsets = pmt_material_select.MaterialSets()
+	materialsets.load_styles(vmf_materialsets_path, "vmf")
 	global vmf_materialsets
-	vmf_materialsets = pmt_material_select.MaterialSets()
-	vmf_materialsets.load_styles(vmf_materialsets_path, "vmf")
+	vmf_materialsets = materialsets
 	print("vmf: loaded {} materialset styles".format(len(vmf_materialsets.styles_dict)))
 	return vmf_materialsets
 	
 t3d_materialsets = None
 def t3d_load_materialsets():
 	t3d_materialsets_path = g_cfg.get_config("t3d", "t3d_materialsets_path")
+	materialsets = pmt_material_select.MaterialSets()
+	materialsets.load_styles(t3d_materialsets_path, "t3d")
 	global t3d_materialsets
-	t3d_materialsets = pmt_material_select.MaterialSets()
-	t3d_materialsets.load_styles(t3d_materialsets_path, "t3d")
+	t3d_materialsets = materialsets
 	print("t3d: loaded {} materialset styles".format(len(t3d_materialsets.styles_dict)))
 	return t3d_materialsets
 	
 map_materialsets = None
 def map_load_materialsets():
 	map_materialsets_path = g_cfg.get_config("map", "map_materialsets_path")
+	materialsets = pmt_material_select.MaterialSets()
+	materialsets.load_styles(map_materialsets_path, "map")
 	global map_materialsets
-	map_materialsets = pmt_material_select.MaterialSets()
-	map_materialsets.load_styles(map_materialsets_path, "map")
+	map_materialsets = materialsets
 	print("map: loaded {} materialset styles".format(len(map_materialsets.styles_dict)))
 	return map_materialsets
 
@@ -378,6 +397,10 @@ def VEX_TRANSFER_material_dbs(node):
 	
 	mark_serialized_attrib(geo, "VEX_TRANSFER_material_dbs")
 	
+	#the node has no engine parm, so the dbs of all engines are transferred; get_asset() loads the ones that are not loaded yet
+	vmf_materialdb = get_asset("vmf_materialdb")
+	t3d_materialdb = get_asset("t3d_materialdb")
+	map_materialdb = get_asset("map_materialdb")
 	if vmf_materialdb != None:
 		find_or_create_globaldict(geo, "vmf_materialdb_mat_to_surfaceprop")
 		geo.setGlobalAttribValue("vmf_materialdb_mat_to_surfaceprop", vmf_materialdb.material_to_surfaceprop_dict)
@@ -420,6 +443,10 @@ def VEX_TRANSFER_materialsets(node):
 	
 	mark_serialized_attrib(geo, "VEX_TRANSFER_materialsets")
 	
+	#the materialsets of all engines are transferred, see VEX_TRANSFER_material_dbs()
+	vmf_materialsets = get_asset("vmf_materialsets")
+	t3d_materialsets = get_asset("t3d_materialsets")
+	map_materialsets = get_asset("map_materialsets")
 	if vmf_materialsets != None:
 		find_or_create_globaldict(geo, "vmf_materialsets_styles_dict")
 		geo.setGlobalAttribValue("vmf_materialsets_styles_dict", vmf_materialsets.styles_dict)
@@ -431,25 +458,25 @@ def VEX_TRANSFER_materialsets(node):
 		geo.setGlobalAttribValue("map_materialsets_styles_dict", map_materialsets.styles_dict)
 
 def button_vmf_load_entity_dict():
-	vmf_load_entity_dict()			
+	run_asset_loader(vmf_load_entity_dict)			
 def button_t3d_load_class_dict():
-	t3d_load_class_dict()
+	run_asset_loader(t3d_load_class_dict)
 def button_map_load_entity_dict():
-	map_load_entity_dict()	
+	run_asset_loader(map_load_entity_dict)	
 	
 def button_vmf_load_materials():
-	vmf_load_materials()	
+	run_asset_loader(vmf_load_materials)	
 def button_t3d_load_materials():
-	t3d_load_materials()		
+	run_asset_loader(t3d_load_materials)		
 def button_map_load_materials():
-	map_load_materials()
+	run_asset_loader(map_load_materials)
 	
 def button_vmf_load_materialsets():
-	vmf_load_materialsets()	
+	run_asset_loader(vmf_load_materialsets)	
 def button_t3d_load_materialsets():
-	t3d_load_materialsets()		
+	run_asset_loader(t3d_load_materialsets)		
 def button_map_load_materialsets():
-	map_load_materialsets()	
+	run_asset_loader(map_load_materialsets)	
 
 #hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule().vmf_start_materialsets_editor()
 def vmf_start_materialsets_editor():
@@ -462,34 +489,58 @@ def map_start_materialsets_editor():
 	pass
 	#pmt_qw_materialsets_editor.MaterialSetsEditorWindow("map")
 
-#OnInstall seems to run twice on load, so manually check whether assets are loaded
-assets_loaded = False
-def load_assets():
-	global assets_loaded
-	if assets_loaded: 
-		print("pmt::pmt__globalconfig load_assets() already loaded.")
-		return
-	
-	print("pmt::pmt__globalconfig load_assets()")
-	assets_loaded = True
-	
-	vmf_load_entity_dict()
-	t3d_load_class_dict()
-	map_load_entity_dict()
+### Lazy asset loading
+#The assets are loaded on first use instead of in OnInstall, so only the assets of the engines that are used are loaded.
+#Code that reads an asset gets it with get_asset(), e.g. hdaModule().get_asset("vmf_materialdb"), which runs its loader
+#if the asset is still None. Plain reads (hdaModule().vmf_materialdb) get None until the asset is loaded.
+#The menus are filled by the loader of their entity or class dict, see MENU_ASSETS.
+ASSET_LOADERS = {
+	"vmf_entity_dict" : vmf_load_entity_dict,
+	"t3d_unrealscript_defs" : t3d_load_class_dict,
+	"map_entity_dict" : map_load_entity_dict,
+	"vmf_materialdb" : vmf_load_materials,
+	"t3d_materialdb" : t3d_load_materials,
+	"map_materialdb" : map_load_materials,
+	"vmf_materialsets" : vmf_load_materialsets,
+	"t3d_materialsets" : t3d_load_materialsets,
+	"map_materialsets" : map_load_materialsets,
+	"vmf_sounddb" : vmf_load_sounds,
+	"t3d_sounddb" : t3d_load_sounds,
+	"map_sounddb" : map_load_sounds,
+	"t3d_meshdb" : t3d_load_meshes,
+}
 
-	vmf_load_materials()
-	t3d_load_materials()
-	map_load_materials()
-	
-	vmf_load_materialsets()
-	t3d_load_materialsets()
-	map_load_materialsets()
-	
-	vmf_load_sounds()
-	t3d_load_sounds()
-	map_load_sounds()
+#The entity and class dicts whose loaders fill the parameter menus of the nodes (vmf_all_entity_menu, ...).
+#The menu scripts read the menus directly, so OnInstall loads these with load_assets(MENU_ASSETS).
+MENU_ASSETS = ["vmf_entity_dict", "t3d_unrealscript_defs", "map_entity_dict"]
+
+#loader name -> seconds of its last run
+asset_load_times = dict()
+
+#Runs loader and prints how long it took
+def run_asset_loader(loader):
+	start_time = time.perf_counter()
+	loader()
+	asset_load_times[loader.__name__] = time.perf_counter() - start_time
+	print("pmt::pmt__globalconfig {}() took {:.2f}s".format(loader.__name__, asset_load_times[loader.__name__]))
+
+#Returns the asset with the name of its global in ASSET_LOADERS, and runs its loader if it is not loaded yet
+def get_asset(name):
+	module_globals = globals()
+	if module_globals[name] == None:
+		run_asset_loader(ASSET_LOADERS[name])
+	return module_globals[name]
+
+#Loads the assets in names (all of ASSET_LOADERS by default) that are not loaded yet, e.g. before a batch job that uses all engines
+def load_assets(names = None):
+	if names == None:
+		names = list(ASSET_LOADERS)
+	print("pmt::pmt__globalconfig load_assets({})".format(", ".join(names)))
 	
-	t3d_load_meshes()
+	start_time = time.perf_counter()
+	for name in names:
+		get_asset(name)
+	print("pmt::pmt__globalconfig load_assets() took {:.2f}s".format(time.perf_counter() - start_time))
 	
 #menu script to get choices - run this in the parameter's menu script
 # def menu_script():
@@ -504,6 +555,7 @@ def load_assets():
 	# type = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config")
 	# return type.hdaModule().get_choices_list(entity, choices_name)
 def get_choices_list(entity_class, prop_name):
+	vmf_entity_dict = get_asset("vmf_entity_dict")
 	if vmf_entity_dict == None:
 		print("PMT:error: get_choices_list() vmf_entity_dict is None")
 		return []
@@ -2,6 +2,7 @@
 #
 
 import math
+import numpy
 
 LARGE_FLOAT = 1e15
 
@@ -211,24 +212,22 @@ def extract_uv_data(hou_primitive):
 	uv_data.t3d_uv_offset = t3d_offset
 	return uv_data
 
+#Deprecated: use pmt_common_format.TAB, NEWLINE, LINS() and LINE().
 TAB = "\t"
 NEWLINE = "\n"
 
-#Returns string in format:	[\t + \t + ... + \t] + string + \n
+#pmt_common_format is resolved on call, as pmt_common is loaded before it (see pmt__global_config PythonModule)
+def get_pmt_common_format():
+	if IN_HOUDINI:
+		return hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule().pmt_common_format
+	import pmt_common_format
+	return pmt_common_format
+
 def LINS(num_tabs, string):
-	out = ""
-	for i in range(num_tabs):
-		out += TAB
-	out += string + NEWLINE
-	return out
+	return get_pmt_common_format().LINS(num_tabs, string)
 	
-#Returns string in format:	[\t + \t + ... + \t] + "key" + " " + "value" + \n
 def LINE(num_tabs, key, value):
-	out = ""
-	for i in range(num_tabs):
-		out += TAB
-	out += "\"" + key + "\" \"" + value + "\"" + NEWLINE
-	return out
+	return get_pmt_common_format().LINE(num_tabs, key, value)
 	
 #BulletPhysics bullet\src\LinearMath\btVector3.h
 def btPlaneSpace1(normal, EPSILON = 0.0001):
@@ -266,24 +265,188 @@ def btPlaneSpace1(normal, EPSILON = 0.0001):
 	q2 = (q[0], q[1], q[2])
 	return (p2, q2)
 
+#Batch version of btPlaneSpace1() that computes the basis of all normals in one pass.
+#	normals: array with shape (N, 3)
+#	skip: optional bool array with shape (N,); rows set to True are not computed (e.g. sides with explicit uv data)
+#	prim_indices: optional array with shape (N,) used to report invalid normals; the row index is used if None
+#Returns (p, q, invalid_prim_indices):
+#	p, q: arrays with shape (N, 3); skipped and invalid rows are set to 0
+#	invalid_prim_indices: prim_indices of the rows that are not skipped and have a zero length normal
+#	(same condition as btPlaneSpace1() returning None)
+def btPlaneSpace1_batch(normals, skip = None, prim_indices = None, EPSILON = 0.0001):
+	normals = numpy.asarray(normals, dtype = numpy.float64).reshape(-1, 3)
+	num_normals = normals.shape[0]
+	nx = normals[:, 0]
+	ny = normals[:, 1]
+	nz = normals[:, 2]
+	
+	p = numpy.zeros((num_normals, 3), dtype = numpy.float64)
+	q = numpy.zeros((num_normals, 3), dtype = numpy.float64)
+	
+	in_yz_plane = numpy.abs(nz) > math.sqrt(1.0 / 2.0)
+	a = numpy.where(in_yz_plane, ny*ny + nz*nz, nx*nx + ny*ny)
+	
+	invalid = a < EPSILON
+	active = ~invalid
+	if skip is not None:
+		skip = numpy.asarray(skip, dtype = bool)
+		invalid &= ~skip
+		active &= ~skip
+	
+	k = numpy.zeros(num_normals, dtype = numpy.float64)
+	k[active] = 1.0 / numpy.sqrt(a[active])
+	
+	#choose p in y-z plane
+	yz = active & in_yz_plane
+	p[yz, 1] = -nz[yz]*k[yz]
+	p[yz, 2] = ny[yz]*k[yz]
+	# set q = n x p
+	q[yz, 0] = a[yz]*k[yz]
+	q[yz, 1] = -nx[yz]*p[yz, 2]
+	q[yz, 2] = nx[yz]*p[yz, 1]
+	
+	# choose p in x-y plane
+	xy = active & ~in_yz_plane
+	p[xy, 0] = -ny[xy]*k[xy]
+	p[xy, 1] = nx[xy]*k[xy]
+	# set q = n x p
+	q[xy, 0] = -nz[xy]*p[xy, 1]
+	q[xy, 1] = nz[xy]*p[xy, 0]
+	q[xy, 2] = a[xy]*k[xy]
+	
+	invalid_rows = numpy.nonzero(invalid)[0]
+	invalid_prim_indices = invalid_rows if prim_indices is None else numpy.asarray(prim_indices)[invalid_rows]
+	return (p, q, invalid_prim_indices)
+
 import datetime
 import time
 def TIME(): 
 	date_time = datetime.datetime.utcfromtimestamp( time.time() )
 	return str(date_time) + (".000000" if date_time.microsecond == 0 else "")
 
-import hou
+#Profiling
+#	HOUPROFILE: a profile (hou.perfMon profile in Houdini), e.g. one export; collects stages and counters until it is deleted
+#	HOUPROFILE_EVENT, HOUPROFILE_EVENT_DECO: a stage (hou.perfMon event in Houdini), e.g. extract_export_data()
+#	HOUPROFILE_COUNT_DECO: for functions that are called in a hot loop, e.g. once per prim; only the number of calls
+#	and the cumulative time are counted, in the stage that calls them, so the profiler does not slow down the loop it measures.
+#When a HOUPROFILE is deleted, the time of each stage and the counters are printed.
+#HOUPROFILE(trace_path = "...json") also writes the stages as a Chrome trace (chrome://tracing, https://www.speedscope.app)
+#with the counters as arguments of each stage; stages and counters are collected outside of Houdini too.
+import sys
+import os
+import json
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+
+#The modules of an HDA can not be imported by name, so the worker processes of the exporters and importers import
+#their copies in \scripts, which is next to the \hda folder of the libraries (\pmt\hda\*.hdalc and \pmt\scripts\script_folder\).
+#Returns the path of \scripts\script_folder\ next to the library of the HDA node_type_name, e.g.
+#get_hda_scripts_path("pmt::pmt_vmf_export", "pmt_vmf_export"); outside of Houdini, next to this module.
+def get_hda_scripts_path(node_type_name, script_folder):
+	if IN_HOUDINI:
+		library_path = hou.nodeType(hou.sopNodeTypeCategory(), node_type_name).definition().libraryFilePath().replace("\\", "/")
+		pmt_path = os.path.dirname(os.path.dirname(library_path))
+	else:
+		pmt_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+	return os.path.normpath(os.path.join(pmt_path, "scripts", script_folder)).replace("\\", "/") + "/"
+
+#Collected by the active HOUPROFILE
+class HouProfileState:
+	def __init__(self):
+		self.active = False			#True while a HOUPROFILE is collecting
+		self.start_time = 0.0
+		self.stages = list()		#open stages; each is [name, start time, counters]
+		self.counters = dict()		#counters outside of any stage
+		self.trace_events = list()	#Chrome trace events of closed stages
+		self.totals = dict()		#stage path (tuple of names) -> [num_calls, seconds], for the summary
+
+	def current_counters(self):
+		return self.stages[-1][2] if len(self.stages) > 0 else self.counters
+
+	def add_total(self, path, num_calls, seconds):
+		total = self.totals.get(path)
+		if total == None:
+			self.totals[path] = [num_calls, seconds]
+		else:
+			total[0] += num_calls
+			total[1] += seconds
+
+	def begin_stage(self, name):
+		stage = [name, time.perf_counter(), dict()]
+		self.stages.append(stage)
+		return stage
+
+	def end_stage(self):
+		name, start, counters = self.stages.pop()
+		end = time.perf_counter()
+		path = tuple([stage[0] for stage in self.stages]) + (name,)
+		self.add_total(path, 1, end - start)
+		for counter_name, (num_calls, seconds) in counters.items():
+			self.add_total(path + (counter_name,), num_calls, seconds)
+
+		args = { counter_name : { "calls" : num_calls, "ms" : round(seconds * 1000.0, 3) } for counter_name, (num_calls, seconds) in counters.items() }
+		self.trace_events.append({
+			"name" : name, "ph" : "X", "pid" : os.getpid(), "tid" : 0,
+			"ts" : (start - self.start_time) * 1e6, "dur" : (end - start) * 1e6, "args" : args,
+		})
+
+HOUPROFILE_STATE = HouProfileState()
+
+#Only the outermost HOUPROFILE collects stages and counters
 class HOUPROFILE:
-	def __init__(self, profile_name, debug_print = False):
+	def __init__(self, profile_name, debug_print = False, trace_path = None):
 		profile_name += " " + TIME()
 		self.debug_print = debug_print
 		self.name = profile_name
+		self.trace_path = trace_path
 		
-		self.profile = hou.perfMon.startProfile(self.name)
+		self.profile = hou.perfMon.startProfile(self.name) if IN_HOUDINI else None
+		self.is_stopped = False
+		self.is_collecting = not HOUPROFILE_STATE.active
+		if self.is_collecting:
+			HOUPROFILE_STATE.__init__()
+			HOUPROFILE_STATE.active = True
+			HOUPROFILE_STATE.start_time = time.perf_counter()
 		if self.debug_print: print("HOUPROFILE {0}".format(self.name))
 	def __del__(self): 
-		self.profile.stop()
+		self.stop()
+	
+	#Also used as a context manager (with HOUPROFILE(...):), so the profile stops even if an exception is raised
+	def __enter__(self):
+		return self
+	def __exit__(self, type, value, tb):
+		self.stop()
+	
+	def stop(self):
+		if self.is_stopped:
+			return
+		self.is_stopped = True
+		if self.profile != None: self.profile.stop()
+		if self.is_collecting:
+			while len(HOUPROFILE_STATE.stages) > 0:
+				HOUPROFILE_STATE.end_stage()
+			HOUPROFILE_STATE.active = False
+			self.print_summary()
+			if self.trace_path != None:
+				self.write_trace(self.trace_path)
 		if self.debug_print: print("~HOUPROFILE {0}".format(self.name))
+	
+	def print_summary(self):
+		total_time = time.perf_counter() - HOUPROFILE_STATE.start_time
+		print("HOUPROFILE {0}: {1:.3f} s".format(self.name, total_time))
+		for counter_name, (num_calls, seconds) in HOUPROFILE_STATE.counters.items():
+			print("\t{0}: {1} calls, {2:.3f} s".format(counter_name, num_calls, seconds))
+		#Sorted paths list each stage before its children
+		for path in sorted(HOUPROFILE_STATE.totals):
+			num_calls, seconds = HOUPROFILE_STATE.totals[path]
+			print("{0}{1}: {2} calls, {3:.3f} s".format("\t" * len(path), path[-1], num_calls, seconds))
+	
+	def write_trace(self, trace_path):
+		trace = { "traceEvents" : HOUPROFILE_STATE.trace_events, "displayTimeUnit" : "ms", "otherData" : { "profile" : self.name } }
+		with open(trace_path, "w") as trace_file:
+			json.dump(trace, trace_file)
+		print("HOUPROFILE trace written to {0}".format(trace_path))
 		
 class HOUPROFILE_EVENT:
 	def __init__(self, event_name, debug_print = False):
@@ -291,11 +454,15 @@ class HOUPROFILE_EVENT:
 		self.name = event_name
 		
 	def __enter__(self):
-		self.event = hou.perfMon.startEvent(self.name)
+		self.event = hou.perfMon.startEvent(self.name) if IN_HOUDINI else None
+		#The stage this event began, if any; the profile may stop (and close it) before the event exits
+		self.began = HOUPROFILE_STATE.begin_stage(self.name) if HOUPROFILE_STATE.active else None
 		if self.debug_print: print("HOUPROFILE_EVENT {0}".format(self.name))
 	
 	def __exit__(self, type, value, tb):
-		self.event.stop()
+		stages = HOUPROFILE_STATE.stages
+		if self.began != None and len(stages) > 0 and stages[-1] is self.began: HOUPROFILE_STATE.end_stage()
+		if self.event != None: self.event.stop()
 		if self.debug_print: print("~HOUPROFILE_EVENT {0}".format(self.name))
 		
 #def HOUPROFILE_DECO(function):
@@ -309,4 +476,24 @@ def HOUPROFILE_EVENT_DECO(function):
 		with HOUPROFILE_EVENT(function.__name__):
 			return function(*args, **keywords)
 	return wrapper
-	
\ No newline at end of file
+
+#Use instead of HOUPROFILE_EVENT_DECO for functions called once per prim/point/line
+def HOUPROFILE_COUNT_DECO(function):
+	name = function.__name__
+	perf_counter = time.perf_counter
+	def wrapper(*args, **keywords):
+		if not HOUPROFILE_STATE.active:
+			return function(*args, **keywords)
+		start = perf_counter()
+		try:
+			return function(*args, **keywords)
+		finally:
+			seconds = perf_counter() - start
+			counters = HOUPROFILE_STATE.current_counters()
+			counter = counters.get(name)
+			if counter == None:
+				counters[name] = [1, seconds]
+			else:
+				counter[0] += 1
+				counter[1] += seconds
+	return wrapper
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_blockindex
+#	script_section_name: 	pmt_common_blockindex.py
+#
+# Offset index of the bracket blocks of a .vmf or .map file, for reading a few blocks without reading the whole file.
+# The file is memory-mapped, and one scan over its bytes finds the opening and closing bracket of each top-level block
+# and of the blocks nested directly inside them (e.g. the solids of the world in a .vmf, the primitives of an entity in a .map);
+# brackets in quotes and // comments are skipped. The text of a block is only decoded when it is requested.
+#
+#	with pmt_common_blockindex.BlockIndex("c:/maps/a.vmf", quotes = "\"\'") as index:
+#		for block in index.blocks:
+#			if block.keyword == "entity" and index.find_key(block, "classname", "cp1252") == "light":
+#				text = index.text(block, "cp1252")		#"{\n\t\"id\" \"2\"\n ...}"
+
+import re
+import mmap
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+#Max number of bytes before an opening bracket that are searched for its keyword
+KEYWORD_MAX_LENGTH = 64
+
+#Chars that end the keyword of a block, see BlockIndex.keyword_before()
+KEYWORD_DELIMITERS = re.compile(rb"[\s{}\"\'()]")
+
+#start and end are the byte offsets of the opening bracket and one past the closing bracket,
+#so index.data[block.start:block.end] is "{ ... }".
+#keyword is the word right before the opening bracket (lowercase), or None; only meaningful for formats with named blocks,
+#e.g. 'entity' or 'solid' in a .vmf (the entities of a .map have no keyword, see pmt_map_import.MapReader).
+#children are the blocks nested directly inside the block; only set for top-level blocks.
+class Block:
+	__slots__ = ("keyword", "start", "end", "children")
+	def __init__(self, keyword, start):
+		self.keyword = keyword
+		self.start = start
+		self.end = None
+		self.children = list()
+
+#quotes and line_comments should match the pmt_common_lexer.Lexer of the format, e.g. quotes = "\"\'" for .vmf and .map
+class BlockIndex:
+	def __init__(self, path, quotes = "\"", line_comments = True):
+		self.path = path
+		self.file = open(path, "rb")
+		self.data = b""
+		self.blocks = list()		#top-level blocks, in the order of the file
+
+		#One match for each bracket; the text in between (strings, comments and other chars) is consumed by the regex engine.
+		#Each alternative starts with a different char, so a failed match does not backtrack into the text before it.
+		skipped_chars = "".join([re.escape(c) for c in quotes]) + "{}/"
+		skipped = ["{0}[^{0}]*{0}".format(re.escape(q)) for q in quotes]
+		if line_comments:
+			skipped.append("//[^\\n]*")
+		skipped.append("/(?!/)" if line_comments else "/")
+		bracket_pattern = "[^{0}]*(?:(?:{1})[^{0}]*)*([{{}}])".format(skipped_chars, "|".join(skipped))
+		
+		#The file is closed if it can not be indexed, e.g. unbalanced brackets
+		try:
+			#mmap can not map an empty file
+			if len(self.file.read(1)) != 0:
+				self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+			self.scan(re.compile(bracket_pattern.encode("ascii")))
+		except:
+			self.close()
+			raise
+
+	def scan(self, bracket_regex):
+		data = self.data
+		depth = 0
+		block = None		#open top-level block
+		child = None		#open block at depth 2
+		for m in bracket_regex.finditer(data):
+			pos = m.start(1)
+			if m.group(1) == b"{":
+				depth += 1
+				if depth == 1:
+					block = Block(self.keyword_before(pos), pos)
+					self.blocks.append(block)
+				elif depth == 2:
+					child = Block(self.keyword_before(pos), pos)
+					block.children.append(child)
+			else:
+				assert depth > 0, CCF(self, CF()) + ": unexpected '}}' at byte {} in {}".format(pos, self.path)
+				if depth == 1:
+					block.end = pos + 1
+				elif depth == 2:
+					child.end = pos + 1
+				depth -= 1
+		assert depth == 0, CCF(self, CF()) + ": no closing bracket for the block at byte {} in {}".format(block.start, self.path)
+
+	#The keyword of a block is the word right before its opening bracket, e.g. 'solid' in 'solid\n{'
+	def keyword_before(self, pos):
+		before = self.data[max(0, pos - KEYWORD_MAX_LENGTH):pos].rstrip()
+		keyword = KEYWORD_DELIMITERS.split(before)[-1]
+		if len(keyword) == 0:
+			return None
+		return keyword.decode("ascii", "replace").lower()
+
+	#Returns the decoded text of block, from its opening to its closing bracket
+	def text(self, block, codec):
+		return self.data[block.start:block.end].decode(codec)
+
+	#Returns the decoded text of block without the text of its children, e.g. only the keyvalues of a .map entity
+	def text_without_children(self, block, codec):
+		data = self.data
+		parts = list()
+		start = block.start
+		for child in block.children:
+			parts.append(data[start:child.start])
+			start = child.end
+		parts.append(data[start:block.end])
+		return b"".join(parts).decode(codec)
+
+	#Returns the value of the first "key" "value" pair of block that is not inside one of its children, or None;
+	#a cheap way to read e.g. the classname of an entity without decoding the block.
+	def find_key(self, block, key, codec, ignore_case = False):
+		key_regex = re.compile(b"\"" + re.escape(key.encode(codec)) + b"\"\\s+\"([^\"]*)\"", re.IGNORECASE if ignore_case else 0)
+		for m in key_regex.finditer(self.data, block.start, block.end):
+			if not any([child.start < m.start() < child.end for child in block.children]):
+				return m.group(1).decode(codec)
+		return None
+
+	def close(self):
+		if isinstance(self.data, mmap.mmap):
+			self.data.close()
+		self.data = b""
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
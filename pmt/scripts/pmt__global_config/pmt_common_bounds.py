@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_bounds
+#	script_section_name: 	pmt_common_bounds.py
+#
+# Axis-aligned bounding boxes of the brushes and entities of a parsed file, for importing only a region of a large map.
+# The boxes of a file are computed once from its parsed result (see the get_bounds_cache() of the importers) and stored
+# in the parse cache next to it, so the next imports of the file only test the boxes against the region and skip the
+# blocks outside of it before any of their geometry is built.
+#
+# Boxes are arrays (mins, maxs) with shape (N, 3), in the space of the imported geometry.
+#
+#	region = pmt_common_bounds.Region((-512, -512, 0), (512, 512, 256))
+#	(mins, maxs) = pmt_common_bounds.point_bounds([(0, 0, 64), (1024, 0, 64)])
+#	region.overlaps(mins, maxs)		#[True, False]
+
+import numpy
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+#An axis-aligned box, e.g. the bounds of the room to import; boxes that touch it overlap it
+class Region:
+	def __init__(self, minimum, maximum):
+		self.minimum = numpy.asarray(minimum, dtype = numpy.float64).reshape(3)
+		self.maximum = numpy.asarray(maximum, dtype = numpy.float64).reshape(3)
+		assert numpy.all(self.minimum <= self.maximum), CCF(self, CF()) + ": minimum {} is above maximum {}".format(self.minimum.tolist(), self.maximum.tolist())
+
+	#Returns a list of bool, True for each box (mins[i], maxs[i]) that overlaps the region; empty boxes overlap no region
+	def overlaps(self, mins, maxs):
+		mins = numpy.asarray(mins, dtype = numpy.float64).reshape(-1, 3)
+		maxs = numpy.asarray(maxs, dtype = numpy.float64).reshape(-1, 3)
+		return numpy.all((mins <= self.maximum) & (maxs >= self.minimum), axis = 1).tolist()
+
+#Returns (mins, maxs) of num_boxes empty boxes, with min = inf and max = -inf, so that the union with any box is that box
+def empty_bounds(num_boxes):
+	return (numpy.full((num_boxes, 3), numpy.inf), numpy.full((num_boxes, 3), -numpy.inf))
+
+#Returns (mins, maxs) of a box around each point of points, e.g. the origins of point entities
+def point_bounds(points):
+	points = numpy.asarray(points, dtype = numpy.float64).reshape(-1, 3)
+	return (points.copy(), points.copy())
+
+#Returns (mins, maxs) of num_groups boxes, where box j is the union of the boxes i with box_groups[i] == j;
+#e.g. the box of each entity from the boxes of its brushes. Groups without boxes are empty.
+def union_bounds(mins, maxs, box_groups, num_groups):
+	(union_mins, union_maxs) = empty_bounds(num_groups)
+	box_groups = numpy.asarray(box_groups, dtype = numpy.int64).reshape(-1)
+	numpy.minimum.at(union_mins, box_groups, numpy.asarray(mins, dtype = numpy.float64).reshape(-1, 3))
+	numpy.maximum.at(union_maxs, box_groups, numpy.asarray(maxs, dtype = numpy.float64).reshape(-1, 3))
+	return (union_mins, union_maxs)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_brush
+#	script_section_name: 	pmt_common_brush.py
+#
+# Convex polygons of brushes that are defined by planes (half-spaces), for the importers.
+# The vertices of a brush are the intersections of each triple of its planes that are inside all of its planes, one for each set of planes they are on;
+# the vertices on each plane are ordered by their angle around the center of the face.
+# Brushes with the same number of planes are computed together with NumPy, in batches of up to BATCH_SIZE values.
+#
+#	(normals, distances) = pmt_common_brush.planes_from_points(a, b, c)
+#	brush_polygons = pmt_common_brush.build_brush_polygons(normals, distances, [6, 6, 5])
+#	for (plane_index, vertex_indices) in brush_polygons.polygons():
+#		...
+
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = PMT__G_CFG.pmt_common
+else:
+	import pmt_common
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
+import itertools
+import numpy
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+#Distance (in units) up to which a vertex is inside or on a plane
+BRUSH_EPSILON = 0.01
+
+#Triples of planes with abs(determinant) below this are (nearly) parallel and have no vertex
+DETERMINANT_EPSILON = 1e-6
+
+#Planes of a brush with a dot product of their normals above this and distances within epsilon are the same plane
+DUPLICATE_PLANE_DOT = 1.0 - 1e-6
+
+#Max number of (brush, triple, plane) values computed at once
+BATCH_SIZE = 1 << 22
+
+#Returns (normals, distances) of the planes through the points a, b, c of each row (arrays with shape (N, 3)), as the sides of a .vmf.
+#The points are clockwise when viewed from outside of the brush, like the vertices of a Houdini polygon, so the normals point outwards.
+def planes_from_points(a, b, c):
+	a = numpy.asarray(a, dtype = numpy.float64).reshape(-1, 3)
+	b = numpy.asarray(b, dtype = numpy.float64).reshape(-1, 3)
+	c = numpy.asarray(c, dtype = numpy.float64).reshape(-1, 3)
+	normals = numpy.cross(c - a, b - a)
+	lengths = numpy.linalg.norm(normals, axis = 1)
+	normals /= numpy.where(lengths > 0.0, lengths, 1.0)[:, None]
+	distances = numpy.einsum("ij,ij->i", normals, a)
+	return (normals, distances)
+
+#Result of build_brush_polygons()
+#	positions: array with shape (num_vertices, 3); the vertices of each brush are consecutive and are shared by its polygons
+#	vertex_brushes: array with shape (num_vertices,); brush index of each vertex
+#	polygon_planes: array with shape (num_polygons,); plane index of each polygon, in increasing order.
+#		Planes that do not touch their brush (e.g. a plane outside of the brush) and duplicates of an earlier plane of their brush have no polygon.
+#	polygon_vertex_counts: array with shape (num_polygons,)
+#	polygon_vertices: array with shape (sum(polygon_vertex_counts),); vertex indices of each polygon,
+#		clockwise when viewed from outside of the brush (the order of Houdini polygons)
+class BrushPolygons:
+	def __init__(self):
+		self.positions = numpy.zeros((0, 3), dtype = numpy.float64)
+		self.vertex_brushes = numpy.zeros(0, dtype = numpy.int64)
+		self.polygon_planes = numpy.zeros(0, dtype = numpy.int64)
+		self.polygon_vertex_counts = numpy.zeros(0, dtype = numpy.int64)
+		self.polygon_vertices = numpy.zeros(0, dtype = numpy.int64)
+
+	#Yields (plane_index, list of vertex indices) of each polygon
+	def polygons(self):
+		vertices = self.polygon_vertices.tolist()
+		start = 0
+		for plane_index, count in zip(self.polygon_planes.tolist(), self.polygon_vertex_counts.tolist()):
+			yield (plane_index, vertices[start:start + count])
+			start += count
+
+TRIPLES_CACHE = dict()
+def plane_triples(num_planes):
+	triples = TRIPLES_CACHE.get(num_planes)
+	if triples is None:
+		triples = numpy.array(list(itertools.combinations(range(num_planes), 3)), dtype = numpy.int64).reshape(-1, 3)
+		TRIPLES_CACHE[num_planes] = triples
+	return triples
+
+#Returns the candidate vertices of the brushes in brush_indices; plane_indices is an array with shape (num_brushes, num_planes)
+#of the planes of each brush, so all brushes have the same number of planes.
+#A candidate vertex is an intersection of 3 planes that is inside all planes of its brush.
+#Returns (positions, brush index of each vertex, on_plane, plane_indices of the brush of each vertex), where
+#on_plane is a bool array with shape (num_vertices, num_planes) of the planes each vertex is on, within epsilon;
+#no vertex is on a plane that is a duplicate of an earlier plane of its brush, so only the first one gets a polygon.
+def brush_vertices(normals, distances, brush_indices, plane_indices, epsilon):
+	triples = plane_triples(plane_indices.shape[1])
+	N = normals[plane_indices]						#(num_brushes, num_planes, 3)
+	D = distances[plane_indices]					#(num_brushes, num_planes)
+
+	A = N[:, triples]								#(num_brushes, num_triples, 3, 3)
+	solvable = numpy.abs(numpy.linalg.det(A)) > DETERMINANT_EPSILON
+	A[~solvable] = numpy.eye(3)
+	V = numpy.linalg.solve(A, D[:, triples][..., None])[..., 0]		#(num_brushes, num_triples, 3)
+
+	plane_distances = numpy.einsum("bpj,btj->btp", N, V) - D[:, None, :]
+	inside = solvable & numpy.all(plane_distances <= epsilon, axis = 2)
+	(vertex_brushes, vertex_triples) = numpy.nonzero(inside)
+	same = (numpy.einsum("bij,bkj->bik", N, N) >= DUPLICATE_PLANE_DOT) & (numpy.abs(D[:, :, None] - D[:, None, :]) <= epsilon)
+	duplicate = numpy.any(same & numpy.tri(N.shape[1], k = -1, dtype = bool), axis = 2)		#(num_brushes, num_planes)
+	on_plane = (numpy.abs(plane_distances[vertex_brushes, vertex_triples]) <= epsilon) & ~duplicate[vertex_brushes]		#(num_vertices, num_planes)
+	return (V[vertex_brushes, vertex_triples], brush_indices[vertex_brushes], on_plane, plane_indices[vertex_brushes])
+
+#Returns (normals, distances, brush_plane_counts) as arrays, with unit normals
+def normalized_planes(normals, distances, brush_plane_counts):
+	normals = numpy.asarray(normals, dtype = numpy.float64).reshape(-1, 3)
+	distances = numpy.asarray(distances, dtype = numpy.float64).reshape(-1)
+	brush_plane_counts = numpy.asarray(brush_plane_counts, dtype = numpy.int64).reshape(-1)
+	assert int(brush_plane_counts.sum()) == normals.shape[0], CURFUNC(CF()) + ": brush_plane_counts do not add up to the number of planes"
+
+	lengths = numpy.linalg.norm(normals, axis = 1)
+	lengths[lengths == 0.0] = 1.0
+	return (normals / lengths[:, None], distances / lengths, brush_plane_counts)
+
+#Returns the candidate vertices of all brushes (see brush_vertices()) as (positions, brush index of each candidate, vertex_planes, candidate_corners):
+#	vertex_planes: array with shape (N, 2) of (candidate index, plane index) of each plane a candidate is on
+#	candidate_corners: corner index of each candidate. The candidates of a brush that are on the same set of planes are the same corner,
+#		e.g. the 4 candidates of the apex of a square pyramid; the positions of the candidates of a corner are within epsilon of its planes.
+#normals and distances must be normalized, see normalized_planes()
+def all_brush_vertices(normals, distances, brush_plane_counts, epsilon):
+	plane_starts = numpy.cumsum(brush_plane_counts) - brush_plane_counts
+	all_positions = list()
+	all_brushes = list()
+	all_vertex_planes = list()
+	all_corners = list()
+	num_candidates = 0
+	num_corners = 0
+	for plane_count in numpy.unique(brush_plane_counts).tolist():
+		if plane_count < 4:
+			continue
+		brushes_with_count = numpy.nonzero(brush_plane_counts == plane_count)[0]
+		batch_brushes = max(1, BATCH_SIZE // (len(plane_triples(plane_count)) * plane_count))
+		for batch_start in range(0, len(brushes_with_count), batch_brushes):
+			brush_indices = brushes_with_count[batch_start:batch_start + batch_brushes]
+			plane_indices = plane_starts[brush_indices][:, None] + numpy.arange(plane_count)
+			(positions, vertex_brushes, on_plane, vertex_plane_indices) = brush_vertices(normals, distances, brush_indices, plane_indices, epsilon)
+			(rows, columns) = numpy.nonzero(on_plane)
+			all_vertex_planes.append( numpy.stack([rows + num_candidates, vertex_plane_indices[rows, columns]], axis = 1) )
+			all_positions.append(positions)
+			all_brushes.append(vertex_brushes)
+			num_candidates += len(positions)
+			
+			#corners: (brush index, bits of on_plane) as an int64, or as rows of bytes if that does not fit
+			if plane_count + len(brush_indices).bit_length() <= 62:
+				corner_keys = (numpy.searchsorted(brush_indices, vertex_brushes) << plane_count) | (on_plane @ (1 << numpy.arange(plane_count, dtype = numpy.int64)))
+				(unique_keys, candidate_corners) = numpy.unique(corner_keys, return_inverse = True)
+			else:
+				corner_keys = numpy.concatenate([vertex_brushes.astype(numpy.int64)[:, None].view(numpy.uint8), numpy.packbits(on_plane, axis = 1)], axis = 1)
+				(unique_keys, candidate_corners) = numpy.unique(corner_keys, axis = 0, return_inverse = True)
+			all_corners.append(candidate_corners.reshape(-1) + num_corners)
+			num_corners += len(unique_keys)
+
+	if num_candidates == 0:
+		return (numpy.zeros((0, 3), dtype = numpy.float64), numpy.zeros(0, dtype = numpy.int64), numpy.zeros((0, 2), dtype = numpy.int64), numpy.zeros(0, dtype = numpy.int64))
+	return (numpy.concatenate(all_positions), numpy.concatenate(all_brushes), numpy.concatenate(all_vertex_planes), numpy.concatenate(all_corners))
+
+#Intersects the half-spaces (normal . x <= distance) of each brush and returns its convex polygons as a BrushPolygons.
+#	normals, distances: arrays with shape (num_planes, 3) and (num_planes,); the normals point out of the brush
+#	brush_plane_counts: number of planes of each brush; the planes of each brush are consecutive
+#Brushes with less than 4 planes are not closed and have no polygons.
+@pmt_common.HOUPROFILE_EVENT_DECO
+def build_brush_polygons(normals, distances, brush_plane_counts, epsilon = BRUSH_EPSILON):
+	(normals, distances, brush_plane_counts) = normalized_planes(normals, distances, brush_plane_counts)
+
+	#candidate vertices and the planes each one is on, for all brushes
+	(positions, candidate_brushes, vertex_planes, candidate_corners) = all_brush_vertices(normals, distances, brush_plane_counts, epsilon)
+
+	brush_polygons = BrushPolygons()
+	if len(positions) == 0:
+		return brush_polygons
+
+	#one vertex for each corner, e.g. of 4 or more planes, at its first candidate;
+	#sorting by brush keeps the vertices of each brush consecutive
+	(corners, first_candidates) = numpy.unique(candidate_corners, return_index = True)
+	vertex_order = numpy.argsort(candidate_brushes[first_candidates], kind = "stable")
+	corner_vertices = numpy.empty(len(corners), dtype = numpy.int64)
+	corner_vertices[vertex_order] = numpy.arange(len(corners))
+	candidate_vertices = corner_vertices[candidate_corners]
+	brush_polygons.positions = positions[first_candidates[vertex_order]]
+	brush_polygons.vertex_brushes = candidate_brushes[first_candidates[vertex_order]]
+
+	#each vertex once per plane
+	num_vertices = len(corners)
+	pair_keys = numpy.unique(vertex_planes[:, 1] * num_vertices + candidate_vertices[vertex_planes[:, 0]])
+	pair_planes = pair_keys // num_vertices
+	pair_vertices = pair_keys % num_vertices
+
+	#planes with less than 3 vertices only touch their brush at an edge or a corner
+	(planes, plane_vertex_counts) = numpy.unique(pair_planes, return_counts = True)
+	face_planes = planes[plane_vertex_counts >= 3]
+	keep = numpy.isin(pair_planes, face_planes)
+	pair_planes = pair_planes[keep]
+	pair_vertices = pair_vertices[keep]
+	(face_planes, pair_faces, face_vertex_counts) = numpy.unique(pair_planes, return_inverse = True, return_counts = True)
+	pair_faces = pair_faces.reshape(-1)
+
+	#angle of each vertex around the center of its face, in the basis (p, q) of the plane, where q = normal x p
+	pair_positions = brush_polygons.positions[pair_vertices]
+	centers = numpy.stack([numpy.bincount(pair_faces, weights = pair_positions[:, axis]) for axis in range(3)], axis = 1) / face_vertex_counts[:, None]
+	(p, q, invalid_planes) = pmt_common.btPlaneSpace1_batch(normals[face_planes])
+	offsets = pair_positions - centers[pair_faces]
+	angles = numpy.arctan2(numpy.einsum("ij,ij->i", offsets, q[pair_faces]), numpy.einsum("ij,ij->i", offsets, p[pair_faces]))
+
+	#increasing angles are counter-clockwise when viewed from outside, so sort by decreasing angle
+	order = numpy.lexsort((-angles, pair_faces))
+	brush_polygons.polygon_planes = face_planes
+	brush_polygons.polygon_vertex_counts = face_vertex_counts
+	brush_polygons.polygon_vertices = pair_vertices[order]
+	return brush_polygons
+
+#Returns (mins, maxs) of the vertices of each brush (see build_brush_polygons()), arrays with shape (num_brushes, 3),
+#without building its polygons. Brushes without vertices have an empty box (see pmt_common_bounds.empty_bounds()).
+@pmt_common.HOUPROFILE_EVENT_DECO
+def build_brush_bounds(normals, distances, brush_plane_counts, epsilon = BRUSH_EPSILON):
+	(normals, distances, brush_plane_counts) = normalized_planes(normals, distances, brush_plane_counts)
+	(positions, candidate_brushes, vertex_planes, candidate_corners) = all_brush_vertices(normals, distances, brush_plane_counts, epsilon)
+	mins = numpy.full((len(brush_plane_counts), 3), numpy.inf)
+	maxs = numpy.full((len(brush_plane_counts), 3), -numpy.inf)
+	numpy.minimum.at(mins, candidate_brushes, positions)
+	numpy.maximum.at(maxs, candidate_brushes, positions)
+	return (mins, maxs)
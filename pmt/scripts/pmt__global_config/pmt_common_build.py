@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_build
+#	script_section_name: 	pmt_common_build.py
+#
+# Bulk geometry construction for the importers, the counterpart of pmt_common_extract.
+# Points, polygons, their attrib values and point groups are collected in lists first, and then created with
+# hou.Geometry.createPoints()/createPolygons() and set with the bulk hou.Geometry.setPoint*AttribValues()/setPrim*AttribValues()
+# functions, instead of calling createPoint()/createPolygon() and hou.Point.setAttribValue() once per element.
+#
+#	builder = pmt_common_build.GeometryBuilder()
+#	p0 = builder.add_point((0, 0, 0), { "pmt_vmf_entity_class" : "light" }, "vmf_pointentity")
+#	builder.add_polygon([p1, p2, p3], { "pmt_vmf_material" : "DEV/DEV_MEASUREGENERIC01B" })
+#	builder.build(geometry)
+
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = PMT__G_CFG.pmt_common
+else:
+	import pmt_common
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+#Values of one point or prim attrib, one per element; None for elements that keep the default value of the attrib
+class AttribValues:
+	def __init__(self):
+		self.values = list()
+
+	def set(self, element_index, value):
+		num_values = len(self.values)
+		if element_index >= num_values:
+			self.values.extend([None] * (element_index + 1 - num_values))
+		self.values[element_index] = value
+
+#Sets the values of the new elements of attrib, which are the last num_new_elements points or prims of the geometry.
+#The bulk setters set all elements of the geometry, so the values of the existing elements are read first.
+def set_attrib_values(geometry, attrib, attrib_values, num_new_elements):
+	name = attrib.name()
+	data_type = attrib.dataType()
+	size = attrib.size()
+	is_prim = attrib.type() == hou.attribType.Prim
+	values = attrib_values.values + [None] * (num_new_elements - len(attrib_values.values))
+
+	if data_type == hou.attribData.Float or data_type == hou.attribData.Int:
+		is_float = data_type == hou.attribData.Float
+		if is_prim:
+			all_values = list(geometry.primFloatAttribValues(name) if is_float else geometry.primIntAttribValues(name))
+		else:
+			all_values = list(geometry.pointFloatAttribValues(name) if is_float else geometry.pointIntAttribValues(name))
+
+		first_value = len(all_values) - num_new_elements * size
+		for element_index, value in enumerate(values):
+			if value == None:
+				continue
+			if size == 1:
+				all_values[first_value + element_index] = value
+			else:
+				offset = first_value + element_index * size
+				all_values[offset:offset + size] = tuple(value)
+
+		if is_prim:
+			(geometry.setPrimFloatAttribValues if is_float else geometry.setPrimIntAttribValues)(name, all_values)
+		else:
+			(geometry.setPointFloatAttribValues if is_float else geometry.setPointIntAttribValues)(name, all_values)
+	elif data_type == hou.attribData.String:
+		all_values = list(geometry.primStringAttribValues(name) if is_prim else geometry.pointStringAttribValues(name))
+		first_value = len(all_values) - num_new_elements
+		for element_index, value in enumerate(values):
+			if value != None:
+				all_values[first_value + element_index] = value
+		if is_prim:
+			geometry.setPrimStringAttribValues(name, all_values)
+		else:
+			geometry.setPointStringAttribValues(name, all_values)
+	else:
+		#dict attribs (e.g. the keyvalues of entities) have no bulk setter
+		elements = geometry.prims() if is_prim else geometry.points()
+		first_element = len(elements) - num_new_elements
+		for element_index, value in enumerate(values):
+			if value != None:
+				elements[first_element + element_index].setAttribValue(attrib, value)
+
+#Attribs are referenced by name and must exist in the geometry when build() is called (see find_or_create_attrib() of the importers);
+#vector values are sequences, e.g. a tuple or hou.Vector3.
+class GeometryBuilder:
+	def __init__(self):
+		self.positions = list()			#(x, y, z) of each point
+		self.polygons = list()			#point indices of each polygon
+		self.point_attribs = dict()		#attrib name -> AttribValues
+		self.prim_attribs = dict()		#attrib name -> AttribValues
+		self.point_groups = dict()		#point group name -> list of point indices
+
+	#Returns the index of the new point, for add_polygon()
+	def add_point(self, position, attribs = None, group_name = None):
+		point_index = len(self.positions)
+		self.positions.append(position)
+		if attribs != None:
+			for name in attribs:
+				self.point_attribs.setdefault(name, AttribValues()).set(point_index, attribs[name])
+		if group_name != None:
+			self.point_groups.setdefault(group_name, list()).append(point_index)
+		return point_index
+
+	#point_indices are indices returned by add_point(), in the order of the vertices of the polygon
+	def add_polygon(self, point_indices, attribs = None):
+		prim_index = len(self.polygons)
+		self.polygons.append(point_indices)
+		if attribs != None:
+			for name in attribs:
+				self.prim_attribs.setdefault(name, AttribValues()).set(prim_index, attribs[name])
+		return prim_index
+
+	#Adds the vertices and polygons of a pmt_common_brush.BrushPolygons; the points of brush i are added to the point group brush_group_names[i],
+	#and the polygon of plane j has the attribs plane_attribs[j] (see add_polygon())
+	def add_brush_polygons(self, brush_polygons, brush_group_names, plane_attribs):
+		first_point = len(self.positions)
+		for position, brush_index in zip(brush_polygons.positions.tolist(), brush_polygons.vertex_brushes.tolist()):
+			self.add_point(position, group_name = brush_group_names[brush_index])
+		for (plane_index, vertex_indices) in brush_polygons.polygons():
+			self.add_polygon([first_point + vertex_index for vertex_index in vertex_indices], plane_attribs[plane_index])
+
+	#Creates the points and polygons in geometry, after its existing points and prims
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def build(self, geometry):
+		num_points = len(self.positions)
+		num_polygons = len(self.polygons)
+		if num_points == 0:
+			return
+
+		points = geometry.createPoints(self.positions)
+		if num_polygons > 0:
+			geometry.createPolygons([[points[point_index] for point_index in polygon] for polygon in self.polygons])
+
+		for name in self.point_attribs:
+			attrib = geometry.findPointAttrib(name)
+			assert attrib != None, CCF(self, CF()) + ": no point attrib '{}'".format(name)
+			set_attrib_values(geometry, attrib, self.point_attribs[name], num_points)
+		for name in self.prim_attribs:
+			attrib = geometry.findPrimAttrib(name)
+			assert attrib != None, CCF(self, CF()) + ": no prim attrib '{}'".format(name)
+			set_attrib_values(geometry, attrib, self.prim_attribs[name], num_polygons)
+
+		for group_name in self.point_groups:
+			point_group = geometry.findPointGroup(group_name)
+			if point_group == None:
+				point_group = geometry.createPointGroup(group_name)
+			point_group.add([points[point_index] for point_index in self.point_groups[group_name]])
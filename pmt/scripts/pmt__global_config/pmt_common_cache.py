@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_cache
+#	script_section_name: 	pmt_common_cache.py
+#
+# Incremental export cache for the exporters.
+# Each pmt_bsp_island/pmt_entity_island is hashed from its point positions and prim attribs,
+# and its serialized text is stored in EXPORT_PATH.pmtcache; the next export of the same
+# path only serializes the islands whose hash changed.
+#
+# Ids (solid ids, actor names, ...) change whenever an island is added or removed, so text is cached
+# as a template with a placeholder character in place of each id; see split_template() and fill_template().
+#
+# ParseCache is the cache of the importers: the parsed result of each .vmf/.t3d/.map is pickled to a file in
+# PARSE_CACHE_DIRECTORY, keyed by the path, size and modification time of the file and the format of the parser,
+# so the prefabs that are imported by many hip files are only parsed once. The directory is per user, and files
+# of other users are not unpickled.
+
+import os
+import re
+import pickle
+import hashlib
+import numpy
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+EXPORT_CACHE_VERSION = 1
+EXPORT_CACHE_EXTENSION = "pmtcache"
+
+#Placeholder characters for ids in cached text; exporters assign them to each id type (e.g. ID_PLACEHOLDER_0 for solid ids)
+ID_PLACEHOLDER_0 = "\x01"
+ID_PLACEHOLDER_1 = "\x02"
+ID_PLACEHOLDER_2 = "\x03"
+ID_PLACEHOLDER_SPLIT = re.compile("([\x01\x02\x03])")
+
+def get_cache_path(export_path):
+	return "{}.{}".format(export_path, EXPORT_CACHE_EXTENSION)
+
+#Returns a list of str, where the odd elements are the placeholders; for example
+#split_template("a\x01b") == ["a", "\x01", "b"]
+def split_template(text):
+	return ID_PLACEHOLDER_SPLIT.split(text)
+
+#ids is a dict of placeholder -> iterator of str; each placeholder in template is replaced by next(ids[placeholder]).
+#Use itertools.repeat(id) for an id that is repeated in the text, or iter(exporter.get_*_id, None) for a counter.
+def fill_template(template, ids):
+	if len(template) == 1:
+		return template[0]
+	out = list(template)
+	for i in range(1, len(out), 2):
+		out[i] = next(ids[out[i]])
+	return "".join(out)
+
+#Returns a key (bytes) for each island.
+#	island_prim_indices: list of list of prim indices, one per island
+#	prim_point_indices: point indices of each prim in vertex order, indexed by prim index
+#	positions: NumPy array with shape (num_points, 3), see pmt_common_extract.fetch_point_positions()
+#	prim_columns: columns that affect the serialized text, see pmt_common_extract.AttribColumns.array()
+#	island_extras: optional list of str or bytes, one per island, for data that is not in a column (e.g. entity keyvalues)
+def compute_island_keys(island_prim_indices, prim_point_indices, positions, prim_columns, island_extras = None):
+	keys = list()
+	for island_index in range(len(island_prim_indices)):
+		prim_indices = island_prim_indices[island_index]
+
+		num_points = list()
+		point_indices = list()
+		for prim_index in prim_indices:
+			num_points.append(len(prim_point_indices[prim_index]))
+			point_indices += prim_point_indices[prim_index]
+
+		hasher = hashlib.blake2b(digest_size = 16)
+		hasher.update( numpy.array(num_points, dtype = numpy.int64).tobytes() )
+		hasher.update( positions[point_indices].tobytes() )
+		for column in prim_columns:
+			if type(column) == list:
+				hasher.update( "\0".join([column[prim_index] for prim_index in prim_indices]).encode() )
+			else:
+				hasher.update( column[prim_indices].tobytes() )
+		if island_extras != None:
+			extra = island_extras[island_index]
+			hasher.update( extra if type(extra) == bytes else extra.encode() )
+		keys.append(hasher.digest())
+	return keys
+
+#Returns a key for a block made of several islands (e.g. a brush entity), from the keys of its islands
+def combine_keys(keys, extra = b""):
+	hasher = hashlib.blake2b(digest_size = 16)
+	for key in keys:
+		hasher.update(key)
+	hasher.update( extra if type(extra) == bytes else extra.encode() )
+	return hasher.digest()
+
+#format_name should change whenever the output of the exporter changes, so old caches are not reused.
+#Only blocks used by the last export are saved, so the cache does not grow over time.
+class ExportCache:
+	def __init__(self, export_path, format_name):
+		self.path = get_cache_path(export_path)
+		self.format_name = format_name
+		self.prev_blocks = dict()		#key -> template, from the previous export
+		self.blocks = dict()			#key -> template, used by this export
+		self.num_hits = 0
+		self.num_misses = 0
+		self.load()
+
+	def load(self):
+		if not os.path.exists(self.path):
+			return
+		try:
+			with open(self.path, "rb") as file_in:
+				cache_data = pickle.load(file_in)
+		except (OSError, EOFError, pickle.UnpicklingError) as e:
+			print("{}: could not read {} ({}); exporting all islands".format(CCF(self, CF()), self.path, e))
+			return
+		if cache_data.get("version") != EXPORT_CACHE_VERSION or cache_data.get("format") != self.format_name:
+			return
+		self.prev_blocks = cache_data["blocks"]
+
+	def save(self):
+		cache_data = { "version" : EXPORT_CACHE_VERSION, "format" : self.format_name, "blocks" : self.blocks }
+		temp_path = self.path + ".tmp"
+		with open(temp_path, "wb") as file_out:
+			pickle.dump(cache_data, file_out, protocol = pickle.HIGHEST_PROTOCOL)
+		os.replace(temp_path, self.path)
+
+	#Returns the template for key, or None if key is not cached
+	def get(self, key):
+		template = self.blocks.get(key)
+		if template == None:
+			template = self.prev_blocks.get(key)
+			if template != None:
+				self.blocks[key] = template
+		if template != None:
+			self.num_hits += 1
+		else:
+			self.num_misses += 1
+		return template
+
+	def put(self, key, template):
+		self.blocks[key] = template
+
+	#Returns the cached template for key, or calls serialize() and caches split_template() of its result
+	def get_or_serialize(self, key, serialize):
+		template = self.get(key)
+		if template == None:
+			template = split_template(serialize())
+			self.put(key, template)
+		return template
+
+	def print_stats(self, name):
+		print("{}: reused {} of {} cached islands from {}".format(name, self.num_hits, self.num_hits + self.num_misses, self.path))
+
+PARSE_CACHE_VERSION = 1
+PARSE_CACHE_EXTENSION = "pmtparse"
+
+#Returns the per-user directory of the parse cache files: %LOCALAPPDATA%/pmt_parse_cache on Windows, else ~/.cache/pmt_parse_cache
+def user_parse_cache_directory():
+	if os.name == "nt":
+		base_directory = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+	else:
+		base_directory = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+	return os.path.join(base_directory, "pmt_parse_cache")
+
+#Directory of the parse cache files; set the environment variable PMT_PARSE_CACHE_DIR to use another directory.
+#It is created only readable by the current user (mode 0o700).
+PARSE_CACHE_DIRECTORY = os.environ.get("PMT_PARSE_CACHE_DIR", user_parse_cache_directory())
+
+#Returns False if the file of stat is owned by another user; such files are not unpickled, since they could run any code.
+#On Windows (without os.getuid()) the per-user directory is relied on.
+def owned_by_current_user(stat):
+	return not hasattr(os, "getuid") or stat.st_uid == os.getuid()
+
+#Max total size of the parse cache files; the least recently used files are removed above it
+PARSE_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+#Cache of the parsed results of one parser, e.g. pmt_vmf_import.parse_vmf(); see get_parse_cache() of the importers.
+#	format_name: should change whenever the result of parse changes, so old results are not reused (e.g. "vmf_import 1")
+#	parse: function(path) that parses the file
+#	to_data, from_data: convert a result of parse to data that is pickled and back, or None to pickle the result.
+#		The data should only contain builtin types and NumPy arrays: the classes of the importers can not be unpickled
+#		reliably, since the modules of an HDA are not importable by name.
+#All formats share the files of directory, and max_bytes is the max total size of them.
+#A file is touched whenever it is read, so its modification time is the time it was last used.
+class ParseCache:
+	def __init__(self, format_name, parse, to_data = None, from_data = None, directory = None, max_bytes = PARSE_CACHE_MAX_BYTES):
+		self.format_name = format_name
+		self.parse = parse
+		self.to_data = to_data
+		self.from_data = from_data
+		self.directory = directory if directory != None else PARSE_CACHE_DIRECTORY
+		self.max_bytes = max_bytes
+		self.num_hits = 0
+		self.num_misses = 0
+
+	#Returns (cache file path, key), where key identifies the version of the file at path that is parsed
+	def entry(self, path):
+		path = os.path.normcase(os.path.abspath(path))
+		stat = os.stat(path)
+		key = (PARSE_CACHE_VERSION, self.format_name, path, stat.st_size, stat.st_mtime_ns)
+		digest = hashlib.blake2b(repr(key).encode(), digest_size = 16).hexdigest()
+		return (os.path.join(self.directory, "{}.{}".format(digest, PARSE_CACHE_EXTENSION)), key)
+
+	#Returns the data cached for key at cache_path, or None
+	def load(self, cache_path, key):
+		try:
+			with open(cache_path, "rb") as file_in:
+				if not owned_by_current_user(os.fstat(file_in.fileno())):
+					print("{}: skipping {}, it is owned by another user; parsing {}".format(CCF(self, CF()), cache_path, key[2]))
+					return None
+				cache_data = pickle.load(file_in)
+		except FileNotFoundError:
+			return None
+		except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError) as e:
+			print("{}: could not read {} ({}); parsing {}".format(CCF(self, CF()), cache_path, e, key[2]))
+			return None
+		if cache_data.get("key") != key:
+			return None
+		try:
+			os.utime(cache_path)
+		except OSError:
+			pass
+		return cache_data["data"]
+
+	def save(self, cache_path, key, data):
+		cache_data = { "key" : key, "data" : data }
+		temp_path = "{}.{}.tmp".format(cache_path, os.getpid())
+		try:
+			os.makedirs(self.directory, mode = 0o700, exist_ok = True)
+			with open(temp_path, "wb") as file_out:
+				pickle.dump(cache_data, file_out, protocol = pickle.HIGHEST_PROTOCOL)
+			os.replace(temp_path, cache_path)
+		except OSError as e:
+			print("{}: could not write {} ({})".format(CCF(self, CF()), cache_path, e))
+			return
+		self.trim()
+
+	#Removes the least recently used files until the total size of the cache is at most max_bytes
+	def trim(self):
+		entries = list()
+		total_bytes = 0
+		with os.scandir(self.directory) as directory_entries:
+			for directory_entry in directory_entries:
+				if directory_entry.name.endswith("." + PARSE_CACHE_EXTENSION) and directory_entry.is_file():
+					#entries can be removed by the trim() of another process, e.g. a worker of pmt_vmf_import.parse_vmf_batch()
+					try:
+						stat = directory_entry.stat()
+					except OSError:
+						continue
+					entries.append((stat.st_mtime_ns, stat.st_size, directory_entry.path))
+					total_bytes += stat.st_size
+		if total_bytes <= self.max_bytes:
+			return
+		entries.sort()
+		for (mtime, size, cache_path) in entries:
+			if total_bytes <= self.max_bytes:
+				break
+			try:
+				os.remove(cache_path)
+				total_bytes -= size
+			except OSError:
+				pass
+
+	#Returns the parsed result of the file at path, from the cache if the file did not change
+	def get(self, path):
+		(cache_path, key) = self.entry(path)
+		data = self.load(cache_path, key)
+		if data != None:
+			self.num_hits += 1
+			return self.from_data(data) if self.from_data != None else data
+
+		return self.parse_and_save(path, cache_path, key)
+
+	def parse_and_save(self, path, cache_path, key):
+		self.num_misses += 1
+		result = self.parse(path)
+		self.save(cache_path, key, self.to_data(result) if self.to_data != None else result)
+		return result
+
+	#Parses and caches each file in directory (and its subdirectories if recursive) with one of extensions that is not cached yet,
+	#e.g. warm("c:/prefabs", [".vmf"]); returns the number of parsed files
+	def warm(self, directory, extensions, recursive = True):
+		extensions = [extension.lower() for extension in extensions]
+		num_parsed = 0
+		for (dir_path, dir_names, file_names) in os.walk(directory):
+			for file_name in sorted(file_names):
+				if os.path.splitext(file_name)[1].lower() not in extensions:
+					continue
+				path = os.path.join(dir_path, file_name)
+				(cache_path, key) = self.entry(path)
+				if os.path.exists(cache_path):
+					continue
+				self.parse_and_save(path, cache_path, key)
+				num_parsed += 1
+			if not recursive:
+				break
+		return num_parsed
+
+	def print_stats(self, name):
+		print("{}: {} of {} files read from the parse cache in {}".format(name, self.num_hits, self.num_hits + self.num_misses, self.directory))
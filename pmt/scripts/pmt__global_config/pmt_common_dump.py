@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_dump
+#	script_section_name: 	pmt_common_dump.py
+#
+# Intermediate export dump (.npz) for the exporters.
+# Each exporter collects its brushes, entities and keyvalues from the Houdini geometry (extract_export_data()),
+# then writes them as text (write_export()); the collected data can be saved as an export dump in between,
+# so the text can be written again without Houdini, see \scripts\pmt_export_cli\pmt_export_cli.py
+#
+# Objects (e.g. the sides of all solids) are stored as records: one NumPy array per numeric attribute,
+# and one JSON list per string/dict attribute. Nested lists (e.g. the sides of each solid) are stored
+# flattened, with the number of elements of each list (see put_counts()).
+
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = PMT__G_CFG.pmt_common
+else:
+	import pmt_common
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
+import os
+import json
+import numpy
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+EXPORT_DUMP_VERSION = 1
+EXPORT_DUMP_EXTENSION = "npz"
+EXPORT_DUMP_JSON = "__json__"		#name of the array that holds the JSON document
+
+def get_dump_path(export_path):
+	return "{}.{}".format(export_path, EXPORT_DUMP_EXTENSION)
+
+#Field types of records; a field is (attribute name, field type)
+FIELD_VALUE = "value"				#int, float or bool; or None
+FIELD_VECTOR = "vector"				#tuple of int/float; or None
+FIELD_VECTORS = "vectors"			#list of tuples of the same size (e.g. vertices)
+FIELD_ARRAY = "array"				#NumPy array (e.g. dispinfo rows); the shape is not stored
+FIELD_STR = "str"					#str or None
+FIELD_JSON = "json"					#dict, list, str, int, float, bool or None
+FIELD_UV_DATA = "uv_data"			#pmt_common.UvData or None
+FIELD_KEY = "key"					#bytes or None (e.g. export cache keys)
+
+#pmt_common.UvData attributes; None is a float and the others are tuples of the given size
+UV_DATA_FIELDS = [
+	("vmf_uv_u_axis", 3), ("vmf_uv_v_axis", 3), ("vmf_uv_scale", 2), ("vmf_uv_offset", 2),
+	("map_uv_scale", 2), ("map_uv_offset", 2), ("map_uv_rotation_degrees", None),
+	("t3d_uv_u_axis", 3), ("t3d_uv_v_axis", 3), ("t3d_uv_scale", 2), ("t3d_uv_offset", 2),
+]
+
+def pack_vectors(vectors, dtype = None):
+	counts = numpy.array([len(v) for v in vectors], dtype = numpy.int64)
+	flat = [value for v in vectors for value in v]
+	return numpy.array(flat, dtype = dtype), counts
+
+#Returns a list of lists, one per count
+def split_counts(flat, counts):
+	out = list()
+	start = 0
+	for count in counts:
+		out.append(flat[start:start + count])
+		start += count
+	return out
+
+#format_name is the exporter that saved the dump, e.g. "vmf"; values are the top-level JSON values (e.g. levelprops).
+class ExportDump:
+	def __init__(self, format_name):
+		self.format_name = format_name
+		self.arrays = dict()		#name -> NumPy array
+		self.json = { "version" : EXPORT_DUMP_VERSION, "format" : format_name, "values" : dict(), "records" : dict() }
+
+	def put_value(self, name, value):
+		self.json["values"][name] = value
+	def get_value(self, name):
+		return self.json["values"][name]
+
+	#Number of elements of each list, for nested lists; see split()
+	def put_counts(self, name, lists):
+		self.arrays[name] = numpy.array([len(l) for l in lists], dtype = numpy.int64)
+	def split(self, name, flat):
+		return split_counts(flat, self.arrays[name].tolist())
+
+	def put_records(self, name, records, fields):
+		self.json["records"][name] = len(records)
+		for attr, field_type in fields:
+			values = [getattr(record, attr) for record in records]
+			self.put_field(name + "." + attr, values, field_type)
+
+	#Returns a list of new record_type() objects with the attributes of fields set
+	def get_records(self, name, record_type, fields):
+		num_records = self.json["records"][name]
+		records = [record_type() for i in range(num_records)]
+		for attr, field_type in fields:
+			values = self.get_field(name + "." + attr, field_type, num_records)
+			for record, value in zip(records, values):
+				setattr(record, attr, value)
+		return records
+
+	def put_field(self, name, values, field_type):
+		if field_type == FIELD_STR or field_type == FIELD_JSON:
+			self.json[name] = values
+		elif field_type == FIELD_KEY:
+			self.json[name] = [value.hex() if value != None else None for value in values]
+		elif field_type == FIELD_VALUE or field_type == FIELD_VECTOR:
+			is_none = [value == None for value in values]
+			if any(is_none):
+				self.arrays[name + ".none"] = numpy.array(is_none, dtype = bool)
+				fill = next(value for value in values if value != None) if not all(is_none) else 0
+				values = [value if value != None else fill for value in values]
+			self.arrays[name] = numpy.array(values)
+		elif field_type == FIELD_VECTORS:
+			self.arrays[name], self.arrays[name + ".counts"] = pack_vectors(values)
+		elif field_type == FIELD_ARRAY:
+			self.arrays[name] = numpy.concatenate([value.ravel() for value in values]) if len(values) > 0 else numpy.zeros(0)
+			self.arrays[name + ".counts"] = numpy.array([value.size for value in values], dtype = numpy.int64)
+		elif field_type == FIELD_UV_DATA:
+			is_none = [value == None for value in values]
+			self.arrays[name + ".none"] = numpy.array(is_none, dtype = bool)
+			for uv_attr, size in UV_DATA_FIELDS:
+				uv_values = [getattr(value, uv_attr) if value != None else (0.0 if size == None else (0.0,) * size) for value in values]
+				self.arrays[name + "." + uv_attr] = numpy.array(uv_values, dtype = numpy.float64)
+		else:
+			assert False, CCF(self, CF()) + ": unknown field type '{}' of '{}'".format(field_type, name)
+
+	def get_field(self, name, field_type, num_records):
+		if field_type == FIELD_STR or field_type == FIELD_JSON:
+			return self.json[name]
+		elif field_type == FIELD_KEY:
+			return [bytes.fromhex(value) if value != None else None for value in self.json[name]]
+		elif field_type == FIELD_VALUE or field_type == FIELD_VECTOR:
+			values = self.arrays[name].tolist()
+			is_none = self.arrays[name + ".none"].tolist() if name + ".none" in self.arrays else [False] * num_records
+			if field_type == FIELD_VECTOR:
+				return [tuple(value) if not value_is_none else None for value, value_is_none in zip(values, is_none)]
+			return [value if not value_is_none else None for value, value_is_none in zip(values, is_none)]
+		elif field_type == FIELD_VECTORS:
+			flat = [tuple(value) for value in self.arrays[name].tolist()]
+			return split_counts(flat, self.arrays[name + ".counts"].tolist())
+		elif field_type == FIELD_ARRAY:
+			flat = self.arrays[name]
+			return split_counts(flat, self.arrays[name + ".counts"].tolist())
+		elif field_type == FIELD_UV_DATA:
+			columns = dict()
+			for uv_attr, size in UV_DATA_FIELDS:
+				column = self.arrays[name + "." + uv_attr].tolist()
+				columns[uv_attr] = column if size == None else [tuple(value) for value in column]
+			values = list()
+			for record_index, is_none in enumerate(self.arrays[name + ".none"].tolist()):
+				if is_none:
+					values.append(None)
+					continue
+				uv_data = pmt_common.UvData()
+				for uv_attr, size in UV_DATA_FIELDS:
+					setattr(uv_data, uv_attr, columns[uv_attr][record_index])
+				values.append(uv_data)
+			return values
+		else:
+			assert False, CCF(self, CF()) + ": unknown field type '{}' of '{}'".format(field_type, name)
+
+	def save(self, path):
+		arrays = dict(self.arrays)
+		arrays[EXPORT_DUMP_JSON] = numpy.array(json.dumps(self.json))
+		temp_path = path + ".tmp"
+		with open(temp_path, "wb") as file_out:
+			numpy.savez_compressed(file_out, **arrays)
+		os.replace(temp_path, path)
+		print("export dump written to {}".format(path))
+
+	#Returns an ExportDump; if format_name is given, asserts the dump was saved by that exporter
+	@staticmethod
+	def load(path, format_name = None):
+		with numpy.load(path, allow_pickle = False) as npz:
+			arrays = { name : npz[name] for name in npz.files }
+		dump_json = json.loads(str(arrays.pop(EXPORT_DUMP_JSON)))
+		assert dump_json["version"] == EXPORT_DUMP_VERSION, "{}: {} has version {}, expected {}".format(CURFUNC(CF()), path, dump_json["version"], EXPORT_DUMP_VERSION)
+		assert format_name == None or dump_json["format"] == format_name, "{}: {} is a '{}' dump, expected '{}'".format(CURFUNC(CF()), path, dump_json["format"], format_name)
+		dump = ExportDump(dump_json["format"])
+		dump.arrays = arrays
+		dump.json = dump_json
+		return dump
+
+#Returns the format_name of the dump at path
+def get_dump_format(path):
+	with numpy.load(path, allow_pickle = False) as npz:
+		return json.loads(str(npz[EXPORT_DUMP_JSON]))["format"]
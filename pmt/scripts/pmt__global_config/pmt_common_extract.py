@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_extract
+#	script_section_name: 	pmt_common_extract.py
+#
+# Columnar attribute fetch for the exporters.
+# Each prim/point attrib is read once per geometry with the bulk
+# hou.Geometry.prim*AttribValues()/point*AttribValues() functions and stored in a NumPy array,
+# instead of calling hou.Prim.attribValue() once per prim.
+
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = PMT__G_CFG.pmt_common
+else:
+	import pmt_common
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
+import numpy
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+UV_PRIM_ATTRIBS = [
+	pmt_common.PMT_VMF_UV_U_AXIS, pmt_common.PMT_VMF_UV_V_AXIS, pmt_common.PMT_VMF_UV_SCALE, pmt_common.PMT_VMF_UV_OFFSET,
+	pmt_common.PMT_MAP_UV_SCALE, pmt_common.PMT_MAP_UV_OFFSET, pmt_common.PMT_MAP_UV_ROTATION_DEGREES,
+	pmt_common.PMT_T3D_UV_U_AXIS, pmt_common.PMT_T3D_UV_V_AXIS, pmt_common.PMT_T3D_UV_SCALE, pmt_common.PMT_T3D_UV_OFFSET,
+]
+
+#Returns a NumPy array with shape (num_elements,) or (num_elements, tuple_size) for numeric attribs,
+#and a list of str for string attribs.
+def fetch_attrib_column(geometry, attrib):
+	name = attrib.name()
+	data_type = attrib.dataType()
+	size = attrib.size()
+	is_prim = attrib.type() == hou.attribType.Prim
+	assert not attrib.isArrayType(), CURFUNC(CF()) + ": array attrib '{}' can not be fetched in bulk".format(name)
+
+	if data_type == hou.attribData.Float:
+		values = geometry.primFloatAttribValues(name) if is_prim else geometry.pointFloatAttribValues(name)
+		column = numpy.array(values, dtype = numpy.float64)
+	elif data_type == hou.attribData.Int:
+		values = geometry.primIntAttribValues(name) if is_prim else geometry.pointIntAttribValues(name)
+		column = numpy.array(values, dtype = numpy.int64)
+	elif data_type == hou.attribData.String:
+		values = geometry.primStringAttribValues(name) if is_prim else geometry.pointStringAttribValues(name)
+		return list(values)
+	else:
+		assert False, CURFUNC(CF()) + ": attrib '{}' has unsupported data type {}".format(name, data_type)
+
+	if size > 1:
+		column = column.reshape(-1, size)
+	return column
+
+#Attribs that do not exist are skipped; use has() before reading.
+#If shared is given (see GeometryCache), columns fetched by another AttribColumns of the same geometry are reused.
+class AttribColumns:
+	def __init__(self, geometry, attrib_names, attrib_type, shared = None):
+		self.columns = dict() if shared == None else shared.columns		#attrib name -> NumPy array or list of str
+		self.rows = dict() if shared == None else shared.rows			#attrib name -> list of python values (same types as hou.Prim.attribValue())
+
+		for name in attrib_names:
+			if name in self.columns:
+				continue
+			attrib = geometry.findPrimAttrib(name) if attrib_type == hou.attribType.Prim else geometry.findPointAttrib(name)
+			if attrib == None:
+				continue
+			self.columns[name] = fetch_attrib_column(geometry, attrib)
+
+	def has(self, name):
+		return name in self.columns
+
+	def array(self, name):
+		assert self.has(name), CCF(self, CF()) + ": attrib '{}' was not fetched".format(name)
+		return self.columns[name]
+
+	#Per-element python values, converted once per attrib;
+	#tuple attribs are returned as tuples to match hou.Prim.attribValue()
+	def values(self, name):
+		if name not in self.rows:
+			column = self.array(name)
+			if type(column) == list:
+				self.rows[name] = column
+			elif column.ndim == 1:
+				self.rows[name] = column.tolist()
+			else:
+				self.rows[name] = [tuple(row) for row in column.tolist()]
+		return self.rows[name]
+
+	def value(self, name, index):
+		return self.values(name)[index]
+
+class PrimAttribColumns(AttribColumns):
+	def __init__(self, geometry, attrib_names, shared = None):
+		AttribColumns.__init__(self, geometry, attrib_names, hou.attribType.Prim, shared)
+
+class PointAttribColumns(AttribColumns):
+	def __init__(self, geometry, attrib_names, shared = None):
+		AttribColumns.__init__(self, geometry, attrib_names, hou.attribType.Point, shared)
+
+#The columns and rows of AttribColumns, shared by all AttribColumns of a geometry
+class SharedColumns:
+	def __init__(self):
+		self.columns = dict()
+		self.rows = dict()
+
+#Returns a NumPy array with shape (num_points, 3)
+def fetch_point_positions(geometry):
+	return numpy.array(geometry.pointFloatAttribValues("P"), dtype = numpy.float64).reshape(-1, 3)
+
+#Columnar version of pmt_common.extract_uv_data();
+#returns a list of pmt_common.UvData, indexed by prim number.
+#Columns is a PrimAttribColumns that was created with UV_PRIM_ATTRIBS.
+def extract_uv_data_columns(columns):
+	vmf_uv_u = columns.values(pmt_common.PMT_VMF_UV_U_AXIS)
+	vmf_uv_v = columns.values(pmt_common.PMT_VMF_UV_V_AXIS)
+	vmf_scale = columns.values(pmt_common.PMT_VMF_UV_SCALE)
+	vmf_offset = columns.values(pmt_common.PMT_VMF_UV_OFFSET)
+
+	map_scale = columns.values(pmt_common.PMT_MAP_UV_SCALE)
+	map_offset = columns.values(pmt_common.PMT_MAP_UV_OFFSET)
+	map_rotation_degrees = columns.values(pmt_common.PMT_MAP_UV_ROTATION_DEGREES)
+
+	t3d_uv_u = columns.values(pmt_common.PMT_T3D_UV_U_AXIS)
+	t3d_uv_v = columns.values(pmt_common.PMT_T3D_UV_V_AXIS)
+	t3d_scale = columns.values(pmt_common.PMT_T3D_UV_SCALE)
+	t3d_offset = columns.values(pmt_common.PMT_T3D_UV_OFFSET)
+
+	all_uv_data = list()
+	for i in range(len(vmf_uv_u)):
+		uv_data = pmt_common.UvData()
+		uv_data.vmf_uv_u_axis = vmf_uv_u[i]
+		uv_data.vmf_uv_v_axis = vmf_uv_v[i]
+		uv_data.vmf_uv_scale = vmf_scale[i]
+		uv_data.vmf_uv_offset = vmf_offset[i]
+
+		uv_data.map_uv_scale = map_scale[i]
+		uv_data.map_uv_offset = map_offset[i]
+		uv_data.map_uv_rotation_degrees = map_rotation_degrees[i]
+
+		uv_data.t3d_uv_u_axis = t3d_uv_u[i]
+		uv_data.t3d_uv_v_axis = t3d_uv_v[i]
+		uv_data.t3d_uv_scale = t3d_scale[i]
+		uv_data.t3d_uv_offset = t3d_offset[i]
+		all_uv_data.append(uv_data)
+	return all_uv_data
+
+#Point indices of each vertex of prim.
+#This stays per prim: hou.Geometry of Houdini 19 has no bulk accessor for the point of each vertex (vertexIntAttribValues() only reads
+#vertex attribs, and the geometry of the exporters is read-only, so no temporary point number attrib can be added to it).
+#GeometryCache.get_prim_point_indices() keeps the result, so a multi-format export reads each prim once.
+def get_prim_point_indices(prim):
+	return [v.point().number() for v in prim.vertices()]
+
+#Data read from a geometry by extract_export_data() of the vmf, t3d and map exporters.
+#Exporting the same geometry to several formats with one GeometryCache (see pmt_multi_export)
+#reads the prims, positions and shared attribs (islands, geotypes, uv data) once instead of once per exporter.
+#Everything is read on first use.
+class GeometryCache:
+	def __init__(self, geometry):
+		self.geometry = geometry
+		self.positions_array = None
+		self.positions = None
+		self.prims = None
+		self.prim_point_indices = dict()		#prim index -> point indices, see get_prim_point_indices()
+		self.prim_normals = dict()				#prim index -> hou.Vector3
+		self.uv_data = None
+		self.prim_shared = SharedColumns()
+		self.point_shared = SharedColumns()
+
+	#NumPy array with shape (num_points, 3), see fetch_point_positions()
+	def get_positions_array(self):
+		if self.positions_array is None:
+			self.positions_array = fetch_point_positions(self.geometry)
+		return self.positions_array
+
+	#List of (x,y,z) tuples
+	def get_positions(self):
+		if self.positions == None:
+			self.positions = [tuple(p) for p in self.get_positions_array().tolist()]
+		return self.positions
+
+	def get_prims(self):
+		if self.prims == None:
+			self.prims = self.geometry.prims()
+		return self.prims
+
+	def get_prim_point_indices(self, prim, prim_index):
+		point_indices = self.prim_point_indices.get(prim_index)
+		if point_indices == None:
+			point_indices = get_prim_point_indices(prim)
+			self.prim_point_indices[prim_index] = point_indices
+		return point_indices
+
+	def get_prim_normal(self, prim, prim_index):
+		normal = self.prim_normals.get(prim_index)
+		if normal == None:
+			normal = prim.normal()
+			self.prim_normals[prim_index] = normal
+		return normal
+
+	def prim_columns(self, attrib_names):
+		return PrimAttribColumns(self.geometry, attrib_names, self.prim_shared)
+
+	def point_columns(self, attrib_names):
+		return PointAttribColumns(self.geometry, attrib_names, self.point_shared)
+
+	#See extract_uv_data_columns(); columns must be from prim_columns()
+	def get_uv_data(self, columns):
+		if self.uv_data == None:
+			self.uv_data = extract_uv_data_columns(columns)
+		return self.uv_data
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_format
+#	script_section_name: 	pmt_common_format.py
+#
+# Text formatting for the vmf, t3d and map exporters.
+# Indentation is precomputed, and lines with several numbers are written with a str.format() template
+# that is built once (for example, a whole VMF side), instead of formatting and concatenating each number.
+# See \scripts\benchmark\benchmark_format.py
+#
+# The vmf and map exporters can also write floats in a compact form (PRECISION_COMPACT, see NumberFormat).
+# The exporter HDAs have no parm for it; it is set from script (main_export(node, path, precision = PRECISION_COMPACT))
+# or with pmt_export_cli --precision compact.
+
+import os
+import itertools
+import functools
+import numpy
+import math
+
+TAB = "\t"
+NEWLINE = "\n"
+MAX_INDENT = 32
+INDENTS = [TAB * num_tabs for num_tabs in range(MAX_INDENT)]
+
+#Format specs for floats; each is the same as the '{0:0=...}'.format() used by the exporters
+FLOAT_6 = "{:.6f}"				#vmf uv, t3d entity location
+FLOAT_16 = "{:.16f}"			#map
+FLOAT_T3D = "{:0=+13.6f}"		#t3d brush, e.g. -01024.000000
+
+#Returns string in format:	[\t + \t + ... + \t] + string + \n
+def LINS(num_tabs, string):
+	return INDENTS[num_tabs] + string + NEWLINE
+
+#Returns string in format:	[\t + \t + ... + \t] + "key" + " " + "value" + \n
+def LINE(num_tabs, key, value):
+	return INDENTS[num_tabs] + "\"" + key + "\" \"" + value + "\"" + NEWLINE
+
+### Templates
+#A template is a str for str.format(); text that is not a replacement field must have its braces escaped.
+
+def escape(text):
+	return text.replace("{", "{{").replace("}", "}}")
+
+#Template for LINS(); string_format is a template, e.g. "Vertex   " + vector_format(FLOAT_T3D, 3, ",")
+def LINS_TEMPLATE(num_tabs, string_format):
+	return INDENTS[num_tabs] + string_format + NEWLINE
+
+#Template for LINE(); key is plain text, value_format is a template
+def LINE_TEMPLATE(num_tabs, key, value_format):
+	return INDENTS[num_tabs] + "\"" + escape(key) + "\" \"" + value_format + "\"" + NEWLINE
+
+#Template for a vector of size values, e.g. vector_format(FLOAT_6, 3) == "{:.6f} {:.6f} {:.6f}"
+@functools.lru_cache(maxsize = None)
+def vector_format(value_format, size, separator = " "):
+	return separator.join([value_format] * size)
+
+@functools.lru_cache(maxsize = 256)
+def repeat_template(template, count):
+	return template * count
+
+#Formats each row of rows (tuples of the same size) with template, in a single str.format() call;
+#returns the concatenated str, e.g. format_rows(LINS_TEMPLATE(4, "Vertex   {} {} {}"), vertices)
+def format_rows(template, rows):
+	return repeat_template(template, len(rows)).format( *itertools.chain.from_iterable(rows) )
+
+### Compact numbers
+#Output precision modes of the vmf and map exporters
+PRECISION_FIXED = "fixed"			#floats have a fixed number of decimals, e.g. FLOAT_6
+PRECISION_COMPACT = "compact"		#floats are written with compact_float()
+PRECISIONS = [PRECISION_FIXED, PRECISION_COMPACT]
+
+#Floats closer than this to an integer are written as the integer in compact mode
+SNAP_EPSILON = 1e-9
+
+#Returns the shortest str that reads back as value rounded to decimals, without an exponent;
+#integers and values within snap_epsilon of an integer are written as the integer,
+#e.g. with decimals = 6: 64.0 -> "64", -0.0 -> "0", 0.7071067811865476 -> "0.707107", 1e-05 -> "0.00001"
+#NaN and inf have no compact form; they are written as in PRECISION_FIXED ("nan", "inf", "-inf")
+def compact_float(value, decimals, snap_epsilon = SNAP_EPSILON):
+	if not math.isfinite(value):
+		return "{:.{}f}".format(value, decimals)
+	integer = round(value)
+	if abs(value - integer) <= snap_epsilon:
+		return str(integer)
+	value = round(value, decimals)
+	if value.is_integer():
+		return str(int(value))
+	text = repr(value)
+	if "e" in text:
+		text = numpy.format_float_positional(value, trim = "-")
+	return text
+
+#Formats the floats of an exporter with decimals in PRECISION_FIXED, or with compact_float() in PRECISION_COMPACT.
+#Templates use float_format for each float; in compact mode it is "{}" and the floats must be converted with values() first.
+#In compact mode the text length of the floats is counted in both modes, see print_report().
+class NumberFormat:
+	def __init__(self, decimals, precision = PRECISION_FIXED, snap_epsilon = SNAP_EPSILON):
+		assert precision in PRECISIONS, "NumberFormat: unknown precision '{}', expected one of {}".format(precision, PRECISIONS)
+		self.decimals = decimals
+		self.precision = precision
+		self.snap_epsilon = snap_epsilon
+		self.fixed_format = "{:." + str(decimals) + "f}"
+		self.is_compact = precision == PRECISION_COMPACT
+		self.float_format = "{}" if self.is_compact else self.fixed_format
+		
+		self.num_values = 0
+		self.fixed_bytes = 0
+		self.compact_bytes = 0
+	
+	#Returns the values to pass to a template built with float_format
+	def values(self, values):
+		if not self.is_compact:
+			return values
+		fixed_format = self.fixed_format
+		out = [compact_float(value, self.decimals, self.snap_epsilon) for value in values]
+		self.num_values += len(out)
+		self.fixed_bytes += sum([len(fixed_format.format(value)) for value in values])
+		self.compact_bytes += sum([len(text) for text in out])
+		return out
+	
+	def str(self, value):
+		if not self.is_compact:
+			return self.fixed_format.format(value)
+		return self.values([value])[0]
+	
+	#Adds the counts of another NumberFormat, e.g. from a worker process (see get_counts())
+	def get_counts(self):
+		return (self.num_values, self.fixed_bytes, self.compact_bytes)
+	def add_counts(self, counts):
+		self.num_values += counts[0]
+		self.fixed_bytes += counts[1]
+		self.compact_bytes += counts[2]
+	
+	#The text of the export cache depends on the precision, see pmt_common_cache.ExportCache
+	def get_cache_format(self, cache_format):
+		if not self.is_compact:
+			return cache_format
+		return "{} {} {!r}".format(cache_format, self.precision, self.snap_epsilon)
+	
+	#Prints the bytes saved by compact mode; floats read from the export cache are not counted
+	def print_report(self, name, export_path):
+		if not self.is_compact:
+			return
+		saved = self.fixed_bytes - self.compact_bytes
+		percent = 100.0 * saved / self.fixed_bytes if self.fixed_bytes > 0 else 0.0
+		print("{}: compact numbers saved {} bytes ({:.1f}% of {} bytes in {} floats); {} is {} bytes".format(
+			name, saved, percent, self.fixed_bytes, self.num_values, export_path, os.path.getsize(export_path)))
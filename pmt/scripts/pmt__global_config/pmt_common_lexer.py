@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_common_lexer
+#	script_section_name: 	pmt_common_lexer.py
+#
+# Tokenizer for the text formats read by the importers and parsers (.vmf, .map, .t3d, .fgd, .uc, .def, soundscripts, .sndshd).
+# A Lexer compiles its comment, quote and operator rules into one regular expression; tokenize() reads the text
+# in a single pass and returns a list of (kind, text, line) tokens. This replaces removing comments, extracting
+# string literals, padding operators and compacting spaces with one pass over the text each.
+#
+#	lexer = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"")
+#	tokens = lexer.tokenize(text)		#[(TOKEN_WORD, "versioninfo", 1), (TOKEN_OPERATOR, "{", 2), (TOKEN_STRING, "editorversion", 3), ...]
+
+import re
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+#Token kinds
+TOKEN_WORD = "word"				#text in between whitespace, quotes, operators and comments
+TOKEN_STRING = "string"			#text in between quotes, without the quotes
+TOKEN_OPERATOR = "operator"		#a single char of Lexer.operators
+TOKEN_NEWLINE = "newline"		#"\n"; only if Lexer.newlines is True
+TOKEN_DIRECTIVE = "directive"	#a line that starts with Lexer.directive (e.g. "#exec ..."), without leading whitespace and line comments
+
+#Prefix of the placeholders of TOKEN_STRING tokens, see replace_strings()
+INQUOTE_TOKEN = "%%q_"
+
+#string.whitespace without "\n"; the text is expected to be read in text mode, so newlines are "\n"
+WHITESPACE = " \t\r\x0b\x0c"
+
+def char_class(chars):
+	return "".join([re.escape(c) for c in chars])
+
+#operators: chars that are tokens by themselves, e.g. "{}()"
+#quotes: quote chars; a string ends at the same quote char it starts with, and can span several lines
+#line_comments: remove // comments, up to the end of the line
+#block_comments: remove /* */ comments; a comment without */ ends at the end of the text
+#newlines: add a TOKEN_NEWLINE for each newline outside of strings and comments
+#directive: prefix of lines that are a single TOKEN_DIRECTIVE, e.g. "#" for UnrealScript preprocessor lines
+class Lexer:
+	def __init__(self, operators = "{}", quotes = "\"", line_comments = True, block_comments = False, newlines = False, directive = None):
+		self.operators = operators
+		self.quotes = quotes
+		self.line_comments = line_comments
+		self.block_comments = block_comments
+		self.newlines = newlines
+		self.directive = directive
+
+		self.group_kinds = dict()		#regex group name -> token kind; None for skipped text
+		rules = list()
+		def add_rule(group_name, kind, pattern):
+			self.group_kinds[group_name] = kind
+			rules.append("(?P<{}>{})".format(group_name, pattern))
+
+		#a comment starts with '/' followed by one of comment_chars
+		comment_chars = ("/" if line_comments else "") + ("*" if block_comments else "")
+
+		if directive != None:
+			#only at the start of a line; (?<![^\n]) also matches at the start of the text
+			directive_body = "(?:[^\\n/]|/(?!/))*" if line_comments else "[^\\n]*"
+			rules.append("(?<![^\\n])[{}]*(?P<directive>{}{})".format(char_class(WHITESPACE), re.escape(directive), directive_body))
+			self.group_kinds["directive"] = TOKEN_DIRECTIVE
+		if newlines or directive != None:
+			#a newline is matched by itself, so that a directive can match at the start of the next line
+			add_rule("space", None, "[{}]+".format(char_class(WHITESPACE)))
+			add_rule("newline", TOKEN_NEWLINE if newlines else None, "\\n")
+		else:
+			add_rule("space", None, "[{}\\n]+".format(char_class(WHITESPACE)))
+		if line_comments:
+			add_rule("line_comment", None, "//[^\\n]*")
+		if block_comments:
+			add_rule("block_comment", None, "/\\*[\\s\\S]*?(?:\\*/|\\Z)")
+		for quote_index, quote in enumerate(quotes):
+			q = re.escape(quote)
+			add_rule("string{}".format(quote_index), TOKEN_STRING, "{0}[^{0}]*{0}".format(q))
+		if len(quotes) > 0:
+			add_rule("unterminated", None, "[{}]".format(char_class(quotes)))
+		if len(operators) > 0:
+			add_rule("operator", TOKEN_OPERATOR, "[{}]".format(char_class(operators)))
+
+		word_excluded = char_class(WHITESPACE + "\n" + quotes + operators)
+		if len(comment_chars) > 0:
+			add_rule("word", TOKEN_WORD, "(?:[^{}/]|/(?![{}]))+".format(word_excluded, char_class(comment_chars)))
+		else:
+			add_rule("word", TOKEN_WORD, "[^{}]+".format(word_excluded))
+
+		self.regex = re.compile("|".join(rules))
+
+	#Yields (kind, text, line) tuples; line starts at 1.
+	#debug_path is only used in error messages.
+	def iter_tokens(self, text, debug_path = None):
+		group_kinds = self.group_kinds
+		line = 1
+		line_pos = 0		#position up to which line is counted
+		for m in self.regex.finditer(text):
+			group_name = m.lastgroup
+			kind = group_kinds[group_name]
+			if kind == None:
+				if group_name == "unterminated":
+					line += text.count("\n", line_pos, m.start())
+					assert False, CCF(self, CF()) + ": missing closing quote {} at line {} in {}".format(m.group(), line, debug_path)
+				continue
+
+			start = m.start(group_name)
+			line += text.count("\n", line_pos, start)
+			line_pos = start
+			if kind == TOKEN_STRING:
+				yield (TOKEN_STRING, m.group()[1:-1], line)
+			else:
+				yield (kind, m.group(group_name), line)
+
+	#Returns a list of the tokens of iter_tokens()
+	def tokenize(self, text, debug_path = None):
+		return list(self.iter_tokens(text, debug_path))
+
+#Returns the text of each token
+def token_texts(tokens):
+	return [token[1] for token in tokens]
+
+#Returns the text of each token, where each TOKEN_STRING is replaced by a placeholder (INQUOTE_TOKEN + number);
+#the text of the strings is added to strings, a dict of placeholder -> text.
+#For parsers that keep string literals out of the text they split, see pmt_parse_unreal1_uc and pmt_parse_source1_fgd
+def replace_strings(tokens, strings):
+	texts = list()
+	for kind, text, line in tokens:
+		if kind == TOKEN_STRING:
+			placeholder = INQUOTE_TOKEN + str( len(strings) )
+			strings[placeholder] = text
+			texts.append(placeholder)
+		else:
+			texts.append(text)
+	return texts
+
+#Returns a list of lines, where each line is the text of the tokens on that line of the text joined with " ",
+#and strings are replaced by placeholders, see replace_strings(); lines without tokens are skipped.
+#A string that spans several lines is on the line it starts on.
+def join_lines(tokens, strings):
+	lines = list()
+	texts = replace_strings(tokens, strings)
+	line_start = 0
+	num_tokens = len(tokens)
+	for i in range(1, num_tokens + 1):
+		if i == num_tokens or tokens[i][2] != tokens[line_start][2]:
+			lines.append(" ".join(texts[line_start:i]))
+			line_start = i
+	return lines
@@ -24,6 +24,7 @@ if hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config") != None:
 		pmt_common = PMT__G_CFG.pmt_common
 		pmt_common_texture = PMT__G_CFG.pmt_common_texture
 		pmt_common_json = PMT__G_CFG.pmt_common_json
+		pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
 	if PMT_REFLEVEL >= 1:
 		pmt_parse_source1_fgd = PMT__G_CFG.pmt_parse_source1_fgd
 		pmt_parse_unreal1_uc = PMT__G_CFG.pmt_parse_unreal1_uc
@@ -50,17 +51,17 @@ def DPRINT(string, level = 1):
 def get_materials(pmt_engine = "vmf"):
 	if pmt_engine == "vmf":
 		material_paths = list()
-		for material in PMT__G_CFG.vmf_materialdb.material_to_diffuse_dict:
+		for material in PMT__G_CFG.get_asset("vmf_materialdb").material_to_diffuse_dict:
 			material_paths.append(material)
 		return material_paths
 	elif pmt_engine == "t3d":
 		material_paths = list()
-		for unreal_path in PMT__G_CFG.t3d_materialdb.unreal_path_to_filesystem_path:
+		for unreal_path in PMT__G_CFG.get_asset("t3d_materialdb").unreal_path_to_filesystem_path:
 			material_paths.append(unreal_path)
 		return material_paths
 	elif pmt_engine == "map":
 		material_paths = list()
-		for material in PMT__G_CFG.map_materialdb.material_to_diffuse_dict:
+		for material in PMT__G_CFG.get_asset("map_materialdb").material_to_diffuse_dict:
 			material_paths.append(material)
 		return material_paths
 	return material_paths
@@ -70,14 +71,14 @@ def get_materials(pmt_engine = "vmf"):
 	
 def get_diffuse_fs(pmt_engine, material_path):
 	if pmt_engine == "vmf":
-		diffuse_relpath = PMT__G_CFG.vmf_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("vmf_materialdb").get_diffuse_of_material(material_path)
 		vmf_textures_path = PMT__G_CFG.g_cfg.get_config("vmf", "vmf_textures_path")
 		diffuse_fs = pmt_materialdb_source1_vmt.convert_source_path_to_fs(diffuse_relpath, vmf_textures_path)
 		return diffuse_fs
 	elif pmt_engine == "t3d":
-		return PMT__G_CFG.t3d_materialdb.get_filesystem_path(material_path)
+		return PMT__G_CFG.get_asset("t3d_materialdb").get_filesystem_path(material_path)
 	elif pmt_engine == "map":
-		diffuse_relpath = PMT__G_CFG.map_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("map_materialdb").get_diffuse_of_material(material_path)
 		map_textures_path = PMT__G_CFG.g_cfg.get_config("map", "map_textures_path")
 		diffuse_fs = pmt_materialdb_idtech4_mtr.convert_idtech4_path_to_fs(diffuse_relpath, map_textures_path)
 		return diffuse_fs
@@ -89,14 +90,14 @@ def get_materials_using_diffuse_fs(pmt_engine, diffuse_absolute_fs_path):
 	if pmt_engine == "vmf":
 		vmf_textures_path = PMT__G_CFG.g_cfg.get_config("vmf", "vmf_textures_path")
 		diffuse_fs = pmt_materialdb_source1_vmt.convert_fs_to_source_path(diffuse_absolute_fs_path, vmf_textures_path)
-		return PMT__G_CFG.vmf_materialdb.diffuse_to_materials_dict[diffuse_fs]
+		return PMT__G_CFG.get_asset("vmf_materialdb").diffuse_to_materials_dict[diffuse_fs]
 	elif pmt_engine == "t3d":
 		#vmf and map are lists, while t3d is a string, but return a list for consistency
-		return [ PMT__G_CFG.t3d_materialdb.filesystem_path_to_unreal_path[diffuse_fs_path] ]
+		return [ PMT__G_CFG.get_asset("t3d_materialdb").filesystem_path_to_unreal_path[diffuse_fs_path] ]
 	elif pmt_engine == "map":
 		map_textures_path = PMT__G_CFG.g_cfg.get_config("map", "map_textures_path")
 		diffuse_fs = pmt_materialdb_idtech4_mtr.convert_fs_to_idtech4_path(diffuse_absolute_fs_path, map_textures_path)
-		return PMT__G_CFG.map_materialdb.diffuse_to_materials_dict[diffuse_fs]
+		return PMT__G_CFG.get_asset("map_materialdb").diffuse_to_materials_dict[diffuse_fs]
 	
 	assert False, "MaterialsetsSelector get_materials_using_diffuse_fs() invalid pmt_engine {}".format(pmt_engine)
 	return None
@@ -114,27 +115,30 @@ def get_path_sep(pmt_engine = "vmf"):
 
 def get_material_analyze_dict(pmt_engine, material_path):
 	diffuse_fs = get_diffuse_fs(pmt_engine, material_path)
-	if pmt_engine == "vmf" and diffuse_fs in PMT__G_CFG.vmf_materialdb.fs_diffuse_to_analyze:
-		return PMT__G_CFG.vmf_materialdb.fs_diffuse_to_analyze[diffuse_fs]
-	elif pmt_engine == "t3d" and diffuse_fs in PMT__G_CFG.t3d_materialdb.filesystem_path_to_analyze:
-		return PMT__G_CFG.t3d_materialdb.filesystem_path_to_analyze[diffuse_fs]
-	elif pmt_engine == "map" and diffuse_fs in PMT__G_CFG.map_materialdb.fs_diffuse_to_analyze:
-		return PMT__G_CFG.map_materialdb.fs_diffuse_to_analyze[diffuse_fs]
+	if pmt_engine == "vmf" and diffuse_fs in PMT__G_CFG.get_asset("vmf_materialdb").fs_diffuse_to_analyze:
+		return PMT__G_CFG.get_asset("vmf_materialdb").fs_diffuse_to_analyze[diffuse_fs]
+	elif pmt_engine == "t3d" and diffuse_fs in PMT__G_CFG.get_asset("t3d_materialdb").filesystem_path_to_analyze:
+		return PMT__G_CFG.get_asset("t3d_materialdb").filesystem_path_to_analyze[diffuse_fs]
+	elif pmt_engine == "map" and diffuse_fs in PMT__G_CFG.get_asset("map_materialdb").fs_diffuse_to_analyze:
+		return PMT__G_CFG.get_asset("map_materialdb").fs_diffuse_to_analyze[diffuse_fs]
 		
 	#assert pmt_engine in ["vmf", "t3d", "map"], "MaterialsetsSelector get_material_analyze_dict() invalid pmt_engine {}".format(pmt_engine)
 	return None
 def get_material_tags_dict(pmt_engine, material_path):
 	diffuse_fs = get_diffuse_fs(pmt_engine, material_path)
-	if pmt_engine == "vmf" and diffuse_fs in PMT__G_CFG.vmf_materialdb.fs_diffuse_to_tags:
-		return PMT__G_CFG.vmf_materialdb.fs_diffuse_to_tags[diffuse_fs]
-	elif pmt_engine == "t3d" and diffuse_fs in PMT__G_CFG.t3d_materialdb.filesystem_path_to_tags:
-		return PMT__G_CFG.t3d_materialdb.filesystem_path_to_tags[diffuse_fs]
-	elif pmt_engine == "map" and diffuse_fs in PMT__G_CFG.map_materialdb.fs_diffuse_to_tags:
-		return PMT__G_CFG.map_materialdb.fs_diffuse_to_tags[diffuse_fs]
+	if pmt_engine == "vmf" and diffuse_fs in PMT__G_CFG.get_asset("vmf_materialdb").fs_diffuse_to_tags:
+		return PMT__G_CFG.get_asset("vmf_materialdb").fs_diffuse_to_tags[diffuse_fs]
+	elif pmt_engine == "t3d" and diffuse_fs in PMT__G_CFG.get_asset("t3d_materialdb").filesystem_path_to_tags:
+		return PMT__G_CFG.get_asset("t3d_materialdb").filesystem_path_to_tags[diffuse_fs]
+	elif pmt_engine == "map" and diffuse_fs in PMT__G_CFG.get_asset("map_materialdb").fs_diffuse_to_tags:
+		return PMT__G_CFG.get_asset("map_materialdb").fs_diffuse_to_tags[diffuse_fs]
 		
 	#assert pmt_engine in ["vmf", "t3d", "map"], "MaterialsetsSelector get_material_tags_dict() invalid pmt_engine {}".format(pmt_engine)
 	return None
 	
+#{similar0?0.5} is a subsearch; quotes and comments are not used in queries
+QUERY_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "", line_comments = False)
+
 def perform_material_search(pmt_engine, materials_list, query):
 	if len(query) == 0:
 		report_string = "No search query entered."
@@ -142,39 +146,7 @@ def perform_material_search(pmt_engine, materials_list, query):
 		
 	query = query.lower()
 
-	def tokenize_query(query):
-		def simplify_whitespace(text):
-			for char in string.whitespace:
-				text = text.replace(char, " ")
-			return text
-		query = simplify_whitespace(query)
-		
-		def pad_operators(text):
-			PAD_CHARS = "{}"
-			for char in PAD_CHARS:
-				text = text.replace(char, " {} ".format(char))
-			return text
-		query = pad_operators(query)
-		
-		def compact_spaces(text):
-			SPACES_4 = "    "
-			SPACES_2 = "  "
-			while text.find(SPACES_4) != -1:
-				text = text.replace(SPACES_4, " ")
-			while text.find(SPACES_2) != -1:
-				text = text.replace(SPACES_2, " ")
-			return text
-		query = compact_spaces(query)
-		
-		#
-		tokens = query.split(sep = " ", maxsplit = -1)
-		
-		while "" in tokens:
-			tokens.remove("")
-		
-		#DPRINT("tokens: {}".format(tokens))	
-		return tokens
-	query_tokens = tokenize_query(query)
+	query_tokens = pmt_common_lexer.token_texts(QUERY_LEXER.tokenize(query))
 	
 	def validate_query(tokens):
 		num_tokens = len(tokens)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+#	node               : 	pmt::pmt__globalconfig
+#	houdini_module_name: 	pmt_multi_export
+#	script_section_name: 	pmt_multi_export.py
+#
+# Exports the geometry of a node to several formats (.vmf, .t3d and .map) in one pass.
+# The geometry is read once (see pmt_common_extract.GeometryCache) and the export data of each format is
+# extracted from it; then each file is written by its exporter, in parallel worker processes if num_processes > 1.
+#
+#	PMT__G_CFG.pmt_multi_export.main_export(node, { "vmf" : "c:/maps/a.vmf", "t3d" : "c:/maps/a.t3d", "map" : "c:/maps/a.map" })
+
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = PMT__G_CFG.pmt_common
+	pmt_common_extract = PMT__G_CFG.pmt_common_extract
+	pmt_common_dump = PMT__G_CFG.pmt_common_dump
+	pmt_common_format = PMT__G_CFG.pmt_common_format
+else:
+	import pmt_common
+	import pmt_common_extract
+	import pmt_common_dump
+	import pmt_common_format
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
+import os
+import importlib
+import multiprocessing
+import concurrent.futures
+
+import inspect
+CF = inspect.currentframe
+def CURFUNC(inspect_currentframe): #return the name of the 'current function':  CURFUNC(CF())
+	return inspect_currentframe.f_code.co_name
+def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
+	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
+
+EXPORT_FORMATS = ["vmf", "t3d", "map"]
+
+#The export data of each format is sent to the worker processes as an export dump (NumPy arrays and JSON, see pmt_common_dump),
+#since the classes of the exporters can not be pickled by reference when they are loaded from the .hda.
+#When running in Houdini, worker processes import the copy of this module in \scripts\pmt__global_config\ next to the library of the HDA
+#(see pmt_common.get_hda_scripts_path()).
+
+#Returns the exporter module of format_name, e.g. pmt_vmf_export for "vmf";
+#outside of Houdini, the module is imported from \scripts\pmt_{format_name}_export
+def get_exporter_module(format_name):
+	assert format_name in EXPORT_FORMATS, CURFUNC(CF()) + ": unknown export format '{}'".format(format_name)
+	module_name = "pmt_{}_export".format(format_name)
+	if IN_HOUDINI:
+		return getattr(hou.nodeType(hou.sopNodeTypeCategory(), "pmt::" + module_name).hdaModule(), module_name)
+	module_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", module_name)
+	if module_path not in sys.path:
+		sys.path.append(module_path)
+	return importlib.import_module(module_name)
+
+#Writes export_data of format_name with the write_export() of its exporter; num_processes is only used by the vmf exporter,
+#precision and snap_epsilon by the vmf and map exporters (see pmt_common_format.NumberFormat)
+def write_export(format_name, export_data, export_path, num_processes = 1, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	exporter_module = get_exporter_module(format_name)
+	if format_name == "vmf":
+		exporter_module.write_export(export_data, export_path, num_processes, use_cache, precision, snap_epsilon)
+	elif format_name == "map":
+		exporter_module.write_export(export_data, export_path, use_cache, precision, snap_epsilon)
+	else:
+		exporter_module.write_export(export_data, export_path, use_cache)
+
+#Worker process entry point; writes the export dump (ExportDump.arrays and ExportDump.json) of format_name to export_path
+def write_dump_export(format_name, dump_arrays, dump_json, export_path, use_cache, precision, snap_epsilon):
+	dump = pmt_common_dump.ExportDump(format_name)
+	dump.arrays = dump_arrays
+	dump.json = dump_json
+	export_data = get_exporter_module(format_name).export_data_from_dump(dump)
+	write_export(format_name, export_data, export_path, 1, use_cache, precision, snap_epsilon)
+	return export_path
+
+def get_worker_module():
+	if not IN_HOUDINI:
+		return sys.modules[__name__]
+	scripts_path = pmt_common.get_hda_scripts_path("pmt::pmt__global_config", "pmt__global_config")
+	if scripts_path not in sys.path:
+		sys.path.append(scripts_path)
+	return importlib.import_module("pmt_multi_export")
+
+#targets is a dict of format_name -> export path, e.g. { "vmf" : "c:/maps/a.vmf", "map" : "c:/maps/a.map" }
+#num_processes > 1 writes the files in parallel, one worker process per format.
+#use_cache reuses the islands of the previous export of each path that did not change (see pmt_common_cache)
+#precision and snap_epsilon set the format of floats of the vmf and map files, see pmt_common_format.NumberFormat
+@pmt_common.HOUPROFILE_EVENT_DECO
+def perform_export(node, targets, num_processes = 1, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	geometry = node.geometry()
+	assert geometry != None, "multi export: node at {} has no geometry".format(node.path())
+	assert len(targets) > 0, "multi export: no export paths"
+
+	geometry_cache = pmt_common_extract.GeometryCache(geometry)
+	all_export_data = dict()
+	for format_name in targets:
+		print("multi export: extracting {}".format(format_name))
+		all_export_data[format_name] = get_exporter_module(format_name).extract_export_data(node, use_cache, geometry_cache)
+
+	#Inside Houdini sys.executable is the Houdini application, see pmt_vmf_export.get_python_executable()
+	python_executable = get_exporter_module("vmf").get_python_executable() if num_processes > 1 and len(targets) > 1 else None
+	if python_executable == None:
+		for format_name in targets:
+			write_export(format_name, all_export_data[format_name], targets[format_name], 1, use_cache, precision, snap_epsilon)
+		return
+
+	context = multiprocessing.get_context("spawn")
+	context.set_executable(python_executable)
+	worker_module = get_worker_module()
+	with concurrent.futures.ProcessPoolExecutor(max_workers = min(num_processes, len(targets)), mp_context = context) as executor:
+		futures = list()
+		for format_name in targets:
+			dump = get_exporter_module(format_name).export_data_to_dump(all_export_data[format_name])
+			futures.append( executor.submit(worker_module.write_dump_export, format_name, dump.arrays, dump.json, targets[format_name], use_cache, precision, snap_epsilon) )
+		for future in futures:
+			print("multi export: wrote {}".format(future.result()))
+
+#the multi export is only run from script (no HDA calls main_export), as are its use_cache, num_processes and precision
+def main_export(node, targets, num_processes = 3, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	profile = pmt_common.HOUPROFILE("pmt_multi_export")
+	perform_export(node, targets, num_processes, use_cache, precision, snap_epsilon)
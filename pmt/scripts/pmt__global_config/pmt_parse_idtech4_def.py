@@ -7,10 +7,22 @@
 
 import sys
 import os
-import string
 import copy
 
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
+else:
+	import pmt_common_lexer
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
 	DEBUG_LEVEL = 1 if not IN_HOUDINI else 0
@@ -52,6 +64,8 @@ class EntityDef:
 		self.all_property_dict = dict()
 		self.all_property_dict_editor = dict() #contains all properties with editor_tags assigned
 		
+DEF_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"", block_comments = True)
+
 def parse_idtech4_def(def_paths):
 	#load .def files and create a series of tokens for each file
 	def_tokens_dict = dict()
@@ -64,64 +78,28 @@ def parse_idtech4_def(def_paths):
 		#fail, so explicitly set the codec here.
 		CODEC = "cp1252" #windows-1252 'Western Europe'
 		with open(filepath, 'rt', encoding=CODEC) as f:
-			text = ""
-			for line in f:
-				text += line
-			
-			#remove text after // comments; note that single line comments precede multiline comments
-			#keepends == True, so we keep the newline chars(/n, /r, ...) 
-			text_without_comments = ""
-			for line in text.splitlines(keepends = True):
-				if len(line) == 0: continue
-
-				left, sep, right = line.partition("//")
-				text_without_comments += left
-				
-			#remove text in between /* */ comments
-			multiline_comment_start_index = text_without_comments.find("/*")
-			while multiline_comment_start_index != -1:
-				left1, sep1, right1 = text_without_comments.partition("/*")
-				left2, sep2, right2 = right1.partition("*/")
-				text_without_comments = left1 + right2
-				multiline_comment_start_index = text_without_comments.find("/*")
-			
-			#DPRINT("commentsremoved: " +  text_without_comments)
-			
-			#replace tabs, return, etc. with " "
-			#important: this can only happen after parsing '//' type comments
-			for char in string.whitespace:
-				text_without_comments = text_without_comments.replace(char, " ")
-			
-			#pad '{' and '}' with spaces so that split() will not mix brackets with text
-			text_without_comments = text_without_comments.replace("{", " { ")
-			text_without_comments = text_without_comments.replace("}", " } ")
+			text = f.read()
 			
-			#replace sequences of spaces with a single space
-			SPACES_4 = "    "
-			SPACES_2 = "  "
-			while text_without_comments.find(SPACES_4) != -1:
-				text_without_comments = text_without_comments.replace(SPACES_4, " ")
-			while text_without_comments.find(SPACES_2) != -1:
-				text_without_comments = text_without_comments.replace(SPACES_2, " ")
-			
-			DPRINT("pretoken: " +  text_without_comments)
-			tokens = text_without_comments.split(sep = " ", maxsplit = -1)
-			DPRINT("tokens: " + str(tokens))
-			
-			def_tokens_dict[filepath] = tokens
+		lexer_tokens = DEF_LEXER.tokenize(text, filepath)
+		tokens = pmt_common_lexer.token_texts(lexer_tokens)
+		#True for tokens that were in quotes, so that quoted brackets are not taken as brackets
+		tokens_quoted = [token[0] == pmt_common_lexer.TOKEN_STRING for token in lexer_tokens]
+		DPRINT("tokens: " + str(tokens))
+		
+		def_tokens_dict[filepath] = (tokens, tokens_quoted)
 	
 	#first pass parsing of tokens
 	entitydef_dict = dict()
 	for filepath in def_tokens_dict:
-		tokens = def_tokens_dict[filepath]
+		(tokens, tokens_quoted) = def_tokens_dict[filepath]
 		num_tokens = len(tokens)
 		
 		#
 		validate_bracket_depth = 0
 		for i in range(num_tokens):
-			if tokens[i] == "{":
+			if tokens[i] == "{" and not tokens_quoted[i]:
 				validate_bracket_depth += 1
-			if tokens[i] == "}":
+			if tokens[i] == "}" and not tokens_quoted[i]:
 				validate_bracket_depth -= 1
 				
 		assert validate_bracket_depth == 0, "no closing bracket for {} (bracket_depth == {})".format(filepath, validate_bracket_depth)
@@ -133,12 +111,12 @@ def parse_idtech4_def(def_paths):
 				is_in_entitydef = True
 				entity_name = tokens[token_index+1]
 				open_bracket = tokens[token_index+2]
-				assert open_bracket == "{", "syntax error - no opening bracket for entityDef {} in {}".format(entity_name, filepath)
+				assert open_bracket == "{" and not tokens_quoted[token_index+2], "syntax error - no opening bracket for entityDef {} in {}".format(entity_name, filepath)
 				
 				#find the token index of closing bracket so we know the range to search for key-value pairs
 				closing_bracket_index = -1
 				for i in range(token_index, num_tokens, 1):
-					if tokens[i] == "}":
+					if tokens[i] == "}" and not tokens_quoted[i]:
 						closing_bracket_index = i
 						break
 				assert closing_bracket_index != -1, "could not find closing bracket in {}".format(filepath)
@@ -152,32 +130,9 @@ def parse_idtech4_def(def_paths):
 					first_property_index = token_index + 3
 					last_property_index = closing_bracket_index - 1
 					
-					#using split() to produce tokens in the previous step separates text between \",
-					#so we need to recombine it
-					recombined_token_string = tokens[first_property_index]
-					for i in range(first_property_index + 1, last_property_index + 1, 1):
-						recombined_token_string += " " + tokens[i]
+					#sequences of whitespace in quotes are replaced with a single space, e.g. "editor_var  key"
+					key_value_pairs = [" ".join(t.split()) for t in tokens[first_property_index:last_property_index + 1]]
 					
-					#we want to split() the string into key-value pairs using " " as a separator, but
-					#do not want to split along spaces between quotes. To resolve this, temporarly replace
-					#spaces in quotes with \t
-					in_quote = False
-					property_string = ""
-					for i in range(len(recombined_token_string)):
-						char = recombined_token_string[i]
-						if char == "\"":
-							in_quote = not in_quote
-							
-						if in_quote and char == " ":
-							property_string += "\t"
-						else:
-							property_string += char
-							
-					key_value_pairs_with_tabs = property_string.split(sep = " ", maxsplit = -1)	
-					key_value_pairs = list()
-					for token in key_value_pairs_with_tabs:
-						key_value_pairs.append(token.replace("\t", " "))
-				
 					#populate the key-value pair dict for this entity
 					#lines are in the format
 					#	key_or_editor value_or_description
@@ -188,11 +143,6 @@ def parse_idtech4_def(def_paths):
 					for i in range(0, num_properties_x2, 2):
 						key_or_editor = key_value_pairs[i]
 						value_or_description = key_value_pairs[i+1]
-						if key_or_editor.startswith("\""): key_or_editor = key_or_editor[1:]
-						if key_or_editor.endswith("\""): key_or_editor = key_or_editor[:-1]
-						if value_or_description.startswith("\""): value_or_description = value_or_description[1:]
-						if value_or_description.endswith("\""): value_or_description = value_or_description[:-1]
-						
 						key_or_editor = key_or_editor.lower()
 						
 						#editor_ keywords without numbers, possibly incomplete
@@ -9,10 +9,21 @@
 
 import sys
 import os
-import string
 import copy
 
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
+else:
+	import pmt_common_lexer
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
 
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
@@ -178,9 +189,9 @@ def parse_source1_fgd(fgd_paths):
 	fgd_tokens_dict = dict()
 	inquote_text_dict = dict()
 	
-	INQUOTE_TOKEN = "%%q_"
+	INQUOTE_TOKEN = pmt_common_lexer.INQUOTE_TOKEN
 	NEWLINE_TOKEN = "%%n"
-	inquote_token_index = 0
+	fgd_lexer = pmt_common_lexer.Lexer(operators = "{}[]():=,+", quotes = "\"", newlines = INCLUDE_NEWLINES)
 	for (name, filepath) in fgd_paths:
 		DPRINT("parsing: {}".format(filepath))
 		
@@ -190,94 +201,19 @@ def parse_source1_fgd(fgd_paths):
 		#fail, so explicitly set the codec here.
 		CODEC = "cp1252" #windows-1252 'Western Europe'
 		with open(filepath, 'rt', encoding=CODEC) as f:
-			text = ""
-			for line in f:
-				text += line
-			
-			#remove text after // comments; note that single line comments precede multiline comments
-			#keepends == True, so we keep the newline chars(/n, /r, ...) 
-			text_without_comments = ""
-			for line in text.splitlines(keepends = True):
-				if len(line) == 0: continue
-
-				left, sep, right = line.partition("//")
-				text_without_comments += left
-			
-			#	todo:  check whether .fgd supports multiline comments
-			#remove text in between /* */ comments
-			REMOVE_MULTILINE_COMMENTS = False
-			if REMOVE_MULTILINE_COMMENTS:
-				multiline_comment_start_index = text_without_comments.find("/*")
-				while multiline_comment_start_index != -1:
-					left1, sep1, right1 = text_without_comments.partition("/*")
-					left2, sep2, right2 = right1.partition("*/")
-					text_without_comments = left1 + right2
-					multiline_comment_start_index = text_without_comments.find("/*")
-			
-			#DPRINT("commentsremoved: " +  text_without_comments)
-			
-			if INCLUDE_NEWLINES:
-				#Make sure that the text does not contain NEWLINE_TOKEN before adding it
-				assert text_without_comments.find(NEWLINE_TOKEN) == -1, "error: .fgd contains NEWLINE_TOKEN {}".format(NEWLINE_TOKEN)
-				
-				#To make debug print more dense/easier to read we want to remove newlines.
-				#However, newlines might be used to indicate the end of entity properties so
-				#replace it with a special token.
-				for char in string.whitespace:
-					text_without_comments = text_without_comments.replace("\n", " {} ".format(NEWLINE_TOKEN))
-			
-			#replace tabs, return, etc. with " "
-			#important: this can only happen after parsing '//' type comments
-			for char in string.whitespace:
-				text_without_comments = text_without_comments.replace(char, " ")
-			
-			#DPRINT("removedwhitespace: " +  text_without_comments)
-			
-			#extract text in between quotes
-			assert text_without_comments.find(INQUOTE_TOKEN) == -1, "error: .fgd contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
+			text = f.read()
 			
-			in_quote = False
-			text_without_quotes = ""
-			inquote_buffer = ""
-			for char in text_without_comments:
-				if char == "\"":
-					if not in_quote: #opening quote
-						inquote_buffer = ""
-					else: #closing quote
-						dict_id_str = INQUOTE_TOKEN + str(inquote_token_index)
-						inquote_token_index += 1
-						inquote_text_dict[dict_id_str] = inquote_buffer
-						text_without_quotes += " {} ".format(dict_id_str)
-					in_quote = not in_quote
-				else:
-					if in_quote:
-						inquote_buffer += char
-					else:
-						text_without_quotes += char
-			assert not in_quote, "error: missing closing quote"
-			
-			#DPRINT("removedquotes: " +  text_without_quotes)
-			#for id in inquote_text_dict:
-			#	DPRINT("{}: {}".format(id, inquote_text_dict[id]))
-			
-			#pad '{', '}', ... with spaces so that split() will not mix them with text
-			PAD_CHARS = "{}[]():=,+"
-			for char in PAD_CHARS:
-				text_without_quotes = text_without_quotes.replace(char, " {} ".format(char))
-			
-			#replace sequences of spaces with a single space
-			SPACES_4 = "    "
-			SPACES_2 = "  "
-			while text_without_quotes.find(SPACES_4) != -1:
-				text_without_quotes = text_without_quotes.replace(SPACES_4, " ")
-			while text_without_quotes.find(SPACES_2) != -1:
-				text_without_quotes = text_without_quotes.replace(SPACES_2, " ")
-			
-			#DPRINT("pretoken: " +  text_without_quotes)
-			tokens = text_without_quotes.split(sep = " ", maxsplit = -1)
-			DPRINT("tokens: " + str(tokens))
-			
-			fgd_tokens_dict[filepath] = tokens
+		#text in between quotes is replaced by INQUOTE_TOKEN placeholders, see inquote_text_dict
+		tokens = pmt_common_lexer.replace_strings(fgd_lexer.tokenize(text, filepath), inquote_text_dict)
+		
+		if INCLUDE_NEWLINES:
+			#To make debug print more dense/easier to read we want to remove newlines.
+			#However, newlines might be used to indicate the end of entity properties so
+			#replace it with a special token.
+			tokens = [NEWLINE_TOKEN if t == "\n" else t for t in tokens]
+		DPRINT("tokens: " + str(tokens))
+		
+		fgd_tokens_dict[filepath] = tokens
 			
 	#validate brackets
 	def validate_bracket_depth(tokens, open_bracket = "{", close_bracket = "}", min_depth = 0, max_depth = 128):
@@ -8,7 +8,19 @@ import os
 import string
 import copy
 
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
+###\scripts\pmt__global_config\pmt__global_config.py
+###Copy-paste this section to reference pmt__global_config modules from a module inside pmt__global_config.
+###Only modules starting with "pmt_common" should be accessed from inside pmt::pmt__global_config.
+import sys
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
+else:
+	import pmt_common_lexer
+###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
 
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
@@ -396,7 +408,7 @@ ENCLOSE_OPERATORS = ["(", ")", "[", "]", "{", "}"]
 OPERATORS += ENCLOSE_OPERATORS
 
 #parser constants
-INQUOTE_TOKEN = "%%q_"
+INQUOTE_TOKEN = pmt_common_lexer.INQUOTE_TOKEN
 INBRACKET_TOKEN = "%%b_"
 NEWLINE_TOKEN = "%%n"
 
@@ -409,6 +421,11 @@ class UCFile:
 		self.bracket_text_dict = dict()
 		self.preprocessor_lines = dict()
 		
+#todo:  include all operators, such as =, <=, +=, ...
+UC_LEXER = pmt_common_lexer.Lexer(operators = "{}[]();,?", quotes = "\"\'", block_comments = True, directive = "#")
+#text in between the brackets of defaultproperties, after comments and strings are removed by UC_LEXER
+UC_DEFAULTPROPERTIES_LEXER = pmt_common_lexer.Lexer(operators = "{}[]();,=", quotes = "", line_comments = False)
+
 def parse_unreal_uc(uc_paths):
 	unreal_defs = UnrealScriptDefinitions()
 	
@@ -429,143 +446,22 @@ def parse_unreal_uc(uc_paths):
 		#fail, so explicitly set the codec here.
 		CODEC = "cp1252" #windows-1252 'Western Europe'
 		
-		text = ""
 		with open(path, 'rt', encoding=CODEC) as f:
-			for line in f:
-				text += line
-			
-		def remove_comments_newlines_and_tabs(text):
-			#remove text after // comments; note that single line comments precede multiline comments
-			#keepends == True, so we keep the newline chars(/n, /r, ...)
-			text_without_comments = ""
-			preprocessor_lines = list()
-			
-			for line in text.splitlines(keepends = True):
-				if len(line) == 0: continue
-
-				if "\"" not in line and "\'" not in line:
-					left, sep, right = line.partition("//")
-					comment_removed_line = left
-				else: #ignore // if it is in a quote
-					if "//" in line:
-						#find the lowest // that is not in a quote and remove all text afterwards
-						splitline = line.split("//", maxsplit = -1)
-						if len(splitline) > 0:
-							num_single_quote = splitline[0].count("\'")
-							num_double_quote = splitline[0].count("\"")
-							comment_removed_line = splitline[0]
-							
-							for i in range(1, len(splitline)):
-								in_quote = num_single_quote % 2 != 0 or num_double_quote % 2 != 0
-								if in_quote:
-									comment_removed_line += "//" + splitline[i] 
-									num_single_quote += splitline[i].count("\'")
-									num_double_quote += splitline[i].count("\"")
-								else:
-									break #if we are not in a quote, all remaining text is removed
-									
-					else:
-						comment_removed_line = line
-						
-				#remove preprocessor lines
-				left_whitespace_removed = comment_removed_line.lstrip(string.whitespace)
-				if not left_whitespace_removed.startswith("#"):
-					text_without_comments += comment_removed_line
-				else:
-					preprocessor_lines.append(left_whitespace_removed)
-					
-			#remove text in between /* */ comments
-			REMOVE_MULTILINE_COMMENTS = True
-			if REMOVE_MULTILINE_COMMENTS:
-				multiline_comment_start_index = text_without_comments.find("/*")
-				while multiline_comment_start_index != -1:
-					left1, sep1, right1 = text_without_comments.partition("/*")
-					left2, sep2, right2 = right1.partition("*/")
-					text_without_comments = left1 + right2
-					multiline_comment_start_index = text_without_comments.find("/*")
-			
-			#Current approach removes all newlines and will not work otherwise.
-			# #if false all newlines are replaced with " " in next step				
-			# INCLUDE_NEWLINE_TOKENS = False
-			# if INCLUDE_NEWLINE_TOKENS:
-				# #Make sure that the text does not contain NEWLINE_TOKEN before adding it
-				# assert text_without_comments.find(NEWLINE_TOKEN) == -1, "error: .fgd contains NEWLINE_TOKEN {}".format(NEWLINE_TOKEN)
-				
-				# #To make debug print more dense/easier to read we want to remove newlines.
-				# #However, newlines might be used for something so replace it with a special token.
-				# for char in string.whitespace:
-					# text_without_comments = text_without_comments.replace("\n", " {} ".format(NEWLINE_TOKEN))
-				
-			#replace tabs, newline, return, etc. with " "
-			#important: this can only happen after parsing '//' type comments
-			for char in string.whitespace:
-				text_without_comments = text_without_comments.replace(char, " ")
-				
-			#	
-			return (text_without_comments, preprocessor_lines)
-		text, preprocessor_lines = remove_comments_newlines_and_tabs(text)
-
-		#Extract text in between quotes "" or ''
-		#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-		#Under this assumption, literals such as "string' or 'string" are invalid.
-		def extract_string_literals(text, debug_path):
-			assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
-			
-			inquote_text_dict = dict()
-			
-			in_quote = False
-			quote_char = None
-			
-			text_without_quotes = ""
-			inquote_buffer = ""
-			for char in text:
-				if char == "\"" or char == "\'" and not in_quote:
-					quote_char = char
-					
-				if char == quote_char:
-					if not in_quote: #opening quote
-						inquote_buffer = ""
-					else: #closing quote
-						dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-						inquote_text_dict[dict_id_str] = inquote_buffer
-						text_without_quotes += " {} ".format(dict_id_str)
-						#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-					in_quote = not in_quote
-				else:
-					if in_quote:
-						inquote_buffer += char
-					else:
-						text_without_quotes += char
-			assert not in_quote, "error: missing closing quote for quote_char({}) in {}".format(quote_char, debug_path)
+			text = f.read()
 			
-			#debug print
-			if True:
-				DPRINT("removedquotes: " +  text_without_quotes)
-				for id in inquote_text_dict:
-					DPRINT("{}: {}".format(id, inquote_text_dict[id]))
-			
-			return (text_without_quotes, inquote_text_dict)
-		text, inquote_text_dict = extract_string_literals(text, path)
-		
-		def pad_operators(text):
-			#todo:  include all operators, such as =, <=, +=, ...		
-			#pad '{', '}', ... with spaces so that split() will not mix them with text
-			PAD_CHARS = "{}[]();,?"
-			for char in PAD_CHARS:
-				text = text.replace(char, " {} ".format(char))
-			return text
-		text = pad_operators(text)
+		#Comments are removed, and preprocessor lines (e.g. #exec) are kept out of the text and stored in preprocessor_lines.
+		#Text in between quotes "" or '' is replaced by INQUOTE_TOKEN placeholders, see inquote_text_dict.
+		lexer_tokens = UC_LEXER.tokenize(text, path)
+		preprocessor_lines = [token[1] + "\n" for token in lexer_tokens if token[0] == pmt_common_lexer.TOKEN_DIRECTIVE]
+		inquote_text_dict = dict()
+		code_tokens = [token for token in lexer_tokens if token[0] != pmt_common_lexer.TOKEN_DIRECTIVE]
+		text = " ".join(pmt_common_lexer.replace_strings(code_tokens, inquote_text_dict))
 		
-		#replace sequences of spaces with a single space
-		def compact_spaces(text):
-			SPACES_4 = "    "
-			SPACES_2 = "  "
-			while text.find(SPACES_4) != -1:
-				text = text.replace(SPACES_4, " ")
-			while text.find(SPACES_2) != -1:
-				text = text.replace(SPACES_2, " ")
-			return text
-		text = compact_spaces(text)
+		#debug print
+		if True:
+			DPRINT("removedquotes: " +  text)
+			for id in inquote_text_dict:
+				DPRINT("{}: {}".format(id, inquote_text_dict[id]))
 		
 		#Since we only want to extract configurable properties for classes/entities,
 		#it is not necessary to parse text in brackets, except for enum and struct types.
@@ -1092,16 +988,7 @@ def parse_unreal_uc(uc_paths):
 				if bracket_token != None:
 					defprop_text = uc.bracket_text_dict[bracket_token]
 					
-					def pad_defaultprop(text):
-						PAD_CHARS = "{}[]();,="
-						for char in PAD_CHARS:
-							text = text.replace(char, " {} ".format(char))
-						return text
-					defprop_text = pad_defaultprop(defprop_text)
-					defprop_text = compact_spaces(defprop_text)
-					defprop_tokens = defprop_text.split(sep = " ", maxsplit = -1)
-					while "" in defprop_tokens:
-							defprop_tokens.remove("")
+					defprop_tokens = pmt_common_lexer.token_texts(UC_DEFAULTPROPERTIES_LEXER.tokenize(defprop_text, path))
 					DPRINT("defprop_tokens: {}".format(defprop_tokens))
 					
 					#collect the indices of each '=' that is not between parenthesis '(' or ')'
@@ -177,7 +177,7 @@ def prop_type_to_propbar_type(prop_type, pmt_engine):
 		#if prop_type == "vector": return PROP_TYPE_VECTOR3
 		#if prop_type == "rotator": return PROP_TYPE_VECTOR3
 		#if prop_type == "color": return PROP_TYPE_COLOR	#RGBA byte [0, 255]
-		if prop_type in PMT__G_CFG.t3d_unrealscript_defs.all_enum_dict: return PROP_TYPE_ENUM
+		if prop_type in PMT__G_CFG.get_asset("t3d_unrealscript_defs").all_enum_dict: return PROP_TYPE_ENUM
 		
 	elif pmt_engine == "map":
 		if prop_type == "editor_bool": return PROP_TYPE_BOOL
@@ -201,18 +201,18 @@ def prop_type_to_propbar_type(prop_type, pmt_engine):
 def get_prop_type(classname, prop_name, pmt_engine):
 	type = None
 
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			vmf_prop = vmf_entity.all_property_dict[prop_name]
 			type = vmf_prop.type
-	elif pmt_engine == "t3d" and classname in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
-		uclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[classname]
+	elif pmt_engine == "t3d" and classname in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
+		uclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[classname]
 		if prop_name in uclass.all_editor_vars_dict:
 			t3d_var = uclass.all_editor_vars_dict[prop_name]
 			type = t3d_var.type
-	elif pmt_engine == "map" and classname in PMT__G_CFG.map_entity_dict:
-		map_entity = PMT__G_CFG.map_entity_dict[classname]
+	elif pmt_engine == "map" and classname in PMT__G_CFG.get_asset("map_entity_dict"):
+		map_entity = PMT__G_CFG.get_asset("map_entity_dict")[classname]
 		if prop_name in map_entity.all_property_dict_editor:
 			map_prop = map_entity.all_property_dict_editor[prop_name]
 			type = map_prop.editor_tag
@@ -226,8 +226,8 @@ def KVTABLE_get_vmf_choices_value(vmf_choice):
 
 #converts a NODE choice to KVTABLE
 def choices_value_to_description(choice_value, classname, prop_name, pmt_engine):
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			vmf_prop = vmf_entity.all_property_dict[prop_name]
 			assert vmf_prop.type == "choices" and vmf_prop.choices_list != None, "vmf entity {} has invalid choices_list"
@@ -242,8 +242,8 @@ def choices_value_to_description(choice_value, classname, prop_name, pmt_engine)
 	
 #converts a KVTABLE choice to NODE
 def choices_description_to_value(choice_description, classname, prop_name, pmt_engine):
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			vmf_prop = vmf_entity.all_property_dict[prop_name]
 			assert vmf_prop.type == "choices" and vmf_prop.choices_list != None, "vmf entity {} has invalid choices_list"
@@ -259,8 +259,8 @@ def choices_description_to_value(choice_description, classname, prop_name, pmt_e
 	
 def KVTABLE_get_prop_options_enum(classname, prop_name, pmt_engine):
 	enum_list = list()
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			vmf_prop = vmf_entity.all_property_dict[prop_name]
 			assert vmf_prop.type == "choices" and vmf_prop.choices_list != None, "vmf entity {} has invalid choices_list"
@@ -268,15 +268,15 @@ def KVTABLE_get_prop_options_enum(classname, prop_name, pmt_engine):
 				choice = vmf_prop.choices_list[choice_index]
 				
 				enum_list.append( KVTABLE_get_vmf_choices_value(choice) )
-	elif pmt_engine == "t3d" and classname in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
-		uclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[classname]
+	elif pmt_engine == "t3d" and classname in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
+		uclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[classname]
 		if prop_name in uclass.all_editor_vars_dict:
 			t3d_var = uclass.all_editor_vars_dict[prop_name]
-			unreal_enum = PMT__G_CFG.t3d_unrealscript_defs.all_enum_dict[t3d_var.type]
+			unreal_enum = PMT__G_CFG.get_asset("t3d_unrealscript_defs").all_enum_dict[t3d_var.type]
 			for i in range(len(unreal_enum.int_to_enum)):
 				enum_text = unreal_enum.int_to_enum[i]
 				enum_list.append(enum_text)
-	elif pmt_engine == "map" and classname in PMT__G_CFG.map_entity_dict:
+	elif pmt_engine == "map" and classname in PMT__G_CFG.get_asset("map_entity_dict"):
 		#return None #todo: check if map has enum/choices type
 		pass
 		#map_entity = PMT__G_CFG.map_entity_dict[classname]
@@ -286,8 +286,8 @@ def KVTABLE_get_prop_options_enum(classname, prop_name, pmt_engine):
 	return enum_list
 	
 def get_flags_descriptions(classname, prop_name, pmt_engine):
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			flags_prop = vmf_entity.all_property_dict[prop_name]
 			return flags_prop.get_flags_descriptions()
@@ -298,16 +298,16 @@ def get_flags_descriptions(classname, prop_name, pmt_engine):
 def KVTABLE_get_prop_default(classname, prop_name, pmt_engine):
 	default_value = None
 
-	if pmt_engine == "vmf" and classname in PMT__G_CFG.vmf_entity_dict:
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+	if pmt_engine == "vmf" and classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		if prop_name in vmf_entity.all_property_dict:
 			vmf_prop = vmf_entity.all_property_dict[prop_name]
 			default_value = vmf_prop.default_value
 			
 			if vmf_prop.type == "choices":
 				default_value = KVTABLE_get_vmf_choices_value(vmf_prop.choices_list[default_value])	
-	elif pmt_engine == "map" and classname in PMT__G_CFG.map_entity_dict:
-		map_entity = PMT__G_CFG.map_entity_dict[classname]
+	elif pmt_engine == "map" and classname in PMT__G_CFG.get_asset("map_entity_dict"):
+		map_entity = PMT__G_CFG.get_asset("map_entity_dict")[classname]
 		if prop_name in map_entity.all_property_dict_editor:
 			map_prop = map_entity.all_property_dict_editor[prop_name]
 			default_value = map_prop.value
@@ -317,23 +317,23 @@ def KVTABLE_get_prop_default(classname, prop_name, pmt_engine):
 def get_list_of_class_prop_names(classname, pmt_engine):
 	prop_names = list()
 	if pmt_engine == "vmf":
-		if classname not in PMT__G_CFG.vmf_entity_dict:
+		if classname not in PMT__G_CFG.get_asset("vmf_entity_dict"):
 			return None
-		vmf_entity = PMT__G_CFG.vmf_entity_dict[classname]
+		vmf_entity = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		for prop_name in vmf_entity.all_property_dict:
 			prop_names.append(prop_name)
 			
 	elif pmt_engine == "t3d":
-		if classname not in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
+		if classname not in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
 			return None
-		uclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[classname]
+		uclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[classname]
 		for var_name in uclass.all_editor_vars_dict:
 			prop_names.append(var_name)
 			
 	elif pmt_engine == "map":
-		if classname not in PMT__G_CFG.map_entity_dict:
+		if classname not in PMT__G_CFG.get_asset("map_entity_dict"):
 			return None
-		map_entity = PMT__G_CFG.map_entity_dict[classname]
+		map_entity = PMT__G_CFG.get_asset("map_entity_dict")[classname]
 		for prop_name in map_entity.all_property_dict_editor:
 			prop_names.append(prop_name)
 			
@@ -426,8 +426,8 @@ def dict_to_t3d_value_str(t3d_value_dict):
 	
 def vmf_pointclasses_to_treeitems():
 	paths_list = list()
-	for classname in PMT__G_CFG.vmf_entity_dict:
-		entity_def = PMT__G_CFG.vmf_entity_dict[classname]
+	for classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		entity_def = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		type = entity_def.classtype.lower()
 		if type == "@pointclass":
 			paths_list.append("/{}".format(classname))
@@ -435,8 +435,8 @@ def vmf_pointclasses_to_treeitems():
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 def vmf_npcclasses_to_treeitems():
 	paths_list = list()
-	for classname in PMT__G_CFG.vmf_entity_dict:
-		entity_def = PMT__G_CFG.vmf_entity_dict[classname]
+	for classname in PMT__G_CFG.get_asset("vmf_entity_dict"):
+		entity_def = PMT__G_CFG.get_asset("vmf_entity_dict")[classname]
 		type = entity_def.classtype.lower()
 		if type == "@npcclass":
 			paths_list.append("/{}".format(classname))
@@ -462,9 +462,9 @@ def vmf_sounds_to_treeitems():
 	#	FOLDER/a.wav
 
 	paths_list = list()
-	for sound_path in PMT__G_CFG.vmf_sounddb.fs_sounds_list:
+	for sound_path in PMT__G_CFG.get_asset("vmf_sounddb").fs_sounds_list:
 		paths_list.append(sound_path)
-	for sound_path in PMT__G_CFG.vmf_sounddb.all_soundscripts:
+	for sound_path in PMT__G_CFG.get_asset("vmf_sounddb").all_soundscripts:
 		paths_list.append(":soundscripts/" + sound_path.replace(".", "/"))
 	#for sound_path in PMT__G_CFG.vmf_sounddb.all_soundscapes:
 	#	paths_list.append(":soundscapes/" + sound_path.replace(".", "/"))
@@ -473,16 +473,16 @@ def vmf_sounds_to_treeitems():
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 def vmf_materials_to_treeitems():
 	paths_list = list()
-	for material_path in PMT__G_CFG.vmf_materialdb.material_to_diffuse_dict:
+	for material_path in PMT__G_CFG.get_asset("vmf_materialdb").material_to_diffuse_dict:
 		paths_list.append(material_path)
 	(qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items) = paths_to_qtreewidgetitems(paths_list, "/")
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 	
 def uclass_to_treeitems(classname):
-	if classname not in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
+	if classname not in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
 		return None
 		
-	uclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[classname]
+	uclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[classname]
 	
 	treeroot = QtWidgets.QTreeWidgetItem(1)
 	treeroot.setText(COLUMN_KVTREE_PROPBAR_TYPE, "class: {}".format(classname))
@@ -492,7 +492,7 @@ def uclass_to_treeitems(classname):
 		treeitem = QtWidgets.QTreeWidgetItem(parent_qtreeitem, 1)
 		treeitem.setText(COLUMN_KVTREE_KEY, unreal_var.name)
 		
-		parser_type = PMT__G_CFG.t3d_unrealscript_defs.get_parser_type(unreal_var.type)
+		parser_type = PMT__G_CFG.get_asset("t3d_unrealscript_defs").get_parser_type(unreal_var.type)
 		if parser_type != pmt_parse_unreal1_uc.PARSER_VARTYPE_STRUCT:
         
 			if default_value_from_struct != None:
@@ -501,19 +501,19 @@ def uclass_to_treeitems(classname):
 				if unreal_var.name in uclass.defaultproperties_dict:
 					default_value = uclass.defaultproperties_dict[unreal_var.name]
 				else:
-					default_value = PMT__G_CFG.t3d_unrealscript_defs.get_empty_default(unreal_var.type)
+					default_value = PMT__G_CFG.get_asset("t3d_unrealscript_defs").get_empty_default(unreal_var.type)
 				treeitem.setText(COLUMN_KVTREE_VALUE, default_value)
 			treeitem.setText(COLUMN_KVTREE_PROP_TYPE, unreal_var.type)
 			treeitem.setText(COLUMN_KVTREE_PROPBAR_TYPE, prop_type_to_propbar_type(unreal_var.type, "t3d"))
 		else:
-			ustruct = PMT__G_CFG.t3d_unrealscript_defs.all_struct_dict[unreal_var.type]
+			ustruct = PMT__G_CFG.get_asset("t3d_unrealscript_defs").all_struct_dict[unreal_var.type]
 			
 			if unreal_var.name in uclass.defaultproperties_dict:
 				default_value = uclass.defaultproperties_dict[unreal_var.name]
 			else:
 				default_value = ""
 				
-			empty_default = PMT__G_CFG.t3d_unrealscript_defs.get_empty_default(unreal_var.type)
+			empty_default = PMT__G_CFG.get_asset("t3d_unrealscript_defs").get_empty_default(unreal_var.type)
 			
 			#print("structdef: {} -> {}".format(unreal_var.name, empty_default))
 			
@@ -637,8 +637,8 @@ def paths_to_qtreewidgetitems(paths, path_sep = '/'):
 	
 def t3d_classes_to_treeitems():
 	paths_list = list()
-	for classname in PMT__G_CFG.t3d_unrealscript_defs.class_dict:
-		uclass = PMT__G_CFG.t3d_unrealscript_defs.class_dict[classname]
+	for classname in PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict:
+		uclass = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[classname]
 		path = ""
 		
 	 #inheritance_chain starts with 'deepest' class and ends with root class('actor'), reverse() to start with root
@@ -653,19 +653,19 @@ def t3d_classes_to_treeitems():
 	
 def t3d_materials_to_treeitems():
 	paths_list = list()
-	for unreal_path in PMT__G_CFG.t3d_materialdb.unreal_path_to_filesystem_path:
+	for unreal_path in PMT__G_CFG.get_asset("t3d_materialdb").unreal_path_to_filesystem_path:
 		paths_list.append(unreal_path)
 	(qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items) = paths_to_qtreewidgetitems(paths_list, ".")
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 def t3d_meshes_to_treeitems():
 	paths_list = list()
-	for unreal_path in PMT__G_CFG.t3d_meshdb.unreal_path_to_filesystem_path:
+	for unreal_path in PMT__G_CFG.get_asset("t3d_meshdb").unreal_path_to_filesystem_path:
 		paths_list.append(unreal_path)
 	(qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items) = paths_to_qtreewidgetitems(paths_list, ".")
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 def t3d_sounds_to_treeitems():
 	paths_list = list()
-	for unreal_path in PMT__G_CFG.t3d_sounddb.unreal_path_to_filesystem_path:
+	for unreal_path in PMT__G_CFG.get_asset("t3d_sounddb").unreal_path_to_filesystem_path:
 		paths_list.append(unreal_path)
 	(qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items) = paths_to_qtreewidgetitems(paths_list, ".")
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
@@ -673,7 +673,7 @@ def t3d_sounds_to_treeitems():
 
 def map_materials_to_treeitems():
 	paths_list = list()
-	for material_path in PMT__G_CFG.map_materialdb.material_to_diffuse_dict:
+	for material_path in PMT__G_CFG.get_asset("map_materialdb").material_to_diffuse_dict:
 		paths_list.append(material_path)
 	paths_list.sort()
 	(qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items) = paths_to_qtreewidgetitems(paths_list, "/")
@@ -684,8 +684,8 @@ def map_meshes_to_treeitems():
 	return (qtreeitem_dict, top_level_paths, top_level_items, leaf_node_items)
 def map_sounds_to_treeitems():
 	paths_list = list()
-	for name in PMT__G_CFG.map_sounddb.sndshd_dict:
-		soundshader = PMT__G_CFG.map_sounddb.sndshd_dict[name]
+	for name in PMT__G_CFG.get_asset("map_sounddb").sndshd_dict:
+		soundshader = PMT__G_CFG.get_asset("map_sounddb").sndshd_dict[name]
 		if soundshader.path != None:
 			paths_list.append(soundshader.path)
 		else:
@@ -697,14 +697,14 @@ def map_sounds_to_treeitems():
 
 def get_diffuse_fs(pmt_engine, material_path):
 	if pmt_engine == "vmf":
-		diffuse_relpath = PMT__G_CFG.vmf_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("vmf_materialdb").get_diffuse_of_material(material_path)
 		vmf_textures_path = PMT__G_CFG.g_cfg.get_config("vmf", "vmf_textures_path")
 		diffuse_fs = pmt_materialdb_source1_vmt.convert_source_path_to_fs(diffuse_relpath, vmf_textures_path)
 		return diffuse_fs
 	elif pmt_engine == "t3d":
-		return PMT__G_CFG.t3d_materialdb.get_filesystem_path(material_path)
+		return PMT__G_CFG.get_asset("t3d_materialdb").get_filesystem_path(material_path)
 	elif pmt_engine == "map":
-		diffuse_relpath = PMT__G_CFG.map_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("map_materialdb").get_diffuse_of_material(material_path)
 		map_textures_path = PMT__G_CFG.g_cfg.get_config("map", "map_textures_path")
 		diffuse_fs = pmt_materialdb_idtech4_mtr.convert_idtech4_path_to_fs(diffuse_relpath, map_textures_path)
 		return diffuse_fs
@@ -877,7 +877,7 @@ class AssetWidget(QtWidgets.QWidget):
 				#':' is used to indicate soundscript/soundscape see also vmf_sounds_to_treeitems()
 				if sound_path.startswith(":soundscripts/"):
 					soundscript_name = sound_path[len(":soundscripts/"):].replace("/", ".")
-					script_dict = PMT__G_CFG.vmf_sounddb.all_soundscripts
+					script_dict = PMT__G_CFG.get_asset("vmf_sounddb").all_soundscripts
 					if soundscript_name in script_dict:
 						if "wave" in script_dict[soundscript_name]:
 							num_waves = len(script_dict[soundscript_name]["wave"])
@@ -929,12 +929,12 @@ class AssetWidget(QtWidgets.QWidget):
 					sound_path = sound_path[sound_path.find("'")+1:]
 				if sound_path.endswith("'"):
 					sound_path = sound_path[:-1]
-				t3d_sound_fs_path = PMT__G_CFG.t3d_sounddb.get_filesystem_path(sound_path)
+				t3d_sound_fs_path = PMT__G_CFG.get_asset("t3d_sounddb").get_filesystem_path(sound_path)
 				qurl = QtCore.QUrl(t3d_sound_fs_path)
 			elif self.pmt_engine == "map":
 				sndshd_name = sound_path[sound_path.rfind("/")+1:]
-				if sndshd_name in PMT__G_CFG.map_sounddb.sndshd_dict:
-					soundshader = PMT__G_CFG.map_sounddb.sndshd_dict[sndshd_name]
+				if sndshd_name in PMT__G_CFG.get_asset("map_sounddb").sndshd_dict:
+					soundshader = PMT__G_CFG.get_asset("map_sounddb").sndshd_dict[sndshd_name]
 					if len(soundshader.sounds) > 0:
 						sound0 = soundshader.sounds[0]
 						#if sound0.endswith("ogg"):
@@ -992,7 +992,7 @@ class AssetWidget(QtWidgets.QWidget):
 		elif self.pmt_engine == "t3d":
 			if self.asset_type == "class":
 				t3d_asset_type = "class"
-				asset_path = PMT__G_CFG.t3d_unrealscript_defs.class_dict[asset_path].get_unreal_path()
+				asset_path = PMT__G_CFG.get_asset("t3d_unrealscript_defs").class_dict[asset_path].get_unreal_path()
 			elif self.asset_type == "sound":
 				t3d_asset_type = "sound"
 			elif self.asset_type == "material":
@@ -85,17 +85,17 @@ MATERIALSET_TYPE_CATEGORY = "type"
 def get_materials(pmt_engine = "vmf"):
 	if pmt_engine == "vmf":
 		material_paths = list()
-		for material in PMT__G_CFG.vmf_materialdb.material_to_diffuse_dict:
+		for material in PMT__G_CFG.get_asset("vmf_materialdb").material_to_diffuse_dict:
 			material_paths.append(material)
 		return material_paths
 	elif pmt_engine == "t3d":
 		material_paths = list()
-		for unreal_path in PMT__G_CFG.t3d_materialdb.unreal_path_to_filesystem_path:
+		for unreal_path in PMT__G_CFG.get_asset("t3d_materialdb").unreal_path_to_filesystem_path:
 			material_paths.append(unreal_path)
 		return material_paths
 	elif pmt_engine == "map":
 		material_paths = list()
-		for material in PMT__G_CFG.map_materialdb.material_to_diffuse_dict:
+		for material in PMT__G_CFG.get_asset("map_materialdb").material_to_diffuse_dict:
 			material_paths.append(material)
 		return material_paths
 	return material_paths
@@ -105,14 +105,14 @@ def get_materials(pmt_engine = "vmf"):
 	
 def get_diffuse_fs(pmt_engine, material_path):
 	if pmt_engine == "vmf":
-		diffuse_relpath = PMT__G_CFG.vmf_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("vmf_materialdb").get_diffuse_of_material(material_path)
 		vmf_textures_path = PMT__G_CFG.g_cfg.get_config("vmf", "vmf_textures_path")
 		diffuse_fs = pmt_materialdb_source1_vmt.convert_source_path_to_fs(diffuse_relpath, vmf_textures_path)
 		return diffuse_fs
 	elif pmt_engine == "t3d":
-		return PMT__G_CFG.t3d_materialdb.get_filesystem_path(material_path)
+		return PMT__G_CFG.get_asset("t3d_materialdb").get_filesystem_path(material_path)
 	elif pmt_engine == "map":
-		diffuse_relpath = PMT__G_CFG.map_materialdb.get_diffuse_of_material(material_path)
+		diffuse_relpath = PMT__G_CFG.get_asset("map_materialdb").get_diffuse_of_material(material_path)
 		map_textures_path = PMT__G_CFG.g_cfg.get_config("map", "map_textures_path")
 		diffuse_fs = pmt_materialdb_idtech4_mtr.convert_idtech4_path_to_fs(diffuse_relpath, map_textures_path)
 		return diffuse_fs
@@ -177,11 +177,11 @@ def get_category_fs_path(pmt_engine, style, category):
 		
 def get_materialsets_styles_dict(pmt_engine):
 	if pmt_engine == "vmf":
-		return PMT__G_CFG.vmf_materialsets.styles_dict
+		return PMT__G_CFG.get_asset("vmf_materialsets").styles_dict
 	elif pmt_engine == "t3d":
-		return PMT__G_CFG.t3d_materialsets.styles_dict
+		return PMT__G_CFG.get_asset("t3d_materialsets").styles_dict
 	elif pmt_engine == "map":
-		return PMT__G_CFG.map_materialsets.styles_dict
+		return PMT__G_CFG.get_asset("map_materialsets").styles_dict
 		
 	assert False, "MaterialsetsSelector get_materialsets() invalid pmt_engine {}".format(pmt_engine)
 	return None
@@ -6,7 +6,6 @@
 
 import os
 import sys
-import string
 	
 #By default open() uses locale.getpreferredencoding();
 #Houdini 18.5 on Windows 10 locale.getpreferredencoding() returns 'cp65001', but
@@ -43,6 +42,9 @@ if IN_HOUDINI:
 	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
 	pmt_common = PMT__G_CFG.pmt_common
 	pmt_common_texture = PMT__G_CFG.pmt_common_texture
+	pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
+else:
+	import pmt_common_lexer
 ###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
 
 class SoundShader:
@@ -53,117 +55,12 @@ class SoundShader:
 		self.params = dict()
 		self.sounds = list()	#list of paths to .wav/.ogg sounds
 		
-#Parses a single .sndshd file, which references multiple sounds
-def parse_soundshader(sndshd_path):		
-	def remove_comments_newlines_and_tabs(text):
-		#remove text after // comments; note that single line comments precede multiline comments
-		#keepends == True, so we keep the newline chars(/n, /r, ...)
-		text_without_comments = ""
-		
-		for line in text.splitlines(keepends = True):
-			if len(line) == 0: continue
+SNDSHD_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"\'", block_comments = True)
 
-			if "\"" not in line and "\'" not in line:
-				left, sep, right = line.partition("//")
-				comment_removed_line = left
-			else: #ignore // if it is in a quote
-				if "//" in line:
-					#find the lowest // that is not in a quote and remove all text afterwards
-					splitline = line.split("//", maxsplit = -1)
-					if len(splitline) > 0:
-						num_single_quote = splitline[0].count("\'")
-						num_double_quote = splitline[0].count("\"")
-						comment_removed_line = splitline[0]
-						
-						for i in range(1, len(splitline)):
-							in_quote = num_single_quote % 2 != 0 or num_double_quote % 2 != 0
-							if in_quote:
-								comment_removed_line += "//" + splitline[i] 
-								num_single_quote += splitline[i].count("\'")
-								num_double_quote += splitline[i].count("\"")
-							else:
-								break #if we are not in a quote, all remaining text is removed
-								
-				else:
-					comment_removed_line = line
-				
-			text_without_comments += comment_removed_line
-			
-		#remove text in between /* */ comments
-		REMOVE_MULTILINE_COMMENTS = True
-		if REMOVE_MULTILINE_COMMENTS:
-			multiline_comment_start_index = text_without_comments.find("/*")
-			while multiline_comment_start_index != -1:
-				left1, sep1, right1 = text_without_comments.partition("/*")
-				left2, sep2, right2 = right1.partition("*/")
-				text_without_comments = left1 + right2
-				multiline_comment_start_index = text_without_comments.find("/*")
-		
-		#replace tabs, newline, return, etc. with " "
-		#important: this can only happen after parsing '//' type comments
-		for char in string.whitespace:
-			text_without_comments = text_without_comments.replace(char, " ")
-			
-		#	
-		return text_without_comments
-		
-	#Extract text in between quotes "" or ''
-	#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-	#Under this assumption, literals such as "string' or 'string" are invalid.
-	INQUOTE_TOKEN = "%%q_"
-	def extract_string_literals(text, debug_path):
-		assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
-		
-		inquote_text_dict = dict()
-		
-		in_quote = False
-		quote_char = None
-		
-		text_without_quotes = ""
-		inquote_buffer = ""
-		for char in text:
-			if char == "\"" or char == "\'" and not in_quote:
-				quote_char = char
-				
-			if char == quote_char:
-				if not in_quote: #opening quote
-					inquote_buffer = ""
-				else: #closing quote
-					dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-					inquote_text_dict[dict_id_str] = inquote_buffer
-					text_without_quotes += " {} ".format(dict_id_str)
-					#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-				in_quote = not in_quote
-			else:
-				if in_quote:
-					inquote_buffer += char
-				else:
-					text_without_quotes += char
-		assert not in_quote, "error: missing closing quote for quote_char({}) in {}: [{}]".format(quote_char, debug_path, text)
-			
-		return (text_without_quotes, inquote_text_dict)
-		
-	def pad_operators(text):
-		#pad '{', '}', ... with spaces so that split() will not mix them with text
-		PAD_CHARS = "{}"
-		for char in PAD_CHARS:
-			text = text.replace(char, " {} ".format(char))
-		return text
-	
-	#replace sequences of spaces with a single space
-	def compact_spaces(text):
-		SPACES_4 = "    "
-		SPACES_2 = "  "
-		while text.find(SPACES_4) != -1:
-			text = text.replace(SPACES_4, " ")
-		while text.find(SPACES_2) != -1:
-			text = text.replace(SPACES_2, " ")
-		return text
-		
+#Parses a single .sndshd file, which references multiple sounds
+def parse_soundshader(sndshd_path):
 	with open(sndshd_path, 'rt', encoding=TEXT_CODEC) as sndshd_file:
-		text = ""
-		for line in sndshd_file:
-			text += line
+		text = sndshd_file.read()
 		
 		
 	#list of tuple containing:
@@ -175,22 +72,7 @@ def parse_soundshader(sndshd_path):
 	PARAM_NAMES = ["mindistance", "maxdistance", "volume", "editor_displayfolder", "description", "shakes", "leadin"]
 	
 	
-	text = remove_comments_newlines_and_tabs(text)
-	(text_without_quotes, inquote_text_dict) = extract_string_literals(text, sndshd_path)
-
-	text_without_quotes = pad_operators(text_without_quotes)
-	text_without_quotes = compact_spaces(text_without_quotes)	
-	tokens_with_quotes = text_without_quotes.split(sep = " ", maxsplit = -1)
-	
-	tokens = list()
-	for token in tokens_with_quotes:
-		if token.startswith(INQUOTE_TOKEN):
-			tokens.append(inquote_text_dict[token])
-		else:
-			tokens.append(token)				
-			
-	while "" in tokens:
-		tokens.remove("")
+	tokens = pmt_common_lexer.token_texts(SNDSHD_LEXER.tokenize(text, sndshd_path))
 	DPRINT("tokens: {}".format(tokens))	
 	
 	current_soundshader_name = None
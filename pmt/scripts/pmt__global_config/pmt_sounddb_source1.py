@@ -6,7 +6,6 @@
 
 import os
 import sys
-import string
 	
 #By default open() uses locale.getpreferredencoding();
 #Houdini 18.5 on Windows 10 locale.getpreferredencoding() returns 'cp65001', but
@@ -43,6 +42,9 @@ if IN_HOUDINI:
 	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
 	pmt_common = PMT__G_CFG.pmt_common
 	pmt_common_texture = PMT__G_CFG.pmt_common_texture
+	pmt_common_lexer = PMT__G_CFG.pmt_common_lexer
+else:
+	import pmt_common_lexer
 ###__pmt::pmt__globalconfig__COMMON_SECTION_INTERNAL__
 
 #Converts between source and filesystem paths:
@@ -139,86 +141,13 @@ class VmfSoundDb:
 		DPRINT("{} is not a soundscript or soundscape".format(sound_name))
 		return None
 	
+SOUNDSCRIPT_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"\'")
+
 def parse_soundscript(soundscript_path):
 	with open(soundscript_path, 'rt', encoding=TEXT_CODEC) as soundscript_file:
-		text = ""
-		for line in soundscript_file:
-			left, sep, right = line.partition("//")
-			text += left
-			
-	#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-	#Under this assumption, literals such as "string' or 'string" are invalid.
-	INQUOTE_TOKEN = "%%q_"
-	def extract_string_literals(text, debug_path):
-		assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
-		
-		inquote_text_dict = dict()
-		
-		in_quote = False
-		quote_char = None
-		
-		text_without_quotes = ""
-		inquote_buffer = ""
-		for char in text:
-			if char == "\"" or char == "\'" and not in_quote:
-				quote_char = char
-				
-			if char == quote_char:
-				if not in_quote: #opening quote
-					inquote_buffer = ""
-				else: #closing quote
-					dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-					inquote_text_dict[dict_id_str] = inquote_buffer
-					text_without_quotes += " {} ".format(dict_id_str)
-					#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-				in_quote = not in_quote
-			else:
-				if in_quote:
-					inquote_buffer += char
-				else:
-					text_without_quotes += char
-		assert not in_quote, "error: missing closing quote for quote_char({}) in {}: [{}]".format(quote_char, debug_path, text)
-			
-		return (text_without_quotes, inquote_text_dict)
-	(text_without_quotes, inquote_text_dict) = extract_string_literals(text, soundscript_path)
-	
-	def simplify_whitespace(text):
-		for char in string.whitespace:
-			text = text.replace(char, " ")
-		return text
-	text_without_quotes = simplify_whitespace(text_without_quotes)
-	
-	def pad_operators(text):
-		#pad '{', '}', ... with spaces so that split() will not mix them with text
-		PAD_CHARS = "{}"
-		for char in PAD_CHARS:
-			text = text.replace(char, " {} ".format(char))
-		return text
-	text_without_quotes = pad_operators(text_without_quotes)
-	
-	#replace sequences of spaces with a single space
-	def compact_spaces(text):
-		SPACES_4 = "    "
-		SPACES_2 = "  "
-		while text.find(SPACES_4) != -1:
-			text = text.replace(SPACES_4, " ")
-		while text.find(SPACES_2) != -1:
-			text = text.replace(SPACES_2, " ")
-		return text
-	text_without_quotes = compact_spaces(text_without_quotes)
-	
-	#
-	tokens_with_quotes = text_without_quotes.split(sep = " ", maxsplit = -1)
-	
-	tokens = list()
-	for token in tokens_with_quotes:
-		if token.startswith(INQUOTE_TOKEN):
-			tokens.append(inquote_text_dict[token])
-		else:
-			tokens.append(token)				
+		text = soundscript_file.read()
 			
-	while "" in tokens:
-		tokens.remove("")
+	tokens = pmt_common_lexer.token_texts(SOUNDSCRIPT_LEXER.tokenize(text, soundscript_path))
 	DPRINT("tokens: {}".format(tokens))	
 	
 	sound_dict = dict()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# pmt_export_cli.py - writes a .vmf, .t3d or .map from an export dump, without Houdini
+#
+# The export dump (.npz, see \scripts\pmt__global_config\pmt_common_dump.py) is saved by the pmt_vmf_export,
+# pmt_t3d_export or pmt_map_export node; the file is written by the same exporter, so the format of
+# export_path is the format of the node that saved the dump.
+#
+#	pmt_export_cli.py dump_path export_path [--processes N] [--cache] [--profile trace.json] [--precision compact] [--snap-epsilon E]
+#	python -m pmt_export_cli dump_path export_path (from \scripts\pmt_export_cli\)
+
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+import pmt_common
+import pmt_common_dump
+import pmt_common_format
+import pmt_multi_export
+
+def export_dump(dump_path, export_path, num_processes = 1, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	format_name = pmt_common_dump.get_dump_format(dump_path)
+	dump = pmt_common_dump.ExportDump.load(dump_path, format_name)
+	export_data = pmt_multi_export.get_exporter_module(format_name).export_data_from_dump(dump)
+	pmt_multi_export.write_export(format_name, export_data, export_path, num_processes, use_cache, precision, snap_epsilon)
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(prog = "pmt_export_cli.py", description = "Writes a .vmf, .t3d or .map from an export dump")
+	parser.add_argument("dump_path", help = "export dump saved by the exporter node")
+	parser.add_argument("export_path", help = "file to write")
+	parser.add_argument("--processes", type = int, default = 1, help = "number of processes to serialize solids (vmf only)")
+	parser.add_argument("--cache", action = "store_true", help = "reuse and update the export cache of export_path (export_path.pmtcache)")
+	parser.add_argument("--profile", metavar = "TRACE_PATH", help = "write a profile trace, see pmt_common.HOUPROFILE")
+	parser.add_argument("--precision", choices = pmt_common_format.PRECISIONS, default = pmt_common_format.PRECISION_FIXED, help = "format of floats (vmf and map only), see pmt_common_format.NumberFormat")
+	parser.add_argument("--snap-epsilon", type = float, default = pmt_common_format.SNAP_EPSILON, help = "floats closer than this to an integer are written as the integer with --precision compact")
+	args = parser.parse_args()
+	
+	with pmt_common.HOUPROFILE("pmt_export_cli", trace_path = args.profile):
+		export_dump(args.dump_path, args.export_path, args.processes, args.cache, args.precision, args.snap_epsilon)
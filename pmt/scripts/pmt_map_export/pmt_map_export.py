@@ -3,19 +3,34 @@
 #	script_section_name: 	pmt_map_export.py
 
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
-if True:
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
 	import hou
 	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
 	pmt__global_config = PMT__G_CFG.pmt__global_config
 	pmt_common = PMT__G_CFG.pmt_common
+	pmt_common_format = PMT__G_CFG.pmt_common_format
+	pmt_common_extract = PMT__G_CFG.pmt_common_extract
+	pmt_common_cache = PMT__G_CFG.pmt_common_cache
+	pmt_common_dump = PMT__G_CFG.pmt_common_dump
 	pmt_material_select = PMT__G_CFG.pmt_material_select
 	pmt_parse_source1_fgd = PMT__G_CFG.pmt_parse_source1_fgd
+else:
+	#Standalone (e.g. pmt_export_cli): load the shared modules from \scripts\pmt__global_config
+	import os
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_format
+	import pmt_common_extract
+	import pmt_common_cache
+	import pmt_common_dump
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 ###pmt exporters COMMON_SECTION
 if True:
-	LINS = pmt_common.LINS
-	LINE = pmt_common.LINE
+	LINS = pmt_common_format.LINS
+	LINE = pmt_common_format.LINE
 ###pmt exporters COMMON_SECTION
 
 import sys
@@ -23,6 +38,9 @@ import os
 import math
 import random
 import importlib
+import itertools
+import functools
+import numpy
 
 import inspect
 CF = inspect.currentframe
@@ -41,7 +59,7 @@ class Side:
 		self.uv_data = None
 		self.texture_size = None
 		
-		self.vertices = None
+		self.point_indices = None		#Points of the prim; used for the origin of brush entities, see center_brushentities()
 		
 
 #A convex solid defined by the intersections of multiple halfspaces(planes)
@@ -56,6 +74,8 @@ class BrushDef3:
 		self.entity_class = None	#string 
 		self.entity_keyvalues_dict = None
 		
+		self.cache_key = None		#Set by extract_export_data() if cache keys are computed
+		
 #An entity composed of multiple solid brushes.
 #We assume that all keyvalues of the solids are the same, 
 #so we can get the keyvalues by looking at entity_keyvalues_list of solids[0].
@@ -63,6 +83,7 @@ class BrushEntity:
 	def __init__(self):
 		self.origin = None
 		self.brushes = list()
+		self.cache_key = None		#Set by extract_export_data() if cache keys are computed
 		
 #// primitive N
 #{
@@ -117,6 +138,7 @@ class PatchDef:
 		
 		self.entity_class = None	#string 
 		self.entity_keyvalues_dict = None
+		self.origin = None			#Patch entities only; average of vertex positions
 	
 	#Inverts direction of patch normal
 	def reverse(self):
@@ -140,25 +162,6 @@ class PatchDef:
 	def is_patch_entity(self):
 		return self.entity_class != None and self.entity_keyvalues_dict != None
 		
-TAB = "\t"
-NEWLINE = "\n"
-
-#Returns string in format:	[\t + \t + ... + \t] + string + \n
-def LINS(num_tabs, string):
-	out = ""
-	for i in range(num_tabs):
-		out += TAB
-	out += string + NEWLINE
-	return out
-	
-#Returns string in format:	[\t + \t + ... + \t] + "key" + " " + "value" + \n
-def LINE(num_tabs, key, value):
-	out = ""
-	for i in range(num_tabs):
-		out += TAB
-	out += "\"" + key + "\" \"" + value + "\"" + NEWLINE
-	return out
-	
 #converts float -> int -> string
 def FloatStr(float_value):
 	#return str( int( round(float_value) ) )
@@ -169,7 +172,27 @@ def FloatUVStr(float_value):
 	return '{0:0=.16f}'.format(float_value)
 	#return str(float_value)
 
-def PlaneStr(n, distance, material = "textures/common/clip", uv_data = None, texture_size = None, primidx = -1, bsp_island = -1):
+#Decimals of FloatUVStr(); floats are written with this precision in PRECISION_FIXED, see pmt_common_format.NumberFormat
+FLOAT_DECIMALS = 16
+FIXED_NUMBERS = pmt_common_format.NumberFormat(FLOAT_DECIMALS)
+
+#"(n0 n1 n2 distance) ( ( u0 u1 u2 ) ( v0 v1 v2 ) ) "material" 0 0 0" + \n, with float_format for each float
+@functools.lru_cache(maxsize = None)
+def get_plane_template(float_format):
+	return pmt_common_format.LINS_TEMPLATE(0, "".join([
+		"(", pmt_common_format.vector_format(float_format, 4), ")",
+		" ( ( ", pmt_common_format.vector_format(float_format, 3), " )",
+		" ( ", pmt_common_format.vector_format(float_format, 3), " ) )",
+		" \"{}\" 0 0 0",
+	]))
+#"( x y z u v )" per patch vertex
+def get_patch_vertex_template(float_format):
+	return "( " + pmt_common_format.vector_format(float_format, 5) + " )"
+PLANE_TEMPLATE = get_plane_template(pmt_common_format.FLOAT_16)
+PATCH_VERTEX_TEMPLATE = get_patch_vertex_template(pmt_common_format.FLOAT_16)
+
+#numbers (pmt_common_format.NumberFormat) sets the precision of the floats
+def PlaneStr(n, distance, material = "textures/common/clip", uv_data = None, texture_size = None, primidx = -1, bsp_island = -1, numbers = FIXED_NUMBERS):
 
 	#0.0078125 == 1/128
 	scale = (0.0078125, 0.0078125)
@@ -220,27 +243,19 @@ def PlaneStr(n, distance, material = "textures/common/clip", uv_data = None, tex
 	a_row1 = (u_scale * math.sin(rotation_radians), v_scale * math.cos(rotation_radians), v_offset)
 	#a_row2 = (0.0, 0.0, 1.0)
 			
-	u_str = "( {0} {1} {2} )".format( FloatUVStr(a_row0[0]), FloatUVStr(a_row0[1]), FloatUVStr(a_row0[2]) )
-	v_str = "( {0} {1} {2} )".format( FloatUVStr(a_row1[0]), FloatUVStr(a_row1[1]), FloatUVStr(a_row1[2]) )
-
-	plane_str = ""
-	plane_str += "({0} {1} {2} {3})".format( FloatUVStr(n[0]), FloatUVStr(n[1]), FloatUVStr(n[2]), FloatUVStr(distance) )
-	plane_str += " ( {0} {1} ) \"{2}\" 0 0 0".format(u_str, v_str, material) + NEWLINE
-	return plane_str
-	
-def Matrix3Str(rotation = [1,0,0, 0,1,0, 0,0,1]):
-	MATRIX_SIZE = len(rotation)
-	rotation_str = ""
-	for i in range(MATRIX_SIZE):
-		rotation_str += "{0}".format(FloatUVStr(rotation[i]))
-		if i < MATRIX_SIZE - 1:
-			rotation_str += " "
-	return rotation_str
+	values = numbers.values([n[0], n[1], n[2], distance, a_row0[0], a_row0[1], a_row0[2], a_row1[0], a_row1[1], a_row1[2]])
+	return get_plane_template(numbers.float_format).format(*values, material)
+	
+def Matrix3Str(rotation = [1,0,0, 0,1,0, 0,0,1], numbers = FIXED_NUMBERS):
+	return pmt_common_format.vector_format(numbers.float_format, len(rotation)).format(*numbers.values(rotation))
 	
+#numbers (pmt_common_format.NumberFormat) sets the precision of the floats; FloatUVStr() if None
 class MapExport:
-	def __init__(self):
+	def __init__(self, numbers = None):
 		self.primitive_id = 0
 		self.entity_id = 1		#worldspawn == id 0
+		self.numbers = numbers if numbers != None else pmt_common_format.NumberFormat(FLOAT_DECIMALS)
+		self.patch_vertex_template = get_patch_vertex_template(self.numbers.float_format)
 	
 	def get_primitive_id(self):
 		id_out = self.primitive_id
@@ -285,7 +300,7 @@ class MapExport:
 			final_material = "textures/common/clip"
 			if side.material_str != None:
 				final_material = side.material_str
-			out += PlaneStr(side.normal, side.distance, final_material, side.uv_data, side.texture_size, side.primidx, solid.bsp_island)
+			out += PlaneStr(side.normal, side.distance, final_material, side.uv_data, side.texture_size, side.primidx, solid.bsp_island, self.numbers)
 		out += LINS(0, "}")
 		out += LINS(0, "}")
 			
@@ -310,17 +325,9 @@ class MapExport:
 			out += LINS(0, "( {0} {1} 0 0 0 )".format(patch.width, patch.height))
 		out += LINS(0, "(")
 		for width_index in range(patch.width):
-			patch_str = ""
-			patch_str += "( "
 			height_start = width_index * patch.height
-			for height_index in range(patch.height):
-				v = patch.vertices[height_start + height_index]
-				v_str = (FloatUVStr(v[0]), FloatUVStr(v[1]), FloatUVStr(v[2]), FloatUVStr(v[3]), FloatUVStr(v[4]))
-				patch_str += "( "
-				patch_str += "{0} {1} {2} {3} {4}".format(v_str[0], v_str[1], v_str[2], v_str[3], v_str[4])
-				patch_str += " )"
-			patch_str += ")"
-			out += LINS(0, patch_str)
+			row_vertices = patch.vertices[height_start : height_start + patch.height]
+			out += LINS(0, "( " + pmt_common_format.format_rows(self.patch_vertex_template, [self.numbers.values(vertex) for vertex in row_vertices]) + ")")
 		out += LINS(0, ")")
 		out += LINS(0, "}")
 		out += LINS(0, "}")
@@ -358,18 +365,14 @@ class MapExport:
 		out += LINS(0, "}")
 		return out
 		
-	def export_point_entity(self, classname = None, kv_attrib_dict = None, location = None, rotation_euler = None):
+	def export_point_entity(self, classname = None, kv_attrib_dict = None, location = None, rotation_matrix = None):
 	
 		keyvalue_dict = dict()
 		keyvalue_dict["classname"] = classname
 		keyvalue_dict["origin"] = FloatStr(location[0]) + " " + FloatStr(location[1]) + " " + FloatStr(location[2])
 		
-		if rotation_euler != None:
-			#	todo: check rotate order -- might be zyx ('yaw pitch roll')
-			rotation = hou.Quaternion()
-			rotation.setToEulerRotates(rotation_euler, rotate_order = "xyz") #fails to rotate to X-
-			rotation_matrix = rotation.extractRotationMatrix3().asTuple()
-			keyvalue_dict["rotation"] = Matrix3Str(rotation_matrix)
+		if rotation_matrix != None:
+			keyvalue_dict["rotation"] = Matrix3Str(rotation_matrix, self.numbers)
 			
 		if kv_attrib_dict != None:
 			for key in kv_attrib_dict:
@@ -392,7 +395,7 @@ class MapExport:
 		keyvalue_dict["classname"] = classname
 		
 		origin = brushentity.origin
-		origin_str = "{} {} {}".format(FloatUVStr(origin[0]), FloatUVStr(origin[1]), FloatUVStr(origin[2]))
+		origin_str = "{} {} {}".format(self.numbers.str(origin[0]), self.numbers.str(origin[1]), self.numbers.str(origin[2]))
 		keyvalue_dict["origin"] = origin_str
 			
 		return self.export_entity(keyvalue_dict, brushentity.brushes)
@@ -402,60 +405,210 @@ class MapExport:
 		classname = patch_entity.entity_class
 		keyvalue_dict["classname"] = classname
 		
-		origin = hou.Vector3(0,0,0)
-		for (x,y,z,u,v) in patch_entity.vertices:
-			origin += hou.Vector3(x,y,z)
-		origin /= float(len(patch_entity.vertices))
-		origin_str = "{} {} {}".format(FloatUVStr(origin[0]), FloatUVStr(origin[1]), FloatUVStr(origin[2]))
+		origin = patch_entity.origin
+		origin_str = "{} {} {}".format(self.numbers.str(origin[0]), self.numbers.str(origin[1]), self.numbers.str(origin[2]))
 		keyvalue_dict["origin"] = origin_str
 		
 		patch_entities = list()
 		patch_entities.append(patch_entity)
 		return self.export_entity(keyvalue_dict, None, patch_entities)
 		
+#Incremental export (see pmt_common_cache)
+PRIMITIVE_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_0
+ENTITY_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_1
+EXPORT_CACHE_FORMAT = "map 1"		#change when the output of export_solid()/export_brush_entity() changes
+
+#Writes placeholders instead of ids, for the export cache
+class MapTemplateExport(MapExport):
+	def get_primitive_id(self):
+		return PRIMITIVE_ID_PLACEHOLDER
+	def get_entity_id(self):
+		return ENTITY_ID_PLACEHOLDER
 	
+### Export data
+#Brushes and entities collected from the geometry by extract_export_data() and written by write_export();
+#can be saved as an export dump and written again without Houdini (see pmt_common_dump)
+class PointEntity:
+	def __init__(self):
+		self.classname = None
+		self.keyvalues_dict = None
+		self.location = None
+		self.rotation_matrix = None				#None if the point has no euler rotation, see get_rotation_matrix()
+
+class MapExportData:
+	def __init__(self):
+		self.levelprops_class = None
+		self.levelprops_kv = None
+		self.world_brushes = list()				#BrushDef3
+		self.patchdefs = list()					#PatchDef
+		self.brushentities = list()				#BrushEntity; planes are relative to the origin of the entity
+		self.patch_entities = list()			#PatchDef
+		self.point_entities = list()			#PointEntity
+
+EXPORT_DUMP_FORMAT = "map"
+SIDE_FIELDS = [
+	("primidx", pmt_common_dump.FIELD_VALUE), ("normal", pmt_common_dump.FIELD_VECTOR), ("distance", pmt_common_dump.FIELD_VALUE),
+	("material_str", pmt_common_dump.FIELD_STR), ("uv_data", pmt_common_dump.FIELD_UV_DATA), ("texture_size", pmt_common_dump.FIELD_VECTOR),
+]
+BRUSH_FIELDS = [
+	("bsp_island", pmt_common_dump.FIELD_VALUE), ("entity_island", pmt_common_dump.FIELD_VALUE),
+	("entity_class", pmt_common_dump.FIELD_STR), ("entity_keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("cache_key", pmt_common_dump.FIELD_KEY),
+]
+BRUSHENTITY_FIELDS = [("origin", pmt_common_dump.FIELD_VECTOR), ("cache_key", pmt_common_dump.FIELD_KEY)]
+PATCH_FIELDS = [
+	("width", pmt_common_dump.FIELD_VALUE), ("height", pmt_common_dump.FIELD_VALUE), ("vertices", pmt_common_dump.FIELD_VECTORS),
+	("material_str", pmt_common_dump.FIELD_STR),
+	("width_subdivisions", pmt_common_dump.FIELD_VALUE), ("height_subdivisions", pmt_common_dump.FIELD_VALUE),
+	("entity_class", pmt_common_dump.FIELD_STR), ("entity_keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("origin", pmt_common_dump.FIELD_VECTOR),
+]
+POINT_ENTITY_FIELDS = [
+	("classname", pmt_common_dump.FIELD_STR), ("keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("location", pmt_common_dump.FIELD_VECTOR), ("rotation_matrix", pmt_common_dump.FIELD_VECTOR),
+]
+
+def export_data_to_dump(export_data):
+	dump = pmt_common_dump.ExportDump(EXPORT_DUMP_FORMAT)
+	dump.put_value("levelprops_class", export_data.levelprops_class)
+	dump.put_value("levelprops_kv", export_data.levelprops_kv)
+	
+	brushes = export_data.world_brushes + [brush for brushentity in export_data.brushentities for brush in brushentity.brushes]
+	dump.put_value("num_world_brushes", len(export_data.world_brushes))
+	dump.put_counts("brushentity_brushes", [brushentity.brushes for brushentity in export_data.brushentities])
+	dump.put_counts("brush_sides", [brush.sides for brush in brushes])
+	dump.put_records("brushentities", export_data.brushentities, BRUSHENTITY_FIELDS)
+	dump.put_records("brushes", brushes, BRUSH_FIELDS)
+	dump.put_records("sides", [side for brush in brushes for side in brush.sides], SIDE_FIELDS)
+	
+	dump.put_value("num_patchdefs", len(export_data.patchdefs))
+	dump.put_records("patches", export_data.patchdefs + export_data.patch_entities, PATCH_FIELDS)
+	dump.put_records("point_entities", export_data.point_entities, POINT_ENTITY_FIELDS)
+	return dump
+
+def export_data_from_dump(dump):
+	export_data = MapExportData()
+	export_data.levelprops_class = dump.get_value("levelprops_class")
+	export_data.levelprops_kv = dump.get_value("levelprops_kv")
+	
+	brushes = dump.get_records("brushes", BrushDef3, BRUSH_FIELDS)
+	sides = dump.get_records("sides", Side, SIDE_FIELDS)
+	for brush, brush_sides in zip(brushes, dump.split("brush_sides", sides)):
+		brush.sides = brush_sides
+	num_world_brushes = dump.get_value("num_world_brushes")
+	export_data.world_brushes = brushes[:num_world_brushes]
+	export_data.brushentities = dump.get_records("brushentities", BrushEntity, BRUSHENTITY_FIELDS)
+	for brushentity, brushentity_brushes in zip(export_data.brushentities, dump.split("brushentity_brushes", brushes[num_world_brushes:])):
+		brushentity.brushes = brushentity_brushes
+	
+	patches = dump.get_records("patches", PatchDef, PATCH_FIELDS)
+	num_patchdefs = dump.get_value("num_patchdefs")
+	export_data.patchdefs = patches[:num_patchdefs]
+	export_data.patch_entities = patches[num_patchdefs:]
+	
+	export_data.point_entities = dump.get_records("point_entities", PointEntity, POINT_ENTITY_FIELDS)
+	return export_data
+
+#Returns the rotation matrix (tuple of 9 floats) of the 'map' rotation keyvalue, see MapExport.export_point_entity()
+def get_rotation_matrix(rotation_euler):
+	#	todo: check rotate order -- might be zyx ('yaw pitch roll')
+	rotation = hou.Quaternion()
+	rotation.setToEulerRotates(rotation_euler, rotate_order = "xyz") #fails to rotate to X-
+	return rotation.extractRotationMatrix3().asTuple()
+
+#Returns the origin of a patch entity; the average of its vertices
+def get_patch_entity_origin(patch_entity):
+	num_vertices = float(len(patch_entity.vertices))
+	origin = [0.0, 0.0, 0.0]
+	for (x,y,z,u,v) in patch_entity.vertices:
+		origin = [origin[0] + x, origin[1] + y, origin[2] + z]
+	return (origin[0] / num_vertices, origin[1] / num_vertices, origin[2] / num_vertices)
+
+#Sets the origin of each brush entity to the average of the vertices of all of its sides,
+#and moves its planes so they are relative to the origin.
+#The vertices of all brush entities are averaged with a single segmented sum, and the distances of all sides are shifted at once;
+#positions is a NumPy array with shape (num_points, 3) and the sides must have point_indices, see Side.
 @pmt_common.HOUPROFILE_EVENT_DECO
-def perform_export(node, map_export_path):
+def center_brushentities(brushentities, positions):
+	if len(brushentities) == 0:
+		return
+	sides = [side for brushentity in brushentities for brush in brushentity.brushes for side in brush.sides]
+	entity_side_counts = numpy.array([sum([len(brush.sides) for brush in brushentity.brushes]) for brushentity in brushentities], dtype = numpy.int64)
+	side_vertex_counts = numpy.array([len(side.point_indices) for side in sides], dtype = numpy.int64)
+	
+	side_ends = numpy.cumsum(side_vertex_counts)
+	entity_vertex_ends = side_ends[numpy.cumsum(entity_side_counts) - 1]
+	entity_vertex_counts = numpy.diff(entity_vertex_ends, prepend = 0)
+	assert numpy.all(entity_vertex_counts > 0), CURFUNC(CF()) + ": brush entity has no vertices"
+	
+	point_indices = numpy.fromiter(itertools.chain.from_iterable([side.point_indices for side in sides]), dtype = numpy.int64, count = int(side_ends[-1]))
+	vertex_sums = numpy.add.reduceat(positions[point_indices], entity_vertex_ends - entity_vertex_counts, axis = 0)
+	centers = vertex_sums / entity_vertex_counts[:, None]
+	
+	side_centers = numpy.repeat(centers, entity_side_counts, axis = 0)
+	normals = numpy.array([side.normal for side in sides], dtype = numpy.float64)
+	distances = numpy.array([side.distance for side in sides], dtype = numpy.float64)
+	distances += normals[:, 0] * side_centers[:, 0] + normals[:, 1] * side_centers[:, 1] + normals[:, 2] * side_centers[:, 2]
+	
+	for side, distance in zip(sides, distances.tolist()):
+		side.distance = distance
+	for brushentity, center in zip(brushentities, centers.tolist()):
+		brushentity.origin = tuple(center)
+
+#Returns a MapExportData with the brushes and entities of the node geometry.
+#with_cache_keys sets the cache_key of each brush and brush entity (see pmt_common_cache)
+#geometry_cache (pmt_common_extract.GeometryCache of the node geometry) is shared when exporting to several formats, see pmt_multi_export
+@pmt_common.HOUPROFILE_EVENT_DECO
+def extract_export_data(node, with_cache_keys = False, geometry_cache = None):
 	N = node
 	G = N.geometry()
 	assert G != None, "map export: node at {} has no geometry".format(N.path())
 	
+	export_data = MapExportData()
+	
 	levelprops_class_attrib = G.findGlobalAttrib(pmt_common.PMT_MAP_LEVELPROPS_CLASS)
 	levelprops_kv_attrib = G.findGlobalAttrib(pmt_common.PMT_MAP_LEVELPROPS_KEYVALUES)
 	
-	levelprops_class = None
-	levelprops_kv = None
 	if levelprops_class_attrib != None and levelprops_kv_attrib != None:
-		levelprops_class = G.attribValue(levelprops_class_attrib)
-		levelprops_kv = G.attribValue(levelprops_kv_attrib)
+		export_data.levelprops_class = G.attribValue(levelprops_class_attrib)
+		export_data.levelprops_kv = G.attribValue(levelprops_kv_attrib)
+		
+	if geometry_cache == None:
+		geometry_cache = pmt_common_extract.GeometryCache(G)
+	positions_array = geometry_cache.get_positions_array()
+	positions = geometry_cache.get_positions()
 		
 	### Load brushes
+	@pmt_common.HOUPROFILE_EVENT_DECO
 	def convert_houdini_prims_to_map_geo(geometry):
 		print(CURFUNC(CF()))
 				
-		def prim_to_side(prim, has_brush_uv, texture_size_attrib, material_path = None):
-			n = prim.normal()
+		@pmt_common.HOUPROFILE_COUNT_DECO
+		def prim_to_side(prim, prim_index, material_path = None):
+			n = geometry_cache.get_prim_normal(prim, prim_index)
 			
-			verts = list()
-			for v in prim.vertices():
-				verts.append( -v.point().position() )		#Note inverse position, this is needed to get brushes to line up with entities
+			point_indices = geometry_cache.get_prim_point_indices(prim, prim_index)
+			prim_point_indices[prim_index] = point_indices
 		
-			v0 = verts[0]
+			#Note inverse position, this is needed to get brushes to line up with entities
+			p0 = positions[point_indices[0]]
+			v0 = (-p0[0], -p0[1], -p0[2])
 			halfspace = Side()
 			halfspace.normal = (n.x(), n.y(), n.z())
-			halfspace.distance = n.x() * v0.x() + n.y() * v0.y() + n.z() * v0.z()
+			halfspace.distance = n.x() * v0[0] + n.y() * v0[1] + n.z() * v0[2]
 		
 			if material_path != None:
 				halfspace.material_str = material_path
-			if has_brush_uv:
-				halfspace.uv_data = pmt_common.extract_uv_data(prim)
-			if texture_size_attrib != None:
-				halfspace.texture_size = prim.attribValue(texture_size_attrib)
+			if all_uv_data != None:
+				halfspace.uv_data = all_uv_data[prim_index]
+			if texture_sizes != None:
+				halfspace.texture_size = texture_sizes[prim_index]
 			
-			halfspace.vertices = verts
+			halfspace.point_indices = point_indices
 			
 			return halfspace
 						
+		@pmt_common.HOUPROFILE_COUNT_DECO
 		def prim_to_patch(prim, patch_uvs = None, material_path = None, is_patchdef3 = False, is_entity = False):
 			assert prim.type() == hou.primType.BezierSurface, CURFUNC(CF()) + ": error - prim is not hou.primType.BezierSurface"
 			
@@ -499,35 +652,37 @@ def perform_export(node, map_export_path):
 			
 			return patch
 			
-		materials = geometry.primStringAttribValues(pmt_common.PMT_MAP_MATERIAL) if geometry.findPrimAttrib(pmt_common.PMT_MAP_MATERIAL) != None else None
 		has_brush_uv = pmt_common.houdini_geometry_has_uv_data(geometry)
 		patch_uvs = geometry.vertexFloatAttribValues("uv") if geometry.findVertexAttrib("uv") != None else None
-		texture_size_attrib = geometry.findPrimAttrib(pmt_common.PMT_MAP_TEXTURE_SIZE)
-		
-		bsp_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_BSP_ISLAND)
-		entity_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_ENTITY_ISLAND)
-		geometry_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOMETRY_PRIM)
-		geotype_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOTYPE_PRIM)
-		assert bsp_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
-		assert entity_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
-		assert geometry_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
-		assert geotype_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
 		
-		entity_class_attrib = geometry.findPrimAttrib(pmt_common.PMT_MAP_ENTITY_CLASS)
-		entity_kv_attrib = geometry.findPrimAttrib(pmt_common.PMT_MAP_ENTITY_KEYVALUES)
-		
-		entity_classes = geometry.primStringAttribValues(pmt_common.PMT_MAP_ENTITY_CLASS) if entity_class_attrib != None else None
-		
-		bsp_islands = geometry.primIntAttribValues(pmt_common.PMT_BSP_ISLAND)
-		entity_islands = geometry.primIntAttribValues(pmt_common.PMT_ENTITY_ISLAND)
-		geotypes = geometry.primStringAttribValues(pmt_common.PMT_GEOTYPE_PRIM)
+		attrib_names = [
+			pmt_common.PMT_BSP_ISLAND, pmt_common.PMT_ENTITY_ISLAND, pmt_common.PMT_GEOMETRY_PRIM, pmt_common.PMT_GEOTYPE_PRIM,
+			pmt_common.PMT_MAP_MATERIAL, pmt_common.PMT_MAP_TEXTURE_SIZE, pmt_common.PMT_MAP_ENTITY_CLASS,
+		]
+		if has_brush_uv:
+			attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+		columns = geometry_cache.prim_columns(attrib_names)
+		
+		assert columns.has(pmt_common.PMT_BSP_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
+		assert columns.has(pmt_common.PMT_ENTITY_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
+		assert columns.has(pmt_common.PMT_GEOMETRY_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
+		assert columns.has(pmt_common.PMT_GEOTYPE_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
+		
+		bsp_islands = columns.values(pmt_common.PMT_BSP_ISLAND)
+		entity_islands = columns.values(pmt_common.PMT_ENTITY_ISLAND)
+		geotypes = columns.values(pmt_common.PMT_GEOTYPE_PRIM)
+		materials = columns.values(pmt_common.PMT_MAP_MATERIAL) if columns.has(pmt_common.PMT_MAP_MATERIAL) else None
+		texture_sizes = columns.values(pmt_common.PMT_MAP_TEXTURE_SIZE) if columns.has(pmt_common.PMT_MAP_TEXTURE_SIZE) else None
+		entity_classes = columns.values(pmt_common.PMT_MAP_ENTITY_CLASS) if columns.has(pmt_common.PMT_MAP_ENTITY_CLASS) else None
+		all_uv_data = geometry_cache.get_uv_data(columns) if has_brush_uv else None
 		
 		all_brushes = list()
 		patchdefs = list()
 		patch_entities = list()
 		
-		prims = geometry.prims()
+		prims = geometry_cache.get_prims()
 		num_prims = len(prims)
+		prim_point_indices = [None] * num_prims
 		prev_bsp_island = None
 		for prim_index in range(num_prims):
 			if (prim_index % 1000) == 0:
@@ -576,7 +731,8 @@ def perform_export(node, map_export_path):
 						all_brushes[-1].entity_class = "func_static"
 						all_brushes[-1].entity_keyvalues_dict = dict()
 					elif is_bspentity:
-						classname = prim.attribValue(pmt_common.PMT_MAP_ENTITY_CLASS)
+						assert entity_classes != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_MAP_ENTITY_CLASS)
+						classname = entity_classes[prim_index]
 						kv_dict = prim.dictAttribValue(pmt_common.PMT_MAP_ENTITY_KEYVALUES)
 					
 						if len(classname) != 0 and classname != pmt_common.PMT_NONE:
@@ -586,10 +742,31 @@ def perform_export(node, map_export_path):
 				else:
 					all_brushes[-1].entity_island = None
 				
-			halfspace = prim_to_side(prim, has_brush_uv, texture_size_attrib, material_path)
+			halfspace = prim_to_side(prim, prim_index, material_path)
 			halfspace.primidx = prim_index
 			all_brushes[-1].sides.append(halfspace)
 			prev_bsp_island = bsp_island
+			
+		#The key of each brush covers the prim attribs used by export_solid() and export_brush_entity()
+		@pmt_common.HOUPROFILE_EVENT_DECO
+		def compute_cache_keys(all_brushes):
+			key_attrib_names = [pmt_common.PMT_GEOTYPE_PRIM, pmt_common.PMT_MAP_MATERIAL, pmt_common.PMT_MAP_TEXTURE_SIZE]
+			if has_brush_uv:
+				key_attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+			key_attrib_names = [name for name in key_attrib_names if columns.has(name)]
+			
+			island_prim_indices = list()
+			island_extras = list()
+			for brush in all_brushes:
+				island_prim_indices.append( [side.primidx for side in brush.sides] )
+				island_extras.append( ",".join(key_attrib_names) + repr( (brush.entity_class, brush.entity_keyvalues_dict) ) )
+			
+			key_columns = [columns.array(name) for name in key_attrib_names]
+			keys = pmt_common_cache.compute_island_keys(island_prim_indices, prim_point_indices, positions_array, key_columns, island_extras)
+			for brush, key in zip(all_brushes, keys):
+				brush.cache_key = key
+		if with_cache_keys:
+			compute_cache_keys(all_brushes)
 		
 		return all_brushes, patchdefs, patch_entities
 	all_brushes, patchdefs, patch_entities = convert_houdini_prims_to_map_geo(G)
@@ -613,65 +790,93 @@ def perform_export(node, map_export_path):
 		
 	world_brushes, all_brushentities = separate_brushes_and_collect_brushentities(all_brushes)
 	
-	@pmt_common.HOUPROFILE_EVENT_DECO
-	def compute_brushentity_centers(all_brushentities):
+	#The origin of a brush entity depends on all of its brushes, so brush entities are cached as a whole
+	if with_cache_keys:
+		for brushentity in all_brushentities:
+			brushentity.cache_key = pmt_common_cache.combine_keys([brush.cache_key for brush in brushentity.brushes])
 	
-		@pmt_common.HOUPROFILE_EVENT_DECO
-		def adjust_brushentity_planes(brushentity):
-			num_verts = 0
-			avg_position = hou.Vector3((0,0,0))
-			
-			for brush in brushentity.brushes:
-				for side in brush.sides:
-					num_verts += len(side.vertices)
-					for v in side.vertices:
-						avg_position += v
-			center = avg_position / num_verts
-			center = -center 	#Note inverse position
-			
-			num_brushes = len(brushentity.brushes)
-			for brush_index in range(num_brushes):
-				brush = brushentity.brushes[brush_index]
-				num_sides = len(brush.sides)
-				for side_index in range(num_sides):
-					normal = hou.Vector3(brush.sides[side_index].normal)
-					brush.sides[side_index].distance += normal.dot(center)
-			
-			brushentity.origin = center
-			#brushentity.origin = hou.Vector3((0,0,0))
-			return brushentity
-		num_brushentities = len(all_brushentities)
-		for i in range(num_brushentities):
-			all_brushentities[i] = adjust_brushentity_planes(all_brushentities[i])
-		return all_brushentities
-	all_brushentities = compute_brushentity_centers(all_brushentities)
-	
-	exporter = MapExport()
+	center_brushentities(all_brushentities, positions_array)
 	
 	@pmt_common.HOUPROFILE_EVENT_DECO
-	def extract_point_entities(exporter, geometry):
+	def extract_point_entities(geometry):
 		print(CURFUNC(CF()))
 		
+		point_entities = list()
 		entity_points = geometry.findPointGroup(pmt_common.PMT_ENTITY)
 		if entity_points == None:
-			return ""
+			return point_entities
+			
+		columns = geometry_cache.point_columns([pmt_common.PMT_MAP_ENTITY_CLASS, pmt_common.PMT_HAS_EULER_ROTATION, pmt_common.PMT_MAP_ROTATION_EULER])
 			
-		entity_str = ""
 		for point in entity_points.points():
-			p = point.position()
-			p_tuple = (p.x(), p.y(), p.z())
+			point_index = point.number()
 			
-			classname = point.attribValue(pmt_common.PMT_MAP_ENTITY_CLASS)
+			classname = columns.value(pmt_common.PMT_MAP_ENTITY_CLASS, point_index)
 			if len(classname) == 0 or classname == pmt_common.PMT_NONE:
 				continue
-				
-			keyvalue_dict = point.dictAttribValue(pmt_common.PMT_MAP_ENTITY_KEYVALUES)
-			rotation_euler_enabled = point.attribValue(pmt_common.PMT_HAS_EULER_ROTATION)
-			rotation_euler = point.attribValue(pmt_common.PMT_MAP_ROTATION_EULER) if rotation_euler_enabled else None
 			
-			entity_str += exporter.export_point_entity(classname, keyvalue_dict, p_tuple, rotation_euler)
+			rotation_euler_enabled = columns.value(pmt_common.PMT_HAS_EULER_ROTATION, point_index)
+			
+			point_entity = PointEntity()
+			point_entity.classname = classname
+			point_entity.keyvalues_dict = point.dictAttribValue(pmt_common.PMT_MAP_ENTITY_KEYVALUES)
+			point_entity.location = positions[point_index]
+			point_entity.rotation_matrix = get_rotation_matrix(columns.value(pmt_common.PMT_MAP_ROTATION_EULER, point_index)) if rotation_euler_enabled else None
+			point_entities.append(point_entity)
+		return point_entities
+	
+	for patch_entity in patch_entities:
+		patch_entity.origin = get_patch_entity_origin(patch_entity)
+	
+	export_data.world_brushes = world_brushes
+	export_data.patchdefs = patchdefs
+	export_data.brushentities = all_brushentities
+	export_data.patch_entities = patch_entities
+	export_data.point_entities = extract_point_entities(G)
+	return export_data
+
+#Writes export_data (MapExportData) to map_export_path; does not use Houdini.
+#use_cache reuses the brushes and brush entities of the previous export of map_export_path that did not change (see pmt_common_cache);
+#the brushes and brush entities must have cache keys, see extract_export_data()
+#precision is pmt_common_format.PRECISION_FIXED or PRECISION_COMPACT; snap_epsilon is used by PRECISION_COMPACT, see pmt_common_format.NumberFormat
+@pmt_common.HOUPROFILE_EVENT_DECO
+def write_export(export_data, map_export_path, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	levelprops_class = export_data.levelprops_class
+	levelprops_kv = export_data.levelprops_kv
+	world_brushes = export_data.world_brushes
+	patchdefs = export_data.patchdefs
+	all_brushentities = export_data.brushentities
+	patch_entities = export_data.patch_entities
+	
+	if use_cache and any([block.cache_key == None for block in world_brushes + all_brushentities]):
+		print("map export: brushes have no cache keys; exporting without the cache")
+		use_cache = False
+	numbers = pmt_common_format.NumberFormat(FLOAT_DECIMALS, precision, snap_epsilon)
+	cache = pmt_common_cache.ExportCache(map_export_path, numbers.get_cache_format(EXPORT_CACHE_FORMAT)) if use_cache else None
+	
+	exporter = MapExport(numbers)
+	
+	#Point entities are written last, but their entity ids come first
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def export_point_entities(exporter, point_entities):
+		entity_str = ""
+		for point_entity in point_entities:
+			entity_str += exporter.export_point_entity(point_entity.classname, point_entity.keyvalues_dict, point_entity.location, point_entity.rotation_matrix)
 		return entity_str
-	entity_str = extract_point_entities(exporter, G)			
+	entity_str = export_point_entities(exporter, export_data.point_entities)
+	
+	#Returns export_function(exporter, block), with the text from the cache if block did not change;
+	#the ids are filled in here, in the same order as export_function() would assign them
+	template_exporter = MapTemplateExport(numbers)
+	def export_block(export_function, block):
+		if cache == None:
+			return export_function(exporter, block)
+		template = cache.get_or_serialize(block.cache_key, lambda: export_function(template_exporter, block))
+		ids = dict()
+		if ENTITY_ID_PLACEHOLDER in template:
+			ids[ENTITY_ID_PLACEHOLDER] = itertools.repeat(exporter.get_entity_id())
+		ids[PRIMITIVE_ID_PLACEHOLDER] = iter(exporter.get_primitive_id, None)
+		return pmt_common_cache.fill_template(template, ids)
 	
 	### Main export
 	file_out = open(map_export_path, 'w')
@@ -679,7 +884,7 @@ def perform_export(node, map_export_path):
 	
 	print("writing {} world brushes".format(len(world_brushes)))
 	for brush in world_brushes:
-		file_out.write( exporter.export_solid(brush) )
+		file_out.write( export_block(MapExport.export_solid, brush) )
 	
 	print("writing {} world patches".format(len(patchdefs)))
 	for patch in patchdefs:
@@ -689,7 +894,7 @@ def perform_export(node, map_export_path):
 	
 	print("writing {} brush entities".format(len(all_brushentities)))
 	for brushentity in all_brushentities:
-		file_out.write( exporter.export_brush_entity(brushentity) )
+		file_out.write( export_block(MapExport.export_brush_entity, brushentity) )
 		
 	print("writing {} patch entities".format(len(patch_entities)))
 	for patchentity in patch_entities:
@@ -701,8 +906,23 @@ def perform_export(node, map_export_path):
 	#
 	file_out.close()
 	print(".map written to {}".format(map_export_path))
+	numbers.print_report("map export", map_export_path)
 	
+	if cache != None:
+		cache.save()
+		cache.print_stats("map export")
+		
+#use_cache reuses the brushes and brush entities of the previous export of map_export_path that did not change (see pmt_common_cache)
+#dump_path also saves the export data as an export dump, see pmt_common_dump and \scripts\pmt_export_cli\pmt_export_cli.py
+#precision and snap_epsilon set the format of floats, see write_export()
+@pmt_common.HOUPROFILE_EVENT_DECO
+def perform_export(node, map_export_path, use_cache = False, dump_path = None, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	export_data = extract_export_data(node, use_cache or dump_path != None)
+	if dump_path != None:
+		export_data_to_dump(export_data).save(dump_path)
+	write_export(export_data, map_export_path, use_cache, precision, snap_epsilon)
 
-def main_export(node, map_export_path):
+#the exporter HDA button calls main_export(hou.pwd(), path); use_cache, dump_path and precision are only set from script
+def main_export(node, map_export_path, use_cache = False, dump_path = None, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
 	profile = pmt_common.HOUPROFILE("map_export_path")
-	perform_export(node, map_export_path)
+	perform_export(node, map_export_path, use_cache, dump_path, precision, snap_epsilon)
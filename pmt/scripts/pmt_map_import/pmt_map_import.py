@@ -4,10 +4,33 @@
 
 import sys
 import os
-import string
 import copy
+import re
+import numpy
 
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	main_module = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = main_module.pmt_common
+	pmt_common_lexer = main_module.pmt_common_lexer
+	pmt_common_blockindex = main_module.pmt_common_blockindex
+	pmt_common_build = main_module.pmt_common_build
+	pmt_common_cache = main_module.pmt_common_cache
+	pmt_common_brush = main_module.pmt_common_brush
+	pmt_common_bounds = main_module.pmt_common_bounds
+else:
+	#Standalone: load the shared modules from \scripts\pmt__global_config
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_lexer
+	import pmt_common_blockindex
+	import pmt_common_build
+	import pmt_common_cache
+	import pmt_common_brush
+	import pmt_common_bounds
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
@@ -73,24 +96,22 @@ TEXT_CODEC = "cp1252" #windows-1252 'Western Europe'
 
 PRIMITIVE_TYPES = ["brushdef3", "patchdef2", "patchdef3"]
 
-class ImportMapBrushPlane:
-	def __init__(self):
-		self.normal = None
-		self.distance = None	#plane constant
-		self.uv_row0 = None
-		self.uv_row1 = None
-		self.material = None
-		
+#Fields of each plane of ImportMapBrush.planes; material is an index of MapMaterials.paths
+MAP_PLANE_DTYPE = numpy.dtype([("normal", numpy.float64, 3), ("distance", numpy.float64), ("uv_row0", numpy.float64, 3), ("uv_row1", numpy.float64, 3), ("material", numpy.int32)])
+
+#Fields of each control point of ImportMapPatchdef2.vertices
+MAP_PATCH_VERTEX_DTYPE = numpy.dtype([("position", numpy.float64, 3), ("uv", numpy.float64, 2)])
+
 class ImportMapBrush:
 	def __init__(self):
-		self.planes = list()
+		self.planes = None		#array of MAP_PLANE_DTYPE with shape (num_planes,)
 		
 class ImportMapPatchdef2:
 	def __init__(self):
 		self.width = None
 		self.height = None
-		self.material = None
-		self.vertices = list()
+		self.material = None	#index of MapMaterials.paths
+		self.vertices = None	#array of MAP_PATCH_VERTEX_DTYPE with shape (width, height)
 		
 class ImportMapPatchdef3(ImportMapPatchdef2):
 	def __init__(self):
@@ -100,334 +121,369 @@ class ImportMapPatchdef3(ImportMapPatchdef2):
 
 class ImportMapEntity:
 	def __init__(self):
-		keyvalues = dict()
-		brushes = list()
-		patchdef2s = list()
-		patchdef3s = list()
+		self.keyvalues = dict()
+		self.brushes = list()
+		self.patchdef2s = list()
+		self.patchdef3s = list()
+		self.materials = None	#MapMaterials, shared by the entities of a .map
 
-def parse_map(map_path):
-	with open(map_path, 'rt', encoding=TEXT_CODEC) as map_file:
-		text = ""
-		for line in map_file:
-			if line.lstrip().startswith("//"):
-				left, sep, right = line.partition("//")
-				text += left
-			else:
-				text += line
-				
-	#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-	#Under this assumption, literals such as "string' or 'string" are invalid.
-	INQUOTE_TOKEN = "%%q_"
-	def extract_string_literals(text, debug_path):
-		assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
+#The material paths of a .map, each stored once; the planes and patches refer to a path by its index (material id)
+class MapMaterials:
+	def __init__(self):
+		self.paths = list()		#material id -> path
+		self.ids = dict()		#path -> material id
 		
-		inquote_text_dict = dict()
+	def id(self, path):
+		material_id = self.ids.get(path)
+		if material_id == None:
+			material_id = len(self.paths)
+			self.ids[path] = material_id
+			self.paths.append(path)
+		return material_id
 		
-		in_quote = False
-		quote_char = None
+	#Returns an array of the material ids of tokens, an array of material paths that are quoted or not; each distinct token is interned once
+	def ids_of_tokens(self, tokens):
+		(unique_tokens, inverse) = numpy.unique(tokens, return_inverse = True)
+		unique_ids = [self.id(unquote(token)) for token in unique_tokens.tolist()]
+		return numpy.array(unique_ids, dtype = numpy.int32)[inverse.reshape(-1)]
 		
-		text_without_quotes = ""
-		inquote_buffer = ""
-		for char in text:
-			if char == "\"" or char == "\'" and not in_quote:
-				quote_char = char
-				
-			if char == quote_char:
-				if not in_quote: #opening quote
-					inquote_buffer = ""
-				else: #closing quote
-					dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-					inquote_text_dict[dict_id_str] = inquote_buffer
-					text_without_quotes += " {} ".format(dict_id_str)
-					#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-				in_quote = not in_quote
-			else:
-				if in_quote:
-					inquote_buffer += char
-				else:
-					text_without_quotes += char
-		assert not in_quote, "error: missing closing quote for quote_char({}) in {}: [{}]".format(quote_char, debug_path, text)
-			
-		return (text_without_quotes, inquote_text_dict)
-	(text_without_quotes, inquote_text_dict) = extract_string_literals(text, map_path)
+MAP_LEXER = pmt_common_lexer.Lexer(operators = "{}()", quotes = "\"\'")
+
+def unquote(token):
+	if len(token) >= 2 and token[0] in "\"\'" and token[-1] == token[0]:
+		return token[1:-1]
+	return token
+
+#The primitives of an entity are decoded with one regex match for each plane or control point, instead of one token at a time.
+#The regexes match the tokens of MAP_LEXER: a number is any word, a material is a string or a word; numbers are converted with NumPy.
+MAP_NUMBER = "([^\\s(){}\"\']+)"
+MAP_MATERIAL = "(\"[^\"]*\"|\'[^\']*\'|[^\\s(){}\"\']+)"
+def map_regex(pattern):
+	return re.compile(pattern.replace("NUMBER", MAP_NUMBER).replace("MATERIAL", MAP_MATERIAL), re.ASCII | re.DOTALL)
+
+#{ brushDef3|patchDef2|patchDef3 { ... } }
+PRIMITIVE_REGEX = map_regex("\\{\\s*(\\w+)\\s*\\{(.*)\\}\\s*\\}")
+
+#A brushDef3 has a line for each plane:
+#{
+#	brushdef3
+#	{
+#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
+#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
+#		...
+#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
+#	}
+#}
+BRUSH_PLANE_PATTERN = "\\(\\s*NUMBER\\s+NUMBER\\s+NUMBER\\s+NUMBER\\s*\\)\\s*\\(\\s*\\(\\s*NUMBER\\s+NUMBER\\s+NUMBER\\s*\\)\\s*\\(\\s*NUMBER\\s+NUMBER\\s+NUMBER\\s*\\)\\s*\\)\\s*MATERIAL\\s+NUMBER\\s+NUMBER\\s+NUMBER"
+BRUSH_PLANE_REGEX = map_regex(BRUSH_PLANE_PATTERN)
+BRUSH_BODY_REGEX = map_regex("\\s*(?:{}\\s*)*".format(BRUSH_PLANE_PATTERN))
+
+#patchDef2 has the material, the patch params and a row of control points for each width:
+#{
+#	patchDef2
+#	{
+#		MATERIAL_PATH
+#		( WIDTH HEIGHT 0 0 0 )
+#		(
+#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
+#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
+#		...
+#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
+#		)
+#	}
+#}
+#
+#patchDef3 is same as patchDef2, except additional parameters (WIDTH_SUBDIVISIONS, HEIGHT_SUBDIVISIONS):
+#		( WIDTH HEIGHT WIDTH_SUBDIVISIONS HEIGHT_SUBDIVISIONS 0 0 0 )
+#
+#patchDef2/patchDef3
+# -- -- --> height
+# |
+# |
+# v
+# width
+PATCH_VERTEX_PATTERN = "\\(\\s*NUMBER\\s+NUMBER\\s+NUMBER\\s+NUMBER\\s+NUMBER\\s*\\)"
+PATCH_VERTEX_REGEX = map_regex(PATCH_VERTEX_PATTERN)
+PATCH_GRID_REGEX = map_regex("\\s*(?:\\(\\s*(?:{}\\s*)*\\)\\s*)*".format(PATCH_VERTEX_PATTERN))
+PATCHDEF2_BODY_REGEX = map_regex("\\s*MATERIAL\\s*\\(\\s*NUMBER\\s+NUMBER\\s+0\\s+0\\s+0\\s*\\)\\s*\\((.*)\\)\\s*")
+PATCHDEF3_BODY_REGEX = map_regex("\\s*MATERIAL\\s*\\(\\s*NUMBER\\s+NUMBER\\s+NUMBER\\s+NUMBER\\s+0\\s+0\\s+0\\s*\\)\\s*\\((.*)\\)\\s*")
+
+#Returns text without // comments, for the primitives that have comments; the regexes above do not skip comments.
+def remove_comments(text, debug_path = None):
+	texts = list()
+	for kind, token_text, line in MAP_LEXER.iter_tokens(text, debug_path):
+		if kind == pmt_common_lexer.TOKEN_STRING:
+			quote = "\"" if "\"" not in token_text else "\'"
+			texts.append(quote + token_text + quote)
+		else:
+			texts.append(token_text)
+	return " ".join(texts)
+
+#Returns an ImportMapPatchdef2 or ImportMapPatchdef3 of the body of a patchDef2/patchDef3 (the text in between its brackets)
+def parse_map_patch(primitive_type, body, materials, debug_path = None):
+	if primitive_type == "patchdef2":
+		patch = ImportMapPatchdef2()
+		m = PATCHDEF2_BODY_REGEX.fullmatch(body)
+	else: #patchdef3
+		patch = ImportMapPatchdef3()
+		m = PATCHDEF3_BODY_REGEX.fullmatch(body)
+	assert m != None, "invalid {} (the params should end with 0 0 0) in {}: {}".format(primitive_type, debug_path, body)
 	
-	def simplify_whitespace(text):
-		for char in string.whitespace:
-			text = text.replace(char, " ")
-		return text
-	text_without_quotes = simplify_whitespace(text_without_quotes)
+	groups = m.groups()
+	patch.material = materials.id(unquote(groups[0]))
+	patch.width = int(groups[1])
+	patch.height = int(groups[2])
+	if primitive_type == "patchdef3":
+		patch.width_subdivisions = int(groups[3])
+		patch.height_subdivisions = int(groups[4])
 	
-	def pad_operators(text):
-		#pad '{', '}', ... with spaces so that split() will not mix them with text
-		PAD_CHARS = "{}()"
-		for char in PAD_CHARS:
-			text = text.replace(char, " {} ".format(char))
-		return text
-	text_without_quotes = pad_operators(text_without_quotes)
+	grid = groups[-1]
+	assert PATCH_GRID_REGEX.fullmatch(grid) != None, "invalid {} control points in {}".format(primitive_type, debug_path)
+	values = numpy.array(PATCH_VERTEX_REGEX.findall(grid), dtype = object).reshape(-1, 5)
+	assert len(values) == patch.width * patch.height, "{} has {} control points instead of {}x{} in {}".format(primitive_type, len(values), patch.width, patch.height, debug_path)
 	
-	#replace sequences of spaces with a single space
-	def compact_spaces(text):
-		SPACES_4 = "    "
-		SPACES_2 = "  "
-		while text.find(SPACES_4) != -1:
-			text = text.replace(SPACES_4, " ")
-		while text.find(SPACES_2) != -1:
-			text = text.replace(SPACES_2, " ")
-		return text
-	text_without_quotes = compact_spaces(text_without_quotes)
+	vertices = numpy.zeros(len(values), dtype = MAP_PATCH_VERTEX_DTYPE)
+	numbers = values.astype(numpy.float64)
+	vertices["position"] = numbers[:, 0:3]
+	vertices["uv"] = numbers[:, 3:5]
+	patch.vertices = vertices.reshape(patch.width, patch.height)
+	return patch
+
+#Parses an entity of a .map.
+#	text: the text of the entity without its primitives, e.g. '{ "classname" "worldspawn" }' (see pmt_common_blockindex.BlockIndex.text_without_children())
+#	primitive_texts: the text of each primitive of the entity, e.g. '{ brushDef3 { ... } }'
+#	materials: MapMaterials of the .map
+#The planes of all brushes of the entity are converted at once to an array of MAP_PLANE_DTYPE; ImportMapBrush.planes are slices of it.
+@pmt_common.HOUPROFILE_COUNT_DECO
+def parse_map_entity(text, primitive_texts, materials, debug_path = None):
+	entity = ImportMapEntity()
+	entity.materials = materials
 	
-	#
-	tokens_with_quotes = text_without_quotes.split(sep = " ", maxsplit = -1)
+	tokens = MAP_LEXER.tokenize(text, debug_path)
+	num_tokens = len(tokens)
+	assert num_tokens >= 2 and tokens[0][1] == "{" and tokens[-1][1] == "}", "entity is not in brackets in {}".format(debug_path)
+	token_index = 1
+	while token_index < num_tokens - 1:
+		(kind, key, line) = tokens[token_index]
+		assert kind == pmt_common_lexer.TOKEN_STRING, "unexpected token: {} (line {} in {})".format(key, line, debug_path)
+		key = key.lower()
+		value = tokens[token_index + 1][1]
+		entity.keyvalues[key] = value
+		DPRINT("addkv: {}={}".format(key, value)) 
+		token_index += 2
 	
-	while "" in tokens_with_quotes:
-		tokens_with_quotes.remove("")
+	plane_rows = list()			#tuple of the tokens of each plane (see BRUSH_PLANE_REGEX) of all brushes
+	brush_num_planes = list()
+	for primitive_text in primitive_texts:
+		if "//" in primitive_text:
+			primitive_text = remove_comments(primitive_text, debug_path)
+		m = PRIMITIVE_REGEX.fullmatch(primitive_text)
+		assert m != None, "invalid primitive in {}: {}".format(debug_path, primitive_text)
+		primitive_type = m.group(1).lower()
+		assert primitive_type in PRIMITIVE_TYPES, "primitive_type: '{}' is not in PRIMITIVE_TYPES in {}".format(primitive_type, debug_path)
 		
-	tokens = list()
-	for token in tokens_with_quotes:
-		if token.startswith(INQUOTE_TOKEN):
-			tokens.append(inquote_text_dict[token])
-		else:
-			tokens.append(token)	
+		body = m.group(2)
+		if primitive_type == "brushdef3":
+			assert BRUSH_BODY_REGEX.fullmatch(body) != None, "invalid brushDef3 in {}: {}".format(debug_path, body)
+			rows = BRUSH_PLANE_REGEX.findall(body)
+			plane_rows += rows
+			brush_num_planes.append(len(rows))
+		elif primitive_type == "patchdef2":
+			entity.patchdef2s.append( parse_map_patch(primitive_type, body, materials, debug_path) )
+		else: #patchdef3
+			entity.patchdef3s.append( parse_map_patch(primitive_type, body, materials, debug_path) )
 			
-	DPRINT("tokens: {}".format(tokens))		
+	if len(plane_rows) > 0:
+		values = numpy.array(plane_rows, dtype = object)
+		numbers = values[:, 0:10].astype(numpy.float64)
+		planes = numpy.zeros(len(plane_rows), dtype = MAP_PLANE_DTYPE)
+		planes["normal"] = numbers[:, 0:3]
+		planes["distance"] = numbers[:, 3]
+		planes["uv_row0"] = numbers[:, 4:7]
+		planes["uv_row1"] = numbers[:, 7:10]
+		planes["material"] = materials.ids_of_tokens(values[:, 10])
+		
+		plane_start = 0
+		for num_planes in brush_num_planes:
+			brush = ImportMapBrush()
+			brush.planes = planes[plane_start:plane_start + num_planes]
+			entity.brushes.append(brush)
+			plane_start += num_planes
+	return entity
+
+#The entities of parse_map() are cached as a dict of the material paths and a tuple for each entity, see entities_to_cache_data()
+PARSE_CACHE_FORMAT = "map_import 1"		#change when the entities of parse_map() change
+
+#The planes of the brushes of an entity are cached as one array of MAP_PLANE_DTYPE
+def entities_to_cache_data(entities):
+	materials = entities[0].materials if len(entities) > 0 else MapMaterials()
+	data_entities = list()
+	for entity in entities:
+		if len(entity.brushes) > 0:
+			planes = numpy.concatenate([brush.planes for brush in entity.brushes])
+		else:
+			planes = numpy.zeros(0, dtype = MAP_PLANE_DTYPE)
+		brush_num_planes = [len(brush.planes) for brush in entity.brushes]
+		patchdef2s = [(patch.width, patch.height, patch.material, patch.vertices) for patch in entity.patchdef2s]
+		patchdef3s = [(patch.width, patch.height, patch.material, patch.vertices, patch.width_subdivisions, patch.height_subdivisions) for patch in entity.patchdef3s]
+		data_entities.append((entity.keyvalues, planes, brush_num_planes, patchdef2s, patchdef3s))
+	return { "materials" : materials.paths, "entities" : data_entities }
 	
-	#
+def entities_from_cache_data(data):
+	materials = MapMaterials()
+	for path in data["materials"]:
+		materials.id(path)
+		
 	entities = list()
-	
-	assert tokens[0].lower() == "version"
-	assert tokens[1] == "2"
-	
-	num_tokens = len(tokens)
-	token_index = 2
-	while token_index < num_tokens:
-		t = tokens[token_index]
-		#t_quote = tokens_with_quotes[token_index]
+	for (keyvalues, planes, brush_num_planes, patchdef2s, patchdef3s) in data["entities"]:
+		entity = ImportMapEntity()
+		entity.keyvalues = keyvalues
+		entity.materials = materials
 		
-		if t == "{":
-			entity_opening = token_index
-			
-			bracket_depth = 1
-			entity_closing = token_index + 1
-			while entity_closing < num_tokens:
-				t2 = tokens[entity_closing]
-				if t2 == "{": bracket_depth += 1
-				if t2 == "}": bracket_depth -= 1
-				if bracket_depth == 0: break
-				
-				entity_closing += 1
-			assert bracket_depth == 0, "error: no closing bracket in .map"
-			
-			def parse_entity(tokens, tokens_with_quotes, entity_opening, entity_closing):
-				
-				entity_kv = dict()
-				ent_brushes = list()
-				ent_patch2s = list()
-				ent_patch3s = list()
-				DPRINT("ent tokens: {}".format(tokens[entity_opening:entity_closing+1]))
-				#num_tokens2 = len(tokens)
-				token_index2 = entity_opening + 1
-				while token_index2 < entity_closing:
-					if tokens_with_quotes[token_index2].startswith(INQUOTE_TOKEN):
-						t2_lower = tokens[token_index2].lower()
-						t2_next = tokens[token_index2 + 1]
-						entity_kv[t2_lower] = t2_next
-						DPRINT("addkv: {}={}".format(t2_lower, t2_next)) 
-						token_index2 += 1
-					elif t == "{":
-						opening_index3 = token_index2
-						primitive_type = tokens[opening_index3 + 1].lower()
-						assert primitive_type in PRIMITIVE_TYPES, "primitive_type: '{}' is not in PRIMITIVE_TYPES token_index2={}".format(primitive_type, token_index2)
-						assert tokens[opening_index3 + 2] == "{", "No 2nd opening bracket for primitive_type '{}' token_index2={}".format(primitive_type, token_index2)
-						
-						if primitive_type not in entity_kv:
-							entity_kv[primitive_type] = list()
-						
-						num_closing_brackets = 0
-						closing_index3 = opening_index3
-						while closing_index3 < entity_closing and num_closing_brackets < 2:
-							if tokens[closing_index3] == "}": num_closing_brackets += 1
-							if num_closing_brackets < 2: closing_index3 += 1
-						assert num_closing_brackets == 2
-						assert tokens[closing_index3] == "}"
-						
-						num_prim_tokens = (closing_index3 - opening_index3) + 1
-						
-						#DPRINT("num_prim_tokens={} for primitive_type={}".format(num_prim_tokens, primitive_type))
-						DPRINT("prim tokens: {}".format(tokens[opening_index3:closing_index3+1]))
-						if primitive_type == "brushdef3":
-							#A brushdef3 has 5 tokens and 22 tokens for each plane:
-							#{
-							#	brushdef3
-							#	{
-							#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
-							#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
-							#		...
-							#		( x y z d ) ( ( a b c ) ( d e f ) ) TEXTURE_PATH 0 0 0
-							#	}
-							#}
-							brush = ImportMapBrush()
-							assert (num_prim_tokens - 5) % 22 == 0, "num_prim_tokens: {}".format(num_prim_tokens)
-							num_planes = (num_prim_tokens - 5) // 22
-							for plane_index in range(num_planes):
-								pl = opening_index3 + 3 + plane_index * 22 #first plane index
-								assert tokens[pl + 0] == "("
-								x = tokens[pl + 1]
-								y = tokens[pl + 2]
-								z = tokens[pl + 3]
-								d = tokens[pl + 4]
-								assert tokens[pl + 5] == ")"
-								assert tokens[pl + 6] == "("
-								assert tokens[pl + 7] == "("
-								u0 = tokens[pl + 8]
-								u1 = tokens[pl + 9]
-								u2 = tokens[pl + 10]
-								assert tokens[pl + 11] == ")"
-								assert tokens[pl + 12] == "("
-								v0 = tokens[pl + 13]
-								v1 = tokens[pl + 14]
-								v2 = tokens[pl + 15]
-								assert tokens[pl + 16] == ")"
-								assert tokens[pl + 17] == ")"
-								material_path = tokens[pl + 18]
-								DPRINT("brushdef3 side: {}".format((x,y,z,d, u0,u1,u2, v0,v1,v2, material_path)))
-								
-								side = ImportMapBrushPlane()
-								side.normal = (float(x), float(y), float(z))
-								side.distance = float(d)
-								side.uv_row0 = (float(u0), float(u1), float(u2))
-								side.uv_row1 = (float(v0), float(v1), float(v2))
-								side.material = material_path
-								brush.planes.append(side)
-							ent_brushes.append(brush)
-							
-						elif primitive_type == "patchdef2" or primitive_type == "patchdef3":
-							#patchDef2 has:
-							#	5 tokens for the keyword + brackets
-							#	10 tokens for the patch params, and outer parenthesis '(' ')'
-							#	2 parenthesis '(' ')' tokens for each width + 7 tokens for each vertex
-							#{
-							#	patchDef2
-							#	{
-							#		MATERIAL_PATH
-							#		( WIDTH HEIGHT 0 0 0 )
-							#		(
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		...
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		)
-							#	}
-							#}
-							#
-							#patchDef3 is same as patchDef2, except additional parameters (WIDTH_SUBDIVISIONS, HEIGHT_SUBDIVISIONS)
-							#patchDef3 has:
-							#	5 tokens for the keyword + brackets
-							#	12 tokens for the patch params, and outer parenthesis '(' ')'
-							#	2 parenthesis '(' ')' tokens for each width + 7 tokens for each vertex
-							#{
-							#	patchDef3
-							#	{
-							#		MATERIAL_PATH
-							#		( WIDTH HEIGHT WIDTH_SUBDIVISIONS HEIGHT_SUBDIVISIONS 0 0 0 )
-							#		(
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		...
-							#		( ( x y z u v ) ( x y z u v ) ( x y z u v ) )
-							#		)
-							#	}
-							#}
-							#
-							#patchDef2/patchDef3
-							# -- -- --> height
-							# |
-							# |
-							# v
-							# width
-							if primitive_type == "patchdef2":
-								patch = ImportMapPatchdef2()
-							else: #patchdef3
-								patch = ImportMapPatchdef3()
-							
-							texpath_index = opening_index3 + 3
-							assert tokens_with_quotes[texpath_index].startswith(INQUOTE_TOKEN)
-							material_path = tokens[texpath_index]
-							assert tokens[texpath_index + 1] == "("
-							width = tokens[texpath_index + 2]
-							height = tokens[texpath_index + 3]
-							patch.width = int(width)
-							patch.height = int(height)
-							patch.material = material_path
-							
-							if primitive_type == "patchdef3":
-								width_subdiv = tokens[texpath_index + 4]
-								height_subdiv = tokens[texpath_index + 5]
-								patch.width_subdivisions = int(width_subdiv)
-								patch.height_subdivisions = int(height_subdivisions)
-							
-							if primitive_type == "patchdef2":
-								assert tokens[texpath_index + 4] == "0"
-								assert tokens[texpath_index + 5] == "0"
-								assert tokens[texpath_index + 6] == "0"
-								assert tokens[texpath_index + 7] == ")"
-								assert tokens[texpath_index + 8] == "("
-								texpath_offset_to_1st_vertex = 11
-							else: #patchdef3
-								assert tokens[texpath_index + 6] == "0"
-								assert tokens[texpath_index + 7] == "0"
-								assert tokens[texpath_index + 8] == "0"
-								assert tokens[texpath_index + 9] == ")"
-								assert tokens[texpath_index + 10] == "("
-								texpath_offset_to_1st_vertex = 13
-							
-							TOKENS_PER_VERTEX = 7
-							width_i = int(width)
-							height_i = int(height)
-							first_vertex_x = texpath_index + texpath_offset_to_1st_vertex #token index of position 'x' of first vertex
-							
-							tokens_per_width = (height_i * TOKENS_PER_VERTEX) + 2
-							
-							for w in range(width_i):
-								first_x_of_line = first_vertex_x + w * tokens_per_width
-								for h in range(height_i):
-									x_of_vertex = first_x_of_line + h * TOKENS_PER_VERTEX
-									assert tokens[x_of_vertex - 1] == "("
-									x = tokens[x_of_vertex]
-									y = tokens[x_of_vertex + 1]
-									z = tokens[x_of_vertex + 2]
-									u = tokens[x_of_vertex + 3]
-									v = tokens[x_of_vertex + 4]
-									assert tokens[x_of_vertex + 5] == ")"
-									DPRINT("{} vtx: {}".format(primitive_type, (x,y,z,u,v)))
-									vertex = (float(x), float(y), float(z), float(u), float(v))
-									patch.vertices.append(vertex)
-									
-							if primitive_type == "patchdef2":
-								ent_patch2s.append(patch)
-							else: #patchdef3
-								ent_patch3s.append(patch)
-						token_index2 = closing_index3
-					else:
-						assert False, "unexpected token: {} (token_index2={})".format(tokens[token_index2], token_index2)
-						
-					token_index2 += 1
-					
-					
-				entity = ImportMapEntity()
-				entity.keyvalues = entity_kv
-				entity.brushes = ent_brushes
-				entity.patchdef2s = ent_patch2s
-				entity.patchdef3s = ent_patch3s
-				return entity
-			entity = parse_entity(tokens, tokens_with_quotes, entity_opening, entity_closing)
-			entities.append(entity)
+		plane_start = 0
+		for num_planes in brush_num_planes:
+			brush = ImportMapBrush()
+			brush.planes = planes[plane_start:plane_start + num_planes]
+			entity.brushes.append(brush)
+			plane_start += num_planes
 			
-			DPRINT("add entity: {}".format(entity.keyvalues))
-			token_index = entity_closing
-			
-		token_index += 1
+		for (width, height, material, vertices) in patchdef2s:
+			patch = ImportMapPatchdef2()
+			(patch.width, patch.height, patch.material, patch.vertices) = (width, height, material, vertices)
+			entity.patchdef2s.append(patch)
+		for (width, height, material, vertices, width_subdivisions, height_subdivisions) in patchdef3s:
+			patch = ImportMapPatchdef3()
+			(patch.width, patch.height, patch.material, patch.vertices) = (width, height, material, vertices)
+			(patch.width_subdivisions, patch.height_subdivisions) = (width_subdivisions, height_subdivisions)
+			entity.patchdef3s.append(patch)
+		entities.append(entity)
 	return entities
+	
+#Returns the pmt_common_cache.ParseCache of parse_map(); e.g. get_parse_cache().warm("c:/prefabs", [".map"]) parses all prefabs in advance
+def get_parse_cache():
+	return pmt_common_cache.ParseCache(PARSE_CACHE_FORMAT, parse_map, entities_to_cache_data, entities_from_cache_data)
+
+#Parses all entities of a .map, see MapReader.
+#use_cache reads the entities from the parse cache if the .map did not change since it was cached (see get_parse_cache())
+@pmt_common.HOUPROFILE_EVENT_DECO
+def parse_map(map_path, use_cache = False):
+	if use_cache:
+		return get_parse_cache().get(map_path)
+		
+	with MapReader(map_path) as reader:
+		return list(reader.entities())
+
+#Reads the entities of a .map on demand, for importing a few entities of a large .map without parsing the whole file.
+#The file is memory-mapped and indexed by pmt_common_blockindex.BlockIndex; an entity is only decoded and parsed
+#(see parse_map_entity()) when it is read, and entities(classname) skips the other entities without decoding them.
+#The entities read by a MapReader share its MapMaterials.
+#
+#	with MapReader("c:/maps/a.map") as reader:
+#		for entity in reader.entities("light"):
+#			...
+class MapReader:
+	def __init__(self, map_path):
+		self.map_path = map_path
+		self.index = pmt_common_blockindex.BlockIndex(map_path, quotes = "\"\'")
+		self.materials = MapMaterials()
+		
+		header_end = self.index.blocks[0].start if len(self.index.blocks) > 0 else len(self.index.data)
+		header = pmt_common_lexer.token_texts( MAP_LEXER.tokenize(self.index.data[:header_end].decode(TEXT_CODEC), map_path) )
+		assert len(header) == 2 and header[0].lower() == "version" and header[1] == "2", "{} does not start with 'Version 2': {}".format(map_path, header)
+		
+	#Number of entities in the .map
+	def __len__(self):
+		return len(self.index.blocks)
+		
+	#Returns the ImportMapEntity of the entity at entity_index, in the order of the file
+	def entity(self, entity_index):
+		block = self.index.blocks[entity_index]
+		text = self.index.text_without_children(block, TEXT_CODEC)
+		primitive_texts = [self.index.text(child, TEXT_CODEC) for child in block.children]
+		return parse_map_entity(text, primitive_texts, self.materials, "{} (entity {})".format(self.map_path, entity_index))
+		
+	#Returns the "classname" of the entity at entity_index without parsing it, or None
+	def classname(self, entity_index):
+		return self.index.find_key(self.index.blocks[entity_index], "classname", TEXT_CODEC, ignore_case = True)
+		
+	#Yields the ImportMapEntity of each entity, or only of the entities with classname
+	def entities(self, classname = None):
+		for entity_index in range(len(self.index.blocks)):
+			if classname == None or self.classname(entity_index) == classname:
+				yield self.entity(entity_index)
+				
+	def close(self):
+		self.index.close()
+		
+	def __enter__(self):
+		return self
+		
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
 		
+### Region import
+#The bounds of the entities of parse_map() are boxes (mins, maxs) in the space of the geometry of import_map() (see pmt_common_bounds):
+#	bounds["brushes"]: the box of each brush, around its vertices (see pmt_common_brush.build_brush_bounds()); the brushes of each entity, in order
+#	bounds["patches"]: the box of each patch, around its control points; the patchdef2s and then the patchdef3s of each entity, in order
+#	bounds["entities"]: the box of each entity; the union of the boxes of its brushes and patches, or its origin
+#import_map() with a region only imports the brushes and patches of the world and the other entities whose box overlaps the region.
+BOUNDS_CACHE_FORMAT = "map_import_bounds 1"		#change when the bounds of map_bounds() change
+
+#Returns the origin of entity (see import_map()), or (0, 0, 0)
+def entity_origin(entity):
+	origin = entity.keyvalues.get("origin", "0 0 0").split()
+	return (float(origin[0]), float(origin[1]), float(origin[2]))
+	
+#Returns the bounds of entities
+@pmt_common.HOUPROFILE_EVENT_DECO
+def map_bounds(entities):
+	num_entities = len(entities)
+	brushes = [brush for entity in entities for brush in entity.brushes]
+	brush_entities = [entity_index for (entity_index, entity) in enumerate(entities) for brush in entity.brushes]
+	patches = [patch for entity in entities for patch in entity.patchdef2s + entity.patchdef3s]
+	patch_entities = [entity_index for (entity_index, entity) in enumerate(entities) for patch in entity.patchdef2s + entity.patchdef3s]
+	origins = numpy.array([entity_origin(entity) for entity in entities], dtype = numpy.float64).reshape(-1, 3)
+	
+	#the same planes as the brushes of import_map(): normal -N through N * distance - origin
+	if len(brushes) > 0:
+		planes = numpy.concatenate([brush.planes for brush in brushes])
+	else:
+		planes = numpy.zeros(0, dtype = MAP_PLANE_DTYPE)
+	brush_num_planes = [len(brush.planes) for brush in brushes]
+	plane_origins = origins[numpy.repeat(numpy.array(brush_entities, dtype = numpy.int64), brush_num_planes)]
+	normals = planes["normal"]
+	distances = -numpy.einsum("ij,ij->i", normals, normals) * planes["distance"] + numpy.einsum("ij,ij->i", normals, plane_origins)
+	(brush_mins, brush_maxs) = pmt_common_brush.build_brush_bounds(-normals, distances, brush_num_planes)
+	
+	(patch_mins, patch_maxs) = pmt_common_bounds.empty_bounds(len(patches))
+	for (patch_index, patch) in enumerate(patches):
+		positions = patch.vertices["position"].reshape(-1, 3)
+		if len(positions) > 0:
+			patch_mins[patch_index] = positions.min(axis = 0)
+			patch_maxs[patch_index] = positions.max(axis = 0)
+			
+	(entity_mins, entity_maxs) = pmt_common_bounds.union_bounds(numpy.concatenate([brush_mins, patch_mins]), numpy.concatenate([brush_maxs, patch_maxs]), brush_entities + patch_entities, num_entities)
+	point_entities = [entity_index for (entity_index, entity) in enumerate(entities) if len(entity.brushes) == 0 and len(entity.patchdef2s) == 0 and len(entity.patchdef3s) == 0]
+	(entity_mins[point_entities], entity_maxs[point_entities]) = pmt_common_bounds.point_bounds(-origins[point_entities])
+	
+	bounds = dict()
+	bounds["brushes"] = (brush_mins, brush_maxs)
+	bounds["patches"] = (patch_mins, patch_maxs)
+	bounds["entities"] = (entity_mins, entity_maxs)
+	return bounds
+	
+#Returns the pmt_common_cache.ParseCache of parse_map_bounds(); the bounds are computed from the cached entities of parse_map(),
+#so a .map is only parsed once for both caches
+def get_bounds_cache():
+	return pmt_common_cache.ParseCache(BOUNDS_CACHE_FORMAT, lambda map_path: map_bounds(parse_map(map_path, use_cache = True)))
+	
+#Returns the map_bounds() of the .map at map_path;
+#use_cache reads them from the parse cache if the .map did not change since they were cached (see get_bounds_cache())
+def parse_map_bounds(map_path, use_cache = False):
+	if use_cache:
+		return get_bounds_cache().get(map_path)
+	return map_bounds(parse_map(map_path))
+	
 def find_or_create_attrib(hou_geometry, hou_attrib_type, attrib_name, default_value):
 	if hou_attrib_type == hou.attribType.Point:
 		attrib = hou_geometry.findPointAttrib(attrib_name)
@@ -446,22 +502,35 @@ def find_or_create_pointgroup(hou_geometry, point_group_name):
 	
 PMT_MAP_ENTITY_RESTRICTED_KEYVALUES = ["classname", "name", "origin", "rotation"]
 
-def import_map(hou_geometry, entities):
+#build_brushes: import each brush as closed convex polygons (see pmt_common_brush), with the attribs of its planes as prim attribs;
+#otherwise each plane is a point on the plane, with the normal and attribs of the plane as point attribs.
+#Positions are negated, like the origins of point entities.
+#region (pmt_common_bounds.Region) only imports the blocks that overlap it, see map_bounds(); bounds are the map_bounds() of entities, e.g. from the parse cache
+@pmt_common.HOUPROFILE_EVENT_DECO
+def import_map(hou_geometry, entities, build_brushes = True, region = None, bounds = None):
 	if not IN_HOUDINI:
 		return	
+	if region != None:
+		if bounds == None:
+			bounds = map_bounds(entities)
+		brushes_in_region = iter(region.overlaps(*bounds["brushes"]))
+		patches_in_region = iter(region.overlaps(*bounds["patches"]))
+		entities_in_region = region.overlaps(*bounds["entities"])
 
 	point_class_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_entity_class", "")
 	point_kv_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_entity_keyvalues", dict())
 	rotation_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_rotation_euler", hou.Vector3((0,0,0)))
 	has_rotation_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_has_euler_rotation", 1)
 		
-	material_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_material", "")
-	uv_scale_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_uv_scale", hou.Vector2((1,1)))
-	uv_offset_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_uv_offset", hou.Vector2((0,0)))
-	uv_rotation_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_map_uv_rotation_degrees", 0.0)
+	plane_attrib_type = hou.attribType.Prim if build_brushes else hou.attribType.Point
+	material_attrib = find_or_create_attrib(hou_geometry, plane_attrib_type, "pmt_map_material", "")
+	uv_scale_attrib = find_or_create_attrib(hou_geometry, plane_attrib_type, "pmt_map_uv_scale", hou.Vector2((1,1)))
+	uv_offset_attrib = find_or_create_attrib(hou_geometry, plane_attrib_type, "pmt_map_uv_offset", hou.Vector2((0,0)))
+	uv_rotation_attrib = find_or_create_attrib(hou_geometry, plane_attrib_type, "pmt_map_uv_rotation_degrees", 0.0)
 	
-	brush_index_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "map_import_brush_index", -1)
-	normal_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "N", hou.Vector3((0,0,0)))
+	brush_index_attrib = find_or_create_attrib(hou_geometry, plane_attrib_type, "map_import_brush_index", -1)
+	if not build_brushes:
+		normal_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "N", hou.Vector3((0,0,0)))
 	
 	patch_material_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Prim, "pmt_map_material", "")
 	patch_width_subdivs_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Prim, "pmt_map_patchdef3_width_subdivs", -1)
@@ -471,13 +540,41 @@ def import_map(hou_geometry, entities):
 	pointentity_group = find_or_create_pointgroup(hou_geometry, "map_pointentity")
 	brushentity_group = find_or_create_pointgroup(hou_geometry, "map_brushentity")
 	
-	brush_index = 0
-	for e in entities:
+	#the points of entities and brush planes are collected by the builder and created at the end; patches are created directly
+	builder = pmt_common_build.GeometryBuilder()
+	plane_attrib_names = [attrib.name() for attrib in [material_attrib, uv_scale_attrib, uv_offset_attrib, uv_rotation_attrib, brush_index_attrib]]
+	
+	#if build_brushes, the polygons of all brushes are built at once after all entities are read
+	brush_normals = list()
+	brush_distances = list()
+	brush_plane_attribs = list()
+	brush_num_planes = list()
+	brush_group_names = list()
+	
+	#brushes are numbered in the order of the file, including the brushes outside of the region
+	next_brush_index = 0
+	for (entity_index, e) in enumerate(entities):
 		is_world = e.keyvalues["classname"] == "worldspawn"
+		brush_indices = list(range(next_brush_index, next_brush_index + len(e.brushes)))
+		next_brush_index += len(e.brushes)
 	
 		has_brushes = len(e.brushes) != 0
 		has_patches = len(e.patchdef2s) != 0 or len(e.patchdef3s) != 0
 		
+		brushes = e.brushes
+		patchdef2s = e.patchdef2s
+		patchdef3s = e.patchdef3s
+		if region != None:
+			brushes_overlap = [next(brushes_in_region) for brush in brushes]
+			patches_overlap = [next(patches_in_region) for patch in patchdef2s + patchdef3s]
+			if is_world:
+				brushes = [brush for (brush, overlaps) in zip(brushes, brushes_overlap) if overlaps]
+				brush_indices = [brush_index for (brush_index, overlaps) in zip(brush_indices, brushes_overlap) if overlaps]
+				patchdef2s = [patch for (patch, overlaps) in zip(patchdef2s, patches_overlap) if overlaps]
+				patchdef3s = [patch for (patch, overlaps) in zip(patchdef3s, patches_overlap[len(e.patchdef2s):]) if overlaps]
+			elif not entities_in_region[entity_index]:
+				continue
+		
 		has_origin = "origin" in e.keyvalues
 		if has_origin:
 			origin_tokens = e.keyvalues["origin"].split(" ", maxsplit = -1)
@@ -502,59 +599,61 @@ def import_map(hou_geometry, entities):
 				if remove_key in e.keyvalues:
 					del e.keyvalues[remove_key]
 			
-			new_point = hou_geometry.createPoint()
-			new_point.setPosition(-origin)
-			new_point.setAttribValue(point_class_attrib, classname)
-			new_point.setAttribValue(point_kv_attrib, e.keyvalues)
-			new_point.setAttribValue(brush_index_attrib, -1)
-			pointentity_group.add(new_point)
+			point_attribs = { point_class_attrib.name() : classname, point_kv_attrib.name() : e.keyvalues }
+			if not build_brushes:
+				point_attribs[brush_index_attrib.name()] = -1
+			builder.add_point(-origin, point_attribs, pointentity_group.name())
 		else:
 			if has_brushes:
-				for brush in e.brushes:
+				group_name = world_group.name() if is_world else brushentity_group.name()
+				material_paths = e.materials.paths
+				for (brush, brush_index) in zip(brushes, brush_indices):
 				
-					for plane in brush.planes:
-						N = hou.Vector3(plane.normal)
-						plane_constant = plane.distance
+					planes = brush.planes
+					for (normal, plane_constant, uv_row0, uv_row1, material_id) in zip(planes["normal"].tolist(), planes["distance"].tolist(), planes["uv_row0"].tolist(), planes["uv_row1"].tolist(), planes["material"].tolist()):
+						N = hou.Vector3(normal)
 						
 						clip_pos = N * plane_constant
 						if has_origin:
 							clip_pos -= origin
 						
-						#plane.uv_row0
-						#plane.uv_row1
-						offset = hou.Vector2(plane.uv_row0[2], plane.uv_row1[2])
+						#uv_row0
+						#uv_row1
+						offset = hou.Vector2(uv_row0[2], uv_row1[2])
 						
 						#todo: convert 'texture_matrix' to scale, rotation
 						scale = hou.Vector2(1.0, 1.0)
 						rotation = 0.0
 						
-						clip_point = hou_geometry.createPoint()
-						clip_point.setPosition(clip_pos)
-						clip_point.setAttribValue(normal_attrib, N)
-						clip_point.setAttribValue(material_attrib, plane.material)
-						clip_point.setAttribValue(uv_scale_attrib, scale)
-						clip_point.setAttribValue(uv_offset_attrib, offset)
-						clip_point.setAttribValue(uv_rotation_attrib, rotation)
-						
-						clip_point.setAttribValue(brush_index_attrib, brush_index)
-						if is_world:
-							world_group.add(clip_point)
+						plane_attribs = dict(zip(plane_attrib_names, [material_paths[material_id], scale, offset, rotation, brush_index]))
+						if build_brushes:
+							#the plane of the .map is (normal . x + distance == 0), relative to the origin of the entity, and its normal points out of the brush;
+							#clip_pos is on the plane of the negated brush, whose normal is -N
+							brush_normals.append(-N)
+							brush_distances.append((-N).dot(clip_pos))
+							brush_plane_attribs.append(plane_attribs)
 						else:
-							brushentity_group.add(clip_point)
-					brush_index += 1
+							plane_attribs[normal_attrib.name()] = N
+							builder.add_point(clip_pos, plane_attribs, group_name)
+					if build_brushes:
+						brush_num_planes.append(len(brush.planes))
+						brush_group_names.append(group_name)
 					
 			if has_patches:
+				@pmt_common.HOUPROFILE_COUNT_DECO
 				def make_patch(hou_geo, patchdef, is_patchdef3 = False):
+					width = patchdef.width
+					height = patchdef.height
 					patch = hou_geo.createBezierSurface(width, height, is_closed_in_u=False, is_closed_in_v=False)
-					patch.setAttribValue(patch_material_attrib, patchdef.material)
+					patch.setAttribValue(patch_material_attrib, e.materials.paths[patchdef.material])
 					if is_patchdef3:
-						patch.setAttribValue(patch_width_subdivs_attrib, patchdef.width_subdiv)
-						patch.setAttribValue(patch_height_subdivs_attrib, patchdef.height_subdiv)
+						patch.setAttribValue(patch_width_subdivs_attrib, patchdef.width_subdivisions)
+						patch.setAttribValue(patch_height_subdivs_attrib, patchdef.height_subdivisions)
 						
+					positions = patchdef.vertices["position"].tolist()
 					for w in range(width):
 						for h in range(height):
-							vertex_index = w * height + h
-							vertex_position = patchdef.vertices[vertex_index]
+							vertex_position = positions[w][h]
 						
 							p = patch.vertex(w, h).point()
 							p.setPosition(vertex_position)
@@ -564,21 +663,27 @@ def import_map(hou_geometry, entities):
 								brushentity_group.add(p)
 					return patch		
 					
-				for patch2 in e.patchdef2s:
+				for patch2 in patchdef2s:
 					make_patch(hou_geometry, patch2, is_patchdef3 = False)
 					
-				for patch3 in e.patchdef3s:
+				for patch3 in patchdef3s:
 					make_patch(hou_geometry, patch3, is_patchdef3 = True)
 					
+	if len(brush_num_planes) > 0:
+		brush_polygons = pmt_common_brush.build_brush_polygons([tuple(n) for n in brush_normals], brush_distances, brush_num_planes)
+		builder.add_brush_polygons(brush_polygons, brush_group_names, brush_plane_attribs)
+		
+	builder.build(hou_geometry)
+	
 if __name__ == "__main__" and not IN_HOUDINI:
-	if len(sys.argv) != 2:
-		print("pmt_prefab_idtech4_map.py [path_to.map]")
+	if len(sys.argv) != 2 and len(sys.argv) != 3:
+		print("pmt_prefab_idtech4_map.py [path_to.map] [trace.json] -- trace.json is an optional profile trace, see pmt_common.HOUPROFILE")
 		exit()
 	
 	map_path = sys.argv[1]
-	
-	map_data = parse_map(map_path)
-else:
+	with pmt_common.HOUPROFILE("pmt_map_import", trace_path = sys.argv[2] if len(sys.argv) == 3 else None):
+		map_data = parse_map(map_path)
+elif IN_HOUDINI:
 	import hou
 	node = hou.pwd()
 	IS_PYTHON_NODE = node != None and "python" in node.type().nameWithCategory().lower() #'Sop/python' in Houdini 18.5
@@ -586,5 +691,7 @@ else:
 		geo = node.geometry()
 		
 		map_path = "C:/pmt/exports/out.map"
-		entity_list = parse_map(map_path)
-		import_map(geo, entity_list)
\ No newline at end of file
+		region = None		#e.g. pmt_common_bounds.Region((-512, -512, 0), (512, 512, 256)) to only import one room
+		entity_list = parse_map(map_path, use_cache = True)
+		bounds = parse_map_bounds(map_path, use_cache = True) if region != None else None
+		import_map(geo, entity_list, region = region, bounds = bounds)
\ No newline at end of file
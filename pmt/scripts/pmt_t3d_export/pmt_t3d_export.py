@@ -6,19 +6,34 @@
 #
 
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
-if True:
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
 	import hou
 	PMT__G_CFG = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
 	pmt__global_config = PMT__G_CFG.pmt__global_config
 	pmt_common = PMT__G_CFG.pmt_common
+	pmt_common_format = PMT__G_CFG.pmt_common_format
+	pmt_common_extract = PMT__G_CFG.pmt_common_extract
+	pmt_common_cache = PMT__G_CFG.pmt_common_cache
+	pmt_common_dump = PMT__G_CFG.pmt_common_dump
 	pmt_material_select = PMT__G_CFG.pmt_material_select
 	pmt_parse_source1_fgd = PMT__G_CFG.pmt_parse_source1_fgd
+else:
+	#Standalone (e.g. pmt_export_cli): load the shared modules from \scripts\pmt__global_config
+	import os
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_format
+	import pmt_common_extract
+	import pmt_common_cache
+	import pmt_common_dump
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 ###pmt exporters COMMON_SECTION
 if True:
-	LINS = pmt_common.LINS
-	LINE = pmt_common.LINE
+	LINS = pmt_common_format.LINS
+	LINE = pmt_common_format.LINE
 ###pmt exporters COMMON_SECTION
 
 import sys
@@ -27,7 +42,8 @@ import math
 import random
 import importlib
 import functools
-import copy
+import itertools
+import numpy
 
 import inspect
 CF = inspect.currentframe
@@ -40,11 +56,14 @@ def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name
 #We assume that all keyvalues of the polylists are the same, 
 #so we can get the keyvalues by looking at entity_keyvalues_dict of polylists[0].
 class MoverBrush:
+	__slots__ = ("polylists",)
 	def __init__(self):
 		self.polylists = list()
 		
 #A polylist here refers to a convex set of prims with the same pmt_bsp_island
+#PolyList and Polygon use __slots__ since a map can have hundreds of thousands of polygons
 class PolyList:
+	__slots__ = ("polygons", "brush_order", "is_additive", "is_terrain", "is_detail", "is_nonsolid", "entity_island", "entity_class", "entity_keyvalues_dict", "cache_key")
 	def __init__(self):
 		self.polygons = list()
 		self.brush_order = None
@@ -56,16 +75,31 @@ class PolyList:
 		self.entity_island = None
 		self.entity_class = None
 		self.entity_keyvalues_dict = None
+		self.cache_key = None		#Set by perform_export() if the export cache is used
 class Polygon:
+	__slots__ = ("primidx", "vertices", "normal", "uv_u_axis", "uv_v_axis", "material_str", "uv_data", "texture_size", "brush_order", "flags")
 	def __init__(self):
 		self.primidx = -1
 		self.vertices = list()
 		self.normal = (0.0, 0.0, 0.0)
+		self.uv_u_axis = None		#Basis of normal from pmt_common.btPlaneSpace1_batch(); None if uv_data is used
+		self.uv_v_axis = None
 		self.material_str = None
 		self.uv_data = None
 		self.texture_size = None
+		self.brush_order = None
 		self.flags = 0
 
+#Returns a PolyList with the polygons of all polylists, and all other values of polylists[0].
+#The polygons and keyvalues are shared with polylists, not copied.
+def merge_polylists(polylists):
+	merged = PolyList()
+	first = polylists[0]
+	for attr in PolyList.__slots__:
+		setattr(merged, attr, getattr(first, attr))
+	merged.polygons = [polygon for polylist in polylists for polygon in polylist.polygons]
+	return merged
+
 #For brushes
 def FloatStr(float_value):
 	return '{0:0=+13.6f}'.format(float_value)
@@ -77,6 +111,20 @@ def FloatIntStr(float_value):
 #For location
 def FloatStrEntity(float_value):
 	return '{0:0=.6f}'.format(float_value)
+
+#"x,y,z" with FloatStr()
+VECTOR_FORMAT = pmt_common_format.vector_format(pmt_common_format.FLOAT_T3D, 3, ",")
+#Lines of a polygon after 'Begin Polygon'; the polygons of a brush are formatted with a single str.format() call, see T3dExport.export_polygons()
+POLYGON_AXES_TEMPLATE = "".join([
+	pmt_common_format.LINS_TEMPLATE(4, "Origin   " + VECTOR_FORMAT),
+	pmt_common_format.LINS_TEMPLATE(4, "Normal   " + VECTOR_FORMAT),
+	pmt_common_format.LINS_TEMPLATE(4, "TextureU " + VECTOR_FORMAT),
+	pmt_common_format.LINS_TEMPLATE(4, "TextureV " + VECTOR_FORMAT),
+])
+POLYGON_AXES_SIZE = 12		#number of floats in POLYGON_AXES_TEMPLATE
+VERTEX_TEMPLATE = pmt_common_format.LINS_TEMPLATE(4, "Vertex   " + VECTOR_FORMAT)
+END_POLYGON_TEMPLATE = pmt_common_format.LINS_TEMPLATE(3, "End Polygon")
+WRITE_BUFFER_SIZE = 1024 * 1024		#bytes buffered by the output file before each write to disk
 	
 class T3dExport:
 	def __init__(self):
@@ -214,8 +262,8 @@ class T3dExport:
 		return out
 
 		
-	def export_polygon(self, polygon, is_terrain, is_detail, is_nonsolid, is_mover = False):
-		o = polygon.vertices[0]
+	#Returns the 'Begin Polygon' line, texture axes and pan of polygon
+	def get_polygon_header(self, polygon, is_terrain, is_detail, is_nonsolid, is_mover = False):
 		n = polygon.normal
 	
 		#u, v:
@@ -226,9 +274,12 @@ class T3dExport:
 		#		128^2 texture needs scale 2.0 to match the brush 1:1
 		#		512^2 texture needs scale 0.5 to match the brush 1:1
 		#pan: in pixels
-		uv = pmt_common.btPlaneSpace1(n)
-		assert uv != None, "poly from prim [{}] has invalid normal [{}] or zero area".format(polygon.primidx, n)
-		u, v = uv
+		u = polygon.uv_u_axis
+		v = polygon.uv_v_axis
+		if polygon.uv_data == None and (u == None or v == None):
+			uv = pmt_common.btPlaneSpace1(n)
+			assert uv != None, "poly from prim [{}] has invalid normal [{}] or zero area".format(polygon.primidx, n)
+			u, v = uv
 		pan_u, pan_v = 0.0, 0.0			
 		
 		final_material = "Detail.Marble"
@@ -240,23 +291,19 @@ class T3dExport:
 				assert False, "t3d export_polygon(): error - polygon has uv_data but not texture_size"
 		
 			#Approach #2: axis, scale, offset are explicitly specified and mesh uvs are computed only for visualization	
-			LOAD_UV_DIRECT = True
-			if LOAD_UV_DIRECT:
-				#UV data is stored by VMF convention -- convert it to T3D
-				scale = polygon.uv_data.t3d_uv_scale
-				scale_u = 1.0 / scale[0]
-				scale_v = 1.0 / scale[1]
-				
-				u = polygon.uv_data.t3d_uv_u_axis
-				v = polygon.uv_data.t3d_uv_v_axis
-				u = (u[0] * scale_u, u[1] * scale_u, u[2] * scale_u)
-				v = (v[0] * scale_v, v[1] * scale_v, v[2] * scale_v)
-				offset = polygon.uv_data.t3d_uv_offset
-				pan_u = offset[0]
-				pan_v = offset[1]
-				
+			#UV data is stored by VMF convention -- convert it to T3D
+			scale = polygon.uv_data.t3d_uv_scale
+			scale_u = 1.0 / scale[0]
+			scale_v = 1.0 / scale[1]
+			
+			u = polygon.uv_data.t3d_uv_u_axis
+			v = polygon.uv_data.t3d_uv_v_axis
+			u = (u[0] * scale_u, u[1] * scale_u, u[2] * scale_u)
+			v = (v[0] * scale_v, v[1] * scale_v, v[2] * scale_v)
+			offset = polygon.uv_data.t3d_uv_offset
+			pan_u = offset[0]
+			pan_v = offset[1]
 			
-		out = ""
 		if not is_terrain:
 			beginstr = "Begin Polygon Texture={0}".format(final_material)
 			if is_nonsolid:
@@ -280,20 +327,50 @@ class T3dExport:
 		if is_mover: #'Link' might be needed for dynamic/mover prims, not sure
 			beginstr += " Link={}".format(self.get_link_id())
 			
-		out += LINS(3, beginstr)
-		
-		out += LINS(4, "Origin   " + FloatStr(o[0]) + "," + FloatStr(o[1]) + "," + FloatStr(o[2]))
-		out += LINS(4, "Normal   " + FloatStr(n[0]) + "," + FloatStr(n[1]) + "," + FloatStr(n[2]))
-		out += LINS(4, "TextureU " + FloatStr(u[0]) + "," + FloatStr(u[1]) + "," + FloatStr(u[2]))
-		out += LINS(4, "TextureV " + FloatStr(v[0]) + "," + FloatStr(v[1]) + "," + FloatStr(v[2]))
-		#out += LINS(4, "TextureU -00001.000000,-00000.000000,-00000.000000")		#todo get u
-		#out += LINS(4, "TextureV +00000.000000,+00000.000000,-00001.000000")		#todo get v
-		#out += LINS(4, "Pan      U=0 V=0")
-		out += LINS(4, "Pan      U={0} V={1}".format(FloatIntStr(pan_u), FloatIntStr(pan_v)))
-		for v in polygon.vertices:
-			out += LINS(4, "Vertex   " + FloatStr(v[0]) + "," + FloatStr(v[1]) + "," + FloatStr(v[2]))
-		out += LINS(3, "End Polygon")
-		return out
+		return LINS(3, beginstr), u, v, pan_u, pan_v
+	
+	def export_polygon(self, polygon, is_terrain, is_detail, is_nonsolid, is_mover = False):
+		return self.export_polygons([polygon], is_terrain, is_detail, is_nonsolid, is_mover)
+	
+	#Returns the text of polygons, formatted with a single str.format() call.
+	#The template of each polygon has its 'Begin Polygon' and pan lines as text, and replacement fields for the
+	#origin, normal, texture axes and vertices; these are scattered into a single NumPy array in the order of the template.
+	@pmt_common.HOUPROFILE_COUNT_DECO
+	def export_polygons(self, polygons, is_terrain, is_detail, is_nonsolid, is_mover = False):
+		num_polygons = len(polygons)
+		if num_polygons == 0:
+			return ""
+		
+		vertex_counts = numpy.array([len(polygon.vertices) for polygon in polygons], dtype = numpy.int64)
+		vertices = numpy.array([vertex for polygon in polygons for vertex in polygon.vertices], dtype = numpy.float64).reshape(-1, 3)
+		vertex_starts = numpy.cumsum(vertex_counts) - vertex_counts
+		
+		axes = numpy.empty((num_polygons, 4, 3), dtype = numpy.float64)
+		axes[:, 0] = vertices[vertex_starts]		#origin is the first vertex
+		axes[:, 1] = [polygon.normal for polygon in polygons]
+		
+		template = list()
+		for polygon_index, polygon in enumerate(polygons):
+			beginstr, u, v, pan_u, pan_v = self.get_polygon_header(polygon, is_terrain, is_detail, is_nonsolid, is_mover)
+			axes[polygon_index, 2] = u
+			axes[polygon_index, 3] = v
+			template.append(pmt_common_format.escape(beginstr))
+			template.append(POLYGON_AXES_TEMPLATE)
+			template.append(LINS(4, "Pan      U={0} V={1}".format(FloatIntStr(pan_u), FloatIntStr(pan_v))))
+			template.append(pmt_common_format.repeat_template(VERTEX_TEMPLATE, len(polygon.vertices)))
+			template.append(END_POLYGON_TEMPLATE)
+		
+		#Each polygon has POLYGON_AXES_SIZE floats followed by 3 floats per vertex
+		value_counts = POLYGON_AXES_SIZE + 3 * vertex_counts
+		value_starts = numpy.cumsum(value_counts) - value_counts
+		values = numpy.empty(int(value_counts.sum()), dtype = numpy.float64)
+		values[ (value_starts[:, None] + numpy.arange(POLYGON_AXES_SIZE)).ravel() ] = axes.ravel()
+		
+		vertex_polygons = numpy.repeat(numpy.arange(num_polygons), vertex_counts)
+		vertex_offsets = value_starts[vertex_polygons] + POLYGON_AXES_SIZE + 3 * (numpy.arange(len(vertices)) - vertex_starts[vertex_polygons])
+		values[ (vertex_offsets[:, None] + numpy.arange(3)).ravel() ] = vertices.ravel()
+		
+		return "".join(template).format( *values.tolist() )
 	
 	
 	def export_actor(self, classname, keyvalues_dict = None, polylist = None, is_mover = False):
@@ -301,7 +378,8 @@ class T3dExport:
 		out = ""
 		out += LINS(0, "Begin Actor Class={0} Name={0}{1}".format(classname, actor_id_str))
 		
-		kv_dict = keyvalues_dict if keyvalues_dict != None else dict()
+		#keyvalues_dict is copied since the keyvalues of a merged mover are shared with its brushes, see merge_polylists()
+		kv_dict = dict(keyvalues_dict) if keyvalues_dict != None else dict()
 		
 		if polylist != None:
 			kv_dict["csgoper"] = "CSG_Add" if polylist.is_additive else "CSG_Subtract"
@@ -325,11 +403,10 @@ class T3dExport:
 		
 		if polylist != None:
 			model_id_str = self.get_model_id()
-			out += pmt_common.NEWLINE
+			out += pmt_common_format.NEWLINE
 			out += LINS(1, "Begin Brush Name=Model" + model_id_str)
 			out += LINS(2, "Begin PolyList")
-			for polygon in polylist.polygons:
-				out += self.export_polygon(polygon, polylist.is_terrain, polylist.is_detail, polylist.is_nonsolid, is_mover)
+			out += self.export_polygons(polylist.polygons, polylist.is_terrain, polylist.is_detail, polylist.is_nonsolid, is_mover)
 			out += LINS(2, "End PolyList")
 			out += LINS(1, "End Brush")
 			out += LINS(1, "Brush=Model'MyLevel.Model" + model_id_str + "'")
@@ -356,71 +433,171 @@ class T3dExport:
 	def export_mover_brush(self, polylist):
 		return self.export_actor(polylist.entity_class, polylist.entity_keyvalues_dict, polylist, True)
 		
+#Incremental export (see pmt_common_cache)
+ACTOR_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_0
+MODEL_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_1
+LINK_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_2
+EXPORT_CACHE_FORMAT = "t3d 1"		#change when the output of export_static_brush()/export_mover_brush() changes
+
+#Writes placeholders instead of ids, for the export cache
+class T3dTemplateExport(T3dExport):
+	def get_model_id(self):
+		return MODEL_ID_PLACEHOLDER
+	def get_actor_id(self):
+		return ACTOR_ID_PLACEHOLDER
+	def get_link_id(self):
+		return LINK_ID_PLACEHOLDER
+		
+
+### Export data
+#Brushes and entities collected from the geometry by extract_export_data() and written by write_export();
+#can be saved as an export dump and written again without Houdini (see pmt_common_dump)
+class PointEntity:
+	def __init__(self):
+		self.classname = None
+		self.keyvalues_dict = None
+		self.location = None
+		self.pitchY_yawZ_rollX = None			#None if the point has no euler rotation
+
+class T3dExportData:
+	def __init__(self):
+		self.levelprops_class = None
+		self.levelprops_kv = None
+		self.static_polylists = list()			#PolyList; sorted by brush_order
+		self.mover_polylists = list()			#PolyList; one per mover, with the polygons of all of its brushes
+		self.point_entities = list()			#PointEntity
+
+EXPORT_DUMP_FORMAT = "t3d"
+POLYGON_FIELDS = [
+	("primidx", pmt_common_dump.FIELD_VALUE), ("vertices", pmt_common_dump.FIELD_VECTORS), ("normal", pmt_common_dump.FIELD_VECTOR),
+	("uv_u_axis", pmt_common_dump.FIELD_VECTOR), ("uv_v_axis", pmt_common_dump.FIELD_VECTOR),
+	("material_str", pmt_common_dump.FIELD_STR), ("uv_data", pmt_common_dump.FIELD_UV_DATA), ("texture_size", pmt_common_dump.FIELD_VECTOR),
+	("flags", pmt_common_dump.FIELD_VALUE),
+]
+POLYLIST_FIELDS = [
+	("brush_order", pmt_common_dump.FIELD_VALUE), ("is_additive", pmt_common_dump.FIELD_VALUE), ("is_terrain", pmt_common_dump.FIELD_VALUE),
+	("is_detail", pmt_common_dump.FIELD_VALUE), ("is_nonsolid", pmt_common_dump.FIELD_VALUE),
+	("entity_island", pmt_common_dump.FIELD_VALUE), ("entity_class", pmt_common_dump.FIELD_STR), ("entity_keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("cache_key", pmt_common_dump.FIELD_KEY),
+]
+POINT_ENTITY_FIELDS = [
+	("classname", pmt_common_dump.FIELD_STR), ("keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("location", pmt_common_dump.FIELD_VECTOR), ("pitchY_yawZ_rollX", pmt_common_dump.FIELD_VECTOR),
+]
+
+def export_data_to_dump(export_data):
+	dump = pmt_common_dump.ExportDump(EXPORT_DUMP_FORMAT)
+	dump.put_value("levelprops_class", export_data.levelprops_class)
+	dump.put_value("levelprops_kv", export_data.levelprops_kv)
+	
+	polylists = export_data.static_polylists + export_data.mover_polylists
+	dump.put_value("num_static_polylists", len(export_data.static_polylists))
+	dump.put_counts("polylist_polygons", [polylist.polygons for polylist in polylists])
+	dump.put_records("polylists", polylists, POLYLIST_FIELDS)
+	dump.put_records("polygons", [polygon for polylist in polylists for polygon in polylist.polygons], POLYGON_FIELDS)
+	dump.put_records("point_entities", export_data.point_entities, POINT_ENTITY_FIELDS)
+	return dump
+
+def export_data_from_dump(dump):
+	export_data = T3dExportData()
+	export_data.levelprops_class = dump.get_value("levelprops_class")
+	export_data.levelprops_kv = dump.get_value("levelprops_kv")
+	
+	polylists = dump.get_records("polylists", PolyList, POLYLIST_FIELDS)
+	polygons = dump.get_records("polygons", Polygon, POLYGON_FIELDS)
+	for polylist, polylist_polygons in zip(polylists, dump.split("polylist_polygons", polygons)):
+		polylist.polygons = polylist_polygons
+	num_static_polylists = dump.get_value("num_static_polylists")
+	export_data.static_polylists = polylists[:num_static_polylists]
+	export_data.mover_polylists = polylists[num_static_polylists:]
+	
+	export_data.point_entities = dump.get_records("point_entities", PointEntity, POINT_ENTITY_FIELDS)
+	return export_data
 
+#Returns a T3dExportData with the brushes and entities of the node geometry.
+#with_cache_keys sets the cache_key of each polylist (see pmt_common_cache)
+#geometry_cache (pmt_common_extract.GeometryCache of the node geometry) is shared when exporting to several formats, see pmt_multi_export
 @pmt_common.HOUPROFILE_EVENT_DECO
-def perform_export(node, t3d_export_path):
+def extract_export_data(node, with_cache_keys = False, geometry_cache = None):
 	N = node
 	G = N.geometry()
 	assert G != None, "t3d export: node at {} has no geometry".format(N.path())
 	
+	export_data = T3dExportData()
+	
 	levelprops_class_attrib = G.findGlobalAttrib(pmt_common.PMT_T3D_LEVELPROPS_CLASS)
 	levelprops_kv_attrib = G.findGlobalAttrib(pmt_common.PMT_T3D_LEVELPROPS_KEYVALUES)
 	
-	levelprops_class = None
-	levelprops_kv = None
 	if levelprops_class_attrib != None and levelprops_kv_attrib != None:
-		levelprops_class = G.attribValue(levelprops_class_attrib)
-		levelprops_kv = G.attribValue(levelprops_kv_attrib)
+		export_data.levelprops_class = G.attribValue(levelprops_class_attrib)
+		export_data.levelprops_kv = G.attribValue(levelprops_kv_attrib)
 		
+	if geometry_cache == None:
+		geometry_cache = pmt_common_extract.GeometryCache(G)
+	positions_array = geometry_cache.get_positions_array()
+	positions = geometry_cache.get_positions()
+	
 	@pmt_common.HOUPROFILE_EVENT_DECO
 	def convert_houdini_prims_to_t3d_brushes(geometry):
 		print(CURFUNC(CF()))
 		
-		@pmt_common.HOUPROFILE_EVENT_DECO
-		def prim_to_poly(prim, has_material, has_uv, texture_size_attrib, brush_order_attrib, polyflags_attrib):
-			n = prim.normal()
+		@pmt_common.HOUPROFILE_COUNT_DECO
+		def prim_to_poly(prim, prim_index):
+			n = geometry_cache.get_prim_normal(prim, prim_index)
 				
 			poly = Polygon()
-			poly.primidx = prim.number()
+			poly.primidx = prim_index
 			poly.normal = (n.x(), n.y(), n.z())
-			for v in prim.vertices():
-				p = v.point().position()
-				poly.vertices.append( (p.x(), p.y(), p.z()) )
+			point_indices = geometry_cache.get_prim_point_indices(prim, prim_index)
+			for point_index in point_indices:
+				poly.vertices.append( positions[point_index] )
 			poly.vertices.reverse()	#Note reverse winding
+			prim_point_indices[prim_index] = point_indices
 			
-			if has_material:
-				poly.material_str = prim.attribValue(pmt_common.PMT_T3D_MATERIAL)
-			if has_uv:
-				poly.uv_data = pmt_common.extract_uv_data(prim)
-			if texture_size_attrib != None:
-				poly.texture_size = prim.attribValue(texture_size_attrib)
-			if brush_order_attrib != None:
-				poly.brush_order = prim.attribValue(brush_order_attrib)
-			if polyflags_attrib != None:
-				poly.flags = prim.attribValue(polyflags_attrib)
+			if materials != None:
+				poly.material_str = materials[prim_index]
+			if all_uv_data != None:
+				poly.uv_data = all_uv_data[prim_index]
+			if texture_sizes != None:
+				poly.texture_size = texture_sizes[prim_index]
+			if brush_orders != None:
+				poly.brush_order = brush_orders[prim_index]
+			if polyflags != None:
+				poly.flags = polyflags[prim_index]
 			return poly
 			
-		has_material = (geometry.findPrimAttrib(pmt_common.PMT_T3D_MATERIAL) != None)
 		has_uv = pmt_common.houdini_geometry_has_uv_data(geometry)
-		texture_size_attrib = geometry.findPrimAttrib(pmt_common.PMT_T3D_TEXTURE_SIZE)
-		brush_order_attrib = geometry.findPrimAttrib(pmt_common.PMT_T3D_BRUSH_ORDER)
-		polyflags_attrib = geometry.findPrimAttrib(pmt_common.PMT_T3D_POLYFLAGS)
-		has_brush_order = brush_order_attrib != None
-		
-		bsp_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_BSP_ISLAND)
-		entity_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_ENTITY_ISLAND)
-		geometry_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOMETRY_PRIM)
-		geotype_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOTYPE_PRIM)
-		assert bsp_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
-		assert entity_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
-		assert geometry_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
-		assert geotype_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
+		attrib_names = [
+			pmt_common.PMT_BSP_ISLAND, pmt_common.PMT_ENTITY_ISLAND, pmt_common.PMT_GEOMETRY_PRIM, pmt_common.PMT_GEOTYPE_PRIM,
+			pmt_common.PMT_T3D_MATERIAL, pmt_common.PMT_T3D_TEXTURE_SIZE, pmt_common.PMT_T3D_BRUSH_ORDER, pmt_common.PMT_T3D_POLYFLAGS,
+			pmt_common.PMT_T3D_ENTITY_CLASS,
+		]
+		if has_uv:
+			attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+		columns = geometry_cache.prim_columns(attrib_names)
+		
+		assert columns.has(pmt_common.PMT_BSP_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
+		assert columns.has(pmt_common.PMT_ENTITY_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
+		assert columns.has(pmt_common.PMT_GEOMETRY_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
+		assert columns.has(pmt_common.PMT_GEOTYPE_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
+		
+		bsp_islands = columns.values(pmt_common.PMT_BSP_ISLAND)
+		entity_islands = columns.values(pmt_common.PMT_ENTITY_ISLAND)
+		geotypes = columns.values(pmt_common.PMT_GEOTYPE_PRIM)
+		materials = columns.values(pmt_common.PMT_T3D_MATERIAL) if columns.has(pmt_common.PMT_T3D_MATERIAL) else None
+		texture_sizes = columns.values(pmt_common.PMT_T3D_TEXTURE_SIZE) if columns.has(pmt_common.PMT_T3D_TEXTURE_SIZE) else None
+		brush_orders = columns.values(pmt_common.PMT_T3D_BRUSH_ORDER) if columns.has(pmt_common.PMT_T3D_BRUSH_ORDER) else None
+		polyflags = columns.values(pmt_common.PMT_T3D_POLYFLAGS) if columns.has(pmt_common.PMT_T3D_POLYFLAGS) else None
+		entity_classes = columns.values(pmt_common.PMT_T3D_ENTITY_CLASS) if columns.has(pmt_common.PMT_T3D_ENTITY_CLASS) else None
+		all_uv_data = geometry_cache.get_uv_data(columns) if has_uv else None
+		has_brush_order = brush_orders != None
 		
 		all_brushes = list()
 		
-		prims = geometry.prims()
+		prims = geometry_cache.get_prims()
 		num_prims = len(prims)
-		prev_prim = None
+		prim_point_indices = [None] * num_prims
+		prev_bsp_island = None
 		for prim_index in range(num_prims):
 			if (prim_index % 1000) == 0:
 				print("prim: {0} / {1}".format(prim_index, num_prims))
@@ -429,7 +606,7 @@ def perform_export(node, t3d_export_path):
 			if prim.type() != hou.primType.Polygon:
 				continue
 			
-			geotype = prim.attribValue(geotype_prim_attrib)
+			geotype = geotypes[prim_index]
 			is_bsp = geotype == pmt_common.PMT_BSP_GROUP
 			is_bspdetail = geotype == pmt_common.PMT_BSPDETAIL_GROUP
 			is_bspnonsolid = geotype == pmt_common.PMT_BSPNONSOLID_GROUP
@@ -445,10 +622,9 @@ def perform_export(node, t3d_export_path):
 			if not (is_bsp or is_bspdetail or is_bspnonsolid or is_bspsubtract or is_bspterrainsubtract or is_bspterrain or is_bspterraindetail or is_bspterrainnonsolid or is_bspentity):
 				continue
 				
-			bsp_island = prim.attribValue(bsp_island_attrib)
-			entity_island = prim.attribValue(entity_island_attrib)
+			bsp_island = bsp_islands[prim_index]
+			entity_island = entity_islands[prim_index]
 			
-			prev_bsp_island = prev_prim.attribValue(bsp_island_attrib) if (prev_prim != None) else None
 			is_new_bsp_island = bsp_island != prev_bsp_island
 			if is_new_bsp_island:
 				brush = PolyList()
@@ -514,7 +690,8 @@ def perform_export(node, t3d_export_path):
 					all_brushes[-1].entity_island = entity_island
 					
 					#assume all prims assigned to this mover have same classname and keyvalues
-					classname = prim.attribValue(pmt_common.PMT_T3D_ENTITY_CLASS)
+					assert entity_classes != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_T3D_ENTITY_CLASS)
+					classname = entity_classes[prim_index]
 					kv_attrib_dict = prim.dictAttribValue(pmt_common.PMT_T3D_ENTITY_KEYVALUES)
 						
 					if len(classname) != 0 and classname != pmt_common.PMT_NONE:
@@ -523,11 +700,32 @@ def perform_export(node, t3d_export_path):
 				else: assert False, CURFUNC(CF()) + ": invalid BSP type"
 					
 			
-			poly = prim_to_poly(prim, has_material, has_uv, texture_size_attrib, brush_order_attrib, polyflags_attrib)
+			poly = prim_to_poly(prim, prim_index)
 			if has_brush_order and all_brushes[-1].brush_order == None:
 				all_brushes[-1].brush_order = poly.brush_order
 			all_brushes[-1].polygons.append(poly)
-			prev_prim = prim
+			prev_bsp_island = bsp_island
+		
+		#The key of each brush covers the prim attribs used by export_actor(); brush_order only changes the order of the brushes
+		@pmt_common.HOUPROFILE_EVENT_DECO
+		def compute_cache_keys(all_brushes):
+			key_attrib_names = [pmt_common.PMT_GEOTYPE_PRIM, pmt_common.PMT_T3D_MATERIAL, pmt_common.PMT_T3D_TEXTURE_SIZE, pmt_common.PMT_T3D_POLYFLAGS]
+			if has_uv:
+				key_attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+			key_attrib_names = [name for name in key_attrib_names if columns.has(name)]
+			
+			island_prim_indices = list()
+			island_extras = list()
+			for brush in all_brushes:
+				island_prim_indices.append( [poly.primidx for poly in brush.polygons] )
+				island_extras.append( ",".join(key_attrib_names) + repr( (brush.entity_class, brush.entity_keyvalues_dict) ) )
+				
+			key_columns = [columns.array(name) for name in key_attrib_names]
+			keys = pmt_common_cache.compute_island_keys(island_prim_indices, prim_point_indices, positions_array, key_columns, island_extras)
+			for brush, key in zip(all_brushes, keys):
+				brush.cache_key = key
+		if with_cache_keys:
+			compute_cache_keys(all_brushes)
 			
 		return all_brushes
 	all_brushes = convert_houdini_prims_to_t3d_brushes(G)
@@ -571,62 +769,120 @@ def perform_export(node, t3d_export_path):
 		for mover in movers:
 			if len(mover.polylists) > 0:
 				#assume all values other than PolyList().polygons are the same for each entity_island
-				mover_polylists.append(PolyList())
-				mover_polylists[-1] = copy.deepcopy(mover.polylists[0])
-				mover_polylists[-1].polygons = list()
-				
-				for polys in mover.polylists:
-					mover_polylists[-1].polygons += polys.polygons
+				mover_polylists.append( merge_polylists(mover.polylists) )
+				if with_cache_keys:
+					mover_polylists[-1].cache_key = pmt_common_cache.combine_keys([polys.cache_key for polys in mover.polylists])
 		return mover_polylists
 	mover_polylists = merge_mover_brush_polylists(mover_brushes)
-				
 	
-	exporter = T3dExport()
+	#Polygons with uv_data do not need a basis
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def compute_uv_axes(polylists):
+		polygons = list()
+		for polylist in polylists:
+			polygons += polylist.polygons
+		
+		normals = [polygon.normal for polygon in polygons]
+		skip = [polygon.uv_data != None for polygon in polygons]
+		prim_indices = [polygon.primidx for polygon in polygons]
+		u_axes, v_axes, invalid_prim_indices = pmt_common.btPlaneSpace1_batch(normals, skip, prim_indices)
+		assert len(invalid_prim_indices) == 0, "polys from prims {} have invalid normals or zero area".format(invalid_prim_indices.tolist())
+		
+		u_axes = u_axes.tolist()
+		v_axes = v_axes.tolist()
+		for polygon_index in range(len(polygons)):
+			if not skip[polygon_index]:
+				polygons[polygon_index].uv_u_axis = tuple(u_axes[polygon_index])
+				polygons[polygon_index].uv_v_axis = tuple(v_axes[polygon_index])
+	compute_uv_axes(static_polylists + [polylist for polylist in mover_polylists if polylist.entity_class != None])
 	
 	@pmt_common.HOUPROFILE_EVENT_DECO
-	def extract_point_entities(exporter, geometry):
+	def extract_point_entities(geometry):
 		print(CURFUNC(CF()))
 		
+		point_entities = list()
 		entity_points = geometry.findPointGroup(pmt_common.PMT_ENTITY)
 		if entity_points == None:
-			return ""
+			return point_entities
+		
+		columns = geometry_cache.point_columns([pmt_common.PMT_T3D_ENTITY_CLASS, pmt_common.PMT_T3D_ROTATION_EULER, pmt_common.PMT_HAS_EULER_ROTATION])
 		
-		entity_str = ""
 		for point in entity_points.points():
-			p = point.position()
-			p_tuple = (p.x(), p.y(), p.z())
+			point_index = point.number()
 			
-			classname = point.attribValue(pmt_common.PMT_T3D_ENTITY_CLASS)
+			classname = columns.value(pmt_common.PMT_T3D_ENTITY_CLASS, point_index)
 			if len(classname) == 0 or classname == pmt_common.PMT_NONE:
 				continue
-					
-			keyvalues_dict = point.dictAttribValue(pmt_common.PMT_T3D_ENTITY_KEYVALUES)
-			rotation_euler = point.attribValue(pmt_common.PMT_T3D_ROTATION_EULER)
-			rotation_euler_enabled = point.attribValue(pmt_common.PMT_HAS_EULER_ROTATION)
-				
-			if not rotation_euler_enabled:
-				entity_str += exporter.export_point_entity(classname, keyvalues_dict, p_tuple)
-			else:
+			
+			point_entity = PointEntity()
+			point_entity.classname = classname
+			point_entity.keyvalues_dict = point.dictAttribValue(pmt_common.PMT_T3D_ENTITY_KEYVALUES)
+			point_entity.location = positions[point_index]
+			
+			rotation_euler = columns.value(pmt_common.PMT_T3D_ROTATION_EULER, point_index)
+			rotation_euler_enabled = columns.value(pmt_common.PMT_HAS_EULER_ROTATION, point_index)
+			if rotation_euler_enabled:
 				rot_x = -rotation_euler[0]
 				rot_y = -rotation_euler[1]
 				rot_z = rotation_euler[2]
-				
-				pitchY_yawZ_rollX = (rot_y, rot_z, rot_x)
-				entity_str += exporter.export_point_entity(classname, keyvalues_dict, p_tuple, pitchY_yawZ_rollX)
+				point_entity.pitchY_yawZ_rollX = (rot_y, rot_z, rot_x)
+			point_entities.append(point_entity)
+		return point_entities
+	
+	export_data.static_polylists = static_polylists
+	export_data.mover_polylists = mover_polylists
+	export_data.point_entities = extract_point_entities(G)
+	return export_data
+
+#Writes export_data (T3dExportData) to t3d_export_path; does not use Houdini.
+#use_cache reuses the brushes of the previous export of t3d_export_path that did not change (see pmt_common_cache);
+#the polylists must have cache keys, see extract_export_data()
+@pmt_common.HOUPROFILE_EVENT_DECO
+def write_export(export_data, t3d_export_path, use_cache = False):
+	levelprops_class = export_data.levelprops_class
+	levelprops_kv = export_data.levelprops_kv
+	static_polylists = export_data.static_polylists
+	mover_polylists = [polylist for polylist in export_data.mover_polylists if polylist.entity_class != None]
+	
+	if use_cache and any([polylist.cache_key == None for polylist in static_polylists + mover_polylists]):
+		print("t3d export: brushes have no cache keys; exporting without the cache")
+		use_cache = False
+	cache = pmt_common_cache.ExportCache(t3d_export_path, EXPORT_CACHE_FORMAT) if use_cache else None
+	
+	exporter = T3dExport()
+	
+	#Point entities are written last, but their actor ids come first
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def export_point_entities(exporter, point_entities):
+		entity_str = ""
+		for point_entity in point_entities:
+			if point_entity.pitchY_yawZ_rollX == None:
+				entity_str += exporter.export_point_entity(point_entity.classname, point_entity.keyvalues_dict, point_entity.location)
+			else:
+				entity_str += exporter.export_point_entity(point_entity.classname, point_entity.keyvalues_dict, point_entity.location, point_entity.pitchY_yawZ_rollX)
 		return entity_str
-	entity_str = extract_point_entities(exporter, G)
+	entity_str = export_point_entities(exporter, export_data.point_entities)
+	
+	#Returns export_function(exporter, polylist), with the text from the cache if polylist did not change;
+	#the ids are filled in here, in the same order as export_function() would assign them
+	template_exporter = T3dTemplateExport()
+	def export_brush(export_function, polylist):
+		if cache == None:
+			return export_function(exporter, polylist)
+		template = cache.get_or_serialize(polylist.cache_key, lambda: export_function(template_exporter, polylist))
+		ids = dict()
+		ids[ACTOR_ID_PLACEHOLDER] = itertools.repeat(exporter.get_actor_id())
+		ids[MODEL_ID_PLACEHOLDER] = itertools.repeat(exporter.get_model_id())
+		ids[LINK_ID_PLACEHOLDER] = iter(exporter.get_link_id, None)
+		return pmt_common_cache.fill_template(template, ids)
 	
 	### Main export
-	file_out = open(t3d_export_path, 'w')
+	file_out = open(t3d_export_path, 'w', buffering = WRITE_BUFFER_SIZE)
 	file_out.write( exporter.export_t3d_start(levelprops_class, levelprops_kv) )
 	file_out.write( exporter.export_t3d_start_insert_sub_brushes() )
 	
-	for brush in static_polylists:
-		file_out.write( exporter.export_static_brush(brush) )
-
-	for polylist in mover_polylists:
-		if polylist.entity_class != None:
-			file_out.write( exporter.export_mover_brush(polylist) )
+	file_out.writelines( export_brush(T3dExport.export_static_brush, brush) for brush in static_polylists )
+	file_out.writelines( export_brush(T3dExport.export_mover_brush, polylist) for polylist in mover_polylists )
 
 	file_out.write( entity_str )
 	file_out.write( exporter.export_t3d_end() )
@@ -634,11 +890,20 @@ def perform_export(node, t3d_export_path):
 	file_out.close()
 	print(".t3d written to {}".format(t3d_export_path))
 	
+	if cache != None:
+		cache.save()
+		cache.print_stats("t3d export")
+	
+#use_cache reuses the brushes of the previous export of t3d_export_path that did not change (see pmt_common_cache)
+#dump_path also saves the export data as an export dump, see pmt_common_dump and \scripts\pmt_export_cli\pmt_export_cli.py
+@pmt_common.HOUPROFILE_EVENT_DECO
+def perform_export(node, t3d_export_path, use_cache = False, dump_path = None):
+	export_data = extract_export_data(node, use_cache or dump_path != None)
+	if dump_path != None:
+		export_data_to_dump(export_data).save(dump_path)
+	write_export(export_data, t3d_export_path, use_cache)
 
-def main_export(node, t3d_export_path):
+#the exporter HDA button calls main_export(hou.pwd(), path); use_cache and dump_path are only set from script
+def main_export(node, t3d_export_path, use_cache = False, dump_path = None):
 	profile = pmt_common.HOUPROFILE("pmt_export_t3d")
-	perform_export(node, t3d_export_path)
-
-
-
-	
\ No newline at end of file
+	perform_export(node, t3d_export_path, use_cache, dump_path)
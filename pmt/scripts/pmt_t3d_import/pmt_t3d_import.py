@@ -4,10 +4,26 @@
 
 import sys
 import os
-import string
 import copy
+import re
 
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	main_module = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = main_module.pmt_common
+	pmt_common_lexer = main_module.pmt_common_lexer
+	pmt_common_build = main_module.pmt_common_build
+	pmt_common_cache = main_module.pmt_common_cache
+else:
+	#Standalone: load the shared modules from \scripts\pmt__global_config
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_lexer
+	import pmt_common_build
+	import pmt_common_cache
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
@@ -42,224 +58,215 @@ class ImportBrushT3d:
 		
 class ImportPolyT3d:
 	def __init__(self):
-		self.origin = None
+		self.origin = None		#(x, y, z) floats, as are normal, textureu, texturev and each vertex
 		self.normal = None
 		self.textureu = None
 		self.texturev = None
-		self.pan = None
+		self.pan = None			#(u, v) floats
 		self.vertices = list()
 		self.keyvalues = None	#dict
 		
-def parse_t3d(t3d_path):
-			
-	#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-	#Under this assumption, literals such as "string' or 'string" are invalid.
-	INQUOTE_TOKEN = "%%q_"
-	def extract_string_literals(text, debug_path = None):
-		assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
-		
-		inquote_text_dict = dict()
-		
-		in_quote = False
-		quote_char = None
-		
-		text_without_quotes = ""
-		inquote_buffer = ""
-		for char in text:
-			if char == "\"" or char == "\'" and not in_quote:
-				quote_char = char
-				
-			if char == quote_char:
-				if not in_quote: #opening quote
-					inquote_buffer = ""
-				else: #closing quote
-					dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-					inquote_text_dict[dict_id_str] = inquote_buffer
-					text_without_quotes += " {} ".format(dict_id_str)
-					#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-				in_quote = not in_quote
-			else:
-				if in_quote:
-					inquote_buffer += char
-				else:
-					text_without_quotes += char
-		assert not in_quote, "error: missing closing quote for quote_char({}): [{}]".format(quote_char, debug_path, text)
-			
-		return (text_without_quotes, inquote_text_dict)
-	
-	with open(t3d_path, 'rt', encoding=TEXT_CODEC) as t3d_file:
-		text = ""
-		for line in t3d_file:
-			text += line.lstrip()
-			
-	(text_without_quotes, inquote_text_dict) = extract_string_literals(text, t3d_path)
-	lines = text_without_quotes.split("\n", maxsplit = -1)
-	while "" in lines:
-		lines.remove("")
-	num_lines = len(lines)
-	
-	for i in range(num_lines):
-		lines[i] = lines[i].lower()
-	
-	assert lines[0].startswith("begin map"), "t3d does not start with 'begin map': {}".format(lines[0].lower())
-	assert lines[-1].startswith("end map"), "t3d does not end with 'end map': {}".format(lines[-1].lower())
-	
-	def find_line_index_that_startswith(lines, start_index, end_statement = "end map"):
-		num_lines = len(lines)
-		while start_index < num_lines:
-			if lines[start_index].startswith(end_statement):
-				return start_index
-			start_index += 1
-			
-		return None
-	def get_begin_statement_keyvalues(begin_line):
-		kv_dict = dict()
-	
-		begin_line_tokens = begin_line.rstrip().split(sep = " ", maxsplit = -1)
-		begin_line_tokens = begin_line_tokens[2:]
-		for t in begin_line_tokens:
-			t = t.lower()
-			if "=" in t:
-				left, sep, right = t.partition("=")
-				kv_dict[left] = right
-				DPRINT("beginkv {}={}".format(left, right))
-		return kv_dict
-		
-	def parse_brush(lines, brush_start, inquote_text_dict):
-		brush_end = find_line_index_that_startswith(lines, brush_start, end_statement = "end brush")
-		
-		brush_first_line = lines[brush_start]
-		brush_kv_dict = get_begin_statement_keyvalues(brush_first_line)
-		polygons = list()
-		
-		polylist_start = find_line_index_that_startswith(lines, brush_start, end_statement = "begin polylist")
-		polylist_end = find_line_index_that_startswith(lines, brush_start, end_statement = "end polylist")
-		
-		num_lines = len(lines)
-		brush_line_index = polylist_start + 1
-		while brush_line_index < polylist_end:
-			brush_line = lines[brush_line_index]
-		
-			if brush_line.startswith("begin polygon"):
-				poly_kv = get_begin_statement_keyvalues(brush_line)
-				
-				poly_start = brush_line_index
-				poly_end = find_line_index_that_startswith(lines, brush_line_index, end_statement = "end polygon")
-				
-				poly_lines = lines[poly_start+1:poly_end]
-				assert "begin polygon" not in poly_lines[0]
-				assert "end polygon" not in poly_lines[-1]
-				
-				poly = ImportPolyT3d()
-				poly.keyvalues = poly_kv
-				for poly_line in poly_lines:
-					def float3_to_tokens(line, remove = "origin"):
-						return line[len(remove):].lstrip().split(",", maxsplit=-1)
-						
-					if poly_line.startswith("origin"):
-						floatstr = float3_to_tokens(poly_line, "origin")
-						DPRINT("origin: {}".format(floatstr))
-						poly.origin = floatstr
-					elif poly_line.startswith("normal"):
-						floatstr = float3_to_tokens(poly_line, "normal")
-						DPRINT("normal: {}".format(floatstr))
-						poly.normal = floatstr
-					elif poly_line.startswith("textureu"):
-						floatstr = float3_to_tokens(poly_line, "textureu")
-						DPRINT("textureu: {}".format(floatstr))
-						poly.textureu = floatstr
-					elif poly_line.startswith("texturev"):
-						floatstr = float3_to_tokens(poly_line, "texturev")
-						DPRINT("texturev: {}".format(floatstr))
-						poly.texturev = floatstr
-					elif poly_line.startswith("vertex"):
-						floatstr = float3_to_tokens(poly_line, "vertex")
-						DPRINT("vertex: {}".format(floatstr))
-						poly.vertices.append(floatstr)
-					elif poly_line.startswith("pan"):
-						pan_line = poly_line[len("pan"):].lstrip()
-						uline, sep, vline = pan_line.partition(" ")
-						assert uline.startswith("u=")
-						assert vline.startswith("v=")
-						pan_u = uline[2:]
-						pan_v = vline[2:]
-						DPRINT("pan_u,v: {}".format((pan_u, pan_v)))
-						poly.pan = (pan_u, pan_v)
-					else:
-						assert False, "unsupported line in 'begin polygon': {}".format(poly_line)
-						
-				polygons.append(poly)
-				
-				brush_line_index = poly_end
-			brush_line_index += 1
-		
-		brush = ImportBrushT3d()
-		brush.keyvalues = brush_kv_dict
-		brush.polygons = polygons
-		return (brush, brush_end)
-		
-	def parse_actor(lines, actor_start, inquote_text_dict):
-		actor_end = find_line_index_that_startswith(lines, actor_start, end_statement = "end actor")
-		
-		actor_first_line = lines[actor_start]
-		actor_kv_dict = get_begin_statement_keyvalues(actor_first_line)
+T3D_LEXER = pmt_common_lexer.Lexer(operators = "", quotes = "\"\'", line_comments = False)
+
+#Strings of T3D_LEXER, and a quote without its closing quote
+T3D_QUOTES_REGEX = re.compile("\"[^\"]*\"|'[^']*'|[\"']")
+
+#Yields the lines of t3d_file that have tokens, like pmt_common_lexer.join_lines() of T3D_LEXER: the tokens of each line are joined with " "
+#and strings are replaced by placeholders in inquote_text_dict. The .t3d has no comments or operators, so only lines with quotes
+#are tokenized by T3D_LEXER (together with the next lines while a string is not closed); the other lines are split on whitespace.
+def iter_t3d_lines(t3d_file, inquote_text_dict, debug_path = None):
+	quoted_text = ""
+	for line in t3d_file:
+		if len(quoted_text) == 0 and "\"" not in line and "'" not in line:
+			tokens = line.split()
+			if len(tokens) > 0:
+				yield " ".join(tokens)
+			continue
+
+		quoted_text += line
+		last_match = None
+		for last_match in T3D_QUOTES_REGEX.finditer(quoted_text):
+			pass
+		if last_match != None and len(last_match.group()) == 1:
+			continue
+		yield from pmt_common_lexer.join_lines(T3D_LEXER.tokenize(quoted_text, debug_path), inquote_text_dict)
+		quoted_text = ""
+	if len(quoted_text) > 0:
+		yield from pmt_common_lexer.join_lines(T3D_LEXER.tokenize(quoted_text, debug_path), inquote_text_dict)
+
+#States of parse_t3d(): the innermost block of the current line
+T3D_STATE_MAP = 0			#begin map
+T3D_STATE_ACTOR = 1			#begin actor
+T3D_STATE_BRUSH = 2			#begin brush, outside of its polylist
+T3D_STATE_POLYLIST = 3		#begin polylist
+T3D_STATE_POLYGON = 4		#begin polygon
+T3D_STATE_END = 5			#after end map
+
+#Returns the keyvalues of a 'begin' line, e.g. 'begin actor class=brush name=brush0'
+def get_begin_statement_keyvalues(begin_line):
+	kv_dict = dict()
+
+	begin_line_tokens = begin_line.rstrip().split(sep = " ", maxsplit = -1)
+	begin_line_tokens = begin_line_tokens[2:]
+	for t in begin_line_tokens:
+		if "=" in t:
+			left, sep, right = t.partition("=")
+			kv_dict[left] = right
+			DPRINT("beginkv {}={}".format(left, right))
+	return kv_dict
+
+#Adds the keyvalue of a line of an actor to actor_kv_dict, e.g. 'group=%%q_0' or 'summary=levelsummary %%q_1'
+def parse_actor_keyvalue(actor_line, actor_kv_dict, inquote_text_dict):
+	INQUOTE_TOKEN = pmt_common_lexer.INQUOTE_TOKEN
+
+	left, sep, right = actor_line.rstrip().partition("=")
+	key = left
+	value = right
+	if INQUOTE_TOKEN in value:
+		vtokens = value.split()
+		num_rtokens = len(vtokens)
+		assert num_rtokens <= 2, "actorkv unsupported: {} (vtokens={})".format(actor_line, vtokens)
+
+		if num_rtokens == 1 and vtokens[0].startswith(INQUOTE_TOKEN):
+			value_string = inquote_text_dict[vtokens[0]]
+			kv_string = value_string
+			DPRINT("actorkv {}='{}'".format(left, value_string))
+		elif num_rtokens == 2 and vtokens[1].startswith(INQUOTE_TOKEN):
+			type_string = vtokens[0]
+			value_string = inquote_text_dict[vtokens[1]]
+			kv_string = "{}'{}'".format(type_string, value_string)
+			DPRINT("actorkv {}={}'{}'".format(left, type_string, value_string))
+
+		actor_kv_dict[key] = kv_string
+	else:
+		DPRINT("actorkv {}={}".format(key, value))
+		actor_kv_dict[key] = value
+
+#Sets the values of a line of a polygon in poly, e.g. 'vertex -01024.000000,-01024.000000,+01024.000000' or 'pan u=0 v=0';
+#vectors are parsed to tuples of floats
+def parse_polygon_line(poly_line, poly):
+	keyword, sep, values = poly_line.partition(" ")
+	if keyword == "vertex":
+		poly.vertices.append( tuple(map(float, values.split(","))) )
+	elif keyword == "origin":
+		poly.origin = tuple(map(float, values.split(",")))
+	elif keyword == "normal":
+		poly.normal = tuple(map(float, values.split(",")))
+	elif keyword == "textureu":
+		poly.textureu = tuple(map(float, values.split(",")))
+	elif keyword == "texturev":
+		poly.texturev = tuple(map(float, values.split(",")))
+	elif keyword == "pan":
+		uline, sep, vline = values.lstrip().partition(" ")
+		assert uline.startswith("u=")
+		assert vline.startswith("v=")
+		poly.pan = (float(uline[2:]), float(vline[2:]))
+	else:
+		assert False, "unsupported line in 'begin polygon': {}".format(poly_line)
+
+#The actors of parse_t3d() are cached as nested tuples, see actors_to_cache_data()
+PARSE_CACHE_FORMAT = "t3d_import 1"		#change when the actors of parse_t3d() change
+
+def actors_to_cache_data(actors):
+	data = list()
+	for actor in actors:
 		brushes = list()
-		
-		num_lines = len(lines)
-		actor_line_index = actor_start + 1
-		while actor_line_index < actor_end:
-			actor_line = lines[actor_line_index]
-		
-			if actor_line.startswith("begin brush"):
-				(brush, actor_line_index) = parse_brush(lines, actor_line_index, inquote_text_dict)
-				brushes.append(brush)
-			elif "=" in actor_line:
-				left, sep, right = actor_line.rstrip().partition("=")
-				key = left.lower()
-				value = right
-				if INQUOTE_TOKEN in value:
-					vtokens = value.split(" ", maxsplit = -1)
-					while "" in vtokens:
-						vtokens.remove("")
-						
-					num_rtokens = len(vtokens)
-					assert num_rtokens <= 2, "actorkv unsupported: {} (vtokens={})".format(actor_line, vtokens)
-				
-					if num_rtokens == 1 and vtokens[0].startswith(INQUOTE_TOKEN):
-						type_string = "string"
-						value_string = inquote_text_dict[vtokens[0]]
-						kv_string = value_string
-						DPRINT("actorkv {}='{}'".format(left, value_string))
-					elif num_rtokens == 2 and vtokens[1].startswith(INQUOTE_TOKEN):
-						type_string = vtokens[0]
-						value_string = inquote_text_dict[vtokens[1]]
-						kv_string = "{}'{}'".format(type_string, value_string)
-						DPRINT("actorkv {}={}'{}'".format(left, type_string, value_string))
-					
-					actor_kv_dict[key] = kv_string
-					
-				else:
-					DPRINT("actorkv {}={}".format(key, value))
-					actor_kv_dict[key] = value
-			actor_line_index += 1
-			
-		actor = ImportActorT3d()
-		actor.keyvalues = actor_kv_dict
-		actor.brushes = brushes
-		return (actor, actor_end)
+		for brush in actor.brushes:
+			polygons = [(poly.keyvalues, poly.origin, poly.normal, poly.textureu, poly.texturev, poly.pan, poly.vertices) for poly in brush.polygons]
+			brushes.append((brush.keyvalues, polygons))
+		data.append((actor.keyvalues, brushes))
+	return data
 	
+def actors_from_cache_data(data):
 	actors = list()
+	for (actor_keyvalues, brushes) in data:
+		actor = ImportActorT3d()
+		actor.keyvalues = actor_keyvalues
+		for (brush_keyvalues, polygons) in brushes:
+			brush = ImportBrushT3d()
+			brush.keyvalues = brush_keyvalues
+			for (poly_keyvalues, origin, normal, textureu, texturev, pan, vertices) in polygons:
+				poly = ImportPolyT3d()
+				poly.keyvalues = poly_keyvalues
+				poly.origin = origin
+				poly.normal = normal
+				poly.textureu = textureu
+				poly.texturev = texturev
+				poly.pan = pan
+				poly.vertices = vertices
+				brush.polygons.append(poly)
+			actor.brushes.append(brush)
+		actors.append(actor)
+	return actors
 	
-	line_index = 1
-	while line_index < num_lines-1:
-		line = lines[line_index]
+#Returns the pmt_common_cache.ParseCache of parse_t3d(); e.g. get_parse_cache().warm("c:/prefabs", [".t3d"]) parses all prefabs in advance
+def get_parse_cache():
+	return pmt_common_cache.ParseCache(PARSE_CACHE_FORMAT, parse_t3d, actors_to_cache_data, actors_from_cache_data)
 
-		if line.startswith("begin actor"):
-			(actor, line_index) = parse_actor(lines, line_index, inquote_text_dict)
-			actors.append(actor)
-	
-		line_index += 1
-	
+#Reads the lines of the .t3d once, and tracks the block they are in with a T3D_STATE_*;
+#each actor, brush and polygon is complete at its 'end' line.
+#use_cache reads the actors from the parse cache if the .t3d did not change since it was cached (see get_parse_cache())
+@pmt_common.HOUPROFILE_EVENT_DECO
+def parse_t3d(t3d_path, use_cache = False):
+	if use_cache:
+		return get_parse_cache().get(t3d_path)
+		
+	actors = list()
+	actor = None
+	brush = None
+	poly = None
+
+	#one line per line of text with tokens, with spaces compacted and string literals replaced by INQUOTE_TOKEN placeholders
+	inquote_text_dict = dict()
+	state = None
+	line = None
+	with open(t3d_path, 'rt', encoding=TEXT_CODEC) as t3d_file:
+		for line in iter_t3d_lines(t3d_file, inquote_text_dict, t3d_path):
+			line = line.lower()
+
+			if state == T3D_STATE_POLYGON:
+				if line.startswith("end polygon"):
+					brush.polygons.append(poly)
+					state = T3D_STATE_POLYLIST
+				else:
+					parse_polygon_line(line, poly)
+			elif state == T3D_STATE_POLYLIST:
+				if line.startswith("begin polygon"):
+					poly = ImportPolyT3d()
+					poly.keyvalues = get_begin_statement_keyvalues(line)
+					state = T3D_STATE_POLYGON
+				elif line.startswith("end polylist"):
+					state = T3D_STATE_BRUSH
+			elif state == T3D_STATE_BRUSH:
+				if line.startswith("begin polylist"):
+					state = T3D_STATE_POLYLIST
+				elif line.startswith("end brush"):
+					actor.brushes.append(brush)
+					state = T3D_STATE_ACTOR
+			elif state == T3D_STATE_ACTOR:
+				if line.startswith("begin brush"):
+					brush = ImportBrushT3d()
+					brush.keyvalues = get_begin_statement_keyvalues(line)
+					state = T3D_STATE_BRUSH
+				elif line.startswith("end actor"):
+					actors.append(actor)
+					state = T3D_STATE_MAP
+				elif "=" in line:
+					parse_actor_keyvalue(line, actor.keyvalues, inquote_text_dict)
+			elif state == T3D_STATE_MAP:
+				if line.startswith("begin actor"):
+					actor = ImportActorT3d()
+					actor.keyvalues = get_begin_statement_keyvalues(line)
+					state = T3D_STATE_ACTOR
+				elif line.startswith("end map"):
+					state = T3D_STATE_END
+			elif state == None:
+				assert line.startswith("begin map"), "t3d does not start with 'begin map': {}".format(line)
+				state = T3D_STATE_MAP
+			else:
+				assert False, "t3d does not end with 'end map': {}".format(line)
+
+	assert state == T3D_STATE_END, "t3d does not end with 'end map': {}".format(line)
 	return actors
 
 
@@ -283,7 +290,9 @@ def find_or_create_pointgroup(hou_geometry, point_group_name):
 	
 	return point_group
 	
-def add_imported_actor(hou_geometry, actor, brush_index):
+#The points and polygons of actor are added to builder (see pmt_common_build.GeometryBuilder); the attribs and groups are created in hou_geometry
+@pmt_common.HOUPROFILE_COUNT_DECO
+def add_imported_actor(hou_geometry, builder, actor, brush_index):
 	if not IN_HOUDINI:
 		return
 		
@@ -339,10 +348,7 @@ def add_imported_actor(hou_geometry, actor, brush_index):
 					val = coord[len(R):]
 					rotation[0] = float(val) * U1_TO_DEGREES	#roll x-axis
 					
-		new_point = hou_geometry.createPoint()
-		new_point.setPosition(position)
-		new_point.setAttribValue(rotation_attrib, rotation)
-		new_point.setAttribValue(has_rotation_attrib, 1)
+		point_attribs = { rotation_attrib.name() : rotation, has_rotation_attrib.name() : 1 }
 		#newpt_kv = dictAttribValue(point_kv_attrib)
 		#for key in actor.keyvalues:
 		#	if key in PMT_T3D_ENTITY_RESTRICTED_KEYVALUES:
@@ -352,15 +358,15 @@ def add_imported_actor(hou_geometry, actor, brush_index):
 		#new_point.setAttribValue(point_kv_attrib, newpt_kv)
 		
 		if "class" in actor.keyvalues:
-			new_point.setAttribValue(point_class_attrib, actor.keyvalues["class"])
+			point_attribs[point_class_attrib.name()] = actor.keyvalues["class"]
 			del actor.keyvalues["class"]
 			
 		for remove_key in PMT_T3D_ENTITY_RESTRICTED_KEYVALUES:
 			if remove_key in actor.keyvalues:
 				del actor.keyvalues[remove_key]
-		new_point.setAttribValue(point_kv_attrib, actor.keyvalues)
+		point_attribs[point_kv_attrib.name()] = actor.keyvalues
 		
-		pointentity_group.add(new_point)
+		builder.add_point(position, point_attribs, pointentity_group.name())
 		
 	else:
 		#pmt_t3d_texture_size
@@ -387,6 +393,11 @@ def add_imported_actor(hou_geometry, actor, brush_index):
 		#for merging vertices shared between prims
 		brush_index_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Prim, "t3d_import_brush_index", -1)
 		
+		brush_group_name = brush_group.name()
+		poly_attrib_names = [attrib.name() for attrib in [brush_index_attrib, prim_material_attrib, prim_uv_u_attrib, prim_uv_v_attrib, prim_uv_scale_attrib, prim_uv_offset_attrib]]
+		if uclassname != None:
+			poly_attrib_names += [prim_class_attrib.name(), prim_kv_attrib.name()]
+			
 		for brush in actor.brushes:
 			#for key in brush.keyvalues:
 			
@@ -399,68 +410,59 @@ def add_imported_actor(hou_geometry, actor, brush_index):
 					
 				#origin = hou.Vector3((float(poly.origin[0]), float(poly.origin[1]), float(poly.origin[2])))
 				#normal = hou.Vector3((float(poly.normal[0]), float(poly.normal[1]), float(poly.normal[2])))
-				textureu = hou.Vector3((float(poly.textureu[0]), float(poly.textureu[1]), float(poly.textureu[2])))
-				texturev = hou.Vector3((float(poly.texturev[0]), float(poly.texturev[1]), float(poly.texturev[2])))
+				textureu = hou.Vector3(poly.textureu)
+				texturev = hou.Vector3(poly.texturev)
 				scaleu = textureu.length()
 				scalev = texturev.length()
 				scale = hou.Vector2((scaleu, scalev))
 				textureu = textureu.normalized()
 				texturev = texturev.normalized()
-				pan = hou.Vector2(float(poly.pan[0]), float(poly.pan[1]))
+				pan = hou.Vector2(poly.pan)
 				
 				#pmt_* uv attribs use .vmf convention, so convert from .t3d to .vmf
 				if True:
 					scale[0] = 1.0 / scale[0]
 					scale[1] = 1.0 / scale[1]
 				
-				new_poly = hou_geometry.createPolygon()
-				new_poly.setAttribValue(brush_index_attrib, brush_index)
-				
-				new_poly.setAttribValue(prim_material_attrib, material)
-				new_poly.setAttribValue(prim_uv_u_attrib, textureu)
-				new_poly.setAttribValue(prim_uv_v_attrib, texturev)
-				new_poly.setAttribValue(prim_uv_scale_attrib, scale)
-				new_poly.setAttribValue(prim_uv_offset_attrib, pan)
-				
+				poly_attribs = [brush_index, material, textureu, texturev, scale, pan]
 				if uclassname != None:
-					new_poly.setAttribValue(prim_class_attrib, uclassname)
-					new_poly.setAttribValue(prim_kv_attrib, actor.keyvalues)
+					poly_attribs += [uclassname, actor.keyvalues]
 					
+				point_indices = list()
 				for vertex in reversed(poly.vertices):
-					x, y, z = float(vertex[0]), float(vertex[1]), float(vertex[2])
-					pos = hou.Vector3((x,y,z))
-					new_point = hou_geometry.createPoint()
-					new_point.setPosition(pos)
-					brush_group.add(new_point)
-		
-					new_poly.addVertex(new_point)
-					if "texture" in poly.keyvalues:
-						new_poly.setAttribValue(prim_material_attrib, poly.keyvalues["texture"])
+					point_indices.append( builder.add_point(vertex, group_name = brush_group_name) )
+				builder.add_polygon(point_indices, dict(zip(poly_attrib_names, poly_attribs)))
 	return brush_index
 	
 	
+@pmt_common.HOUPROFILE_EVENT_DECO
 def import_actors(hou_geometry, actors):
 	#skip the first brush, which is the 'active brush' that does not contribute to world geometry
 	is_first_brush = True
 		
 	#track a global brush index so that vertices shared by brushes can be merged
 	brush_index = 0
+	
+	#all points, polygons and attrib values are collected by the builder and created at the end
+	builder = pmt_common_build.GeometryBuilder()
 		
 	for a in actors:
 		if is_first_brush and "class" in a.keyvalues and a.keyvalues["class"] == "brush":
 			is_first_brush = False
 			continue
-		brush_index = add_imported_actor(hou_geometry, a, brush_index)
+		brush_index = add_imported_actor(hou_geometry, builder, a, brush_index)
+		
+	builder.build(hou_geometry)
 
 if __name__ == "__main__" and not IN_HOUDINI:
-	if len(sys.argv) != 2:
-		print("pmt_prefab_unreal1_t3d.py [path_to.t3d]")
+	if len(sys.argv) != 2 and len(sys.argv) != 3:
+		print("pmt_prefab_unreal1_t3d.py [path_to.t3d] [trace.json] -- trace.json is an optional profile trace, see pmt_common.HOUPROFILE")
 		exit()
 	
 	t3d_path = sys.argv[1]
-	
-	actors = parse_t3d(t3d_path)
-else:
+	with pmt_common.HOUPROFILE("pmt_t3d_import", trace_path = sys.argv[2] if len(sys.argv) == 3 else None):
+		actors = parse_t3d(t3d_path)
+elif IN_HOUDINI:
 	import hou
 	node = hou.pwd()
 	IS_PYTHON_NODE = node != None and "python" in node.type().nameWithCategory().lower() #'Sop/python' in Houdini 18.5
@@ -468,5 +470,5 @@ else:
 		t3d_path = "C:/pmt/exports/out.t3d"
 		
 		geo = node.geometry()
-		actors = parse_t3d(t3d_path)
+		actors = parse_t3d(t3d_path, use_cache = True)
 		import_actors(geo, actors)
\ No newline at end of file
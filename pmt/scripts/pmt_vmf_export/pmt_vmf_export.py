@@ -3,19 +3,34 @@
 #	script_section_name: 	pmt_vmf_export.py
 
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
-if True:
+import sys
+IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
 	import hou
 	main_module = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
 	pmt__global_config = main_module.pmt__global_config
 	pmt_common = main_module.pmt_common
+	pmt_common_format = main_module.pmt_common_format
+	pmt_common_extract = main_module.pmt_common_extract
+	pmt_common_cache = main_module.pmt_common_cache
+	pmt_common_dump = main_module.pmt_common_dump
 	pmt_material_select = main_module.pmt_material_select
 	pmt_parse_source1_fgd = main_module.pmt_parse_source1_fgd
+else:
+	#Standalone (e.g. export worker processes, pmt_export_cli): load the shared modules from \scripts\pmt__global_config
+	import os
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_format
+	import pmt_common_extract
+	import pmt_common_cache
+	import pmt_common_dump
 ###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 ###pmt exporters COMMON_SECTION
 if True:
-	LINS = pmt_common.LINS
-	LINE = pmt_common.LINE
+	LINS = pmt_common_format.LINS
+	LINE = pmt_common_format.LINE
 ###pmt exporters COMMON_SECTION
 
 import sys
@@ -23,6 +38,12 @@ import os
 import math
 import random
 import importlib
+import itertools
+import functools
+import collections
+import multiprocessing
+import concurrent.futures
+import numpy
 		
 import inspect
 CF = inspect.currentframe
@@ -31,6 +52,9 @@ def CURFUNC(inspect_currentframe): #return the name of the 'current function':
 def CCF(self, inspect_currentframe, sep = "::", suffix = "()"): #return the name the the 'current class function': CCF(self, CF())
 	return type(self).__qualname__ + sep + inspect_currentframe.f_code.co_name +  suffix
 
+def EXPORT_ERROR(message): #hou.NodeError in Houdini; ValueError in standalone mode (pmt_export_cli, worker processes), where hou is not imported
+	return hou.NodeError(message) if IN_HOUDINI else ValueError(message)
+
 
 
 class DispInfo:
@@ -45,14 +69,14 @@ class DispInfo:
 		self.triangle_tags_num_columns = 0
 		self.triangle_tags_num_rows = 0
 		
-		#Contains floats only, length depends on power
-		#Stored as rows, then columns(if power == 3, then distances[81], and distances[0:8] are the first row)
-		self.normals = list()				#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows
-		self.distances = list()				#2: 5 x 5 rows		3: 9 x 9 rows		4: 17 x 17 rows	
-		self.offsets = list()				#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows
-		self.offset_normals = list()		#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows	
-		self.alphas = list()				#2: 5 x 5 rows		3: 9 x 9 rows		4: 17 x 17 rows
-		self.triangle_tags = list()			#2: 8 x 4 rows		3: 16 x 8 rows		4: 32 x 16 rows
+		#NumPy arrays with shape (num_rows, num_columns), allocated by setup(); shape depends on power
+		#(if power == 3, then distances.shape == (9, 9), and distances[0] is the first row)
+		self.normals = None					#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows
+		self.distances = None				#2: 5 x 5 rows		3: 9 x 9 rows		4: 17 x 17 rows	
+		self.offsets = None					#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows
+		self.offset_normals = None			#2: 15 x 5 rows		3: 27 x 9 rows		4: 51 x 17 rows	
+		self.alphas = None					#2: 5 x 5 rows		3: 9 x 9 rows		4: 17 x 17 rows
+		self.triangle_tags = None			#2: 8 x 4 rows		3: 16 x 8 rows		4: 32 x 16 rows; int
 		#self.allowed_verts = list()		#10 entries, default -1
 
 	def setup(self, power):
@@ -85,25 +109,19 @@ class DispInfo:
 			self.triangle_tags_num_columns = 2 * (2 ** power)
 			self.triangle_tags_num_rows = power * power
 		
-		num_normals = self.get_num_normals()
-		num_distances = self.get_num_distances()
-		num_triangle_tags = self.get_num_triangle_tags()
+		normals_shape = (self.normals_num_rows, self.normals_num_columns)
+		distances_shape = (self.distances_num_rows, self.distances_num_columns)
+		triangle_tags_shape = (self.triangle_tags_num_rows, self.triangle_tags_num_columns)
 		
-		#
-		for i in range(num_normals):
-			self.normals += [0, 0, 0]
-		for i in range(num_normals):
-			self.offsets += [0, 0, 0]
-		for i in range(num_normals):
-			self.offset_normals += [0, 0, 1]
-			
-		for i in range(num_distances):
-			self.distances.append(0)
-		for i in range(num_distances):
-			self.alphas.append(0.0)
-			
-		for i in range(num_triangle_tags):
-			self.triangle_tags.append(9)	#9: No slope, walkable; 1: Slope, walkable, 0: Non-walkable
+		self.normals = numpy.zeros(normals_shape)
+		self.offsets = numpy.zeros(normals_shape)
+		self.offset_normals = numpy.zeros(normals_shape)
+		self.offset_normals[:, 2::3] = 1.0		#(0, 0, 1) per vertex
+		
+		self.distances = numpy.zeros(distances_shape)
+		self.alphas = numpy.zeros(distances_shape)
+		
+		self.triangle_tags = numpy.full(triangle_tags_shape, 9, dtype = numpy.int64)	#9: No slope, walkable; 1: Slope, walkable, 0: Non-walkable
 	
 	def get_num_normals(self):
 		return self.normals_num_rows * self.normals_num_columns
@@ -121,6 +139,9 @@ class Side:
 		self.b = (0.0, 0.0, 0.0)
 		self.c = (0.0, 0.0, 0.0)
 		self.uv_normal = (0.0, 0.0, 0.0)	#Not necessarily pointing in the same direction as the actual surface normal
+		self.uv_u_axis = None				#Basis of uv_normal from pmt_common.btPlaneSpace1_batch(); None if uv_data is used
+		self.uv_v_axis = None
+		self.side_id = None					#Set by VmfExport.assign_ids()
 		self.dispinfo = None
 		self.material_str = None
 		self.uv_data = None
@@ -133,6 +154,8 @@ class Solid:
 	def __init__(self):
 		self.sides = list()
 		self.source_prims = list()				#hou.Prim; original prims used to form each side
+		self.solid_id = None					#Set by VmfExport.assign_ids()
+		self.cache_key = None					#Set by perform_export() if the export cache is used
 		
 		self.entity_island = None
 		self.entity_class = None
@@ -144,6 +167,7 @@ class Solid:
 class BrushEntity:
 	def __init__(self):
 		self.solids = list()
+		self.entity_id = None					#Set by VmfExport.assign_ids()
 		
 		
 #converts float -> int -> string
@@ -156,16 +180,60 @@ def FloatUVStr(float_value):
 	#return str(float_value)
 	return '{0:0=.6f}'.format(float_value)
 	
-def DispInfoColumnStr(value_list, num_columns, row_index, float_str_convert = FloatUVStr):
-	column_str = ""
-	for column in range(num_columns):
-		list_index = row_index * num_columns + column
-		column_str += float_str_convert(value_list[list_index])
-		if column < num_columns - 1:
-			column_str += " " 
-	return column_str
+#Template for a block of dispinfo rows; formatted with a single str.format() call per block:
+#	[\t + ... + \t] + "row0" "value value ..." + \n + [\t + ... + \t] + "row1" ...
+DISPINFO_ROWS_TEMPLATES = dict()		#(num_tabs, num_rows, num_columns, value_format) -> str
+def get_dispinfo_rows_template(num_tabs, num_rows, num_columns, value_format):
+	key = (num_tabs, num_rows, num_columns, value_format)
+	template = DISPINFO_ROWS_TEMPLATES.get(key)
+	if template == None:
+		row_values = pmt_common_format.vector_format(value_format, num_columns)
+		template = "".join( [pmt_common_format.LINE_TEMPLATE(num_tabs, "row" + str(row_index), row_values) for row_index in range(num_rows)] )
+		DISPINFO_ROWS_TEMPLATES[key] = template
+	return template
+
+#Formats all rows of a DispInfo array (shape (num_rows, num_columns)) at once.
+#"{:.6f}" matches FloatUVStr(); use "{:d}" with int arrays to match FloatStr().
+def DispInfoRowsStr(array, num_tabs, value_format = "{:.6f}"):
+	num_rows, num_columns = array.shape
+	template = get_dispinfo_rows_template(num_tabs, num_rows, num_columns, value_format)
+	return template.format( *array.ravel().tolist() )
 	
+#Decimals of FloatUVStr(); floats are written with this precision in PRECISION_FIXED, see pmt_common_format.NumberFormat
+FLOAT_DECIMALS = 6
+
+#"(a0 a1 a2) (b0 b1 b2) (c0 c1 c2)"
+def get_plane_format(float_format):
+	return " ".join( ["(" + pmt_common_format.vector_format(float_format, 3) + ")"] * 3 )
+#"[u0 u1 u2 offset] scale"
+def get_uv_axis_format(float_format):
+	return "[" + pmt_common_format.vector_format(float_format, 4) + "] " + float_format
+PLANE_FORMAT = get_plane_format(pmt_common_format.FLOAT_6)
+UV_AXIS_FORMAT = get_uv_axis_format(pmt_common_format.FLOAT_6)
+
+LIGHT_MAP_SCALE = 64	#Default 16; world units/luxel; value too low will cause vrad.exe to crash for large maps
+
+#Lines of a side before its dispinfo; formatted with a single str.format() call per side, see VmfExport.export_side()
+@functools.lru_cache(maxsize = None)
+def get_side_template(float_format):
+	return "".join([
+		pmt_common_format.LINS_TEMPLATE(2, "side"),
+		pmt_common_format.LINS_TEMPLATE(2, "{{"),
+		pmt_common_format.LINE_TEMPLATE(3, "id", "{}"),
+		pmt_common_format.LINE_TEMPLATE(3, "plane", get_plane_format(float_format)),
+		pmt_common_format.LINE_TEMPLATE(3, "material", "{}"),
+		pmt_common_format.LINE_TEMPLATE(3, "uaxis", get_uv_axis_format(float_format)),
+		pmt_common_format.LINE_TEMPLATE(3, "vaxis", get_uv_axis_format(float_format)),
+		pmt_common_format.LINE_TEMPLATE(3, "rotation", "0"),
+		pmt_common_format.LINE_TEMPLATE(3, "lightmapscale", FloatStr(LIGHT_MAP_SCALE)),
+		pmt_common_format.LINE_TEMPLATE(3, "smoothing_groups", "0"),
+	])
+SIDE_TEMPLATE = get_side_template(pmt_common_format.FLOAT_6)
+SOLID_START_TEMPLATE = pmt_common_format.LINS_TEMPLATE(1, "solid") + pmt_common_format.LINS_TEMPLATE(1, "{{") + pmt_common_format.LINE_TEMPLATE(2, "id", "{}")
+
 def PlaneStr(a, b, c, float_to_str = FloatUVStr):
+	if float_to_str == FloatUVStr:
+		return PLANE_FORMAT.format(a[0], a[1], a[2], b[0], b[1], b[2], c[0], c[1], c[2])
 	plane_str = ""
 	plane_str += "(" + float_to_str(a[0]) + " " + float_to_str(a[1]) + " " + float_to_str(a[2]) + ")"
 	plane_str += " "
@@ -174,10 +242,18 @@ def PlaneStr(a, b, c, float_to_str = FloatUVStr):
 	plane_str += "(" + float_to_str(c[0]) + " " + float_to_str(c[1]) + " " + float_to_str(c[2]) + ")"
 	return plane_str
 		
+BRUSHES_PER_PRINT = 250
+WRITE_BUFFER_SIZE = 1024 * 1024		#bytes buffered by the output file before each write to disk
+
+#export_solid(), export_side(), export_dispinfo() and export_*entity() are generators
+#that yield one line at a time; pass them to file.writelines() to stream the output.
+#numbers (pmt_common_format.NumberFormat) sets the precision of the floats; FloatUVStr() if None
 class VmfExport:
-	def __init__(self):
+	def __init__(self, numbers = None):
 		self.solid_id = 2		#World is id == 1, so start at 2 (also used for entities)
 		self.side_id = 1
+		self.numbers = numbers if numbers != None else pmt_common_format.NumberFormat(FLOAT_DECIMALS)
+		self.side_template = get_side_template(self.numbers.float_format)
 	
 	def get_solid_id(self):
 		id_out = self.solid_id
@@ -187,6 +263,34 @@ class VmfExport:
 		id_out = self.side_id
 		self.side_id += 1
 		return str(id_out)
+		
+	#Assigns the ids of all solids, sides and brush entities in the order they are written,
+	#so the solids can be serialized in any order (or in parallel) with the same output.
+	#Side ids are a prefix sum over the number of sides of each solid.
+	#Returns all solids in the order they are written.
+	def assign_ids(self, brushes, brushentities):
+		solids = list()
+		for brush in brushes:
+			brush.solid_id = self.solid_id
+			self.solid_id += 1
+			solids.append(brush)
+		for brushentity in brushentities:
+			if len(brushentity.solids) <= 0:
+				continue
+			brushentity.entity_id = self.solid_id
+			self.solid_id += 1
+			for brush in brushentity.solids:
+				brush.solid_id = self.solid_id
+				self.solid_id += 1
+				solids.append(brush)
+		
+		side_counts = numpy.array([len(solid.sides) for solid in solids], dtype = numpy.int64)
+		first_side_ids = self.side_id + numpy.cumsum(side_counts) - side_counts
+		for solid, first_side_id in zip(solids, first_side_ids.tolist()):
+			for side_index in range(len(solid.sides)):
+				solid.sides[side_index].side_id = first_side_id + side_index
+		self.side_id += int(side_counts.sum())
+		return solids
 
 	#Call before any other functions
 	def export_vmf_start(self):
@@ -251,36 +355,32 @@ class VmfExport:
 		return LINS(0, "}")
 	
 	def export_solid(self, solid):
-		out = ""
-		out += LINS(1, "solid")
-		out += LINS(1, "{")
-		out += LINE(2, "id", self.get_solid_id())
+		yield SOLID_START_TEMPLATE.format(solid.solid_id if solid.solid_id != None else self.get_solid_id())
 		for side in solid.sides:
-			out += self.export_side(side)
-		#out += LINS(2, "editor")
-		#out += LINS(2, "{")
-		#out += LINE(3, "color", "0 130 167")
-		#out += LINE(3, "visgroupshown", "1")
-		#out += LINE(3, "visgroupautoshown", "1")
-		#out += LINS(2, "}")
-		out += LINS(1, "}")
-		
-		return out
+			yield from self.export_side(side)
+		#yield LINS(2, "editor")
+		#yield LINS(2, "{")
+		#yield LINE(3, "color", "0 130 167")
+		#yield LINE(3, "visgroupshown", "1")
+		#yield LINE(3, "visgroupautoshown", "1")
+		#yield LINS(2, "}")
+		yield LINS(1, "}")
 		
 	def export_side(self, side):
 		n = side.uv_normal
-		uv = pmt_common.btPlaneSpace1( (n[0], n[1], n[2]) )
-		if uv == None:
-			raise hou.NodeError(CCF(self, CF()) + " error: side has zero length normal. (prim_index={}, bsp_island={})".format(side.prim_index, side.bsp_island))
-		u, v = uv
+		u = side.uv_u_axis
+		v = side.uv_v_axis
+		if side.uv_data == None and (u == None or v == None):
+			uv = pmt_common.btPlaneSpace1( (n[0], n[1], n[2]) )
+			if uv == None:
+				raise EXPORT_ERROR(CCF(self, CF()) + " error: side has zero length normal. (prim_index={}, bsp_island={})".format(side.prim_index, side.bsp_island))
+			u, v = uv
 		texture_size = side.texture_size
 		
 		final_material = "DEV/DEV_MEASUREICE01"
 		if side.material_str != None:
 			final_material = side.material_str
 		
-		LIGHT_MAP_SCALE = 64	#Default 16; world units/luxel; value too low will cause vrad.exe to crash for large maps
-			
 		#offset: 
 		#	offset in pixels (depends on image size -- 50% offset is 128 for 256^2 texture; 512 for 1024^1024 texture)
 		#	not affected by size of brush/prim
@@ -299,89 +399,89 @@ class VmfExport:
 			scale = side.uv_data.vmf_uv_scale
 			offset = side.uv_data.vmf_uv_offset
 				
-		out = ""
-		out += LINS(2, "side")
-		out += LINS(2, "{")
-		out += LINE(3, "id", self.get_side_id())
-		out += LINE(3, "plane", PlaneStr(side.a, side.b, side.c))
-		out += LINE(3, "material", final_material)
-		out += LINE(3, "uaxis", "[" + FloatUVStr(u[0]) + " " + FloatUVStr(u[1]) + " " + FloatUVStr(u[2]) + " " + FloatUVStr(offset[0]) + "] " + FloatUVStr(scale[0]))
-		out += LINE(3, "vaxis", "[" + FloatUVStr(v[0]) + " " + FloatUVStr(v[1]) + " " + FloatUVStr(v[2]) + " " + FloatUVStr(offset[1]) + "] " + FloatUVStr(scale[1]))
-		out += LINE(3, "rotation", "0")
-		out += LINE(3, "lightmapscale", FloatStr(LIGHT_MAP_SCALE))
-		out += LINE(3, "smoothing_groups", "0")
+		a = side.a
+		b = side.b
+		c = side.c
+		values = self.numbers.values([
+			a[0], a[1], a[2], b[0], b[1], b[2], c[0], c[1], c[2],
+			u[0], u[1], u[2], offset[0], scale[0],
+			v[0], v[1], v[2], offset[1], scale[1]])
+		yield self.side_template.format(
+			side.side_id if side.side_id != None else self.get_side_id(),
+			*values[0:9],
+			final_material,
+			*values[9:19])
 		if side.dispinfo != None:
-			out += self.export_dispinfo(side.dispinfo)
-		out += LINS(2, "}")
-		return out
+			yield from self.export_dispinfo(side.dispinfo)
+		yield LINS(2, "}")
 	
 	def export_dispinfo(self, dispinfo):
 		DI = dispinfo
 	
 		origin = DI.start_position
 		#origin = (0,0,0)
-		out = ""
-		out += LINS(3, "dispinfo")
-		out += LINS(3, "{")
-		out += LINE(4, "power", str(DI.power))
-		out += LINE(4, "startposition", "[" + FloatStr(origin[0]) + " " + FloatStr(origin[1]) + " " + FloatStr(origin[2]) + "]")
-		out += LINE(4, "flags", "0")
-		out += LINE(4, "elevation", "0")
-		out += LINE(4, "subdiv", "0")
-		out += LINS(4, "normals")
-		out += LINS(4, "{")
-		for row_index in range(DI.normals_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.normals, DI.normals_num_columns, row_index))
-		out += LINS(4, "}")
-		out += LINS(4, "distances")
-		out += LINS(4, "{")
-		for row_index in range(DI.distances_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.distances, DI.distances_num_columns, row_index))
-		out += LINS(4, "}")
-		out += LINS(4, "offsets")
-		out += LINS(4, "{")
-		for row_index in range(DI.normals_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.offsets, DI.normals_num_columns, row_index))
-		out += LINS(4, "}")
-		out += LINS(4, "offset_normals")
-		out += LINS(4, "{")
-		for row_index in range(DI.normals_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.offset_normals, DI.normals_num_columns, row_index))
-		out += LINS(4, "}")
-		out += LINS(4, "alphas")
-		out += LINS(4, "{")
-		for row_index in range(DI.distances_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.alphas, DI.distances_num_columns, row_index))
-		out += LINS(4, "}")
-		out += LINS(4, "triangle_tags")
-		out += LINS(4, "{")
-		for row_index in range(DI.triangle_tags_num_rows):
-			out += LINE(5, "row" + str(row_index), DispInfoColumnStr(DI.triangle_tags, DI.triangle_tags_num_columns, row_index, FloatStr))
-		out += LINS(4, "}")
-		out += LINS(4, "allowed_verts")
-		out += LINS(4, "{")
-		out += LINE(5, "10", "-1 -1 -1 -1 -1 -1 -1 -1 -1 -1")
-		out += LINS(4, "}")
-		out += LINS(3, "}")
-		return out
+		yield LINS(3, "dispinfo")
+		yield LINS(3, "{")
+		yield LINE(4, "power", str(DI.power))
+		yield LINE(4, "startposition", "[" + FloatStr(origin[0]) + " " + FloatStr(origin[1]) + " " + FloatStr(origin[2]) + "]")
+		yield LINE(4, "flags", "0")
+		yield LINE(4, "elevation", "0")
+		yield LINE(4, "subdiv", "0")
+		yield LINS(4, "normals")
+		yield LINS(4, "{")
+		yield self.dispinfo_rows_str(DI.normals, 5)
+		yield LINS(4, "}")
+		yield LINS(4, "distances")
+		yield LINS(4, "{")
+		yield self.dispinfo_rows_str(DI.distances, 5)
+		yield LINS(4, "}")
+		yield LINS(4, "offsets")
+		yield LINS(4, "{")
+		yield self.dispinfo_rows_str(DI.offsets, 5)
+		yield LINS(4, "}")
+		yield LINS(4, "offset_normals")
+		yield LINS(4, "{")
+		yield self.dispinfo_rows_str(DI.offset_normals, 5)
+		yield LINS(4, "}")
+		yield LINS(4, "alphas")
+		yield LINS(4, "{")
+		yield self.dispinfo_rows_str(DI.alphas, 5)
+		yield LINS(4, "}")
+		yield LINS(4, "triangle_tags")
+		yield LINS(4, "{")
+		yield DispInfoRowsStr(DI.triangle_tags, 5, "{:d}")
+		yield LINS(4, "}")
+		yield LINS(4, "allowed_verts")
+		yield LINS(4, "{")
+		yield LINE(5, "10", "-1 -1 -1 -1 -1 -1 -1 -1 -1 -1")
+		yield LINS(4, "}")
+		yield LINS(3, "}")
+	
+	#DispInfoRowsStr() with the precision of self.numbers
+	def dispinfo_rows_str(self, array, num_tabs):
+		if not self.numbers.is_compact:
+			return DispInfoRowsStr(array, num_tabs, self.numbers.float_format)
+		num_rows, num_columns = array.shape
+		template = get_dispinfo_rows_template(num_tabs, num_rows, num_columns, self.numbers.float_format)
+		return template.format( *self.numbers.values(array.ravel().tolist()) )
 		
 	#Entities follow brushes (call export_entity_* after export_solid)
-	def export_entity(self, keyvalue_dict = None, connections = None, solids = None):
-		out = ""
-		out += LINS(0, "entity")
-		out += LINS(0, "{")
-		out += LINE(1, "id", self.get_solid_id())
+	#serialized_solids: optional iterable of str from export_solid(); written instead of solids
+	def export_entity(self, keyvalue_dict = None, connections = None, solids = None, entity_id = None, serialized_solids = None):
+		yield LINS(0, "entity")
+		yield LINS(0, "{")
+		yield LINE(1, "id", str(entity_id) if entity_id != None else self.get_solid_id())
 		
 		if keyvalue_dict != None:
 			for key in keyvalue_dict:
 				assert type(keyvalue_dict[key]) == type(""), CCF(self, CF()) + ": key '{}' value '{}' is not str".format(key, keyvalue_dict[key])
-				out += LINE(1, key, keyvalue_dict[key])
+				yield LINE(1, key, keyvalue_dict[key])
 		
 		#connections is a list of strings, each set of 6 strings is one connection
 		if connections != None:
 			num_connections = len(connections) // 6
-			out += LINS(1, "connections")
-			out += LINS(1, "{")
+			yield LINS(1, "connections")
+			yield LINS(1, "{")
 			for i in range(num_connections):
 				output = connections[i*6]
 				targetname = connections[i*6+1]
@@ -389,15 +489,16 @@ class VmfExport:
 				input_parm = connections[i*6+3]
 				delay_seconds = connections[i*6+4]
 				fire_once = connections[i*6+5]
-				out += LINE(2, output, "{},{},{},{},{}".format(targetname, input_name, input_parm, delay_seconds, fire_once))
-			out += LINS(1, "}")
+				yield LINE(2, output, "{},{},{},{},{}".format(targetname, input_name, input_parm, delay_seconds, fire_once))
+			yield LINS(1, "}")
 		
-		if solids != None:
+		if serialized_solids != None:
+			yield from serialized_solids
+		elif solids != None:
 			for solid in solids:
-				out += self.export_solid(solid)
+				yield from self.export_solid(solid)
 		
-		out += LINS(0, "}")
-		return out
+		yield LINS(0, "}")
 		
 	def export_point_entity(self, classname = "", kv_attrib_dict = None, location = None, rotation_xyz = None):
 		key_value_dict = dict()
@@ -422,17 +523,17 @@ class VmfExport:
 			pitch = rotation_xyz[1]
 			yaw  = rotation_xyz[2]
 			roll = rotation_xyz[0]
-			key_value_dict["angles"] = "{0} {1} {2}".format(FloatUVStr(pitch), FloatUVStr(yaw), FloatUVStr(roll))		#Pitch Yaw Roll (Y Z X)
+			key_value_dict["angles"] = "{0} {1} {2}".format(self.numbers.str(pitch), self.numbers.str(yaw), self.numbers.str(roll))		#Pitch Yaw Roll (Y Z X)
 			
 			#special case for light_spot entity, where angles[0] is ignored
 			if classname.lower() == "light_spot" or classname.lower() == "light_dynamic":
-				key_value_dict["pitch"] = FloatUVStr(pitch)
+				key_value_dict["pitch"] = self.numbers.str(pitch)
 			
-		return self.export_entity(key_value_dict, connections)
+		yield from self.export_entity(key_value_dict, connections)
 		
-	def export_brush_entity(self, brushentity):
+	def export_brush_entity(self, brushentity, serialized_solids = None):
 		if len(brushentity.solids) <= 0:
-			return ""
+			return
 	
 		#Assume all entity_keyvalues_dict in brushentity.solids are the same for this brush entity
 		solid0 = brushentity.solids[0]
@@ -452,111 +553,339 @@ class VmfExport:
 				assert key.lower() not in pmt_common.PMT_VMF_ENTITY_RESTRICTED_KEYVALUES,CCF(self, CF()) + " error: restricted key of keyvalue: {}(={}) (pmt_entity_island={})".format(key, value, solid0.entity_island)
 				key_value_dict[key] = value
 				
-		return self.export_entity(key_value_dict, connections, brushentity.solids)
+		yield from self.export_entity(key_value_dict, connections, brushentity.solids, brushentity.entity_id, serialized_solids)
+
+### Parallel and incremental serialization
+#Solids are serialized as templates, with placeholders in place of their solid and side ids (see pmt_common_cache.split_template()).
+#Templates do not depend on the order of the solids, so they can be serialized in worker processes
+#and reused by later exports from the cache; the ids are filled in when the solids are written.
+#
+#Solids are sent to worker processes as plain data (dict, list, tuple), since the
+#classes of this module can not be pickled by reference when it is loaded from the .hda.
+#When running in Houdini, worker processes import the copy of this module in \scripts\pmt_vmf_export\ next to the library of the HDA
+#(see pmt_common.get_hda_scripts_path()).
+SOLIDS_PER_CHUNK = 500
+SOLID_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_0
+SIDE_ID_PLACEHOLDER = pmt_common_cache.ID_PLACEHOLDER_1
+EXPORT_CACHE_FORMAT = "vmf 1"		#change when the output of export_solid() changes
+
+#Writes placeholders instead of ids
+class VmfTemplateExport(VmfExport):
+	def get_solid_id(self):
+		return SOLID_ID_PLACEHOLDER
+	def get_side_id(self):
+		return SIDE_ID_PLACEHOLDER
+
+#Ids are left out, so the solid is serialized with placeholders
+def solid_to_data(solid):
+	sides_data = list()
+	for side in solid.sides:
+		side_data = dict(side.__dict__)
+		del side_data["vertices"]
+		del side_data["side_id"]
+		if side.uv_data != None:
+			side_data["uv_data"] = dict(side.uv_data.__dict__)
+		if side.dispinfo != None:
+			side_data["dispinfo"] = dict(side.dispinfo.__dict__)
+		sides_data.append(side_data)
+	return sides_data
+	
+def solid_from_data(sides_data):
+	solid = Solid()
+	for side_data in sides_data:
+		side = Side()
+		side.__dict__.update(side_data)
+		if side.uv_data != None:
+			side.uv_data = pmt_common.UvData()
+			side.uv_data.__dict__.update(side_data["uv_data"])
+		if side.dispinfo != None:
+			side.dispinfo = DispInfo()
+			side.dispinfo.__dict__.update(side_data["dispinfo"])
+		solid.sides.append(side)
+	return solid
+	
+#Worker process entry point; returns the template of each solid of solids_data,
+#and the counts of the pmt_common_format.NumberFormat of precision and snap_epsilon (see NumberFormat.get_counts())
+def serialize_solids_chunk(solids_data, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	exporter = VmfTemplateExport( pmt_common_format.NumberFormat(FLOAT_DECIMALS, precision, snap_epsilon) )
+	templates = list()
+	for solid_data in solids_data:
+		templates.append( pmt_common_cache.split_template("".join(exporter.export_solid(solid_from_data(solid_data)))) )
+	return templates, exporter.numbers.get_counts()
+	
+#Returns the text of solid; the ids must be assigned with VmfExport.assign_ids()
+def fill_solid_template(template, solid):
+	ids = dict()
+	ids[SOLID_ID_PLACEHOLDER] = iter([str(solid.solid_id)])
+	ids[SIDE_ID_PLACEHOLDER] = iter([str(side.side_id) for side in solid.sides])
+	return pmt_common_cache.fill_template(template, ids)
+	
+#Inside Houdini sys.executable is the Houdini application; the worker processes use the interpreter that ships with Houdini
+def get_python_executable():
+	if not IN_HOUDINI:
+		return sys.executable
+	version = "{}.{}".format(sys.version_info[0], sys.version_info[1])
+	for name in ["python.exe", "python{}.exe".format(version), os.path.join("bin", "python" + version), os.path.join("bin", "python3")]:
+		path = os.path.join(sys.exec_prefix, name)
+		if os.path.isfile(path):
+			return path
+	return None
+	
+def get_worker_module():
+	if not IN_HOUDINI:
+		return sys.modules[__name__]
+	scripts_path = pmt_common.get_hda_scripts_path("pmt::pmt_vmf_export", "pmt_vmf_export")
+	if scripts_path not in sys.path:
+		sys.path.append(scripts_path)
+	return importlib.import_module("pmt_vmf_export")
+	
+#Yields the serialized text of each solid, in the same order as solids.
+#The ids of all solids must be assigned with VmfExport.assign_ids() first, 
+#so the output is the same for any num_processes.
+#If cache (pmt_common_cache.ExportCache) is given, keys is the cache key of each solid,
+#and only the solids that are not in the cache are serialized.
+def serialize_solids(exporter, solids, num_processes = 1, cache = None, keys = None):
+	templates = [cache.get(key) for key in keys] if cache != None else [None] * len(solids)
+	missing = [solid_index for solid_index in range(len(solids)) if templates[solid_index] == None]
+	
+	python_executable = get_python_executable() if num_processes > 1 else None
+	if num_processes > 1 and python_executable == None:
+		print("vmf export: python interpreter not found in {}; serializing solids in a single process".format(sys.exec_prefix))
+	use_processes = python_executable != None and len(missing) > SOLIDS_PER_CHUNK
+	
+	#Yields (solid indices, (templates, number counts)) for each chunk of missing, in order
+	numbers = exporter.numbers
+	def serialize_missing_chunks(executor):
+		chunks = [missing[chunk_start:chunk_start + SOLIDS_PER_CHUNK] for chunk_start in range(0, len(missing), SOLIDS_PER_CHUNK)]
+		if executor == None:
+			for chunk in chunks:
+				yield chunk, serialize_solids_chunk([solid_to_data(solids[solid_index]) for solid_index in chunk], numbers.precision, numbers.snap_epsilon)
+			return
+		
+		#Limit the number of chunks in flight so memory use does not grow with the size of the map
+		worker_module = get_worker_module()
+		pending = collections.deque()
+		for chunk in chunks:
+			chunk_data = [solid_to_data(solids[solid_index]) for solid_index in chunk]
+			pending.append( (chunk, executor.submit(worker_module.serialize_solids_chunk, chunk_data, numbers.precision, numbers.snap_epsilon)) )
+			if len(pending) >= num_processes * 2:
+				chunk, future = pending.popleft()
+				yield chunk, future.result()
+		while len(pending) > 0:
+			chunk, future = pending.popleft()
+			yield chunk, future.result()
+	
+	def serialize_in_order(executor):
+		missing_chunks = serialize_missing_chunks(executor)
+		for solid_index in range(len(solids)):
+			if templates[solid_index] == None:
+				chunk, (chunk_templates, chunk_counts) = next(missing_chunks)
+				numbers.add_counts(chunk_counts)
+				for chunk_solid_index, template in zip(chunk, chunk_templates):
+					templates[chunk_solid_index] = template
+					if cache != None:
+						cache.put(keys[chunk_solid_index], template)
+			yield fill_solid_template(templates[solid_index], solids[solid_index])
+	
+	if not use_processes:
+		yield from serialize_in_order(None)
+		return
+	
+	context = multiprocessing.get_context("spawn")
+	context.set_executable(python_executable)
+	with concurrent.futures.ProcessPoolExecutor(max_workers = num_processes, mp_context = context) as executor:
+		yield from serialize_in_order(executor)
+
+### Export data
+#Brushes and entities collected from the geometry by extract_export_data() and written by write_export();
+#can be saved as an export dump and written again without Houdini (see pmt_common_dump)
+class PointEntity:
+	def __init__(self):
+		self.classname = None
+		self.keyvalues_dict = None
+		self.location = None
+		self.rotation_euler = None				#None if the point has no euler rotation
+
+class VmfExportData:
+	def __init__(self):
+		self.levelprops_class = None
+		self.levelprops_kv = None
+		self.brushes = list()					#Solid; world brushes
+		self.detail_brushentities = list()		#BrushEntity
+		self.entity_brushentities = list()		#BrushEntity
+		self.point_entities = list()			#PointEntity
+
+EXPORT_DUMP_FORMAT = "vmf"
+DISPINFO_ARRAYS = ["normals", "distances", "offsets", "offset_normals", "alphas", "triangle_tags"]
+SIDE_FIELDS = [
+	("prim_index", pmt_common_dump.FIELD_VALUE), ("bsp_island", pmt_common_dump.FIELD_VALUE),
+	("a", pmt_common_dump.FIELD_VECTOR), ("b", pmt_common_dump.FIELD_VECTOR), ("c", pmt_common_dump.FIELD_VECTOR),
+	("uv_normal", pmt_common_dump.FIELD_VECTOR), ("uv_u_axis", pmt_common_dump.FIELD_VECTOR), ("uv_v_axis", pmt_common_dump.FIELD_VECTOR),
+	("material_str", pmt_common_dump.FIELD_STR), ("uv_data", pmt_common_dump.FIELD_UV_DATA), ("texture_size", pmt_common_dump.FIELD_VECTOR),
+]
+DISPINFO_FIELDS = [("power", pmt_common_dump.FIELD_VALUE), ("start_position", pmt_common_dump.FIELD_VECTOR)] + [(name, pmt_common_dump.FIELD_ARRAY) for name in DISPINFO_ARRAYS]
+SOLID_FIELDS = [
+	("entity_island", pmt_common_dump.FIELD_VALUE), ("entity_class", pmt_common_dump.FIELD_STR), ("entity_keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("cache_key", pmt_common_dump.FIELD_KEY),
+]
+POINT_ENTITY_FIELDS = [
+	("classname", pmt_common_dump.FIELD_STR), ("keyvalues_dict", pmt_common_dump.FIELD_JSON),
+	("location", pmt_common_dump.FIELD_VECTOR), ("rotation_euler", pmt_common_dump.FIELD_VECTOR),
+]
 
+def export_data_to_dump(export_data):
+	dump = pmt_common_dump.ExportDump(EXPORT_DUMP_FORMAT)
+	dump.put_value("levelprops_class", export_data.levelprops_class)
+	dump.put_value("levelprops_kv", export_data.levelprops_kv)
+	
+	brushentities = export_data.detail_brushentities + export_data.entity_brushentities
+	solids = export_data.brushes + [solid for brushentity in brushentities for solid in brushentity.solids]
+	sides = [side for solid in solids for side in solid.sides]
+	dump.put_value("num_brushes", len(export_data.brushes))
+	dump.put_value("num_detail_brushentities", len(export_data.detail_brushentities))
+	dump.put_counts("brushentity_solids", [brushentity.solids for brushentity in brushentities])
+	dump.put_counts("solid_sides", [solid.sides for solid in solids])
+	dump.put_records("solids", solids, SOLID_FIELDS)
+	dump.put_records("sides", sides, SIDE_FIELDS)
+	
+	dump.put_value("dispinfo_sides", [side_index for side_index in range(len(sides)) if sides[side_index].dispinfo != None])
+	dump.put_records("dispinfos", [side.dispinfo for side in sides if side.dispinfo != None], DISPINFO_FIELDS)
+	dump.put_records("point_entities", export_data.point_entities, POINT_ENTITY_FIELDS)
+	return dump
+
+def export_data_from_dump(dump):
+	export_data = VmfExportData()
+	export_data.levelprops_class = dump.get_value("levelprops_class")
+	export_data.levelprops_kv = dump.get_value("levelprops_kv")
+	
+	solids = dump.get_records("solids", Solid, SOLID_FIELDS)
+	sides = dump.get_records("sides", Side, SIDE_FIELDS)
+	for solid, solid_sides in zip(solids, dump.split("solid_sides", sides)):
+		solid.sides = solid_sides
+	
+	for side_index, dispinfo_data in zip(dump.get_value("dispinfo_sides"), dump.get_records("dispinfos", DispInfo, DISPINFO_FIELDS)):
+		dispinfo = DispInfo()
+		dispinfo.setup(dispinfo_data.power)
+		dispinfo.start_position = dispinfo_data.start_position
+		for name in DISPINFO_ARRAYS:
+			array = getattr(dispinfo, name)
+			array[:] = numpy.reshape(getattr(dispinfo_data, name), array.shape)
+		sides[side_index].dispinfo = dispinfo
+	
+	num_brushes = dump.get_value("num_brushes")
+	export_data.brushes = solids[:num_brushes]
+	brushentities = list()
+	for brushentity_solids in dump.split("brushentity_solids", solids[num_brushes:]):
+		brushentity = BrushEntity()
+		brushentity.solids = brushentity_solids
+		brushentities.append(brushentity)
+	num_detail_brushentities = dump.get_value("num_detail_brushentities")
+	export_data.detail_brushentities = brushentities[:num_detail_brushentities]
+	export_data.entity_brushentities = brushentities[num_detail_brushentities:]
+	
+	export_data.point_entities = dump.get_records("point_entities", PointEntity, POINT_ENTITY_FIELDS)
+	return export_data
+
+#Returns a VmfExportData with the brushes and entities of the node geometry.
+#with_cache_keys sets the cache_key of each solid (see pmt_common_cache)
+#geometry_cache (pmt_common_extract.GeometryCache of the node geometry) is shared when exporting to several formats, see pmt_multi_export
 @pmt_common.HOUPROFILE_EVENT_DECO
-def perform_export(node_pmt_vmf_export, vmf_export_path):
+def extract_export_data(node_pmt_vmf_export, with_cache_keys = False, geometry_cache = None):
 	
 	### Load brushes
 	node = node_pmt_vmf_export
 	geometry = node.geometry()
 	assert geometry != None, "vmf export: node at {} has no geometry".format(node.path())
 	
+	export_data = VmfExportData()
+	
 	levelprops_class_attrib = geometry.findGlobalAttrib(pmt_common.PMT_VMF_LEVELPROPS_CLASS)
 	levelprops_kv_attrib = geometry.findGlobalAttrib(pmt_common.PMT_VMF_LEVELPROPS_KEYVALUES)
 	
-	levelprops_class = None
-	levelprops_kv = None
 	if levelprops_class_attrib != None and levelprops_kv_attrib != None:
-		levelprops_class = geometry.attribValue(levelprops_class_attrib)
-		levelprops_kv = geometry.attribValue(levelprops_kv_attrib)
+		export_data.levelprops_class = geometry.attribValue(levelprops_class_attrib)
+		export_data.levelprops_kv = geometry.attribValue(levelprops_kv_attrib)
+		
+	if geometry_cache == None:
+		geometry_cache = pmt_common_extract.GeometryCache(geometry)
+	positions_array = geometry_cache.get_positions_array()
+	positions = geometry_cache.get_positions()
 		
 	@pmt_common.HOUPROFILE_EVENT_DECO
 	def convert_houdini_prims_to_brushes(geometry):
 	
-		@pmt_common.HOUPROFILE_EVENT_DECO		
-		def prim_to_halfspace(prim, prim_index, bsp_island, texture_attrib, texture_size_attrib, has_uv, is_dispmap):
-			n = prim.normal()
+		@pmt_common.HOUPROFILE_COUNT_DECO
+		def prim_to_halfspace(prim, prim_index, bsp_island, is_dispmap):
+			n = geometry_cache.get_prim_normal(prim, prim_index)
 			
-			@pmt_common.HOUPROFILE_EVENT_DECO
-			def get_prim_vertices(prim):
-				verts = list()
-				verts_indices = list()
-				for v in prim.vertices():
-					verts.append( v.point().position() )
-					verts_indices.append( v.number() )
-				return verts, verts_indices
-			verts, verts_indices = get_prim_vertices(prim)
+			point_indices = geometry_cache.get_prim_point_indices(prim, prim_index)
+			verts = [positions[point_index] for point_index in point_indices]
+			prim_point_indices[prim_index] = point_indices
 			
-			selected_verts = verts[0:3]
-			
-			v0 = selected_verts[0]
-			v1 = selected_verts[1]
-			v2 = selected_verts[2]
 			halfspace = Side()
 			halfspace.prim_index = prim_index
 			halfspace.bsp_island = bsp_island
-			halfspace.a = (v0.x(), v0.y(), v0.z())
-			halfspace.b = (v1.x(), v1.y(), v1.z())
-			halfspace.c = (v2.x(), v2.y(), v2.z())
+			halfspace.a = verts[0]
+			halfspace.b = verts[1]
+			halfspace.c = verts[2]
 			halfspace.uv_normal = (n.x(), n.y(), n.z())
+			halfspace.vertices = verts
 				
-			for v in prim.vertices():
-				halfspace.vertices.append( v.point().position() )
-				
-			if texture_attrib != None:
-				halfspace.material_str = prim.attribValue(texture_attrib)
-			if texture_size_attrib != None:
-				halfspace.texture_size = prim.attribValue(texture_size_attrib)
-			if has_uv:
-				halfspace.uv_data = pmt_common.extract_uv_data(prim)
+			if materials != None:
+				halfspace.material_str = materials[prim_index]
+			if texture_sizes != None:
+				halfspace.texture_size = texture_sizes[prim_index]
+			if all_uv_data != None:
+				halfspace.uv_data = all_uv_data[prim_index]
 
-			@pmt_common.HOUPROFILE_EVENT_DECO
+			@pmt_common.HOUPROFILE_COUNT_DECO
 			def extract_displacement_info2(prim):
 				distances = prim.attribValue("pmt_dispinfo_distances")
 				normals = prim.attribValue("pmt_dispinfo_normals")
 				offset_normals = prim.attribValue("pmt_dispinfo_offset_normals")
 				alphas = prim.attribValue("pmt_dispinfo_alphas")
-				start_position_vtxidx = prim.attribValue("pmt_dispinfo_start_position_vtxidx")
+				start_position_vtxidx = columns.value("pmt_dispinfo_start_position_vtxidx", prim_index)
 				if True: #attempt to fix issue where dispmap breaks after translation(axis align) since start_position is not always moved
-					start = prim.vertex(start_position_vtxidx).point().position()
-					start_position = (start.x(), start.y(), start.z())
+					start_position = verts[start_position_vtxidx]
 				else:
 					start_position = prim.attribValue("pmt_dispinfo_start_position")
-				power = prim.attribValue("pmt_dispinfo_power")
+				power = columns.value("pmt_dispinfo_power", prim_index)
 				
 				dispinfo = DispInfo()
 				dispinfo.setup(power)
 				dispinfo.start_position = start_position
 				
-				for i in range(0, dispinfo.get_num_normals(), 3 ):
-					dispinfo.normals[i] = normals[i]
-					dispinfo.normals[i+1] = normals[i+1]
-					dispinfo.normals[i+2] = normals[i+2]
-				for i in range(0, dispinfo.get_num_normals(), 3 ):
-					dispinfo.offset_normals[i] = offset_normals[i]
-					dispinfo.offset_normals[i+1] = offset_normals[i+1]
-					dispinfo.offset_normals[i+2] = offset_normals[i+2]
-				for i in range( dispinfo.get_num_distances() ):
-					dispinfo.distances[i] = distances[i]
-				for i in range( dispinfo.get_num_distances() ):
-					dispinfo.alphas[i] = alphas[i]
+				dispinfo.normals[:] = numpy.reshape(normals[:dispinfo.get_num_normals()], dispinfo.normals.shape)
+				dispinfo.offset_normals[:] = numpy.reshape(offset_normals[:dispinfo.get_num_normals()], dispinfo.offset_normals.shape)
+				dispinfo.distances[:] = numpy.reshape(distances[:dispinfo.get_num_distances()], dispinfo.distances.shape)
+				dispinfo.alphas[:] = numpy.reshape(alphas[:dispinfo.get_num_distances()], dispinfo.alphas.shape)
 				return dispinfo
 			halfspace.dispinfo = extract_displacement_info2(prim) if is_dispmap else None
 			return halfspace
 		
+		#the size of pmt_dispinfo_* lists depends on the power of each displacement, so they are still read per prim
 		has_uv = pmt_common.houdini_geometry_has_uv_data(geometry)
-		texture_attrib = geometry.findPrimAttrib(pmt_common.PMT_VMF_MATERIAL)
-		texture_size_attrib = geometry.findPrimAttrib(pmt_common.PMT_VMF_TEXTURE_SIZE)
-		
-		bsp_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_BSP_ISLAND)
-		entity_island_attrib = geometry.findPrimAttrib(pmt_common.PMT_ENTITY_ISLAND)
-		geometry_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOMETRY_PRIM)
-		geotype_prim_attrib = geometry.findPrimAttrib(pmt_common.PMT_GEOTYPE_PRIM)
-		assert bsp_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
-		assert entity_island_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
-		assert geometry_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
-		assert geotype_prim_attrib != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
+		attrib_names = [
+			pmt_common.PMT_BSP_ISLAND, pmt_common.PMT_ENTITY_ISLAND, pmt_common.PMT_GEOMETRY_PRIM, pmt_common.PMT_GEOTYPE_PRIM,
+			pmt_common.PMT_VMF_MATERIAL, pmt_common.PMT_VMF_TEXTURE_SIZE, pmt_common.PMT_VMF_ENTITY_CLASS,
+			"pmt_dispinfo_start_position_vtxidx", "pmt_dispinfo_power",
+		]
+		if has_uv:
+			attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+		columns = geometry_cache.prim_columns(attrib_names)
+		
+		assert columns.has(pmt_common.PMT_BSP_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_BSP_ISLAND)
+		assert columns.has(pmt_common.PMT_ENTITY_ISLAND), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_ENTITY_ISLAND)
+		assert columns.has(pmt_common.PMT_GEOMETRY_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOMETRY_PRIM)
+		assert columns.has(pmt_common.PMT_GEOTYPE_PRIM), CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_GEOTYPE_PRIM)
+		
+		bsp_islands = columns.values(pmt_common.PMT_BSP_ISLAND)
+		entity_islands = columns.values(pmt_common.PMT_ENTITY_ISLAND)
+		geotypes = columns.values(pmt_common.PMT_GEOTYPE_PRIM)
+		materials = columns.values(pmt_common.PMT_VMF_MATERIAL) if columns.has(pmt_common.PMT_VMF_MATERIAL) else None
+		texture_sizes = columns.values(pmt_common.PMT_VMF_TEXTURE_SIZE) if columns.has(pmt_common.PMT_VMF_TEXTURE_SIZE) else None
+		entity_classes = columns.values(pmt_common.PMT_VMF_ENTITY_CLASS) if columns.has(pmt_common.PMT_VMF_ENTITY_CLASS) else None
+		all_uv_data = geometry_cache.get_uv_data(columns) if has_uv else None
 		
 		#bsp_group = geometry.findPrimGroup(pmt_common.PMT_BSP_GROUP)
 		#bspdetail_group = geometry.findPrimGroup(pmt_common.PMT_BSPDETAIL_GROUP)
@@ -565,9 +894,10 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 		
 		all_brushes = list()
 		
-		prims = geometry.prims()
+		prims = geometry_cache.get_prims()
 		num_prims = len(prims)
-		prev_prim = None
+		prim_point_indices = [None] * num_prims
+		prev_bsp_island = None
 		for prim_index in range(num_prims):
 			if (prim_index % 1000) == 0:
 				print("prim_index: {0} / {1}".format(prim_index, num_prims))
@@ -576,7 +906,7 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 			if prim.type() != hou.primType.Polygon:
 				continue
 			
-			geotype = prim.attribValue(geotype_prim_attrib)
+			geotype = geotypes[prim_index]
 			
 			is_bsp = geotype == pmt_common.PMT_BSP_GROUP
 			is_bspdetail = geotype == pmt_common.PMT_BSPDETAIL_GROUP
@@ -587,11 +917,9 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 			if not (is_bsp or is_entity or is_dispmap):
 				continue
 			
-			bsp_island = prim.attribValue(bsp_island_attrib)
-			entity_island = prim.attribValue(entity_island_attrib)
-			#is_pmt_geometry = prim.attribValue(geometry_prim_attrib)
+			bsp_island = bsp_islands[prim_index]
+			entity_island = entity_islands[prim_index]
 			
-			prev_bsp_island = prev_prim.attribValue(bsp_island_attrib) if (prev_prim != None) else None
 			is_new_bsp_island = bsp_island != prev_bsp_island
 			if is_new_bsp_island:
 				convex = Solid()
@@ -603,7 +931,8 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 						all_brushes[-1].entity_keyvalues_dict = dict()
 						all_brushes[-1].entity_class = "func_detail"
 					elif is_bspentity:
-						classname = prim.attribValue(pmt_common.PMT_VMF_ENTITY_CLASS)
+						assert entity_classes != None, CURFUNC(CF()) + ": could not find '{}' prim attrib".format(pmt_common.PMT_VMF_ENTITY_CLASS)
+						classname = entity_classes[prim_index]
 						kv_attrib_dict = prim.dictAttribValue(pmt_common.PMT_VMF_ENTITY_KEYVALUES)
 						#print("prim classname {0}".format(classname))
 						#print("prim key_value_list {0}".format(key_value_list))
@@ -620,9 +949,40 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 				else:
 					all_brushes[-1].entity_island = None
 				
-			halfspace = prim_to_halfspace(prim, prim_index, bsp_island, texture_attrib, texture_size_attrib, has_uv, is_dispmap)
+			halfspace = prim_to_halfspace(prim, prim_index, bsp_island, is_dispmap)
 			all_brushes[-1].sides.append(halfspace)
-			prev_prim = prim
+			prev_bsp_island = bsp_island
+		
+		#The key of each solid covers the prim attribs used by export_solid();
+		#dispinfo lists are not in columns, so they are added from the solid
+		@pmt_common.HOUPROFILE_EVENT_DECO
+		def compute_cache_keys(all_brushes):
+			key_attrib_names = [
+				pmt_common.PMT_GEOTYPE_PRIM, pmt_common.PMT_VMF_MATERIAL, pmt_common.PMT_VMF_TEXTURE_SIZE,
+				"pmt_dispinfo_start_position_vtxidx", "pmt_dispinfo_power",
+			]
+			if has_uv:
+				key_attrib_names += pmt_common_extract.UV_PRIM_ATTRIBS
+			key_attrib_names = [name for name in key_attrib_names if columns.has(name)]
+			
+			island_prim_indices = list()
+			island_extras = list()
+			for brush in all_brushes:
+				island_prim_indices.append( [side.prim_index for side in brush.sides] )
+				
+				dispinfo_bytes = b""
+				for side in brush.sides:
+					if side.dispinfo != None:
+						DI = side.dispinfo
+						dispinfo_bytes += DI.normals.tobytes() + DI.distances.tobytes() + DI.offset_normals.tobytes() + DI.alphas.tobytes()
+				island_extras.append( ",".join(key_attrib_names).encode() + dispinfo_bytes )
+			
+			key_columns = [columns.array(name) for name in key_attrib_names]
+			keys = pmt_common_cache.compute_island_keys(island_prim_indices, prim_point_indices, positions_array, key_columns, island_extras)
+			for brush, key in zip(all_brushes, keys):
+				brush.cache_key = key
+		if with_cache_keys:
+			compute_cache_keys(all_brushes)
 			
 		return all_brushes
 	all_brushes = convert_houdini_prims_to_brushes(geometry)
@@ -660,98 +1020,175 @@ def perform_export(node_pmt_vmf_export, vmf_export_path):
 		return world_brushes, detail_brushentities, entity_brushentities
 	brushes, detail_brushentities, entity_brushentities = separate_brushes(all_brushes)
 	
-	exporter = VmfExport()
+	#Sides with uv_data do not need a basis
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def compute_uv_axes(brushes, detail_brushentities, entity_brushentities):
+		sides = list()
+		for brush in brushes:
+			sides += brush.sides
+		for brushentity in detail_brushentities + entity_brushentities:
+			for brush in brushentity.solids:
+				sides += brush.sides
+		
+		normals = [side.uv_normal for side in sides]
+		skip = [side.uv_data != None for side in sides]
+		prim_indices = [side.prim_index for side in sides]
+		u_axes, v_axes, invalid_prim_indices = pmt_common.btPlaneSpace1_batch(normals, skip, prim_indices)
+		if len(invalid_prim_indices) > 0:
+			raise EXPORT_ERROR(CURFUNC(CF()) + " error: {} sides have zero length normal. (prim_index={})".format(len(invalid_prim_indices), invalid_prim_indices.tolist()))
+		
+		u_axes = u_axes.tolist()
+		v_axes = v_axes.tolist()
+		for side_index in range(len(sides)):
+			if not skip[side_index]:
+				sides[side_index].uv_u_axis = tuple(u_axes[side_index])
+				sides[side_index].uv_v_axis = tuple(v_axes[side_index])
+	compute_uv_axes(brushes, detail_brushentities, entity_brushentities)
 	
 	@pmt_common.HOUPROFILE_EVENT_DECO
-	def export_brushes(exporter, brushes, detail_brushentities, entity_brushentities):
-		BRUSHES_PER_PRINT = 250
+	def extract_point_entities(geometry):
+		point_entities = list()
+		for pointGroup in geometry.pointGroups():
+			if pointGroup.name() != pmt_common.PMT_ENTITY:
+				continue
+				
+			columns = geometry_cache.point_columns([pmt_common.PMT_VMF_ENTITY_CLASS, pmt_common.PMT_HAS_EULER_ROTATION, pmt_common.PMT_VMF_ROTATION_EULER])
+				
+			for point in pointGroup.points():
+				point_index = point.number()
+				
+				classname = columns.value(pmt_common.PMT_VMF_ENTITY_CLASS, point_index)
+				if classname == "pmt_none":
+					continue
+				
+				rotation_euler_enabled = columns.value(pmt_common.PMT_HAS_EULER_ROTATION, point_index)
+				
+				point_entity = PointEntity()
+				point_entity.classname = classname
+				point_entity.keyvalues_dict = point.dictAttribValue(pmt_common.PMT_VMF_ENTITY_KEYVALUES)
+				point_entity.location = positions[point_index]
+				point_entity.rotation_euler = columns.value(pmt_common.PMT_VMF_ROTATION_EULER, point_index) if rotation_euler_enabled else None
+				point_entities.append(point_entity)
+		return point_entities
+	
+	export_data.brushes = brushes
+	export_data.detail_brushentities = detail_brushentities
+	export_data.entity_brushentities = entity_brushentities
+	export_data.point_entities = extract_point_entities(geometry)
+	return export_data
+
+#Writes export_data (VmfExportData) to vmf_export_path; does not use Houdini.
+#num_processes > 1 serializes solids in a process pool (see serialize_solids())
+#use_cache reuses the solids of the previous export of vmf_export_path that did not change (see pmt_common_cache);
+#the solids must have cache keys, see extract_export_data()
+#precision is pmt_common_format.PRECISION_FIXED or PRECISION_COMPACT; snap_epsilon is used by PRECISION_COMPACT, see pmt_common_format.NumberFormat
+@pmt_common.HOUPROFILE_EVENT_DECO
+def write_export(export_data, vmf_export_path, num_processes = 1, use_cache = False, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	levelprops_class = export_data.levelprops_class
+	levelprops_kv = export_data.levelprops_kv
+	brushes = export_data.brushes
+	detail_brushentities = export_data.detail_brushentities
+	entity_brushentities = export_data.entity_brushentities
 	
+	exporter = VmfExport( pmt_common_format.NumberFormat(FLOAT_DECIMALS, precision, snap_epsilon) )
+	solids = exporter.assign_ids(brushes, detail_brushentities + entity_brushentities)
+	if use_cache and any([solid.cache_key == None for solid in solids]):
+		print("vmf export: solids have no cache keys; exporting without the cache")
+		use_cache = False
+	cache = pmt_common_cache.ExportCache(vmf_export_path, exporter.numbers.get_cache_format(EXPORT_CACHE_FORMAT)) if use_cache else None
+	keys = [solid.cache_key for solid in solids] if cache != None else None
+	serialized_solids = serialize_solids(exporter, solids, num_processes, cache, keys)
+	
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def export_brushes(exporter, file_out, brushes):
 		num_brushes_processed = 0
 		num_brushes = len(brushes)
-		bsp_str = ""
 		for brush in brushes:
 			if (num_brushes_processed % BRUSHES_PER_PRINT) == 0:
 				print("brushes: {0} / {1}".format(num_brushes_processed, num_brushes))
 			num_brushes_processed += 1
-			bsp_str += exporter.export_solid(brush)
+			file_out.write( next(serialized_solids) )
 			
+	@pmt_common.HOUPROFILE_EVENT_DECO
+	def export_brush_entities(exporter, file_out, detail_brushentities, entity_brushentities):
 		num_detail_brushes_processed = 0
 		num_detail_brushes = len(detail_brushentities)
-		bspdetail_str = ""
 		for brushentity in detail_brushentities:
 			if (num_detail_brushes_processed % BRUSHES_PER_PRINT) == 0:
 				print("detail_brushentities: {0} / {1}".format(num_detail_brushes_processed, num_detail_brushes))
 			num_detail_brushes_processed += 1
-			bspdetail_str += exporter.export_brush_entity(brushentity)
+			file_out.writelines( exporter.export_brush_entity(brushentity, itertools.islice(serialized_solids, len(brushentity.solids))) )
 			
 		num_entity_brushes_processed = 0
 		num_entity_brushes = len(entity_brushentities)
-		bspentity_str = ""
 		for brushentity in entity_brushentities:
 			if (num_entity_brushes_processed % BRUSHES_PER_PRINT) == 0:
 				print("entity_brushentities: {0} / {1}".format(num_entity_brushes_processed, num_entity_brushes))
 			num_entity_brushes_processed += 1
-			bspentity_str += exporter.export_brush_entity(brushentity)
-			
-		return (exporter, bsp_str, bspdetail_str, bspentity_str)
-	exporter, bsp_str, bspdetail_str, bspentity_str = export_brushes(exporter, brushes, detail_brushentities, entity_brushentities)
+			file_out.writelines( exporter.export_brush_entity(brushentity, itertools.islice(serialized_solids, len(brushentity.solids))) )
 	
 	@pmt_common.HOUPROFILE_EVENT_DECO
-	def export_point_entities(exporter, geometry):
+	def export_point_entities(exporter, file_out, point_entities):
 		ENTITIES_PER_PRINT = 250
 		
-		entity_str = ""
-		for pointGroup in geometry.pointGroups():
-			if pointGroup.name() != pmt_common.PMT_ENTITY:
-				continue
-				
-			num_point_entities = len(pointGroup.points())
-			num_point_entities_exported = 0
-			for point in pointGroup.points():
-				p = point.position()
-				p_tuple = (p.x(), p.y(), p.z())
-				
-				classname = point.attribValue(pmt_common.PMT_VMF_ENTITY_CLASS)
-				if classname == "pmt_none":
-					continue
-				
-				key_value_list = point.dictAttribValue(pmt_common.PMT_VMF_ENTITY_KEYVALUES)
-				rotation_euler_enabled = point.attribValue(pmt_common.PMT_HAS_EULER_ROTATION)
-				rotation_euler = point.attribValue(pmt_common.PMT_VMF_ROTATION_EULER) if rotation_euler_enabled else None
-					
-				#print("ent classname {0}".format(classname))
-				#print("ent key_value_list {0}".format(key_value_list))
-				entity_str += exporter.export_point_entity(classname, key_value_list, p_tuple, rotation_euler)
-				
-				if (num_point_entities_exported % ENTITIES_PER_PRINT) == 0:
-					print("point_entities: {0} / {1}".format(num_point_entities_exported, num_point_entities))
-				num_point_entities_exported += 1
-				
-		return exporter, entity_str
-	exporter, entity_str = export_point_entities(exporter, geometry)
+		num_point_entities = len(point_entities)
+		num_point_entities_exported = 0
+		for point_entity in point_entities:
+			#print("ent classname {0}".format(point_entity.classname))
+			#print("ent key_value_list {0}".format(point_entity.keyvalues_dict))
+			file_out.writelines( exporter.export_point_entity(point_entity.classname, point_entity.keyvalues_dict, point_entity.location, point_entity.rotation_euler) )
+			
+			if (num_point_entities_exported % ENTITIES_PER_PRINT) == 0:
+				print("point_entities: {0} / {1}".format(num_point_entities_exported, num_point_entities))
+			num_point_entities_exported += 1
 	
+	#Chunks are streamed from the VmfExport generators straight into the file buffer,
+	#so the whole map is never held in memory as a single string.
 	@pmt_common.HOUPROFILE_EVENT_DECO
-	def write_file(exporter, bsp_str, bspdetail_str, bspentity_str, entity_str):
-		file_out = open(vmf_export_path, 'w')
+	#the .vmf is written to a temp file that replaces vmf_export_path only when it is complete,
+	#so an error while writing leaves the previous export as it was
+	def write_file(exporter, file_out):
 		file_out.write( exporter.export_vmf_start() )
 		
 		#world
 		file_out.write( exporter.export_world_start(levelprops_class, levelprops_kv) )
-		file_out.write(bsp_str)
+		export_brushes(exporter, file_out, brushes)
 		file_out.write( exporter.export_world_end() )
 		
 		#entity
-		file_out.write(bspdetail_str)
-		file_out.write(bspentity_str)
-		file_out.write(entity_str)
+		export_brush_entities(exporter, file_out, detail_brushentities, entity_brushentities)
+		export_point_entities(exporter, file_out, export_data.point_entities)
 		
 		#
 		file_out.write( exporter.export_vmf_end() )
-		file_out.close()
-	write_file(exporter, bsp_str, bspdetail_str, bspentity_str, entity_str)
+	temp_path = vmf_export_path + ".tmp"
+	try:
+		with open(temp_path, 'w', buffering = WRITE_BUFFER_SIZE) as file_out:
+			write_file(exporter, file_out)
+		os.replace(temp_path, vmf_export_path)
+	except:
+		if os.path.exists(temp_path):
+			os.remove(temp_path)
+		raise
 	print(".vmf written to {}".format(vmf_export_path))
+	exporter.numbers.print_report("vmf export", vmf_export_path)
+	
+	if cache != None:
+		cache.save()
+		cache.print_stats("vmf export")
+
+#num_processes > 1 serializes solids in a process pool (see serialize_solids())
+#use_cache reuses the solids of the previous export of vmf_export_path that did not change (see pmt_common_cache)
+#dump_path also saves the export data as an export dump, see pmt_common_dump and \scripts\pmt_export_cli\pmt_export_cli.py
+#precision and snap_epsilon set the format of floats, see write_export()
+@pmt_common.HOUPROFILE_EVENT_DECO
+def perform_export(node_pmt_vmf_export, vmf_export_path, num_processes = 1, use_cache = False, dump_path = None, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
+	export_data = extract_export_data(node_pmt_vmf_export, use_cache or dump_path != None)
+	if dump_path != None:
+		export_data_to_dump(export_data).save(dump_path)
+	write_export(export_data, vmf_export_path, num_processes, use_cache, precision, snap_epsilon)
 	
-def main_export(node_pmt_vmf_export, vmf_export_path):
+#the exporter HDA button calls main_export(hou.pwd(), path); use_cache, num_processes, dump_path and precision are only set from script
+def main_export(node_pmt_vmf_export, vmf_export_path, num_processes = 1, use_cache = False, dump_path = None, precision = pmt_common_format.PRECISION_FIXED, snap_epsilon = pmt_common_format.SNAP_EPSILON):
 	profile = pmt_common.HOUPROFILE("pmt_export_vmf")
-	perform_export(node_pmt_vmf_export, vmf_export_path)
-	
\ No newline at end of file
+	perform_export(node_pmt_vmf_export, vmf_export_path, num_processes, use_cache, dump_path, precision, snap_epsilon)
@@ -4,10 +4,36 @@
 
 import sys
 import os
-import string
 import copy
+import importlib
+import itertools
+import multiprocessing
+import concurrent.futures
+import numpy
 
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 IN_HOUDINI = 'hou' in sys.modules
+if IN_HOUDINI:
+	import hou
+	main_module = hou.nodeType(hou.sopNodeTypeCategory(), "pmt::pmt__global_config").hdaModule()
+	pmt_common = main_module.pmt_common
+	pmt_common_lexer = main_module.pmt_common_lexer
+	pmt_common_blockindex = main_module.pmt_common_blockindex
+	pmt_common_build = main_module.pmt_common_build
+	pmt_common_cache = main_module.pmt_common_cache
+	pmt_common_brush = main_module.pmt_common_brush
+	pmt_common_bounds = main_module.pmt_common_bounds
+else:
+	#Standalone: load the shared modules from \scripts\pmt__global_config
+	sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "pmt__global_config"))
+	import pmt_common
+	import pmt_common_lexer
+	import pmt_common_blockindex
+	import pmt_common_build
+	import pmt_common_cache
+	import pmt_common_brush
+	import pmt_common_bounds
+###__pmt::pmt__globalconfig__COMMON_SECTION__
 
 def DPRINT(string, level = 1):
 	#0 to turn off debug messages, higher level == more messages
@@ -31,190 +57,85 @@ TEXT_CODEC = "cp1252" #windows-1252 'Western Europe'
 EDITOR_KEYWORDS = ["versioninfo", "visgroups", "viewsettings", "editor", "cameras", "cordons", "group", "hidden"]
 BSP_KEYWORDS =  ["world", "solid", "side"]
 ENTITY_KEYWORDS = ["entity", "connections"]
-DISPLACEMENT_MAP_KEYWORDS = ["dispinfo", "normals", "distances", "offsets", "offset_normals", "alphas", "triangle_tags"]
+DISPLACEMENT_MAP_KEYWORDS = ["dispinfo", "normals", "distances", "offsets", "offset_normals", "alphas", "triangle_tags", "allowed_verts"]
 
 VMF_KEYWORDS = EDITOR_KEYWORDS + BSP_KEYWORDS + ENTITY_KEYWORDS + DISPLACEMENT_MAP_KEYWORDS
 
-def parse_vmf(vmf_path):
-	with open(vmf_path, 'rt', encoding=TEXT_CODEC) as vmf_file:
-		text = ""
-		for line in vmf_file:
-			if line.lstrip().startswith("//"):
-				left, sep, right = line.partition("//")
-				text += left
-			else:
-				text += line
-			
-	#Assume that the quotes must be matched; that is \" must end with \" and likewise with \'.
-	#Under this assumption, literals such as "string' or 'string" are invalid.
-	INQUOTE_TOKEN = "%%q_"
-	def extract_string_literals(text, debug_path):
-		assert text.find(INQUOTE_TOKEN) == -1, "error: .uc contains INQUOTE_TOKEN {}".format(INQUOTE_TOKEN)
-		
-		inquote_text_dict = dict()
-		
-		in_quote = False
-		quote_char = None
-		
-		text_without_quotes = ""
-		inquote_buffer = ""
-		for char in text:
-			if char == "\"" or char == "\'" and not in_quote:
-				quote_char = char
-				
-			if char == quote_char:
-				if not in_quote: #opening quote
-					inquote_buffer = ""
-				else: #closing quote
-					dict_id_str = INQUOTE_TOKEN + str( len(inquote_text_dict) )
-					inquote_text_dict[dict_id_str] = inquote_buffer
-					text_without_quotes += " {} ".format(dict_id_str)
-					#DPRINT("inquote: {}: {}".format(dict_id_str, inquote_buffer))
-				in_quote = not in_quote
-			else:
-				if in_quote:
-					inquote_buffer += char
-				else:
-					text_without_quotes += char
-		assert not in_quote, "error: missing closing quote for quote_char({}) in {}: [{}]".format(quote_char, debug_path, text)
-			
-		return (text_without_quotes, inquote_text_dict)
-	(text_without_quotes, inquote_text_dict) = extract_string_literals(text, vmf_path)
-	
-	def simplify_whitespace(text):
-		for char in string.whitespace:
-			text = text.replace(char, " ")
-		return text
-	text_without_quotes = simplify_whitespace(text_without_quotes)
-	
-	def pad_operators(text):
-		#pad '{', '}', ... with spaces so that split() will not mix them with text
-		PAD_CHARS = "{}"
-		for char in PAD_CHARS:
-			text = text.replace(char, " {} ".format(char))
-		return text
-	text_without_quotes = pad_operators(text_without_quotes)
-	
-	#replace sequences of spaces with a single space
-	def compact_spaces(text):
-		SPACES_4 = "    "
-		SPACES_2 = "  "
-		while text.find(SPACES_4) != -1:
-			text = text.replace(SPACES_4, " ")
-		while text.find(SPACES_2) != -1:
-			text = text.replace(SPACES_2, " ")
-		return text
-	text_without_quotes = compact_spaces(text_without_quotes)
-	
-	#
-	tokens_with_quotes = text_without_quotes.split(sep = " ", maxsplit = -1)
+VMF_LEXER = pmt_common_lexer.Lexer(operators = "{}", quotes = "\"\'")
+
+#world/entity > solid > side > dispinfo > normals, distances, ...
+VMF_MAX_BRACKET_DEPTH = 5
+
+#Returned by next() at the end of the tokens
+VMF_END_TOKEN = (None, None, None)
+
+#Reads the tokens of a block from token_iter, from the token after its opening '{' to its closing '}'.
+#Returns the kv_dict of the block:
+#	"key" "value" pairs are stored as kv_dict[key] = value
+#	nested blocks (keyword { ... }) are stored as kv_dict[keyword] = list of kv_dict, in the order of the file
+#Each token is read once, and nested blocks are read by the recursive calls from the same token_iter.
+#Not profiled, as it is recursive and called once per block; parse_vmf() and VmfReader.parse_block() are profiled instead.
+def parse_vmf_block(token_iter, vmf_keyword, bracket_depth, vmf_path):
+	assert bracket_depth <= VMF_MAX_BRACKET_DEPTH, "expected max bracket_depth == {}, is {} (vmf_keyword={}) in {}".format(VMF_MAX_BRACKET_DEPTH, bracket_depth, vmf_keyword, vmf_path)
+	kv_dict = dict()
 	
-	while "" in tokens_with_quotes:
-		tokens_with_quotes.remove("")
-		
-	tokens = list()
-	for token in tokens_with_quotes:
-		if token.startswith(INQUOTE_TOKEN):
-			tokens.append(inquote_text_dict[token])
+	for (kind, text, line) in token_iter:
+		#Assuming that there are 2 types of tokens in .vmf files:
+		#	- If the token is not encapsulated by quotes, then it should be in VMF_KEYWORDS,
+		#	and should be followed by a opening '{' and closing '}' brace.
+		#	- If the token is in quotes, then it is a key-value pair in the format:
+		#		"a" "b"
+		if kind == pmt_common_lexer.TOKEN_STRING:
+			(value_kind, value, value_line) = next(token_iter, VMF_END_TOKEN)
+			assert value_kind != None, "no value for key '{}' at line {} in {}".format(text, line, vmf_path)
+			kv_dict[text] = value
+		elif kind == pmt_common_lexer.TOKEN_OPERATOR:
+			assert text == "}", "unexpected '{}' in {} at line {} in {}".format(text, vmf_keyword, line, vmf_path)
+			return kv_dict
 		else:
-			tokens.append(token)	
+			keyword = text.lower()
+			assert keyword in VMF_KEYWORDS, "unexpected token '{}' not in VMF_KEYWORDS in {} at line {} in {}".format(text, vmf_keyword, line, vmf_path)
+			(bracket_kind, bracket, bracket_line) = next(token_iter, VMF_END_TOKEN)
+			assert bracket == "{" and bracket_kind == pmt_common_lexer.TOKEN_OPERATOR, "expected '{{' after '{}' at line {} in {}".format(text, line, vmf_path)
+			if keyword not in kv_dict:
+				kv_dict[keyword] = list()
+			kv_dict[keyword].append( parse_vmf_block(token_iter, keyword, bracket_depth + 1, vmf_path) )
 			
-	DPRINT("tokens: {}".format(tokens))	
-	
+	assert False, "no closing bracket for {} in {}".format(vmf_keyword, vmf_path)
 	
+#The vmf_dict of parse_vmf() only has dicts, lists and str, so it is cached as is
+PARSE_CACHE_FORMAT = "vmf_import 1"		#change when the vmf_dict of parse_vmf() changes
+
+#Returns the pmt_common_cache.ParseCache of parse_vmf(); e.g. get_parse_cache().warm("c:/prefabs", [".vmf"]) parses all prefabs in advance
+def get_parse_cache():
+	return pmt_common_cache.ParseCache(PARSE_CACHE_FORMAT, parse_vmf)
+
+#use_cache reads the vmf_dict from the parse cache if the .vmf did not change since it was cached (see get_parse_cache())
+@pmt_common.HOUPROFILE_EVENT_DECO
+def parse_vmf(vmf_path, use_cache = False):
+	if use_cache:
+		return get_parse_cache().get(vmf_path)
+		
+	with open(vmf_path, 'rt', encoding=TEXT_CODEC) as vmf_file:
+		text = vmf_file.read()
+		
 	#
 	vmf_dict = dict()
 	
-	#
-	num_tokens = len(tokens)
-	token_index = 0
-	while token_index < num_tokens:
-		t = tokens[token_index]
-		
-		if t == "{":
-			opening_index = token_index
-			vmf_keyword = tokens[opening_index - 1].lower()
-			
+	#top-level blocks, e.g. versioninfo { ... }, world { ... } or entity { ... }
+	token_iter = VMF_LEXER.iter_tokens(text, vmf_path)
+	prev_text = None
+	for (kind, text, line) in token_iter:
+		if kind == pmt_common_lexer.TOKEN_OPERATOR and text == "{":
+			assert prev_text != None, "no keyword for '{{' at line {} in {}".format(line, vmf_path)
+			vmf_keyword = prev_text.lower()
 			DPRINT("vmf_keyword: {}".format(vmf_keyword))
 			
-			def extract_tokens_in_brackets(vmf_keyword, tokens, tokens_with_quotes, opening_index, global_bracket_depth):
-				assert global_bracket_depth <= 3, "expected max bracket_depth == 3, is {} (vmf_keyword={}, tokens={})".format(global_bracket_depth, vmf_keyword, tokens) 
-			
-				DEBUG_SPACING = ""
-				for i in range(global_bracket_depth):
-					DEBUG_SPACING += "  "
-			
-				assert tokens[opening_index] == "{"
-				closing_index = opening_index+1
-				bracket_depth = 1
-				
-				#find closing_index
-				while closing_index < num_tokens:
-					t2 = tokens[closing_index]
-					if t2 == "{": bracket_depth += 1
-					if t2 == "}": bracket_depth -= 1
-					
-					if bracket_depth == 0:
-						break
-				
-					closing_index += 1
-				
-				assert tokens[closing_index] == "}"
-				in_bracket_tokens = tokens[opening_index:closing_index+1]
-				in_bracket_tokens_quotes = tokens_with_quotes[opening_index:closing_index+1]
-				assert in_bracket_tokens[0] == "{", "in_bracket_tokens: {}".format(in_bracket_tokens)
-				assert in_bracket_tokens[-1] == "}", "in_bracket_tokens: {}".format(in_bracket_tokens)
-				
-				kv_dict = dict()
-				
-				token_index2 = 0
-				num_tokens2 = len(in_bracket_tokens)
-				while token_index2 < num_tokens2:
-					#skip first/last brackets
-					if token_index2 == 0 or token_index2 == num_tokens2 - 1:
-						token_index2 += 1
-						continue
-				
-					t2 = in_bracket_tokens[token_index2]
-					t2quote = in_bracket_tokens_quotes[token_index2]
-					t2lo = t2.lower()
-					
-					#Assuming that there are 2 types of tokens in .vmf files:
-					#	- If the token is not encapsulated by quotes, then it should be in VMF_KEYWORDS,
-					#	and should be followed by a opening '{' and closing '}' brace.
-					#	- If the token is in quotes, then it is a key-value pair in the format:
-					#		"a" "b"
-					#if t2lo in VMF_KEYWORDS:
-					if not t2quote.startswith(INQUOTE_TOKEN):
-						assert t2lo in VMF_KEYWORDS, "unexpected token '{}' not in VMF_KEYWORDS (token={}) (tokens={})".format(vmf_keyword, tokens)
-						if t2lo not in kv_dict:
-							kv_dict[t2lo] = list()
-							
-						(closing_index2, kv_dict2) = extract_tokens_in_brackets(t2lo, in_bracket_tokens, in_bracket_tokens_quotes, token_index2+1, global_bracket_depth+1)
-						kv_dict[t2lo].append(kv_dict2)
-						token_index2 = closing_index2
-					else:
-						t2next = in_bracket_tokens[token_index2+1]
-						token_index2 += 1
-						kv_dict[t2] = t2next
-						
-					token_index2 += 1
-				
-				
-				return (closing_index, kv_dict)
-				
-			(closing_index, kv_dict) = extract_tokens_in_brackets(vmf_keyword, tokens, tokens_with_quotes, opening_index, 1)
-			DPRINT("tokens: {}".format(tokens[opening_index:closing_index+1]))
-			DPRINT("kv_dict: {}".format(kv_dict))
-			DPRINT("")
-			
 			if vmf_keyword not in vmf_dict:
 				vmf_dict[vmf_keyword] = list()
-			vmf_dict[vmf_keyword].append(kv_dict)
+			vmf_dict[vmf_keyword].append( parse_vmf_block(token_iter, vmf_keyword, 1, vmf_path) )
 			
-			token_index = closing_index
-			
-		token_index += 1
+		prev_text = text
 		
 	if "world" in vmf_dict:
 		assert len(vmf_dict["world"]) == 1, "error: .vmf file has multiple world(s)"
@@ -223,18 +144,119 @@ def parse_vmf(vmf_path):
 		if "solid" in world_kv:
 			solids_list = world_kv["solid"]
 			num_solids = len(solids_list)
+			num_sides = sum([len(solid_kv_dict.get("side", list())) for solid_kv_dict in solids_list])
 			DPRINT("num_solids: {}".format(num_solids))
-			for solid_kv_dict in solids_list:
-				if "side" in solid_kv_dict:
-					sides_list = solid_kv_dict["side"]
-					num_sides = len(sides_list)
-					DPRINT("num_sides: {}".format(num_sides))
-					for side_kv_dict in sides_list:
-						DPRINT("side: {}".format(side_kv_dict))
+			DPRINT("num_sides: {}".format(num_sides))
 						
 		
 	#	
 	return vmf_dict
+
+#Reads the blocks of a .vmf on demand, for importing a few entities or solids of a large .vmf without parsing the whole file.
+#The file is memory-mapped and indexed by pmt_common_blockindex.BlockIndex (the top-level blocks and the solids inside them);
+#a block is only tokenized and parsed when it is read, and each kv_dict is the same as in the vmf_dict of parse_vmf().
+#
+#	with VmfReader("c:/maps/a.vmf") as reader:
+#		for entity_kv_dict in reader.entities("light"):
+#			...
+class VmfReader:
+	def __init__(self, vmf_path):
+		self.vmf_path = vmf_path
+		self.index = pmt_common_blockindex.BlockIndex(vmf_path, quotes = "\"\'")
+		
+	#Returns the kv_dict of block; bracket_depth is 1 for top-level blocks and 2 for their children
+	@pmt_common.HOUPROFILE_COUNT_DECO
+	def parse_block(self, block, bracket_depth = 1):
+		assert block.keyword in VMF_KEYWORDS, "unexpected block '{}' at byte {} in {}".format(block.keyword, block.start, self.vmf_path)
+		debug_path = "{} (block at byte {})".format(self.vmf_path, block.start)
+		token_iter = VMF_LEXER.iter_tokens(self.index.text(block, TEXT_CODEC), debug_path)
+		next(token_iter)	#opening '{'
+		return parse_vmf_block(token_iter, block.keyword, bracket_depth, debug_path)
+		
+	#Returns the top-level blocks with vmf_keyword, e.g. "entity"
+	def blocks(self, vmf_keyword):
+		return [block for block in self.index.blocks if block.keyword == vmf_keyword]
+		
+	#Yields the kv_dict of each entity, or only of the entities with classname
+	def entities(self, classname = None):
+		for block in self.blocks("entity"):
+			if classname == None or self.index.find_key(block, "classname", TEXT_CODEC) == classname:
+				yield self.parse_block(block)
+				
+	#Yields the kv_dict of each solid of the world
+	def world_solids(self):
+		for world_block in self.blocks("world"):
+			for block in world_block.children:
+				if block.keyword == "solid":
+					yield self.parse_block(block, 2)
+					
+	def close(self):
+		self.index.close()
+		
+	def __enter__(self):
+		return self
+		
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+	
+### Region import
+#The bounds of a vmf_dict are boxes (mins, maxs) in the order that import_vmfs() reads its blocks (see pmt_common_bounds):
+#	bounds["world_solids"]: the box of each solid of the world, around the vertices of its brush (see pmt_common_brush.build_brush_bounds())
+#	bounds["entities"]: the box of each entity; the union of the boxes of its solids, or its origin
+#import_vmfs() with a region only imports the solids of the world and the entities whose box overlaps the region.
+BOUNDS_CACHE_FORMAT = "vmf_import_bounds 1"		#change when the bounds of vmf_bounds() change
+
+#Returns the bounds of the blocks of vmf_dict
+@pmt_common.HOUPROFILE_EVENT_DECO
+def vmf_bounds(vmf_dict):
+	world_solids = list()
+	if "world" in vmf_dict:
+		world_solids = vmf_dict["world"][0].get("solid", list())
+	entity_list = vmf_dict.get("entity", list())
+	
+	#the solids of the world, then the solids of each entity
+	solids = list(world_solids)
+	solid_entities = [-1] * len(world_solids)
+	origins = list()
+	for (entity_index, entity_kv_dict) in enumerate(entity_list):
+		entity_solids = entity_kv_dict.get("solid", list())
+		solids.extend(entity_solids)
+		solid_entities.extend([entity_index] * len(entity_solids))
+		origin = entity_kv_dict.get("origin", "0 0 0").split()
+		origins.append((float(origin[0]), float(origin[1]), float(origin[2])))
+		
+	plane_points = list()
+	solid_num_sides = list()
+	for solid_kv_dict in solids:
+		sides_list = solid_kv_dict.get("side", list())
+		for side_kv_dict in sides_list:
+			plane_points.append([float(number) for number in side_kv_dict["plane"].replace("(", " ").replace(")", " ").split()])
+		solid_num_sides.append(len(sides_list))
+	plane_points = numpy.array(plane_points, dtype = numpy.float64).reshape(-1, 9)
+	(normals, distances) = pmt_common_brush.planes_from_points(plane_points[:, 0:3], plane_points[:, 3:6], plane_points[:, 6:9])
+	(solid_mins, solid_maxs) = pmt_common_brush.build_brush_bounds(normals, distances, solid_num_sides)
+	
+	num_world_solids = len(world_solids)
+	(entity_mins, entity_maxs) = pmt_common_bounds.union_bounds(solid_mins[num_world_solids:], solid_maxs[num_world_solids:], solid_entities[num_world_solids:], len(entity_list))
+	point_entities = [entity_index for (entity_index, entity_kv_dict) in enumerate(entity_list) if "solid" not in entity_kv_dict]
+	(entity_mins[point_entities], entity_maxs[point_entities]) = pmt_common_bounds.point_bounds([origins[entity_index] for entity_index in point_entities])
+	
+	bounds = dict()
+	bounds["world_solids"] = (solid_mins[:num_world_solids], solid_maxs[:num_world_solids])
+	bounds["entities"] = (entity_mins, entity_maxs)
+	return bounds
+	
+#Returns the pmt_common_cache.ParseCache of parse_vmf_bounds(); the bounds are computed from the cached vmf_dict of parse_vmf(),
+#so a .vmf is only parsed once for both caches
+def get_bounds_cache():
+	return pmt_common_cache.ParseCache(BOUNDS_CACHE_FORMAT, lambda vmf_path: vmf_bounds(parse_vmf(vmf_path, use_cache = True)))
+	
+#Returns the vmf_bounds() of the .vmf at vmf_path;
+#use_cache reads them from the parse cache if the .vmf did not change since they were cached (see get_bounds_cache())
+def parse_vmf_bounds(vmf_path, use_cache = False):
+	if use_cache:
+		return get_bounds_cache().get(vmf_path)
+	return vmf_bounds(parse_vmf(vmf_path))
 	
 def find_or_create_attrib(hou_geometry, hou_attrib_type, attrib_name, default_value):
 	if hou_attrib_type == hou.attribType.Point:
@@ -254,42 +276,38 @@ def find_or_create_pointgroup(hou_geometry, point_group_name):
 	
 PMT_VMF_ENTITY_RESTRICTED_KEYVALUES = ["id", "origin", "angles"]
 	
-def import_vmf(hou_geometry, vmf_dict):
+@pmt_common.HOUPROFILE_EVENT_DECO
+#build_brushes: import each solid as closed convex polygons (see pmt_common_brush), with the vertices shared by its polygons;
+#otherwise each side is a triangle of the 3 points of its plane.
+#region (pmt_common_bounds.Region) only imports the blocks that overlap it, see vmf_bounds(); bounds are the vmf_bounds() of vmf_dict, e.g. from the parse cache
+def import_vmf(hou_geometry, vmf_dict, build_brushes = True, region = None, bounds = None):
+	import_vmfs(hou_geometry, [vmf_dict], build_brushes, region, [bounds] if bounds != None else None)
+	
+#Imports each vmf_dict of vmf_dicts, in order, with one pmt_common_build.GeometryBuilder and one pmt_common_brush.build_brush_polygons();
+#vmf_import_brush_index keeps counting over all vmf_dicts. all_bounds are the vmf_bounds() of each vmf_dict, or None to compute them if region is set.
+@pmt_common.HOUPROFILE_EVENT_DECO
+def import_vmfs(hou_geometry, vmf_dicts, build_brushes = True, region = None, all_bounds = None):
 	if not IN_HOUDINI:
 		return
+	if region != None and all_bounds == None:
+		all_bounds = [vmf_bounds(vmf_dict) for vmf_dict in vmf_dicts]
 	
+	#the points and axes are tuples of floats; the builder and pmt_common_brush.planes_from_points() take them as they are
+	@pmt_common.HOUPROFILE_COUNT_DECO
 	def parse_side(side_kv_dict):
-		plane_str = side_kv_dict["plane"]
-		uaxis_str = side_kv_dict["uaxis"]
-		vaxis_str = side_kv_dict["vaxis"]
-		material = side_kv_dict["material"]
-		lightmapscale = int(side_kv_dict["lightmapscale"])
-		
-		plane = plane_str.replace("(", "").replace(")", "").split(" ", maxsplit = -1)
-		while "" in plane:
-			plane.remove("")
-		v0 = hou.Vector3(float(plane[0]), float(plane[1]), float(plane[2]))
-		v1 = hou.Vector3(float(plane[3]), float(plane[4]), float(plane[5]))
-		v2 = hou.Vector3(float(plane[6]), float(plane[7]), float(plane[8]))
-			
-		uaxis_tokens = uaxis_str.replace("[", "").replace("]", "").split(" ", maxsplit = -1)
-		while "" in uaxis_tokens:
-			uaxis_tokens.remove("")
-		uaxis = hou.Vector3(float(uaxis_tokens[0]), float(uaxis_tokens[1]), float(uaxis_tokens[2]))
-		uoffset = float(uaxis_tokens[3])
-		uscale = float(uaxis_tokens[4])
-		
-		vaxis_tokens = vaxis_str.replace("[", "").replace("]", "").split(" ", maxsplit = -1)
-		while "" in vaxis_tokens:
-			vaxis_tokens.remove("")
-		vaxis = hou.Vector3(float(vaxis_tokens[0]), float(vaxis_tokens[1]), float(vaxis_tokens[2]))
-		voffset = float(vaxis_tokens[3])
-		vscale = float(vaxis_tokens[4])
+		plane = [float(number) for number in side_kv_dict["plane"].replace("(", " ").replace(")", " ").split()]
+		uaxis_tokens = [float(number) for number in side_kv_dict["uaxis"].replace("[", " ").replace("]", " ").split()]
+		vaxis_tokens = [float(number) for number in side_kv_dict["vaxis"].replace("[", " ").replace("]", " ").split()]
 		
-		scale = hou.Vector2((uscale, vscale))
-		offset = hou.Vector2((uoffset, voffset))
+		v0 = tuple(plane[0:3])
+		v1 = tuple(plane[3:6])
+		v2 = tuple(plane[6:9])
+		uaxis = tuple(uaxis_tokens[0:3])
+		vaxis = tuple(vaxis_tokens[0:3])
+		scale = (uaxis_tokens[4], vaxis_tokens[4])
+		offset = (uaxis_tokens[3], vaxis_tokens[3])
 			
-		return (v0, v1, v2, uaxis, vaxis, scale, offset, material)
+		return (v0, v1, v2, uaxis, vaxis, scale, offset, side_kv_dict["material"])
 		
 	point_class_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_vmf_entity_class", "")
 	point_kv_attrib = find_or_create_attrib(hou_geometry, hou.attribType.Point, "pmt_vmf_entity_keyvalues", dict())
@@ -308,117 +326,205 @@ def import_vmf(hou_geometry, vmf_dict):
 	pointentity_group = find_or_create_pointgroup(hou_geometry, "vmf_pointentity")
 	brushentity_group = find_or_create_pointgroup(hou_geometry, "vmf_brushentity")
 	
-	brush_index = 0
-	if "world" in vmf_dict:
-		assert len(vmf_dict["world"]) == 1, "error: .vmf file has multiple world(s)"
-		world_kv = vmf_dict["world"][0]
+	#all points, polygons and attrib values are collected by the builder and created at the end
+	builder = pmt_common_build.GeometryBuilder()
 	
-		if "solid" in world_kv:
-			solids_list = world_kv["solid"]
-			for solid_kv_dict in solids_list:
-				if "side" not in solid_kv_dict:
-					continue 
-					
-				sides_list = solid_kv_dict["side"]
-				for side_kv_dict in sides_list:
-					(v0, v1, v2, uaxis, vaxis, scale, offset, material) = parse_side(side_kv_dict)
-					
-					new_poly = hou_geometry.createPolygon()
-					new_poly.setAttribValue(brush_index_attrib, brush_index)
-					new_poly.setAttribValue(prim_material_attrib, material)
-					new_poly.setAttribValue(prim_uv_u_attrib, uaxis)
-					new_poly.setAttribValue(prim_uv_v_attrib, vaxis)
-					new_poly.setAttribValue(prim_uv_scale_attrib, scale)
-					new_poly.setAttribValue(prim_uv_offset_attrib, offset)
-					
-					#todo: process other entity attribs
-					
-					for v in [v0, v1, v2]:
-						new_point = hou_geometry.createPoint()
-						new_point.setPosition(v)
-						world_group.add(new_point)
-						new_poly.addVertex(new_point)
+	side_attrib_names = [attrib.name() for attrib in [brush_index_attrib, prim_material_attrib, prim_uv_u_attrib, prim_uv_v_attrib, prim_uv_scale_attrib, prim_uv_offset_attrib]]
+	
+	#if build_brushes, the polygons of all solids are built at once after all solids are read
+	brush_sides = list()		#parse_side() of each side
+	brush_num_sides = list()
+	brush_group_names = list()
+	brush_indices = list()
+	
+	#brushes are numbered in the order of the files, including the solids outside of the region (solids_overlap[i] == False)
+	brush_index = 0
+	def add_solids(solids_list, point_group, solids_overlap):
+		nonlocal brush_index
+		group_name = point_group.name()
+		for (solid_kv_dict, overlaps) in zip(solids_list, solids_overlap):
+			if "side" not in solid_kv_dict:
+				continue 
+			if not overlaps:
+				brush_index += 1
+				continue
+				
+			sides_list = solid_kv_dict["side"]
+			if build_brushes:
+				brush_sides.extend([parse_side(side_kv_dict) for side_kv_dict in sides_list])
+				brush_num_sides.append(len(sides_list))
+				brush_group_names.append(group_name)
+				brush_indices.append(brush_index)
 				brush_index += 1
+				continue
 				
-	if "entity" in vmf_dict:
-		entity_list = vmf_dict["entity"]
-		for entity_kv_dict in entity_list:
+			for side_kv_dict in sides_list:
+				(v0, v1, v2, uaxis, vaxis, scale, offset, material) = parse_side(side_kv_dict)
+				
+				#todo: process other entity attribs
+				point_indices = [builder.add_point(v, group_name = group_name) for v in [v0, v1, v2]]
+				builder.add_polygon(point_indices, dict(zip(side_attrib_names, [brush_index, material, uaxis, vaxis, scale, offset])))
+			brush_index += 1
+			
+	#Returns a list of bool, True for each block whose box overlaps the region
+	def blocks_overlap(blocks, boxes):
+		if region == None:
+			return [True] * len(blocks)
+		return region.overlaps(*boxes)
+		
+	for (vmf_index, vmf_dict) in enumerate(vmf_dicts):
+		bounds = all_bounds[vmf_index] if region != None else None
+		if "world" in vmf_dict:
+			assert len(vmf_dict["world"]) == 1, "error: .vmf file has multiple world(s)"
+			world_kv = vmf_dict["world"][0]
+	
+			if "solid" in world_kv:
+				world_solids = world_kv["solid"]
+				add_solids(world_solids, world_group, blocks_overlap(world_solids, bounds["world_solids"] if bounds != None else None))
+				
+		if "entity" in vmf_dict:
+			entity_list = vmf_dict["entity"]
+			for (entity_kv_dict, entity_overlaps) in zip(entity_list, blocks_overlap(entity_list, bounds["entities"] if bounds != None else None)):
 					
-			if "solid" in entity_kv_dict:
-				entity_brushes = entity_kv_dict["solid"]
-				for solid_kv_dict in entity_brushes:
-					if "side" not in solid_kv_dict:
-						continue 
-						
-					sides_list = solid_kv_dict["side"]
-					for side_kv_dict in sides_list:
-						(v0, v1, v2, uaxis, vaxis, scale, offset, material) = parse_side(side_kv_dict)
-						
-						new_poly = hou_geometry.createPolygon()
-						new_poly.setAttribValue(brush_index_attrib, brush_index)
-						new_poly.setAttribValue(prim_material_attrib, material)
-						new_poly.setAttribValue(prim_uv_u_attrib, uaxis)
-						new_poly.setAttribValue(prim_uv_v_attrib, vaxis)
-						new_poly.setAttribValue(prim_uv_scale_attrib, scale)
-						new_poly.setAttribValue(prim_uv_offset_attrib, offset)
-						
-						for v in [v0, v1, v2]:
-							new_point = hou_geometry.createPoint()
-							new_point.setPosition(v)
-							brushentity_group.add(new_point)
-							new_poly.addVertex(new_point)
-					brush_index += 1
+				if "solid" in entity_kv_dict:
+					add_solids(entity_kv_dict["solid"], brushentity_group, [entity_overlaps] * len(entity_kv_dict["solid"]))
+					
+				elif not entity_overlaps:
+					continue
 					
-			else:
-				def str_to_vector3(string):
-					coords = string.split(" ", maxsplit = -1)
-					return hou.Vector3( (float(coords[0]), float(coords[1]), float(coords[2])) )
+				else:
+					def str_to_vector3(string):
+						coords = string.split(" ", maxsplit = -1)
+						return hou.Vector3( (float(coords[0]), float(coords[1]), float(coords[2])) )
 			
-				new_point = hou_geometry.createPoint()
-				if "classname" in entity_kv_dict:
-					classname = entity_kv_dict["classname"]
-					new_point.setAttribValue(point_class_attrib, classname)
-					del entity_kv_dict["classname"]
+					position = hou.Vector3((0,0,0))
+					point_attribs = dict()
+					if "classname" in entity_kv_dict:
+						point_attribs[point_class_attrib.name()] = entity_kv_dict["classname"]
+						del entity_kv_dict["classname"]
 					
-				if "origin" in entity_kv_dict:
-					origin = str_to_vector3(entity_kv_dict["origin"])
-					new_point.setPosition(origin)
-					del entity_kv_dict["origin"]
+					if "origin" in entity_kv_dict:
+						position = str_to_vector3(entity_kv_dict["origin"])
+						del entity_kv_dict["origin"]
 					
-				if "angles" in entity_kv_dict:
-					#angles is ordered as y, z, x, whereas pmt_vmf_rotation_euler is x, y, z
-					angles_tokens = entity_kv_dict["angles"].split(" ", maxsplit = -1)
-					angles = hou.Vector3( (float(angles_tokens[2]), float(angles_tokens[0]), float(angles_tokens[1])) )
+					if "angles" in entity_kv_dict:
+						#angles is ordered as y, z, x, whereas pmt_vmf_rotation_euler is x, y, z
+						angles_tokens = entity_kv_dict["angles"].split(" ", maxsplit = -1)
+						angles = hou.Vector3( (float(angles_tokens[2]), float(angles_tokens[0]), float(angles_tokens[1])) )
 					
-					new_point.setAttribValue(rotation_attrib, angles)
-					new_point.setAttribValue(has_rotation_attrib, 1)
-					del entity_kv_dict["angles"]
+						point_attribs[rotation_attrib.name()] = angles
+						point_attribs[has_rotation_attrib.name()] = 1
+						del entity_kv_dict["angles"]
 				
-				for remove_key in PMT_VMF_ENTITY_RESTRICTED_KEYVALUES:
-					if remove_key in entity_kv_dict:
-						del entity_kv_dict[remove_key]
+					for remove_key in PMT_VMF_ENTITY_RESTRICTED_KEYVALUES:
+						if remove_key in entity_kv_dict:
+							del entity_kv_dict[remove_key]
 						
-				array_keys = list()
-				for key in entity_kv_dict:
-					if type(entity_kv_dict[key]) == type(list()):
-						array_keys.append(key)
+					array_keys = list()
+					for key in entity_kv_dict:
+						if type(entity_kv_dict[key]) == type(list()):
+							array_keys.append(key)
 						
-				for remove_key in array_keys:
-					del entity_kv_dict[remove_key]
+					for remove_key in array_keys:
+						del entity_kv_dict[remove_key]
 						
-				new_point.setAttribValue(point_kv_attrib, entity_kv_dict)
-				pointentity_group.add(new_point)
+					point_attribs[point_kv_attrib.name()] = entity_kv_dict
+					builder.add_point(position, point_attribs, pointentity_group.name())
+				
+	if len(brush_sides) > 0:
+		(normals, distances) = pmt_common_brush.planes_from_points(*[[side[point] for side in brush_sides] for point in range(3)])
+		brush_polygons = pmt_common_brush.build_brush_polygons(normals, distances, brush_num_sides)
+		side_brush_indices = [side_brush_index for (side_brush_index, num_sides) in zip(brush_indices, brush_num_sides) for side in range(num_sides)]
+		side_attribs = [dict(zip(side_attrib_names, [side_brush_index, material, uaxis, vaxis, scale, offset]))
+			for (side_brush_index, (v0, v1, v2, uaxis, vaxis, scale, offset, material)) in zip(side_brush_indices, brush_sides)]
+		builder.add_brush_polygons(brush_polygons, brush_group_names, side_attribs)
+		
+	builder.build(hou_geometry)
 				
+### Batch import
+#Many .vmf files (e.g. a library of prefabs) are parsed in worker processes and imported into one geometry with import_vmfs().
+#The vmf_dict of each file is sent back from the worker as is, since it only has dicts, lists and str.
+#When running in Houdini, worker processes import the copy of this module in \scripts\pmt_vmf_import\ next to the library of the HDA
+#(see pmt_common.get_hda_scripts_path()).
+VMF_FILES_PER_TASK = 8		#max number of files sent to a worker at once, see parse_vmf_batch()
+
+#Worker process entry point; returns (vmf_dict, None), or (None, error message) if the file could not be read or parsed,
+#so one broken file does not stop the other files of the batch
+def parse_vmf_for_batch(vmf_path, use_cache = False):
+	try:
+		return (parse_vmf(vmf_path, use_cache), None)
+	except Exception as error:
+		return (None, "{}: {}".format(type(error).__name__, error))
+		
+#Inside Houdini sys.executable is the Houdini application, see pmt_vmf_export.get_python_executable()
+def get_python_executable():
+	if not IN_HOUDINI:
+		return sys.executable
+	version = "{}.{}".format(sys.version_info[0], sys.version_info[1])
+	for name in ["python.exe", "python{}.exe".format(version), os.path.join("bin", "python" + version), os.path.join("bin", "python3")]:
+		path = os.path.join(sys.exec_prefix, name)
+		if os.path.isfile(path):
+			return path
+	return None
+	
+def get_worker_module():
+	if not IN_HOUDINI:
+		return sys.modules[__name__]
+	scripts_path = pmt_common.get_hda_scripts_path("pmt::pmt_vmf_import", "pmt_vmf_import")
+	if scripts_path not in sys.path:
+		sys.path.append(scripts_path)
+	return importlib.import_module("pmt_vmf_import")
+	
+#Returns (vmf_dicts, failures):
+#	vmf_dicts is the vmf_dict of each of vmf_paths, in the same order for any num_processes; None for the files that failed
+#	failures is a list of (vmf_path, error message) of the files that failed, in the order of vmf_paths
+@pmt_common.HOUPROFILE_EVENT_DECO
+def parse_vmf_batch(vmf_paths, num_processes = 1, use_cache = False):
+	python_executable = get_python_executable() if num_processes > 1 and len(vmf_paths) > 1 else None
+	if num_processes > 1 and len(vmf_paths) > 1 and python_executable == None:
+		print("vmf import: python interpreter not found in {}; parsing files in a single process".format(sys.exec_prefix))
+		
+	if python_executable == None:
+		results = [parse_vmf_for_batch(vmf_path, use_cache) for vmf_path in vmf_paths]
+	else:
+		#executor.map() returns the results in the order of vmf_paths; small files are sent in chunks to save round trips
+		num_workers = min(num_processes, len(vmf_paths))
+		chunk_size = max(1, min(VMF_FILES_PER_TASK, len(vmf_paths) // (num_workers * 4)))
+		context = multiprocessing.get_context("spawn")
+		context.set_executable(python_executable)
+		worker_module = get_worker_module()
+		with concurrent.futures.ProcessPoolExecutor(max_workers = num_workers, mp_context = context) as executor:
+			results = list(executor.map(worker_module.parse_vmf_for_batch, vmf_paths, itertools.repeat(use_cache), chunksize = chunk_size))
+			
+	vmf_dicts = [vmf_dict for (vmf_dict, error) in results]
+	failures = [(vmf_path, error) for (vmf_path, (vmf_dict, error)) in zip(vmf_paths, results) if error != None]
+	return (vmf_dicts, failures)
+	
+#Parses vmf_paths with parse_vmf_batch() and imports the files that were parsed, in the order of vmf_paths, with import_vmfs().
+#region only imports the blocks of each file that overlap it; with use_cache, their bounds are also read from the parse cache.
+#Returns the failures of parse_vmf_batch(), which are also printed.
+@pmt_common.HOUPROFILE_EVENT_DECO
+def import_vmf_batch(hou_geometry, vmf_paths, num_processes = 4, use_cache = True, build_brushes = True, region = None):
+	(vmf_dicts, failures) = parse_vmf_batch(vmf_paths, num_processes, use_cache)
+	for (vmf_path, error) in failures:
+		print("vmf import: failed to parse {}: {}".format(vmf_path, error))
+	print("vmf import: parsed {} of {} files".format(len(vmf_paths) - len(failures), len(vmf_paths)))
+	
+	parsed = [(vmf_path, vmf_dict) for (vmf_path, vmf_dict) in zip(vmf_paths, vmf_dicts) if vmf_dict != None]
+	all_bounds = [parse_vmf_bounds(vmf_path, use_cache = True) for (vmf_path, vmf_dict) in parsed] if region != None and use_cache else None
+	import_vmfs(hou_geometry, [vmf_dict for (vmf_path, vmf_dict) in parsed], build_brushes, region, all_bounds)
+	return failures
+	
 if __name__ == "__main__" and not IN_HOUDINI:
-	if len(sys.argv) != 2:
-		print("pmt_prefab_source1_vmf.py [path_to.vmf]")
+	if len(sys.argv) != 2 and len(sys.argv) != 3:
+		print("pmt_prefab_source1_vmf.py [path_to.vmf] [trace.json] -- trace.json is an optional profile trace, see pmt_common.HOUPROFILE")
 		exit()
 	
 	vmf_path = sys.argv[1]
+	with pmt_common.HOUPROFILE("pmt_vmf_import", trace_path = sys.argv[2] if len(sys.argv) == 3 else None):
+		vmf_dict = parse_vmf(vmf_path)
 	
-	vmf_dict = parse_vmf(vmf_path)
-	
-else:
+elif IN_HOUDINI:
 	import hou
 	node = hou.pwd()
 	IS_PYTHON_NODE = node != None and "python" in node.type().nameWithCategory().lower() #'Sop/python' in Houdini 18.5
@@ -426,5 +532,7 @@ else:
 		geo = node.geometry()
 		
 		vmf_path = "C:/pmt/exports/out.vmf"
-		vmf_dict = parse_vmf(vmf_path)
-		import_vmf(geo, vmf_dict)
\ No newline at end of file
+		region = None		#e.g. pmt_common_bounds.Region((-512, -512, 0), (512, 512, 256)) to only import one room
+		vmf_dict = parse_vmf(vmf_path, use_cache = True)
+		bounds = parse_vmf_bounds(vmf_path, use_cache = True) if region != None else None
+		import_vmf(geo, vmf_dict, region = region, bounds = bounds)
\ No newline at end of file